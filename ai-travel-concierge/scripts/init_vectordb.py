@@ -1,7 +1,13 @@
 #!/usr/bin/env python
 """
 Initialize vector database with sample travel data.
+
+Usage:
+    python scripts/init_vectordb.py                       # load built-in samples
+    python scripts/init_vectordb.py --source-dir guides/  # stream a directory of
+                                                          # JSONL/Markdown/PDF guides
 """
+import argparse
 import asyncio
 import logging
 from pathlib import Path
@@ -11,6 +17,7 @@ from dotenv import load_dotenv
 from src.utils.config import load_config
 from src.utils.logger import setup_logger
 from src.retrievers.rag.travel_retriever import TravelRetriever
+from src.retrievers.rag.ingestion import IngestionPipeline, iter_source_documents
 
 # Setup
 load_dotenv()
@@ -110,8 +117,48 @@ def load_sample_data():
     return sample_destinations
 
 
-async def initialize_vector_db():
-    """Initialize the vector database with sample data."""
+def ingest_source_dir(
+    retriever: TravelRetriever,
+    source_dir: str,
+    batch_size: int,
+    workers: int,
+    checkpoint: str = None,
+    manifest: str = None,
+    prune: bool = False
+) -> None:
+    """Stream every guide under source_dir into the vector store."""
+    if manifest is None:
+        # Keep the manifest next to the vector store it describes
+        manifest = str(Path(retriever.config["chroma_persist_directory"]).parent / "ingestion_manifest.db")
+    
+    pipeline = IngestionPipeline(
+        retriever,
+        batch_size=batch_size,
+        embed_workers=workers,
+        checkpoint_path=checkpoint,
+        manifest_path=manifest,
+    )
+    stats = pipeline.run(iter_source_documents(source_dir), prune=prune)
+    
+    logger.info(
+        f"Ingested {stats.documents} changed documents ({stats.chunks} new chunks, "
+        f"{stats.reused_chunks} reused, {stats.deleted_chunks} deleted, "
+        f"{stats.unchanged_documents} unchanged) in {stats.elapsed_seconds:.1f}s "
+        f"at {stats.chunks_per_second:.1f} chunks/s "
+        f"[embed {stats.embed_seconds:.1f}s, upsert {stats.upsert_seconds:.1f}s]"
+    )
+
+
+async def initialize_vector_db(
+    source_dir: str = None,
+    batch_size: int = 64,
+    workers: int = 4,
+    checkpoint: str = None,
+    manifest: str = None,
+    prune: bool = False,
+    rebuild_partitions: bool = False
+):
+    """Initialize the vector database with sample data or a directory of guides."""
     
     logger.info("Starting vector database initialization...")
     
@@ -119,21 +166,26 @@ async def initialize_vector_db():
         # Load configuration
         config = load_config()
         
-        # Create retriever (this initializes the vector store)
+        # Create retriever (the vector store is loaded on first use)
         retriever = TravelRetriever(config)
         
-        # Load sample data
-        sample_data = load_sample_data()
-        
-        # Extract texts and metadata
-        texts = [item["text"] for item in sample_data]
-        metadatas = [item["metadata"] for item in sample_data]
-        
-        # Add to vector store
-        logger.info(f"Adding {len(texts)} documents to vector store...")
-        ids = retriever.add_texts(texts=texts, metadatas=metadatas)
-        
-        logger.info(f"Successfully added {len(ids)} documents")
+        if rebuild_partitions:
+            retriever.rebuild_partitions()
+        elif source_dir:
+            ingest_source_dir(retriever, source_dir, batch_size, workers, checkpoint, manifest, prune)
+        else:
+            # Load sample data
+            sample_data = load_sample_data()
+            
+            # Extract texts and metadata
+            texts = [item["text"] for item in sample_data]
+            metadatas = [item["metadata"] for item in sample_data]
+            
+            # Add to vector store
+            logger.info(f"Adding {len(texts)} documents to vector store...")
+            ids = retriever.add_texts(texts=texts, metadatas=metadatas, batch_size=batch_size)
+            
+            logger.info(f"Successfully added {len(ids)} documents")
         
         # Test retrieval
         logger.info("Testing retrieval...")
@@ -155,5 +207,34 @@ async def initialize_vector_db():
         raise
 
 
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Initialize the travel knowledge vector store")
+    parser.add_argument("--source-dir", help="Directory of JSONL/Markdown/PDF guides to ingest")
+    parser.add_argument("--batch-size", type=int, default=64, help="Chunks per embedding batch")
+    parser.add_argument("--workers", type=int, default=4, help="Parallel embedding workers")
+    parser.add_argument("--checkpoint", help="Checkpoint file for resumable ingestion")
+    parser.add_argument("--manifest", help="Ingestion manifest (defaults to data/ingestion_manifest.db)")
+    parser.add_argument(
+        "--prune",
+        action="store_true",
+        help="Delete chunks of sources no longer present in --source-dir",
+    )
+    parser.add_argument(
+        "--rebuild-partitions",
+        action="store_true",
+        help="Backfill per-destination collections from the existing global collection",
+    )
+    return parser.parse_args()
+
+
 if __name__ == "__main__":
-    asyncio.run(initialize_vector_db())
+    args = parse_args()
+    asyncio.run(initialize_vector_db(
+        source_dir=args.source_dir,
+        batch_size=args.batch_size,
+        workers=args.workers,
+        checkpoint=args.checkpoint,
+        manifest=args.manifest,
+        prune=args.prune,
+        rebuild_partitions=args.rebuild_partitions,
+    ))
@@ -0,0 +1,65 @@
+#!/usr/bin/env python
+"""
+Refresh the bundled country snapshot (data/countries.json) from REST Countries.
+
+Usage:
+    python scripts/refresh_country_snapshot.py
+    python scripts/refresh_country_snapshot.py --output /tmp/countries.json
+
+The /all endpoint accepts at most 10 fields per request, so the records are
+fetched in two halves and joined on the ISO 3166-1 alpha-3 code. Running
+servers pick the new file up on restart (or ``CountryDataset.reload()``).
+"""
+import argparse
+import json
+import sys
+from pathlib import Path
+
+import httpx
+
+# Add project root to path if running directly
+SCRIPT_DIR = Path(__file__).parent.resolve()
+AGENT_ROOT = SCRIPT_DIR.parent
+sys.path.insert(0, str(AGENT_ROOT))
+
+from src.utils.country_dataset import DEFAULT_SNAPSHOT_PATH
+
+ALL_URL = "https://restcountries.com/v3.1/all"
+FIELD_GROUPS = [
+    ["name", "cca2", "cca3", "altSpellings", "capital", "region", "subregion", "currencies", "languages", "timezones"],
+    ["cca3", "population", "area", "borders", "car", "demonyms", "flags", "coatOfArms", "maps"],
+]
+
+
+def fetch_countries(timeout: float = 30.0) -> list:
+    """All countries, with the fields the country tool normalizes."""
+    merged = {}
+    with httpx.Client(timeout=timeout) as client:
+        for fields in FIELD_GROUPS:
+            response = client.get(ALL_URL, params={"fields": ",".join(fields)})
+            response.raise_for_status()
+            for record in response.json():
+                merged.setdefault(record["cca3"], {}).update(record)
+    return sorted(merged.values(), key=lambda r: r.get("name", {}).get("common", ""))
+
+
+def write_snapshot(records: list, path: str) -> None:
+    """One record per line keeps diffs of refreshed snapshots readable."""
+    Path(path).parent.mkdir(parents=True, exist_ok=True)
+    lines = ",\n".join(json.dumps(record, ensure_ascii=False) for record in records)
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(f"[\n{lines}\n]\n")
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Refresh the offline REST Countries snapshot")
+    parser.add_argument("--output", default=DEFAULT_SNAPSHOT_PATH, help="Snapshot file to write")
+    parser.add_argument("--timeout", type=float, default=30.0, help="Seconds per request")
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    countries = fetch_countries(timeout=args.timeout)
+    write_snapshot(countries, args.output)
+    print(f"Wrote {len(countries)} countries to {args.output}")
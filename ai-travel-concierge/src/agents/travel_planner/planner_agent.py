@@ -11,6 +11,7 @@ from langchain_core.prompts import ChatPromptTemplate, MessagesPlaceholder
 
 from src.graphs.state.conversation_state import ConversationState, Itinerary
 from src.tools.external_apis import PlacesTool, WeatherTool
+from src.utils.context_packer import ContextPacker
 
 logger = logging.getLogger(__name__)
 
@@ -29,6 +30,7 @@ class TravelPlannerAgent:
             model=config.get("model_name", "openai/gpt-oss-120b"),
             temperature=config.get("temperature", 0.7)
         )
+        self.context_packer = ContextPacker.from_config(config)
         
         # Initialize tools
         self.tools = [
@@ -114,7 +116,8 @@ class TravelPlannerAgent:
     ) -> str:
         """Format the input for the travel planner."""
         
-        context_text = "\n".join(context[:3]) if context else "No additional context available"
+        packed = self.context_packer.pack(context) if context else None
+        context_text = packed.context_text if packed and packed.context else "No additional context available"
         
         return f"""Create a detailed itinerary for:
 
@@ -0,0 +1,342 @@
+"""
+Local intent classification fast path.
+
+Keyword/regex rules (and optionally a nearest-centroid model over embedded
+labeled examples) resolve obvious intents like "convert 100 USD to EUR" or
+"weather in Tokyo" without an LLM call. Anything ambiguous is left to the
+LLM classifier in ``GraphNodes.classify_intent_node``, and so are messages
+with trip details (dates, a budget, an unrecognized place) that only the
+LLM path extracts into the conversation state.
+"""
+import json
+import logging
+import re
+from collections import Counter
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+from pydantic import BaseModel, Field
+
+from src.tools.validation.entity_extractor import extract_dates
+from src.utils.country_dataset import CountryDataset, normalize_name
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_EXAMPLES_PATH = str(Path(__file__).parent.parent.parent / "data" / "intent_examples.jsonl")
+
+# (pattern, weight) per intent; weights are summed and capped at 1.0
+INTENT_RULES: Dict[str, List[Tuple[str, float]]] = {
+    "convert_currency": [
+        (r"\b\d[\d,.]*\s*[a-z]{3}\s+(?:to|in|into)\s+[a-z]{3}\b", 1.0),
+        (r"\bexchange rates?\b", 0.9),
+        (r"\bconvert\b", 0.6),
+        (r"\b[a-z]{3}\s+to\s+[a-z]{3}\b", 0.3),
+        (r"\b(?:currency|dollars?|euros?|yen|pounds?|francs?|rupees?)\b", 0.3),
+    ],
+    "check_weather": [
+        (r"\bweather\b", 0.9),
+        (r"\bforecast\b", 0.9),
+        (r"\b(?:rain|raining|sunny|snow|snowing|temperature)\b", 0.5),
+    ],
+    "check_visa": [
+        (r"\bvisas?\b", 1.0),
+        (r"\bentry requirements?\b", 0.9),
+        (r"\bpassport holders?\b", 0.5),
+    ],
+    "search_flights": [
+        (r"\bflights?\b", 0.9),
+        (r"\b(?:airfare|plane tickets?)\b", 0.9),
+        (r"\bfly\b", 0.6),
+    ],
+    "search_hotels": [
+        (r"\b(?:hotels?|hostels?)\b", 0.9),
+        (r"\b(?:where to stay|place to stay|accommodation)\b", 0.9),
+    ],
+    "get_country_info": [
+        (r"\bcapital of\b", 0.9),
+        (r"\b(?:official language|population) of\b", 0.9),
+        (r"\bwhat currency does\b", 0.9),
+        (r"\b(?:tell me about|information about|facts about)\b", 0.5),
+    ],
+    # Rules for intents the fast path never resolves: they only register
+    # conflicts ("plan a trip with flights") so those go to the LLM
+    "plan_trip": [
+        (r"\b(?:plan|planning|itinerary)\b", 0.9),
+    ],
+    "book_travel": [
+        (r"\bbook\b", 0.7),
+    ],
+    "get_recommendations": [
+        (r"\b(?:recommend|suggest)\b", 0.7),
+    ],
+}
+
+# Intents whose nodes extract their own parameters from the message, so
+# skipping the LLM's trip-detail extraction loses nothing
+LOCAL_INTENTS = {
+    "convert_currency", "check_weather", "check_visa",
+    "search_flights", "search_hotels", "get_country_info",
+}
+
+_COMPILED_RULES = {
+    intent: [(re.compile(pattern), weight) for pattern, weight in rules]
+    for intent, rules in INTENT_RULES.items()
+}
+
+# "in Tokyo", "to New Zealand", "about Portugal" (capitalized words only, so
+# currency and airport codes like EUR or CDG are not taken for places)
+_PLACE_PATTERN = re.compile(
+    r"\b(?:in|to|for|about|of|visit|visiting|enter)\s+((?:[A-Z][a-z][\w'-]*)(?:\s+[A-Z][a-z][\w'-]*)*)"
+)
+_NOT_PLACES = {
+    "january", "february", "march", "april", "may", "june", "july", "august",
+    "september", "october", "november", "december", "monday", "tuesday",
+    "wednesday", "thursday", "friday", "saturday", "sunday",
+}
+
+# Popular destinations that are neither countries nor capitals; together
+# with the country snapshot's names and capitals they form the gazetteer a
+# place name must be in before the fast path sets it as the destination
+DESTINATION_CITIES = frozenset(normalize_name(city) for city in [
+    "Amalfi", "Antalya", "Auckland", "Bali", "Barcelona", "Boston", "Bruges",
+    "Cancun", "Cape Town", "Cappadocia", "Chiang Mai", "Chicago", "Crete",
+    "Cusco", "Dubai", "Dubrovnik", "Edinburgh", "Florence", "Frankfurt",
+    "Geneva", "Goa", "Hawaii", "Ho Chi Minh City", "Honolulu", "Ibiza",
+    "Istanbul", "Krakow", "Kyoto", "Las Vegas", "Los Angeles", "Lyon",
+    "Machu Picchu", "Mallorca", "Marrakech", "Marseille", "Melbourne", "Miami",
+    "Milan", "Montreal", "Mumbai", "Munich", "Mykonos", "Naples", "New Orleans",
+    "New York", "Nice", "NYC", "Orlando", "Osaka", "Phuket", "Porto",
+    "Queenstown", "Rio de Janeiro", "Salzburg", "San Francisco", "Santorini",
+    "Sao Paulo", "Seattle", "Seville", "Shanghai", "Sicily", "Split",
+    "Sydney", "Tenerife", "Toronto", "Tuscany", "Vancouver", "Venice",
+    "Zanzibar", "Zurich",
+])
+
+# Trip timing and budget, which the LLM path extracts into the trip state
+# (exact and relative dates are found by ``extract_dates``)
+_TRIP_DETAIL_PATTERN = re.compile(
+    r"\b(?:january|february|march|april|june|july|august|september|october|november|december)\b"
+    r"|\b(?:in|during|early|mid|late)[\s-]+may\b"  # not the verb
+    r"|\b(?:weekend|next month|next year|this summer|this winter)\b"
+    r"|\b\d+\s*(?:days?|nights?|weeks?)\b"
+    r"|\bbudget\b|[$€£¥]\s*\d|\b\d[\d,.]*\s*(?:usd|eur|gbp|dollars?|euros?|pounds?)\b",
+    re.IGNORECASE
+)
+
+
+class IntentPrediction(BaseModel):
+    """Result of local intent classification."""
+    intent: Optional[str] = None
+    confidence: float = 0.0
+    source: str = "rules"  # rules | centroid
+    destination: Optional[str] = None
+    resolved: bool = False  # True if the LLM can be skipped
+
+
+class NearestCentroidClassifier:
+    """
+    Nearest-centroid intent model over embedded labeled examples.
+
+    Each intent's centroid is the normalized mean of its examples' embeddings;
+    a message is assigned the intent with the most similar centroid.
+    """
+
+    def __init__(self, embed_documents: Callable[[List[str]], List[List[float]]]):
+        self.embed_documents = embed_documents
+        self.intents: List[str] = []
+        self._centroids: Optional[np.ndarray] = None
+
+    @staticmethod
+    def _normalize(matrix: np.ndarray) -> np.ndarray:
+        norms = np.linalg.norm(matrix, axis=-1, keepdims=True)
+        return matrix / np.where(norms == 0, 1, norms)
+
+    def fit(self, examples: List[Dict[str, str]]) -> "NearestCentroidClassifier":
+        """
+        Compute one centroid per intent.
+
+        Args:
+            examples: Labeled examples with ``text`` and ``intent`` keys
+        """
+        vectors = self._normalize(np.asarray(
+            self.embed_documents([e["text"] for e in examples]), dtype=np.float32
+        ))
+        self.intents = sorted({e["intent"] for e in examples})
+        labels = np.asarray([e["intent"] for e in examples])
+        self._centroids = self._normalize(np.stack([
+            vectors[labels == intent].mean(axis=0) for intent in self.intents
+        ]))
+        return self
+
+    def predict(self, text: str) -> Tuple[Optional[str], float, float]:
+        """
+        Returns:
+            Tuple of (intent, similarity, margin over the runner-up)
+        """
+        if self._centroids is None:
+            return None, 0.0, 0.0
+        vector = self._normalize(np.asarray(self.embed_documents([text])[0], dtype=np.float32))
+        similarities = self._centroids @ vector
+        order = np.argsort(similarities)[::-1]
+        margin = similarities[order[0]] - similarities[order[1]] if len(order) > 1 else 1.0
+        return self.intents[order[0]], float(similarities[order[0]]), float(margin)
+
+
+class LocalIntentClassifier:
+    """
+    Resolve high-confidence intents without an LLM.
+
+    Rule scores are summed per intent and capped at 1.0; confidence is the
+    margin between the best and second-best intent, so a message matching
+    two intents ("book a flight") is never resolved locally. When the rules
+    are uncertain an optional nearest-centroid model gets a second opinion.
+    """
+
+    def __init__(
+        self,
+        min_confidence: float = 0.8,
+        centroid: Optional[NearestCentroidClassifier] = None,
+        centroid_threshold: float = 0.75,
+        centroid_margin: float = 0.05,
+        gazetteer: Optional[CountryDataset] = None
+    ):
+        self.min_confidence = min_confidence
+        self.centroid = centroid
+        self.centroid_threshold = centroid_threshold
+        self.centroid_margin = centroid_margin
+        # Country names and capitals (the bundled snapshot, loaded on first use)
+        self.gazetteer = gazetteer if gazetteer is not None else CountryDataset()
+
+    @staticmethod
+    def place_candidates(message: str) -> List[str]:
+        """Capitalized names after in/to/for/about/of, in order of appearance."""
+        return [m for m in _PLACE_PATTERN.findall(message) if m.split()[0].lower() not in _NOT_PLACES]
+
+    def is_known_place(self, name: str) -> bool:
+        """Whether a name is a country, a capital or a popular destination city."""
+        return (
+            normalize_name(name) in DESTINATION_CITIES
+            or self.gazetteer.lookup(name, "name") is not None
+            or self.gazetteer.lookup(name, "capital") is not None
+        )
+
+    def extract_destination(self, message: str) -> Optional[str]:
+        """Last place name in the message that the gazetteer knows, if any."""
+        known = [m for m in self.place_candidates(message) if self.is_known_place(m)]
+        return known[-1] if known else None
+
+    @staticmethod
+    def has_trip_details(message: str) -> bool:
+        """Whether the message mentions dates or a budget for the trip."""
+        return bool(_TRIP_DETAIL_PATTERN.search(message) or extract_dates(message))
+
+    def rule_scores(self, message: str) -> Dict[str, float]:
+        text = message.lower()
+        scores = {}
+        for intent, rules in _COMPILED_RULES.items():
+            score = sum(weight for pattern, weight in rules if pattern.search(text))
+            if score:
+                scores[intent] = min(score, 1.0)
+        return scores
+
+    def classify(self, message: str) -> IntentPrediction:
+        """
+        Classify a message locally.
+
+        Args:
+            message: Latest user message
+
+        Returns:
+            IntentPrediction; ``resolved`` is False when the LLM should decide
+        """
+        ranked = sorted(self.rule_scores(message).items(), key=lambda item: -item[1])
+        prediction = IntentPrediction()
+
+        if ranked:
+            top_intent, top_score = ranked[0]
+            runner_up = ranked[1][1] if len(ranked) > 1 else 0.0
+            prediction = IntentPrediction(intent=top_intent, confidence=top_score - runner_up)
+
+        if prediction.confidence < self.min_confidence and self.centroid is not None:
+            intent, similarity, margin = self.centroid.predict(message)
+            rules_agree = not ranked or ranked[0][0] == intent
+            if intent and rules_agree and similarity >= self.centroid_threshold and margin >= self.centroid_margin:
+                prediction = IntentPrediction(intent=intent, confidence=similarity, source="centroid")
+                prediction.resolved = intent in LOCAL_INTENTS
+        else:
+            prediction.resolved = (
+                prediction.intent in LOCAL_INTENTS
+                and prediction.confidence >= self.min_confidence
+            )
+
+        # Conversions carry amounts and dates of their own, not trip details
+        if prediction.resolved and prediction.intent != "convert_currency":
+            if self.has_trip_details(message):
+                prediction.resolved = False
+            else:
+                prediction.destination = self.extract_destination(message)
+                # An unknown name may be a person ("with Sarah") or an unlisted
+                # city; the LLM tells them apart
+                if prediction.destination is None and self.place_candidates(message):
+                    prediction.resolved = False
+        return prediction
+
+
+def load_labeled_examples(path: str) -> List[Dict[str, str]]:
+    """Load ``{"text": ..., "intent": ...}`` examples from a JSONL file."""
+    with open(path, encoding="utf-8") as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+class IntentEvaluation(BaseModel):
+    """Precision and coverage of the local classifier on a labeled set."""
+    total: int
+    resolved: int
+    correct: int
+    precision_by_intent: Dict[str, float] = Field(default_factory=dict)
+
+    @property
+    def coverage(self) -> float:
+        """Share of messages resolved without the LLM."""
+        return self.resolved / self.total if self.total else 0.0
+
+    @property
+    def precision(self) -> float:
+        """Share of locally resolved messages that got the right intent."""
+        return self.correct / self.resolved if self.resolved else 1.0
+
+
+def evaluate_classifier(
+    classifier: LocalIntentClassifier,
+    examples: List[Dict[str, str]]
+) -> IntentEvaluation:
+    """
+    Measure how often the fast path fires and how often it is right.
+
+    Args:
+        classifier: Classifier under test
+        examples: Labeled examples with ``text`` and ``intent`` keys
+
+    Returns:
+        IntentEvaluation with overall and per-intent precision
+    """
+    predicted: Counter = Counter()
+    correct: Counter = Counter()
+    for example in examples:
+        prediction = classifier.classify(example["text"])
+        if not prediction.resolved:
+            continue
+        predicted[prediction.intent] += 1
+        if prediction.intent == example["intent"]:
+            correct[prediction.intent] += 1
+        else:
+            logger.debug(f"Misclassified '{example['text']}' as {prediction.intent} ({example['intent']})")
+
+    return IntentEvaluation(
+        total=len(examples),
+        resolved=sum(predicted.values()),
+        correct=sum(correct.values()),
+        precision_by_intent={intent: correct[intent] / n for intent, n in predicted.items()}
+    )
+
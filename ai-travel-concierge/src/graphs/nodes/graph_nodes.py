@@ -1,8 +1,11 @@
 """
 Node functions for the Travel Concierge LangGraph workflow.
 """
-from typing import Dict, Any
+from datetime import datetime
+from typing import Awaitable, Dict, Any, List, Optional, Tuple
+import asyncio
 import logging
+import time
 
 from langchain_core.messages import HumanMessage, AIMessage
 from langchain_groq import ChatGroq
@@ -12,16 +15,52 @@ from src.agents.travel_planner.planner_agent import TravelPlannerAgent
 from src.agents.recommendation_engine.recommender_agent import RecommenderAgent
 from src.agents.booking_assistant.booking_agent import BookingAgent
 from src.retrievers.rag.travel_retriever import TravelRetriever
+from src.retrievers.rag.semantic_cache import SemanticAnswerCache
+from src.chains.intent_classifier import (
+    DEFAULT_EXAMPLES_PATH,
+    LocalIntentClassifier,
+    NearestCentroidClassifier,
+    load_labeled_examples,
+)
+from src.tools.external_apis.amadeus_auth import configure_amadeus_token_manager
+from src.tools.external_apis.base import BaseTravelAPITool, ToolCallError
+from src.tools.external_apis.prefetcher import ToolPrefetcher
 from src.tools.external_apis.amadeus_tools import FlightSearchTool, HotelSearchTool
 from src.tools.external_apis.weather_tools import WeatherForecastTool
 from src.tools.external_apis.country_tools import CountryInfoTool
-from src.tools.external_apis.currency_tools import CurrencyConversionTool
+from src.tools.external_apis.currency_tools import CurrencyConversionTool, ExchangeRateHistoryTool
 from src.tools.external_apis.visa_tools import VisaRequirementTool
 from src.tools.external_apis.image_tools import UnsplashImageTool, format_unsplash_attribution
+from src.tools.validation.entity_extractor import (
+    extract_currency_conversion,
+    extract_flight_refinement,
+    extract_rate_history,
+    extract_visa_countries,
+    is_rate_history_question,
+)
+from src.utils import deadline
+from src.utils.cache_manager import CacheManager
+from src.utils.circuit_breaker import configure_circuit_breakers
+from src.utils.hedging import configure_hedging
+from src.utils.country_dataset import DEFAULT_SNAPSHOT_PATH, CountryDataset
+from src.utils.context_packer import ContextPacker, format_trip_state
+from src.utils.flight_offer_store import FlightOfferStore
+from src.utils.llm_cache import LLMResponseCache
+from src.utils.reference_store import HotelReferenceStore
 
 logger = logging.getLogger(__name__)
 
 
+def current_date() -> str:
+    """
+    Today's date for LLM prompts.
+    
+    Extraction responses are cached, so every prompt that may resolve a
+    relative date ("this weekend") must carry the date it was resolved on.
+    """
+    return datetime.now().strftime("%Y-%m-%d")
+
+
 def get_flag_emoji(country_code: str) -> str:
     """Convert a 2-letter country code to regional flag emoji."""
     if not country_code or len(country_code) != 2:
@@ -39,10 +78,48 @@ class GraphNodes:
             model=config.get("model_name", "openai/gpt-oss-120b"),
             temperature=config.get("temperature", 0.7)
         )
+        # Intent classification and tool-argument extraction run deterministically,
+        # so identical prompts can be answered from the response cache
+        self.llm_cache: Optional[LLMResponseCache] = None
+        if config.get("llm_cache_enabled", True):
+            self.llm_cache = LLMResponseCache(
+                max_entries=config.get("llm_cache_size", 1024),
+                db_path=config.get("llm_cache_path"),
+                ttl=config.get("llm_cache_ttl", 7 * 86400)
+            )
+        self.extraction_llm = ChatGroq(
+            model=config.get("model_name", "openai/gpt-oss-120b"),
+            temperature=config.get("extraction_temperature", 0.0),
+            cache=self.llm_cache if self.llm_cache is not None else False
+        )
+        # Bundled country snapshot: answers country lookups and, as a
+        # gazetteer, confirms destinations found by the intent fast path
+        country_dataset = CountryDataset(path=config.get("country_dataset_path") or DEFAULT_SNAPSHOT_PATH)
+        # Rule-based intent fast path; the LLM only classifies uncertain messages
+        self.intent_classifier: Optional[LocalIntentClassifier] = None
+        if config.get("intent_fast_path_enabled", True):
+            self.intent_classifier = LocalIntentClassifier(
+                min_confidence=config.get("intent_rule_confidence", 0.8),
+                gazetteer=country_dataset
+            )
+        # Centroids need the embedding model, so they are fitted on first use
+        self._intent_centroids_pending = config.get("intent_centroid_enabled", False)
         self.travel_planner = TravelPlannerAgent(config)
         self.recommender = RecommenderAgent(config)
         self.booking_agent = BookingAgent(config)
         self.retriever = TravelRetriever(config)
+        self.context_packer = ContextPacker.from_config(config)
+        
+        # Reuse answers to near-duplicate general questions
+        self.answer_cache: Optional[SemanticAnswerCache] = None
+        if config.get("semantic_cache_enabled", True):
+            self.answer_cache = SemanticAnswerCache(
+                embed_query=lambda question: self.retriever.embeddings.embed_query(question),
+                threshold=config.get("semantic_cache_threshold", 0.92),
+                ttl=config.get("semantic_cache_ttl", 86400),
+                max_entries=config.get("semantic_cache_max_entries", 500)
+            )
+            self.retriever.add_update_listener(self.answer_cache.clear)
         
         # Initialize external API tools
         self.flight_tool = FlightSearchTool()
@@ -50,8 +127,75 @@ class GraphNodes:
         self.weather_tool = WeatherForecastTool()
         self.country_tool = CountryInfoTool()
         self.currency_tool = CurrencyConversionTool()
+        self.rate_history_tool = ExchangeRateHistoryTool()
         self.visa_tool = VisaRequirementTool()
         self.image_tool = UnsplashImageTool()
+        
+        # One Amadeus token for all Amadeus tools (and workers, via Redis)
+        redis_url = None
+        if config.get("amadeus_token_shared", False):
+            password = config.get("redis_password") or ""
+            redis_url = (
+                f"redis://{':' + password + '@' if password else ''}"
+                f"{config.get('redis_host', 'localhost')}:{config.get('redis_port', 6379)}/{config.get('redis_db', 0)}"
+            )
+        configure_amadeus_token_manager(
+            refresh_ahead=config.get("amadeus_token_refresh_ahead", 300),
+            redis_url=redis_url
+        )
+        
+        # Latest flight search per conversation, refined locally on follow-ups
+        self.flight_offers: Optional[FlightOfferStore] = None
+        if config.get("flight_store_enabled", True):
+            self.flight_offers = FlightOfferStore(ttl=config.get("flight_store_ttl", 900))
+        
+        # Hotel-by-city lists change rarely; keep them out of the Amadeus quota
+        HotelSearchTool.set_reference_store(HotelReferenceStore(
+            db_path=config.get("hotel_reference_path"),
+            refresh_after=config.get("hotel_reference_refresh_days", 7) * 86400
+        ))
+        
+        # Country facts barely change; the bundled snapshot answers most lookups
+        CountryInfoTool.set_dataset(country_dataset if config.get("country_dataset_enabled", True) else None)
+        
+        # Shared per-API circuit breakers so a degraded upstream fails fast
+        configure_circuit_breakers(
+            failure_rate_threshold=config.get("circuit_failure_rate", 0.5),
+            slow_call_seconds=config.get("circuit_slow_call_seconds", 10.0),
+            cool_down=config.get("circuit_cool_down", 30.0)
+        )
+        
+        # Hedge slow GETs to the free APIs (tools opt in via hedge_requests)
+        configure_hedging(
+            enabled=config.get("hedging_enabled", True),
+            budget_ratio=config.get("hedge_budget_ratio", 0.05)
+        )
+        
+        # Shared response cache for all API tools, warmed ahead of follow-up
+        # questions by the prefetcher
+        if config.get("tool_cache_enabled", True):
+            BaseTravelAPITool.set_cache_manager(CacheManager(max_entries=config.get("tool_cache_max_entries", 2048)))
+        self.prefetcher: Optional[ToolPrefetcher] = None
+        if config.get("prefetch_enabled", True):
+            self.prefetcher = ToolPrefetcher(
+                {"weather": self.weather_tool, "country": self.country_tool, "visa": self.visa_tool},
+                max_calls=config.get("prefetch_max_calls", 4)
+            )
+        # Country names resolved from earlier lookups, so image searches for
+        # code/capital queries can start before the country API answers
+        self._country_names: Dict[Tuple[str, str], str] = {}
+        # conversation_id -> image lookup that missed its card deadline
+        self._pending_images: Dict[str, asyncio.Task] = {}
+    
+    def _fit_intent_centroids(self) -> None:
+        """Fit the nearest-centroid intent model on the labeled examples (blocking)."""
+        examples = load_labeled_examples(
+            self.config.get("intent_examples_path") or DEFAULT_EXAMPLES_PATH
+        )
+        self.intent_classifier.centroid = NearestCentroidClassifier(
+            lambda texts: self.retriever.embeddings.embed_documents(texts)
+        ).fit(examples)
+        logger.info(f"Fitted intent centroids on {len(examples)} labeled examples")
     
     async def classify_intent_node(self, state: ConversationState) -> ConversationState:
         """
@@ -59,12 +203,34 @@ class GraphNodes:
         """
         logger.info("Node: Classifying user intent and extracting entities")
         
+        if self.intent_classifier and state["messages"]:
+            if self._intent_centroids_pending:
+                self._intent_centroids_pending = False
+                try:
+                    await asyncio.to_thread(self._fit_intent_centroids)
+                except Exception as e:
+                    logger.warning(f"Intent centroid model unavailable, using rules only: {e}")
+            
+            latest_message = state["messages"][-1]["content"]
+            prediction = await asyncio.to_thread(self.intent_classifier.classify, latest_message)
+            if prediction.resolved:
+                logger.info(
+                    f"Classified intent locally ({prediction.source}, "
+                    f"{prediction.confidence:.2f}): {prediction.intent}"
+                )
+                state["current_intent"] = prediction.intent
+                if prediction.destination:
+                    state["trip_details"]["destination"] = prediction.destination
+                state["needs_more_info"] = False
+                state["current_tool_result"] = None
+                state["tool_results"] = []
+                return state
+        
         # Combine recent messages to track clarifications and context
         recent_messages = state["messages"][-5:]
         conversation_context = "\n".join([f"{msg['role']}: {msg['content']}" for msg in recent_messages])
 
-        from datetime import datetime
-        current_date_str = datetime.now().strftime("%Y-%m-%d")
+        current_date_str = current_date()
 
         prompt = f"""You are a travel assistant. 
         Analyze the conversation and extract the user's main intent and any provided travel details.
@@ -80,11 +246,11 @@ class GraphNodes:
         - book_travel
         - modify_itinerary
         - ask_question
-        - search_flights
+        - search_flights (also follow-ups that filter, sort or page earlier flight results)
         - search_hotels
         - check_weather
         - get_country_info
-        - convert_currency
+        - convert_currency (also how an exchange rate moved over a period)
         - check_visa
         
         Date Extraction Rules:
@@ -101,7 +267,7 @@ class GraphNodes:
         }}"""
         
         try:
-            response = await self.llm.ainvoke(prompt)
+            response = await self.extraction_llm.ainvoke(prompt)
             content = response.content.strip()
             logger.info(f"LLM raw classify response: {content}")
             
@@ -135,6 +301,7 @@ class GraphNodes:
             # Reset needs_more_info and current_tool_result for the new turn
             state["needs_more_info"] = False
             state["current_tool_result"] = None
+            state["tool_results"] = []
             
         except Exception as e:
             logger.error(f"Failed to parse intent/entities from LLM: {e}")
@@ -147,6 +314,19 @@ class GraphNodes:
         logger.info("Node: Retrieving context from RAG")
         
         latest_message = state["messages"][-1]["content"]
+        state["cached_answer"] = None
+        
+        # A cached answer to a near-duplicate question makes retrieval unnecessary
+        if self.answer_cache is not None and state.get("current_intent") == "ask_question":
+            cached = await self.answer_cache.lookup(
+                latest_message,
+                destination=state["trip_details"].get("destination"),
+                trip_state=format_trip_state(state["trip_details"], state["user_preferences"])
+            )
+            if cached is not None:
+                state["cached_answer"] = cached
+                state["retrieved_context"] = []
+                return state
         
         # Retrieve relevant documents
         context_docs = await self.retriever.retrieve(
@@ -244,12 +424,31 @@ class GraphNodes:
         logger.info("Node: Answering travel question")
         
         latest_message = state["messages"][-1]["content"]
-        context = "\n".join(state["retrieved_context"])
+        
+        if state.get("cached_answer"):
+            state["messages"].append({
+                "role": "assistant",
+                "content": state["cached_answer"]
+            })
+            state["cached_answer"] = None
+            return state
+        
+        packed = self.context_packer.pack(
+            state["retrieved_context"],
+            history=state["messages"][:-1],
+            trip_state=format_trip_state(state["trip_details"], state["user_preferences"])
+        )
         
         prompt = f"""Answer the following travel question using the provided context.
         
+        Trip:
+        {packed.trip_state or "Not specified"}
+        
+        Conversation so far:
+        {packed.history_text or "None"}
+        
         Context:
-        {context}
+        {packed.context_text}
         
         Question: {latest_message}
         
@@ -262,6 +461,15 @@ class GraphNodes:
             "content": response.content
         })
         
+        # Answers shaped by this conversation's history are not reusable by others
+        if self.answer_cache is not None and response.content and not packed.history:
+            await self.answer_cache.store(
+                latest_message,
+                response.content,
+                destination=state["trip_details"].get("destination"),
+                trip_state=packed.trip_state
+            )
+        
         return state
     
     async def flight_search_node(self, state: ConversationState) -> ConversationState:
@@ -272,6 +480,7 @@ class GraphNodes:
         
         # Prompt LLM to extract flight search arguments
         prompt = f"""Extract flight search parameters from the user's message.
+        Today's date: {current_date()} (resolve relative dates like "next Friday" from it)
         User message: {latest_message}
         
         Required fields (if missing, try to infer or leave blank for clarification):
@@ -279,48 +488,60 @@ class GraphNodes:
         - destination (IATA code)
         - departure_date (YYYY-MM-DD)
         - return_date (YYYY-MM-DD, optional)
+        - flexible_days (optional: when the user is flexible or asks for the cheapest day,
+          the number of consecutive departure dates to compare, up to 7)
         
         Respond with a JSON object containing these keys."""
         
+        # Refinements of stored results ("non-stop only", "show me more") cost no search
+        stored = self.flight_offers.get(state["conversation_id"]) if self.flight_offers is not None else None
+        refinement = self._flight_refinement(state)
+        if stored is not None and refinement:
+            flights, total = stored.refine(refinement)
+            state["current_tool_result"] = {"type": "flight", "data": self._flight_card_data(stored.search, flights)}
+            if total:
+                content = f"Here are {len(flights)} of the {total} matching flight options."
+            else:
+                content = "None of the flights I found match that. Want me to search again with different details?"
+            state["messages"].append({"role": "assistant", "content": content})
+            return state
+        
         try:
-            function_call = await self.llm.bind_tools([self.flight_tool]).ainvoke(
+            function_call = await self.extraction_llm.bind_tools([self.flight_tool]).ainvoke(
                 [HumanMessage(content=prompt)]
             )
             
             if function_call.tool_calls:
                 kwargs = function_call.tool_calls[0]["args"]
-                flight_results = await self.flight_tool._call_api(**kwargs)
+                page_size = kwargs.get("max_results", 5)
+                call_args = dict(kwargs)
+                if self.flight_offers is not None:
+                    # Fetch a deeper page once so follow-ups can be answered locally
+                    call_args["max_results"] = max(page_size, self.config.get("flight_store_fetch_size", 50))
+                flight_results = await self.flight_tool._call_api(**call_args)
                 normalized = self.flight_tool._normalize_response(flight_results)
                 
-                # Format to schema expected by FlightCard
-                flights_data = []
-                for f in normalized.get("flights", []):
-                    itineraries = f.get("itineraries", [])
-                    first_seg = itineraries[0].get("segments", [{}])[0] if itineraries else {}
-                    flights_data.append({
-                        "airline": first_seg.get("airline", "Unknown"),
-                        "flightNumber": first_seg.get("flight_number", "N/A"),
-                        "departure": first_seg.get("departure_time"),
-                        "arrival": first_seg.get("arrival_time"),
-                        "duration": itineraries[0].get("duration") if itineraries else "N/A",
-                        "stops": len(itineraries[0].get("segments", [])) - 1 if itineraries else 0,
-                        "price": {"amount": f.get("price"), "currency": f.get("currency", "USD")}
-                    })
+                search = dict(kwargs)
+                if normalized.get("calendar"):
+                    # Flexible dates: the flights shown are the cheapest day's
+                    search["departure_date"] = normalized.get("cheapest_date") or search.get("departure_date")
+                    search["price_calendar"] = normalized["calendar"]
+                if self.flight_offers is not None:
+                    stored = self.flight_offers.put(state["conversation_id"], search, normalized, page_size=page_size)
+                    flights, _ = stored.refine({})
+                else:
+                    flights = normalized.get("flights", [])
                 
-                state["current_tool_result"] = {
-                    "type": "flight",
-                    "data": {
-                        "origin": kwargs.get("origin", "").upper(),
-                        "destination": kwargs.get("destination", "").upper(),
-                        "departureDate": kwargs.get("departure_date"),
-                        "flights": flights_data
-                    }
-                }
+                state["current_tool_result"] = {"type": "flight", "data": self._flight_card_data(search, flights)}
                 
-                state["messages"].append({
-                    "role": "assistant",
-                    "content": f"I found {normalized.get('count', 0)} flight options for you."
-                })
+                if normalized.get("calendar") and normalized.get("cheapest_date"):
+                    content = (
+                        f"I compared {len(normalized['calendar'])} departure dates; "
+                        f"{normalized['cheapest_date']} is the cheapest, with {normalized.get('count', 0)} flight options."
+                    )
+                else:
+                    content = f"I found {normalized.get('count', 0)} flight options for you."
+                state["messages"].append({"role": "assistant", "content": content})
             else:
                  state["messages"].append({
                     "role": "assistant",
@@ -333,14 +554,55 @@ class GraphNodes:
         
         return state
 
+    def _flight_refinement(self, state: ConversationState) -> Optional[Dict[str, Any]]:
+        """Filter/sort/paging change to the conversation's stored flight results, if any."""
+        stored = self.flight_offers.get(state.get("conversation_id")) if self.flight_offers is not None else None
+        if stored is None or not state["messages"]:
+            return None
+        latest_message = state["messages"][-1]["content"]
+        refinement = extract_flight_refinement(latest_message, carriers=stored.table.carrier_codes) or {}
+        carriers = list(dict.fromkeys(refinement.get("airlines", []) + stored.table.match_carriers(latest_message)))
+        if carriers:
+            refinement["airlines"] = carriers
+        return refinement or None
+
+    @staticmethod
+    def _flight_card_data(search: Dict[str, Any], flights: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """Normalized flights in the schema expected by FlightCard."""
+        flights_data = []
+        for f in flights:
+            itineraries = f.get("itineraries", [])
+            first_seg = itineraries[0].get("segments", [{}])[0] if itineraries else {}
+            flights_data.append({
+                "airline": first_seg.get("airline", "Unknown"),
+                "flightNumber": first_seg.get("flight_number", "N/A"),
+                "departure": first_seg.get("departure_time"),
+                "arrival": first_seg.get("arrival_time"),
+                "duration": itineraries[0].get("duration") if itineraries else "N/A",
+                "stops": len(itineraries[0].get("segments", [])) - 1 if itineraries else 0,
+                "price": {"amount": f.get("price"), "currency": f.get("currency", "USD")}
+            })
+        data = {
+            "origin": search.get("origin", "").upper(),
+            "destination": search.get("destination", "").upper(),
+            "departureDate": search.get("departure_date"),
+            "flights": flights_data
+        }
+        if search.get("price_calendar"):
+            data["priceCalendar"] = [
+                {"date": day["date"], "price": day["cheapest_price"], "currency": day["currency"] or "USD"}
+                for day in search["price_calendar"]
+            ]
+        return data
+
     async def hotel_search_node(self, state: ConversationState) -> ConversationState:
         """Execute hotel search."""
         logger.info("Node: Processing hotel search")
         latest_message = state["messages"][-1]["content"]
-        prompt = f"Extract hotel search parameters: city_code (IATA), check_in, check_out, adults.\nMessage: {latest_message}"
+        prompt = f"Extract hotel search parameters: city_code (IATA), check_in, check_out, adults.\nToday's date: {current_date()}\nMessage: {latest_message}"
         
         try:
-            function_call = await self.llm.bind_tools([self.hotel_tool]).ainvoke([HumanMessage(content=prompt)])
+            function_call = await self.extraction_llm.bind_tools([self.hotel_tool]).ainvoke([HumanMessage(content=prompt)])
             if function_call.tool_calls:
                 kwargs = function_call.tool_calls[0]["args"]
                 hotel_results = await self.hotel_tool._call_api(**kwargs)
@@ -391,56 +653,115 @@ class GraphNodes:
             
         return state
 
+    async def _call_tool(self, tool: BaseTravelAPITool, **params) -> Dict[str, Any]:
+        """
+        Normalized data from ``tool.execute``, raising on failure.
+        
+        Raises ``ToolCallError`` (with the upstream status code) instead of
+        returning an unsuccessful ``APIResponse``, so callers can react to
+        specific errors, e.g. a 404 from a name search.
+        """
+        response = await tool.execute(**params)
+        if not response.success:
+            raise ToolCallError(response)
+        if response.degraded:
+            logger.info(f"{tool.api_name} unavailable, serving stale cached data")
+        return response.data
+    
+    def schedule_prefetch(self, state: ConversationState) -> Optional[asyncio.Task]:
+        """Warm the tool cache for this conversation's likely next calls, in the background."""
+        return self.prefetcher.schedule(state) if self.prefetcher else None
+    
+    async def _gather_tool_calls(
+        self,
+        calls: Dict[str, Awaitable[Dict[str, Any]]],
+        timeout: float
+    ) -> List[Dict[str, Any]]:
+        """
+        Run several tool calls concurrently, tolerating individual failures.
+        
+        Args:
+            calls: Label -> awaitable producing a tool result card
+            timeout: Per-call timeout in seconds (capped by the turn deadline)
+        
+        Returns:
+            Cards of the calls that succeeded in time, in the order given
+        """
+        labels = list(calls)
+        timeout = deadline.budget(timeout)
+        results = await asyncio.gather(
+            *(asyncio.wait_for(calls[label], timeout=timeout) for label in labels),
+            return_exceptions=True
+        )
+        
+        cards = []
+        for label, result in zip(labels, results):
+            if isinstance(result, asyncio.TimeoutError):
+                logger.warning(f"Fan-out call '{label}' timed out after {timeout}s")
+            elif isinstance(result, Exception):
+                logger.warning(f"Fan-out call '{label}' failed: {result}")
+            elif result:
+                cards.append(result)
+        return cards
+    
+    async def _fetch_destination_country_card(
+        self,
+        destination: str,
+        conversation_id: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """Country card for a destination that may be a country or a capital city."""
+        try:
+            return await self._fetch_country_card({"query": destination, "search_by": "name"}, conversation_id)
+        except ToolCallError as e:
+            if e.status_code != 404:
+                raise
+        return await self._fetch_country_card({"query": destination, "search_by": "capital"}, conversation_id)
+    
+    async def destination_briefing_node(self, state: ConversationState) -> ConversationState:
+        """
+        Fetch weather, country, currency and visa cards for a trip in one turn.
+        
+        The calls run concurrently with a per-call timeout; a failed or slow
+        API only drops its own card. Currency and visa are included when the
+        message names the currencies or countries involved.
+        """
+        logger.info("Node: Fetching destination briefing")
+        destination = state["trip_details"].get("destination")
+        if not destination:
+            return state
+        
+        latest_message = state["messages"][-1]["content"] if state["messages"] else ""
+        days = min(state["trip_details"].get("duration_days") or 7, 16)
+        
+        calls: Dict[str, Awaitable[Dict[str, Any]]] = {
+            "weather": self._fetch_weather_card({"location": destination, "days": days}),
+            "country": self._fetch_destination_country_card(destination, state["conversation_id"]),
+        }
+        conversion = extract_currency_conversion(latest_message)
+        if conversion:
+            calls["currency"] = self._fetch_currency_card_only(conversion)
+        visa_countries = extract_visa_countries(latest_message)
+        if visa_countries:
+            calls["visa"] = self._fetch_visa_card(visa_countries)
+        
+        cards = await self._gather_tool_calls(calls, timeout=self.config.get("tool_fanout_timeout", 8.0))
+        logger.info(f"Destination briefing returned {len(cards)}/{len(calls)} cards")
+        
+        state["tool_results"] = cards
+        state["current_tool_result"] = cards[0] if cards else None
+        return state
+    
     async def weather_check_node(self, state: ConversationState) -> ConversationState:
         """Execute weather check."""
         logger.info("Node: Checking weather")
         latest_message = state["messages"][-1]["content"]
-        prompt = f"Extract weather parameters: destination, start_date, end_date.\nMessage: {latest_message}"
+        prompt = f"Extract weather parameters: destination, start_date, end_date.\nToday's date: {current_date()}\nMessage: {latest_message}"
         
         try:
-            function_call = await self.llm.bind_tools([self.weather_tool]).ainvoke([HumanMessage(content=prompt)])
+            function_call = await self.extraction_llm.bind_tools([self.weather_tool]).ainvoke([HumanMessage(content=prompt)])
             if function_call.tool_calls:
                 kwargs = function_call.tool_calls[0]["args"]
-                weather_results = await self.weather_tool._call_api(**kwargs)
-                normalized = self.weather_tool._normalize_response(weather_results)
-                
-                def get_weather_icon(code: int) -> str:
-                    if code == 0: return "☀️"
-                    elif code in [1, 2]: return "⛅"
-                    elif code == 3: return "☁️"
-                    elif code in [45, 48]: return "🌫️"
-                    elif code in [51, 53, 55, 61, 63, 65, 80, 81, 82]: return "🌧️"
-                    elif code in [71, 73, 75, 77, 85, 86]: return "❄️"
-                    elif code in [95, 96, 99]: return "⛈️"
-                    return "🌡️"
-                
-                unit_val = normalized.get("unit", "celsius").lower()
-                if "°c" in unit_val: unit_val = "celsius"
-                if "°f" in unit_val: unit_val = "fahrenheit"
-                
-                forecast_data = []
-                for f in normalized.get("forecast", []):
-                    forecast_data.append({
-                        "date": f.get("date"),
-                        "high": f.get("high"),
-                        "low": f.get("low"),
-                        "condition": f.get("condition"),
-                        "icon": get_weather_icon(f.get("weather_code", 0))
-                    })
-                
-                state["current_tool_result"] = {
-                    "type": "weather",
-                    "data": {
-                        "location": normalized.get("location"),
-                        "unit": unit_val,
-                        "current": {
-                            "temp": normalized.get("current", {}).get("temperature"),
-                            "condition": normalized.get("current", {}).get("condition"),
-                            "icon": get_weather_icon(normalized.get("current", {}).get("weather_code", 0))
-                        },
-                        "forecast": forecast_data
-                    }
-                }
+                state["current_tool_result"] = await self._fetch_weather_card(kwargs)
                 
                 state["messages"].append({"role": "assistant", "content": f"Here is the weather forecast for {kwargs.get('destination')}."})
             else:
@@ -451,129 +772,310 @@ class GraphNodes:
             
         return state
 
+    async def _fetch_weather_card(self, kwargs: Dict[str, Any]) -> Dict[str, Any]:
+        """Call the weather tool and format its result for the WeatherCard."""
+        normalized = await self._call_tool(self.weather_tool, **kwargs)
+        
+        def get_weather_icon(code: int) -> str:
+            if code == 0: return "☀️"
+            elif code in [1, 2]: return "⛅"
+            elif code == 3: return "☁️"
+            elif code in [45, 48]: return "🌫️"
+            elif code in [51, 53, 55, 61, 63, 65, 80, 81, 82]: return "🌧️"
+            elif code in [71, 73, 75, 77, 85, 86]: return "❄️"
+            elif code in [95, 96, 99]: return "⛈️"
+            return "🌡️"
+        
+        unit_val = normalized.get("unit", "celsius").lower()
+        if "°c" in unit_val: unit_val = "celsius"
+        if "°f" in unit_val: unit_val = "fahrenheit"
+        
+        forecast_data = []
+        for f in normalized.get("forecast", []):
+            forecast_data.append({
+                "date": f.get("date"),
+                "high": f.get("high"),
+                "low": f.get("low"),
+                "condition": f.get("condition"),
+                "icon": get_weather_icon(f.get("weather_code", 0))
+            })
+        
+        return {
+            "type": "weather",
+            "data": {
+                "location": normalized.get("location"),
+                "unit": unit_val,
+                "current": {
+                    "temp": normalized.get("current", {}).get("temperature"),
+                    "condition": normalized.get("current", {}).get("condition"),
+                    "icon": get_weather_icon(normalized.get("current", {}).get("weather_code", 0))
+                },
+                "forecast": forecast_data
+            }
+        }
+
     async def country_info_node(self, state: ConversationState) -> ConversationState:
         """Execute country info check."""
         logger.info("Node: Checking country info")
         latest_message = state["messages"][-1]["content"]
-        prompt = f"Extract country query from message.\nMessage: {latest_message}"
+        prompt = f"Extract country query from message.\nToday's date: {current_date()}\nMessage: {latest_message}"
         
         try:
-            function_call = await self.llm.bind_tools([self.country_tool]).ainvoke([HumanMessage(content=prompt)])
+            function_call = await self.extraction_llm.bind_tools([self.country_tool]).ainvoke([HumanMessage(content=prompt)])
             if function_call.tool_calls:
                 kwargs = function_call.tool_calls[0]["args"]
-                info = await self.country_tool._call_api(**kwargs)
-                normalized = self.country_tool._normalize_response(info)
-                
-                common_name = normalized.get("name", {}).get("common", "")
-                image_url = None
-                image_attr = None
-                try:
-                    image_results = await self.image_tool._call_api(query=f"{common_name} skyline landmark", per_page=1)
-                    norm_images = self.image_tool._normalize_response(image_results)
-                    if norm_images.get("returned_count", 0) > 0:
-                        img = norm_images["images"][0]
-                        image_url = img.get("urls", {}).get("regular")
-                        image_attr = format_unsplash_attribution(img)
-                except Exception as img_err:
-                    logger.error(f"Failed to fetch unsplash image: {img_err}")
+                state["current_tool_result"] = await self._fetch_country_card(kwargs, state["conversation_id"])
                 
-                cca2 = normalized.get("codes", {}).get("iso_alpha_2", "US")
-                flag_emoji = get_flag_emoji(cca2)
-                curr_info = normalized.get("primary_currency", {"name": "USD", "symbol": "$"})
-                
-                state["current_tool_result"] = {
-                    "type": "destination",
-                    "data": {
-                        "name": common_name,
-                        "flag": flag_emoji,
-                        "capital": normalized.get("capital", "N/A"),
-                        "imageUrl": image_url,
-                        "imageAttribution": image_attr,
-                        "language": normalized.get("languages", []),
-                        "timezone": normalized.get("timezones", []),
-                        "currency": {
-                            "name": curr_info.get("name", "Unknown"),
-                            "symbol": curr_info.get("symbol", "")
-                        },
-                        "population": normalized.get("population", 0)
-                    }
-                }
-                
-                state["messages"].append({"role": "assistant", "content": f"Country Information: {common_name}."})
+                state["messages"].append({"role": "assistant", "content": f"Country Information: {state['current_tool_result']['data']['name']}."})
         except Exception as e:
             logger.error(f"Country info error: {e}")
             state["messages"].append({"role": "assistant", "content": "Failed to retrieve country information."})
             
         return state
 
+    async def _fetch_country_image(self, name: str) -> Optional[Dict[str, Any]]:
+        """Unsplash image fields for a DestinationCard, or None if there is none."""
+        try:
+            norm_images = await self._call_tool(self.image_tool, query=f"{name} skyline landmark", per_page=1)
+            if norm_images.get("returned_count", 0) > 0:
+                img = norm_images["images"][0]
+                return {
+                    "imageUrl": img.get("urls", {}).get("regular"),
+                    "imageAttribution": format_unsplash_attribution(img)
+                }
+        except Exception as img_err:
+            logger.error(f"Failed to fetch unsplash image: {img_err}")
+        return None
+
+    def take_pending_image(self, conversation_id: Optional[str]) -> Optional[asyncio.Task]:
+        """
+        Hand over the image lookup that missed this turn's card deadline.
+        
+        Returns:
+            Task resolving to the DestinationCard image fields (or None), or
+            None if the card was returned complete
+        """
+        return self._pending_images.pop(conversation_id, None) if conversation_id else None
+
+    async def _fetch_country_card(
+        self,
+        kwargs: Dict[str, Any],
+        conversation_id: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """
+        Call the country tool and format the DestinationCard.
+        
+        The Unsplash image is looked up concurrently, from the query itself
+        for name searches or from a previously resolved name otherwise. The
+        card waits at most ``image_fetch_deadline`` seconds for it; a late
+        image is left in ``_pending_images`` for the caller to stream as a
+        follow-up update (or dropped when there is no conversation to patch).
+        """
+        started = time.monotonic()
+        search_by = kwargs.get("search_by", "name").lower()
+        name_key = (search_by, str(kwargs.get("query", "")).strip().lower())
+        image_name = self._country_names.get(name_key) or (kwargs.get("query") if search_by == "name" else None)
+        image_task = asyncio.create_task(self._fetch_country_image(image_name)) if image_name else None
+        
+        try:
+            normalized = await self._call_tool(self.country_tool, **kwargs)
+        except BaseException:
+            if image_task is not None:
+                image_task.cancel()
+            raise
+        
+        common_name = normalized.get("name", {}).get("common", "")
+        if common_name:
+            self._country_names[name_key] = common_name
+            if image_task is None:
+                image_task = asyncio.create_task(self._fetch_country_image(common_name))
+        
+        image = None
+        if image_task is not None:
+            remaining = deadline.budget(self.config.get("image_fetch_deadline", 1.0) - (time.monotonic() - started))
+            try:
+                done, _ = await asyncio.wait({image_task}, timeout=max(remaining, 0))
+            except asyncio.CancelledError:
+                image_task.cancel()
+                raise
+            if done:
+                image = image_task.result()
+            elif conversation_id:
+                logger.info(f"Image for {common_name} missed the card deadline, patching it in later")
+                stale = self._pending_images.pop(conversation_id, None)
+                if stale is not None:
+                    stale.cancel()
+                self._pending_images[conversation_id] = image_task
+            else:
+                image_task.cancel()
+        image = image or {}
+        
+        cca2 = normalized.get("codes", {}).get("iso_alpha_2", "US")
+        flag_emoji = get_flag_emoji(cca2)
+        curr_info = normalized.get("primary_currency", {"name": "USD", "symbol": "$"})
+        
+        return {
+            "type": "destination",
+            "data": {
+                "name": common_name,
+                "flag": flag_emoji,
+                "capital": normalized.get("capital", "N/A"),
+                "imageUrl": image.get("imageUrl"),
+                "imageAttribution": image.get("imageAttribution"),
+                "language": normalized.get("languages", []),
+                "timezone": normalized.get("timezones", []),
+                "currency": {
+                    "name": curr_info.get("name", "Unknown"),
+                    "symbol": curr_info.get("symbol", "")
+                },
+                "population": normalized.get("population", 0)
+            }
+        }
+
     async def currency_conversion_node(self, state: ConversationState) -> ConversationState:
-        """Execute currency conversion."""
+        """Execute currency conversion, or the rate history when the message asks how a rate moved."""
         logger.info("Node: Converting currency")
         latest_message = state["messages"][-1]["content"]
-        prompt = f"Extract currency parameters: amount, from_currency, to_currency.\nMessage: {latest_message}"
+        if is_rate_history_question(latest_message):
+            return await self._rate_history(state, latest_message)
+        prompt = f"Extract currency parameters: amount, from_currency, to_currency.\nToday's date: {current_date()}\nMessage: {latest_message}"
         
         try:
-            function_call = await self.llm.bind_tools([self.currency_tool]).ainvoke([HumanMessage(content=prompt)])
-            if function_call.tool_calls:
-                kwargs = function_call.tool_calls[0]["args"]
-                result = await self.currency_tool._call_api(**kwargs)
-                normalized = self.currency_tool._normalize_response(result)
-                
-                state["current_tool_result"] = {
-                    "type": "currency",
-                    "data": {
-                        "from": normalized.get("original_currency"),
-                        "to": normalized.get("converted_currency"),
-                        "amount": normalized.get("original_amount"),
-                        "convertedAmount": normalized.get("converted_amount"),
-                        "rate": normalized.get("exchange_rate"),
-                        "lastUpdated": normalized.get("rate_date")
-                    }
-                }
+            # Most conversion requests parse deterministically; the LLM handles the rest
+            kwargs = extract_currency_conversion(latest_message)
+            if kwargs is None:
+                function_call = await self.extraction_llm.bind_tools([self.currency_tool]).ainvoke([HumanMessage(content=prompt)])
+                kwargs = function_call.tool_calls[0]["args"] if function_call.tool_calls else None
+            else:
+                logger.info(f"Extracted currency parameters locally: {kwargs}")
+            
+            if kwargs:
+                state["current_tool_result"], formula = await self._fetch_currency_card(kwargs)
                 
-                state["messages"].append({"role": "assistant", "content": f"Currency Conversion: {normalized.get('formula')}"})
+                state["messages"].append({"role": "assistant", "content": f"Currency Conversion: {formula}"})
         except Exception as e:
             logger.error(f"Currency error: {e}")
             state["messages"].append({"role": "assistant", "content": "Failed to convert currency."})
             
         return state
 
+    async def _fetch_currency_card(self, kwargs: Dict[str, Any]) -> Tuple[Dict[str, Any], str]:
+        """Call the currency tool and format the CurrencyCard; also returns the formula text."""
+        normalized = await self._call_tool(self.currency_tool, **kwargs)
+        
+        card = {
+            "type": "currency",
+            "data": {
+                "from": normalized.get("original_currency"),
+                "to": normalized.get("converted_currency"),
+                "amount": normalized.get("original_amount"),
+                "convertedAmount": normalized.get("converted_amount"),
+                "rate": normalized.get("exchange_rate"),
+                "lastUpdated": normalized.get("rate_date")
+            }
+        }
+        return card, normalized.get("formula")
+
+    async def _rate_history(self, state: ConversationState, latest_message: str) -> ConversationState:
+        """Answer "how has the yen moved this year" from the exchange-rate history tool."""
+        prompt = (
+            "Extract exchange-rate history parameters: from_currency, to_currency, "
+            "start_date (YYYY-MM-DD) and optional end_date (YYYY-MM-DD).\n"
+            f"Today's date: {current_date()}\nMessage: {latest_message}"
+        )
+        
+        try:
+            kwargs = extract_rate_history(latest_message)
+            if kwargs is None:
+                function_call = await self.extraction_llm.bind_tools([self.rate_history_tool]).ainvoke([HumanMessage(content=prompt)])
+                kwargs = function_call.tool_calls[0]["args"] if function_call.tool_calls else None
+            else:
+                logger.info(f"Extracted rate history parameters locally: {kwargs}")
+            
+            if kwargs:
+                state["current_tool_result"], summary = await self._fetch_rate_history_card(kwargs)
+                
+                state["messages"].append({"role": "assistant", "content": f"Exchange Rate History: {summary}"})
+        except Exception as e:
+            logger.error(f"Rate history error: {e}")
+            state["messages"].append({"role": "assistant", "content": "Failed to fetch the exchange rate history."})
+            
+        return state
+
+    async def _fetch_rate_history_card(self, kwargs: Dict[str, Any]) -> Tuple[Optional[Dict[str, Any]], str]:
+        """Call the rate history tool; returns a CurrencyCard with the latest rate and a summary of the period."""
+        normalized = await self._call_tool(self.rate_history_tool, **kwargs)
+        
+        pair = f"{normalized.get('from_currency')}/{normalized.get('to_currency')}"
+        period = f"{normalized.get('start_date')} to {normalized.get('end_date')}"
+        if not normalized.get("count"):
+            return None, f"No published {pair} rates between {period}."
+        
+        card = {
+            "type": "currency",
+            "data": {
+                "from": normalized.get("from_currency"),
+                "to": normalized.get("to_currency"),
+                "rate": normalized.get("last_rate"),
+                "lastUpdated": normalized["rates"][-1]["date"]
+            }
+        }
+        summary = (
+            f"{pair} went from {normalized['first_rate']} to {normalized['last_rate']} "
+            f"({normalized['change_percent']:+.2f}%) between {period}; "
+            f"low {normalized['min_rate']}, high {normalized['max_rate']}, average {normalized['average_rate']}."
+        )
+        return card, summary
+
+    async def _fetch_currency_card_only(self, kwargs: Dict[str, Any]) -> Dict[str, Any]:
+        """CurrencyCard without the formula text, for the fan-out."""
+        card, _ = await self._fetch_currency_card(kwargs)
+        return card
+
     async def visa_requirement_node(self, state: ConversationState) -> ConversationState:
         """Execute visa requirement check."""
         logger.info("Node: Checking visa requirements")
         latest_message = state["messages"][-1]["content"]
-        prompt = f"Extract visa check parameters: from_country (2-letter ISO), to_country (2-letter ISO).\nMessage: {latest_message}"
+        prompt = f"Extract visa check parameters: from_country (2-letter ISO), to_country (2-letter ISO).\nToday's date: {current_date()}\nMessage: {latest_message}"
         
         try:
-            function_call = await self.llm.bind_tools([self.visa_tool]).ainvoke([HumanMessage(content=prompt)])
-            if function_call.tool_calls:
-                kwargs = function_call.tool_calls[0]["args"]
-                result = await self.visa_tool._call_api(**kwargs)
-                normalized = self.visa_tool._normalize_response(result)
-                
-                visa_req = normalized.get("category", "visa_required").lower().replace("_", "-")
-                if visa_req == "evisa":
-                    visa_req = "e-visa"
-                if visa_req not in ["visa-free", "visa-on-arrival", "e-visa", "visa-required"]:
-                    visa_req = "visa-required"
-                
-                state["current_tool_result"] = {
-                    "type": "visa",
-                    "data": {
-                        "from": normalized.get("from_country"),
-                        "to": normalized.get("to_country"),
-                        "requirement": visa_req,
-                        "duration": f"{normalized.get('duration')} days" if normalized.get("duration") else None,
-                        "notes": normalized.get("summary")
-                    }
-                }
+            kwargs = extract_visa_countries(latest_message)
+            if kwargs is None:
+                function_call = await self.extraction_llm.bind_tools([self.visa_tool]).ainvoke([HumanMessage(content=prompt)])
+                kwargs = function_call.tool_calls[0]["args"] if function_call.tool_calls else None
+            else:
+                logger.info(f"Extracted visa parameters locally: {kwargs}")
+            
+            if kwargs:
+                state["current_tool_result"] = await self._fetch_visa_card(kwargs)
                 
-                state["messages"].append({"role": "assistant", "content": f"Visa Requirement: {normalized.get('summary')}"})
+                state["messages"].append({"role": "assistant", "content": f"Visa Requirement: {state['current_tool_result']['data']['notes']}"})
         except Exception as e:
             logger.error(f"Visa check error: {e}")
             state["messages"].append({"role": "assistant", "content": "Failed to check visa requirements."})
             
         return state
+
+    async def _fetch_visa_card(self, kwargs: Dict[str, Any]) -> Dict[str, Any]:
+        """Call the visa tool and format the VisaCard."""
+        normalized = await self._call_tool(self.visa_tool, **kwargs)
+        
+        visa_req = normalized.get("category", "visa_required").lower().replace("_", "-")
+        if visa_req == "evisa":
+            visa_req = "e-visa"
+        if visa_req not in ["visa-free", "visa-on-arrival", "e-visa", "visa-required"]:
+            visa_req = "visa-required"
+        
+        return {
+            "type": "visa",
+            "data": {
+                "from": normalized.get("from_country"),
+                "to": normalized.get("to_country"),
+                "requirement": visa_req,
+                "duration": f"{normalized.get('duration')} days" if normalized.get("duration") else None,
+                "notes": normalized.get("summary")
+            }
+        }
     
     def _format_itinerary_response(self, itinerary: list) -> str:
         """Format itinerary into a readable response."""
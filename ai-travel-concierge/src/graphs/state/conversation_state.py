@@ -81,6 +81,7 @@ class ConversationState(TypedDict):
     
     # RAG context
     retrieved_context: List[str]
+    cached_answer: Optional[str]  # Set by retrieve_context on a semantic cache hit
     
     # Agent metadata
     current_agent: Optional[str]
@@ -97,6 +98,7 @@ class ConversationState(TypedDict):
     
     # Tool output mapping
     current_tool_result: Optional[Dict[str, Any]]
+    tool_results: List[Dict[str, Any]]  # All cards produced this turn (fan-out)
 
 
 def create_initial_state(user_id: Optional[str] = None) -> ConversationState:
@@ -126,6 +128,7 @@ def create_initial_state(user_id: Optional[str] = None) -> ConversationState:
         recommendations={},
         bookings=[],
         retrieved_context=[],
+        cached_answer=None,
         current_agent=None,
         next_action=None,
         error=None,
@@ -133,5 +136,6 @@ def create_initial_state(user_id: Optional[str] = None) -> ConversationState:
         needs_more_info=False,
         ready_to_book=False,
         conversation_complete=False,
-        current_tool_result=None
+        current_tool_result=None,
+        tool_results=[]
     )
@@ -1,17 +1,20 @@
 """
 Main Travel Concierge LangGraph workflow definition.
 """
+import asyncio
 import logging
-from typing import Dict, Any
+from typing import Any, Awaitable, Callable, Dict
 from contextlib import asynccontextmanager
 
 from pathlib import Path
 from langgraph.graph import StateGraph, END
 from langgraph.checkpoint.memory import MemorySaver
+from langchain_core.runnables import RunnableConfig
 
 from src.graphs.state.conversation_state import ConversationState, create_initial_state
 from src.graphs.nodes.graph_nodes import GraphNodes
 from src.graphs.edges.graph_edges import GraphEdges
+from src.utils.deadline import deadline_from_config, make_deadline, run_with_deadline
 
 logger = logging.getLogger(__name__)
 
@@ -95,22 +98,28 @@ class TravelConciergeGraph:
         workflow = StateGraph(ConversationState)
         
         # Add nodes
-        workflow.add_node("classify_intent", self.nodes.classify_intent_node)
+        workflow.add_node("classify_intent", self._with_deadline("classify_intent", self.nodes.classify_intent_node, answers=False))
         workflow.add_node("check_info", self._check_info_node)
-        workflow.add_node("retrieve_context", self.nodes.retrieve_context_node)
-        workflow.add_node("plan_trip", self.nodes.plan_trip_node)
-        workflow.add_node("recommend", self.nodes.recommend_node)
-        workflow.add_node("book", self.nodes.booking_node)
-        workflow.add_node("answer_question", self.nodes.answer_question_node)
-        workflow.add_node("clarify", self.nodes.clarification_node)
+        workflow.add_node("retrieve_context", self._with_deadline("retrieve_context", self.nodes.retrieve_context_node, answers=False))
+        workflow.add_node("plan_trip", self._with_deadline("plan_trip", self.nodes.plan_trip_node))
+        workflow.add_node("recommend", self._with_deadline("recommend", self.nodes.recommend_node))
+        workflow.add_node("book", self._with_deadline("book", self.nodes.booking_node))
+        workflow.add_node("answer_question", self._with_deadline("answer_question", self.nodes.answer_question_node))
+        workflow.add_node("clarify", self._with_deadline("clarify", self.nodes.clarification_node))
         
         # Add new external API nodes
-        workflow.add_node("flight_search", self.nodes.flight_search_node)
-        workflow.add_node("hotel_search", self.nodes.hotel_search_node)
-        workflow.add_node("weather_check", self.nodes.weather_check_node)
-        workflow.add_node("country_info", self.nodes.country_info_node)
-        workflow.add_node("currency_conversion", self.nodes.currency_conversion_node)
-        workflow.add_node("visa_requirement", self.nodes.visa_requirement_node)
+        workflow.add_node("flight_search", self._with_deadline("flight_search", self.nodes.flight_search_node))
+        workflow.add_node("hotel_search", self._with_deadline("hotel_search", self.nodes.hotel_search_node))
+        workflow.add_node("weather_check", self._with_deadline("weather_check", self.nodes.weather_check_node))
+        workflow.add_node("country_info", self._with_deadline("country_info", self.nodes.country_info_node))
+        workflow.add_node("currency_conversion", self._with_deadline("currency_conversion", self.nodes.currency_conversion_node))
+        workflow.add_node("visa_requirement", self._with_deadline("visa_requirement", self.nodes.visa_requirement_node))
+        
+        # Trip plans first fetch the destination's tool cards concurrently
+        fanout = self.config.get("tool_fanout_enabled", True)
+        if fanout:
+            workflow.add_node("destination_briefing", self._with_deadline("destination_briefing", self.nodes.destination_briefing_node, answers=False))
+            workflow.add_edge("destination_briefing", "plan_trip")
         
         # Set entry point
         workflow.set_entry_point("classify_intent")
@@ -134,7 +143,7 @@ class TravelConciergeGraph:
             "retrieve_context",
             self.edges.route_by_intent,
             {
-                "plan_trip": "plan_trip",
+                "plan_trip": "destination_briefing" if fanout else "plan_trip",
                 "recommend": "recommend",
                 "book": "book",
                 "answer_question": "answer_question",
@@ -171,6 +180,37 @@ class TravelConciergeGraph:
         logger.info("Graph workflow structure built successfully")
         return workflow
     
+    def _with_deadline(
+        self,
+        name: str,
+        node: Callable[[ConversationState], Awaitable[ConversationState]],
+        answers: bool = True
+    ) -> Callable[[ConversationState, RunnableConfig], Awaitable[ConversationState]]:
+        """
+        Run a node under the turn deadline from the run config and ``node_timeout``.
+        
+        A node that runs out of time is cancelled and whatever it already
+        wrote to the state is kept. Nodes that answer the user (``answers``)
+        fall back to an apology if they had not replied yet; upstream nodes
+        just hand the partial state on.
+        """
+        node_timeout = self.config.get("node_timeout")
+        
+        async def run(state: ConversationState, config: RunnableConfig) -> ConversationState:
+            try:
+                return await run_with_deadline(lambda: node(state), deadline_from_config(config), node_timeout)
+            except asyncio.TimeoutError:
+                logger.warning(f"Node '{name}' ran out of time, returning partial results")
+                state["error"] = f"{name} timed out"
+                if answers and (not state["messages"] or state["messages"][-1]["role"] != "assistant"):
+                    state["messages"].append({
+                        "role": "assistant",
+                        "content": "I'm sorry, that took longer than expected. Please try again in a moment."
+                    })
+                return state
+        
+        return run
+    
     def _check_info_node(self, state: ConversationState) -> ConversationState:
         """
         Wrapper node to maintain compatibility with edge routing.
@@ -213,7 +253,10 @@ class TravelConciergeGraph:
         })
         
         # Run the graph
-        config = {"configurable": {"thread_id": state["conversation_id"]}}
+        config = {"configurable": {
+            "thread_id": state["conversation_id"],
+            "deadline": make_deadline(self.config.get("agent_timeout")),
+        }}
         
         try:
             async with self.get_compiled_graph() as compiled_graph:
@@ -226,6 +269,7 @@ class TravelConciergeGraph:
             ]
             
             response = assistant_messages[-1] if assistant_messages else "I'm sorry, I couldn't process that request."
+            self.nodes.schedule_prefetch(result)
             
             logger.info("Successfully processed user input")
             return response
@@ -233,6 +277,11 @@ class TravelConciergeGraph:
         except Exception as e:
             logger.error(f"Error running graph: {e}", exc_info=True)
             return "I apologize, but I encountered an error. Please try again."
+        finally:
+            # A text-only reply has no card to patch a late destination image into
+            image_task = self.nodes.take_pending_image(state["conversation_id"])
+            if image_task is not None:
+                image_task.cancel()
     
     def _load_conversation(self, conversation_id: str) -> ConversationState:
         """
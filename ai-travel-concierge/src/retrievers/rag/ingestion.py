@@ -0,0 +1,429 @@
+"""
+Streaming ingestion pipeline for the travel knowledge base.
+
+Documents are streamed from JSONL / Markdown / PDF sources, chunked lazily,
+embedded in parallel batches and upserted into Chroma batch by batch, so
+memory stays bounded regardless of corpus size. An optional manifest makes
+re-ingestion incremental: unchanged documents are skipped, only new or
+changed chunks are embedded, and stale chunks are deleted.
+"""
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import time
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from pathlib import Path
+from typing import Any, Deque, Dict, Iterable, Iterator, List, Optional, Set, Tuple
+
+from langchain_core.documents import Document
+from pydantic import BaseModel
+
+from src.retrievers.rag.travel_retriever import TravelRetriever
+
+logger = logging.getLogger(__name__)
+
+SUPPORTED_EXTENSIONS = {".jsonl", ".md", ".markdown", ".pdf"}
+
+
+def _parse_front_matter(text: str) -> Tuple[Dict[str, Any], str]:
+    """
+    Split simple ``key: value`` front matter off a Markdown document.
+
+    Comma-separated values for ``interests`` are turned into a list.
+    """
+    if not text.startswith("---"):
+        return {}, text
+
+    end = text.find("\n---", 3)
+    if end == -1:
+        return {}, text
+
+    metadata: Dict[str, Any] = {}
+    for line in text[3:end].strip().splitlines():
+        if ":" not in line:
+            continue
+        key, value = line.split(":", 1)
+        key, value = key.strip(), value.strip()
+        if key == "interests":
+            metadata[key] = [v.strip() for v in value.strip("[]").split(",") if v.strip()]
+        elif value:
+            metadata[key] = value
+
+    return metadata, text[end + 4:].lstrip("\n")
+
+
+def _iter_jsonl(path: Path, source: str) -> Iterator[Document]:
+    """Yield one document per JSONL line ({"text": ..., "metadata": {...}})."""
+    with path.open(encoding="utf-8") as f:
+        for line_no, line in enumerate(f, 1):
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError as e:
+                logger.warning(f"Skipping invalid JSON at {source}:{line_no}: {e}")
+                continue
+            text = record.get("text") or record.get("content")
+            if not text:
+                continue
+            metadata = dict(record.get("metadata", {}))
+            metadata["source"] = f"{source}:{record.get('id', line_no)}"
+            yield Document(page_content=text, metadata=metadata)
+
+
+def _iter_markdown(path: Path, source: str) -> Iterator[Document]:
+    """Yield a Markdown file as a single document."""
+    metadata, body = _parse_front_matter(path.read_text(encoding="utf-8"))
+    if body.strip():
+        metadata["source"] = source
+        yield Document(page_content=body, metadata=metadata)
+
+
+def _iter_pdf(path: Path, source: str) -> Iterator[Document]:
+    """Yield a PDF file as a single document (requires pypdf)."""
+    try:
+        from pypdf import PdfReader
+    except ImportError:
+        logger.warning(f"pypdf is not installed, skipping {source}")
+        return
+
+    reader = PdfReader(str(path))
+    text = "\n".join(page.extract_text() or "" for page in reader.pages)
+    if text.strip():
+        yield Document(page_content=text, metadata={"source": source})
+
+
+def iter_source_documents(source_dir: str) -> Iterator[Document]:
+    """
+    Stream documents from a directory tree of JSONL, Markdown and PDF files.
+
+    Files are visited in sorted order so runs are reproducible (and
+    checkpoints stay meaningful). Every document gets a ``source`` metadata
+    key that identifies it across runs.
+
+    Args:
+        source_dir: Root directory to scan recursively
+
+    Yields:
+        Documents, one at a time
+    """
+    root = Path(source_dir)
+    for path in sorted(root.rglob("*")):
+        suffix = path.suffix.lower()
+        if not path.is_file() or suffix not in SUPPORTED_EXTENSIONS:
+            continue
+
+        source = path.relative_to(root).as_posix()
+        if suffix == ".jsonl":
+            yield from _iter_jsonl(path, source)
+        elif suffix == ".pdf":
+            yield from _iter_pdf(path, source)
+        else:
+            yield from _iter_markdown(path, source)
+
+
+def document_hash(doc: Document) -> str:
+    """Hash of a document's text and metadata, used to detect changed sources."""
+    digest = hashlib.sha256(doc.page_content.encode("utf-8"))
+    digest.update(json.dumps(doc.metadata, sort_keys=True, default=str).encode("utf-8"))
+    return digest.hexdigest()
+
+
+class IngestionStats(BaseModel):
+    """Throughput metrics for an ingestion run."""
+    documents: int = 0
+    skipped_documents: int = 0
+    unchanged_documents: int = 0
+    chunks: int = 0
+    reused_chunks: int = 0
+    deleted_chunks: int = 0
+    batches: int = 0
+    embed_seconds: float = 0.0
+    upsert_seconds: float = 0.0
+    elapsed_seconds: float = 0.0
+
+    @property
+    def chunks_per_second(self) -> float:
+        return self.chunks / self.elapsed_seconds if self.elapsed_seconds else 0.0
+
+
+class IngestionCheckpoint:
+    """
+    Append-only log of fully ingested document sources (one per line).
+
+    A document is only recorded once all of its chunks have been upserted,
+    so an interrupted run can resume without losing or duplicating work.
+    Appending keeps each checkpoint write O(batch) rather than O(corpus).
+    """
+
+    def __init__(self, path: Optional[str] = None):
+        self.path = Path(path) if path else None
+        self.completed: Set[str] = set()
+
+        if self.path and self.path.exists():
+            with self.path.open(encoding="utf-8") as f:
+                self.completed = {line.rstrip("\n") for line in f if line.endswith("\n")}
+            logger.info(f"Resuming ingestion: {len(self.completed)} documents already done")
+
+    def __contains__(self, source: str) -> bool:
+        return source in self.completed
+
+    def mark_done(self, sources: Iterable[str]) -> None:
+        """Record sources as done and flush them to the checkpoint file."""
+        new_sources = [s for s in sources if s not in self.completed]
+        self.completed.update(new_sources)
+
+        if not self.path or not new_sources:
+            return
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with self.path.open("a", encoding="utf-8") as f:
+            f.write("".join(f"{source}\n" for source in new_sources))
+            f.flush()
+            os.fsync(f.fileno())
+
+
+class IngestionManifest:
+    """
+    SQLite record of which chunk IDs each source produced, and its content hash.
+
+    Lets re-ingestion skip unchanged sources, embed only chunks whose IDs
+    are new, and delete chunks a changed (or removed) source no longer has.
+    """
+
+    def __init__(self, path: str):
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        self.conn = sqlite3.connect(path)
+        self.conn.execute(
+            """CREATE TABLE IF NOT EXISTS sources (
+                source TEXT PRIMARY KEY,
+                content_hash TEXT NOT NULL,
+                chunk_ids TEXT NOT NULL
+            )"""
+        )
+        self.conn.commit()
+
+    def get(self, source: str) -> Optional[Tuple[str, List[str]]]:
+        """Return (content_hash, chunk_ids) for a source, or None if unknown."""
+        row = self.conn.execute(
+            "SELECT content_hash, chunk_ids FROM sources WHERE source = ?", (source,)
+        ).fetchone()
+        return (row[0], json.loads(row[1])) if row else None
+
+    def record(self, source: str, content_hash: str, chunk_ids: List[str]) -> None:
+        self.conn.execute(
+            "INSERT OR REPLACE INTO sources (source, content_hash, chunk_ids) VALUES (?, ?, ?)",
+            (source, content_hash, json.dumps(chunk_ids)),
+        )
+        self.conn.commit()
+
+    def remove(self, source: str) -> None:
+        self.conn.execute("DELETE FROM sources WHERE source = ?", (source,))
+        self.conn.commit()
+
+    def sources(self) -> Set[str]:
+        return {row[0] for row in self.conn.execute("SELECT source FROM sources")}
+
+    def close(self) -> None:
+        self.conn.close()
+
+
+class _CompletedSource:
+    """A source whose chunks have all been queued, plus what to clean up after commit."""
+
+    def __init__(self, source: str, content_hash: str, chunk_ids: List[str], stale_ids: List[str]):
+        self.source = source
+        self.content_hash = content_hash
+        self.chunk_ids = chunk_ids
+        self.stale_ids = stale_ids
+
+
+class _ChunkBatch:
+    """A batch of chunks plus the sources whose last chunk it contains."""
+
+    def __init__(self):
+        self.ids: List[str] = []
+        self.texts: List[str] = []
+        self.metadatas: List[Dict[str, Any]] = []
+        self.completed: List[_CompletedSource] = []
+
+    @property
+    def completed_sources(self) -> List[str]:
+        return [c.source for c in self.completed]
+
+    def __len__(self) -> int:
+        return len(self.texts)
+
+
+class IngestionPipeline:
+    """
+    Stream documents → chunk → embed in parallel batches → upsert.
+
+    Embedding runs in a thread pool with a bounded number of in-flight
+    batches; upserts happen in submission order on the calling thread so the
+    checkpoint and manifest always describe a consistent prefix of the work.
+    """
+
+    def __init__(
+        self,
+        retriever: TravelRetriever,
+        batch_size: int = 64,
+        embed_workers: int = 4,
+        checkpoint_path: Optional[str] = None,
+        manifest_path: Optional[str] = None,
+        log_every: int = 10,
+    ):
+        self.retriever = retriever
+        self.batch_size = batch_size
+        self.embed_workers = embed_workers
+        self.max_in_flight = embed_workers * 2
+        self.checkpoint = IngestionCheckpoint(checkpoint_path)
+        self.manifest = IngestionManifest(manifest_path) if manifest_path else None
+        self.log_every = log_every
+        self._started = 0.0
+        self._seen_sources: Set[str] = set()
+
+    def _iter_batches(self, documents: Iterable[Document], stats: IngestionStats) -> Iterator[_ChunkBatch]:
+        """Chunk documents lazily and group the new chunks into fixed-size batches."""
+        batch = _ChunkBatch()
+
+        for doc in documents:
+            source = doc.metadata.get("source") or f"doc-{stats.documents + stats.skipped_documents}"
+            self._seen_sources.add(source)
+            if source in self.checkpoint:
+                stats.skipped_documents += 1
+                continue
+
+            content_hash = document_hash(doc)
+            previous = self.manifest.get(source) if self.manifest else None
+            if previous and previous[0] == content_hash:
+                stats.unchanged_documents += 1
+                continue
+
+            stats.documents += 1
+            previous_ids = set(previous[1]) if previous else set()
+            chunk_ids: List[str] = []
+            seen_ids: Set[str] = set()
+            for i, chunk in enumerate(self.retriever.text_splitter.split_text(doc.page_content)):
+                metadata = {**doc.metadata, "source": source, "chunk_index": i}
+                chunk_id = self.retriever.make_chunk_id(chunk, metadata)
+                if chunk_id in seen_ids:
+                    continue
+                seen_ids.add(chunk_id)
+                chunk_ids.append(chunk_id)
+
+                # Content-addressed IDs: an unchanged chunk is already stored
+                if chunk_id in previous_ids:
+                    stats.reused_chunks += 1
+                    continue
+
+                batch.ids.append(chunk_id)
+                batch.texts.append(chunk)
+                batch.metadatas.append(metadata)
+
+                if len(batch) >= self.batch_size:
+                    yield batch
+                    batch = _ChunkBatch()
+
+            # Recorded on the batch holding (or following) the last chunk, so the
+            # source is only checkpointed once every chunk has been upserted
+            batch.completed.append(_CompletedSource(
+                source, content_hash, chunk_ids, sorted(previous_ids - seen_ids)
+            ))
+
+        if len(batch) or batch.completed:
+            yield batch
+
+    def _embed(self, batch: _ChunkBatch) -> Tuple[_ChunkBatch, List[List[float]], float]:
+        start = time.perf_counter()
+        embeddings = self.retriever.embeddings.embed_documents(batch.texts) if len(batch) else []
+        return batch, embeddings, time.perf_counter() - start
+
+    def _commit(self, future: Future, stats: IngestionStats) -> None:
+        batch, embeddings, embed_seconds = future.result()
+
+        start = time.perf_counter()
+        if len(batch):
+            self.retriever.upsert_embeddings(
+                ids=batch.ids,
+                texts=batch.texts,
+                embeddings=embeddings,
+                metadatas=batch.metadatas,
+            )
+
+        # New chunks are in place, so stale ones can go
+        for completed in batch.completed:
+            if completed.stale_ids:
+                self.retriever.delete_documents(completed.stale_ids)
+                stats.deleted_chunks += len(completed.stale_ids)
+            if self.manifest:
+                self.manifest.record(completed.source, completed.content_hash, completed.chunk_ids)
+
+        stats.upsert_seconds += time.perf_counter() - start
+        stats.embed_seconds += embed_seconds
+        stats.chunks += len(batch)
+        stats.batches += 1
+
+        self.checkpoint.mark_done(batch.completed_sources)
+
+        if stats.batches % self.log_every == 0:
+            logger.info(
+                f"Ingested {stats.documents} documents / {stats.chunks} chunks "
+                f"({stats.chunks / max(time.perf_counter() - self._started, 1e-9):.1f} chunks/s)"
+            )
+
+    def _prune_missing_sources(self, stats: IngestionStats) -> None:
+        """Delete chunks of manifest sources that were not in this run's stream."""
+        for source in self.manifest.sources() - self._seen_sources:
+            _, chunk_ids = self.manifest.get(source)
+            if chunk_ids:
+                self.retriever.delete_documents(chunk_ids)
+                stats.deleted_chunks += len(chunk_ids)
+            self.manifest.remove(source)
+            logger.info(f"Removed {len(chunk_ids)} chunks of deleted source {source}")
+
+    def run(self, documents: Iterable[Document], prune: bool = False) -> IngestionStats:
+        """
+        Ingest a stream of documents.
+
+        Args:
+            documents: Any iterable of documents (typically a generator)
+            prune: Delete chunks of manifest sources missing from the stream.
+                Only use when the stream covers the whole corpus.
+
+        Returns:
+            Throughput metrics for the run
+        """
+        stats = IngestionStats()
+        self._started = time.perf_counter()
+        self._seen_sources = set()
+
+        # Load the model up front so the first batches don't all block on it
+        self.retriever.warm_up()
+
+        in_flight: Deque[Future] = deque()
+        with ThreadPoolExecutor(max_workers=self.embed_workers) as executor:
+            for batch in self._iter_batches(documents, stats):
+                in_flight.append(executor.submit(self._embed, batch))
+
+                # Bound memory: wait for the oldest batch before reading further
+                if len(in_flight) >= self.max_in_flight:
+                    self._commit(in_flight.popleft(), stats)
+
+            while in_flight:
+                self._commit(in_flight.popleft(), stats)
+
+        if prune and self.manifest:
+            self._prune_missing_sources(stats)
+
+        stats.elapsed_seconds = time.perf_counter() - self._started
+        logger.info(
+            f"Ingestion complete: {stats.documents} documents, {stats.chunks} chunks embedded, "
+            f"{stats.reused_chunks} reused, {stats.deleted_chunks} deleted, "
+            f"{stats.unchanged_documents} unchanged, {stats.skipped_documents} skipped, "
+            f"{stats.chunks_per_second:.1f} chunks/s"
+        )
+        return stats
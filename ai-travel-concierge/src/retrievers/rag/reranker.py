@@ -0,0 +1,146 @@
+"""
+Cross-encoder reranking for RAG results.
+
+The vector search fetches a wider candidate set cheaply; a small CPU
+cross-encoder then scores each (query, chunk) pair and the best k are kept.
+Reranking runs under a time budget and falls back to the vector order when
+the budget is exceeded or the model is unavailable; loading the model is
+not counted against the budget.
+"""
+import asyncio
+import logging
+import threading
+import time
+from typing import Any, List, Optional
+
+from langchain_core.documents import Document
+
+logger = logging.getLogger(__name__)
+
+
+class CrossEncoderReranker:
+    """
+    Rerank retrieved documents with a sentence-transformers cross-encoder.
+
+    The model is loaded on first use (or via ``load``). If sentence-transformers
+    is not installed or the model fails to load, the reranker disables itself
+    and ``arerank`` returns documents in their original order.
+    """
+
+    def __init__(self, model_name: str, max_length: int = 512):
+        self.model_name = model_name
+        self.max_length = max_length
+
+        self._model: Optional[Any] = None
+        self._load_lock = threading.Lock()
+        self._disabled = False
+
+        self.timeouts = 0
+        self.failures = 0
+
+    @property
+    def is_available(self) -> bool:
+        """Whether reranking can run (False once loading has failed)."""
+        return not self._disabled
+
+    def load(self) -> None:
+        """Load the cross-encoder model if not loaded yet (blocking)."""
+        if self._model is not None or self._disabled:
+            return
+
+        with self._load_lock:
+            if self._model is not None or self._disabled:
+                return
+
+            start = time.perf_counter()
+            try:
+                from sentence_transformers import CrossEncoder
+                self._model = CrossEncoder(self.model_name, max_length=self.max_length)
+            except Exception as e:
+                self._disabled = True
+                logger.warning(f"Cross-encoder {self.model_name} unavailable, reranking disabled: {e}")
+                return
+
+            logger.info(f"Cross-encoder {self.model_name} loaded in {time.perf_counter() - start:.2f}s")
+
+    def rerank(self, query: str, documents: List[Document], k: int) -> List[Document]:
+        """
+        Score documents against the query and return the best k (blocking).
+
+        Args:
+            query: Search query
+            documents: Candidate documents in vector order
+            k: Number of documents to keep
+
+        Returns:
+            Top k documents by cross-encoder score
+        """
+        self.load()
+        if self._model is None or len(documents) <= 1:
+            return documents[:k]
+
+        scores = self._model.predict([(query, doc.page_content) for doc in documents])
+        # sorted() is stable, so ties keep their vector order
+        ranked = sorted(zip(scores, range(len(documents))), key=lambda pair: -float(pair[0]))
+        return [documents[i] for _, i in ranked[:k]]
+
+    async def arerank(
+        self,
+        query: str,
+        documents: List[Document],
+        k: int,
+        budget_seconds: Optional[float] = None
+    ) -> List[Document]:
+        """
+        Rerank in a worker thread, falling back to vector order on timeout or error.
+
+        Args:
+            query: Search query
+            documents: Candidate documents in vector order
+            k: Number of documents to keep
+            budget_seconds: Time budget for scoring; None means no limit
+
+        Returns:
+            Top k documents, reranked if scoring finished within the budget
+        """
+        ranked = await self.atry_rerank(query, documents, k, budget_seconds)
+        return documents[:k] if ranked is None else ranked
+
+    async def atry_rerank(
+        self,
+        query: str,
+        documents: List[Document],
+        k: int,
+        budget_seconds: Optional[float] = None
+    ) -> Optional[List[Document]]:
+        """
+        Like ``arerank``, but None instead of the vector-order fallback.
+
+        The model is loaded before the budget starts: loading takes seconds
+        and would otherwise make the first call after startup time out.
+
+        Returns:
+            Top k documents by cross-encoder score, or None if reranking
+            timed out, failed or is unavailable
+        """
+        if len(documents) <= 1:
+            return documents[:k]
+        if self._model is None:
+            await asyncio.to_thread(self.load)
+        if not self.is_available:
+            return None
+
+        try:
+            return await asyncio.wait_for(
+                asyncio.to_thread(self.rerank, query, documents, k),
+                timeout=budget_seconds
+            )
+        except asyncio.TimeoutError:
+            # The worker thread finishes in the background; its result is discarded
+            self.timeouts += 1
+            logger.warning(f"Reranking exceeded {budget_seconds:.3f}s budget, using vector order")
+        except Exception as e:
+            self.failures += 1
+            logger.error(f"Reranking failed, using vector order: {e}")
+
+        return None
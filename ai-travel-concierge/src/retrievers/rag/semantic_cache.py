@@ -0,0 +1,144 @@
+"""
+Semantic answer cache for general travel questions.
+
+Questions are embedded with the retriever's embedding model; a new question
+whose embedding is close enough to a previously answered one (for the same
+destination and trip details) reuses that answer instead of running retrieval
+and the LLM.
+"""
+import asyncio
+import logging
+import re
+import time
+from collections import OrderedDict
+from typing import Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+
+class SemanticAnswerCache:
+    """
+    Near-duplicate question → answer cache, scoped by destination and trip state.
+
+    Answers are tailored to the trip details in the prompt (dates, budget,
+    travelers), so only callers with identical trip state share them.
+
+    Entries expire after ``ttl`` seconds and each scope keeps at most
+    ``max_entries`` answers (oldest evicted first). ``clear`` is registered as
+    a knowledge-base update listener so answers never outlive the context
+    they were generated from.
+    """
+
+    def __init__(
+        self,
+        embed_query: Callable[[str], List[float]],
+        threshold: float = 0.92,
+        ttl: int = 86400,
+        max_entries: int = 500
+    ):
+        self.embed_query = embed_query
+        self.threshold = threshold
+        self.ttl = ttl
+        self.max_entries = max_entries
+
+        # scope -> [(unit vector, question, answer, expires_at)], oldest first
+        self._scopes: Dict[str, List[Tuple[np.ndarray, str, str, float]]] = {}
+        # Recently embedded questions, so lookup + store embed only once
+        self._vectors: "OrderedDict[str, np.ndarray]" = OrderedDict()
+
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def _scope(destination: Optional[str], trip_state: Optional[str] = None) -> str:
+        return f"{(destination or '').strip().lower()}\n{trip_state or ''}"
+
+    @staticmethod
+    def _normalize(question: str) -> str:
+        return " ".join(re.sub(r"[^\w\s]", " ", question.lower()).split())
+
+    async def _embed(self, question: str) -> np.ndarray:
+        key = self._normalize(question)
+        vector = self._vectors.get(key)
+        if vector is None:
+            raw = np.asarray(await asyncio.to_thread(self.embed_query, question), dtype=np.float32)
+            norm = np.linalg.norm(raw)
+            vector = raw / norm if norm else raw
+            self._vectors[key] = vector
+            while len(self._vectors) > 128:
+                self._vectors.popitem(last=False)
+        self._vectors.move_to_end(key)
+        return vector
+
+    async def lookup(
+        self,
+        question: str,
+        destination: Optional[str] = None,
+        trip_state: Optional[str] = None
+    ) -> Optional[str]:
+        """
+        Find a cached answer for a near-duplicate question.
+
+        Args:
+            question: User question
+            destination: Trip destination the answer must be scoped to
+            trip_state: Formatted trip details the answer must have been generated with
+
+        Returns:
+            The cached answer, or None on a miss
+        """
+        entries = self._scopes.get(self._scope(destination, trip_state))
+        if entries:
+            now = time.monotonic()
+            entries[:] = [e for e in entries if e[3] > now]
+
+        if not entries:
+            self.misses += 1
+            return None
+
+        vector = await self._embed(question)
+        similarities = np.stack([e[0] for e in entries]) @ vector
+        best = int(np.argmax(similarities))
+        if similarities[best] < self.threshold:
+            self.misses += 1
+            return None
+
+        self.hits += 1
+        logger.info(
+            f"Semantic cache hit ({similarities[best]:.3f}) for '{question[:50]}' "
+            f"matching '{entries[best][1][:50]}'"
+        )
+        return entries[best][2]
+
+    async def store(
+        self,
+        question: str,
+        answer: str,
+        destination: Optional[str] = None,
+        trip_state: Optional[str] = None
+    ) -> None:
+        """
+        Cache an answer for a question.
+
+        Args:
+            question: User question
+            answer: Generated answer
+            destination: Trip destination the answer is scoped to
+            trip_state: Formatted trip details the answer was generated with
+        """
+        vector = await self._embed(question)
+        entries = self._scopes.setdefault(self._scope(destination, trip_state), [])
+        entries.append((vector, question, answer, time.monotonic() + self.ttl))
+        if len(entries) > self.max_entries:
+            del entries[:len(entries) - self.max_entries]
+
+    def clear(self) -> None:
+        """Drop all cached answers (knowledge-base update hook)."""
+        if self._scopes:
+            logger.info("Knowledge base updated, clearing semantic answer cache")
+        self._scopes.clear()
+
+    def __len__(self) -> int:
+        return sum(len(entries) for entries in self._scopes.values())
@@ -1,14 +1,23 @@
 """
 RAG-based Travel Knowledge Retriever.
 """
+import asyncio
+import hashlib
+import json
 import logging
-from typing import List, Dict, Any, Optional
+import re
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable, List, Dict, Any, Optional, Tuple
 
 from langchain_huggingface import HuggingFaceEmbeddings
 from langchain_chroma import Chroma
 from langchain_core.documents import Document
 from langchain_text_splitters import RecursiveCharacterTextSplitter
 
+from src.retrievers.rag.reranker import CrossEncoderReranker
+
 logger = logging.getLogger(__name__)
 
 
@@ -20,18 +29,57 @@ class TravelRetriever:
     - Vector store of travel information
     - Embedding-based retrieval
     - Context filtering and ranking
+    
+    The embedding model and the Chroma store are loaded lazily on first use
+    (or eagerly via ``warm_up``/``awarm_up``), so constructing a retriever is cheap.
+    
+    Results of ``retrieve`` are cached per (normalized query, filter, k) and the
+    cache is cleared on every write through this retriever. Writes made by other
+    processes are only picked up once cached entries expire.
+    
+    With ``destination_partitioning`` enabled, every chunk that has a
+    ``destination`` is also written to a per-destination collection, so
+    destination-filtered queries search only that slice. A slice holds every
+    chunk of its destination, so a short result is returned as is; only a
+    destination without a slice falls back to the filtered global collection.
+    Slices are picked case-insensitively ("Paris" and "paris" share one),
+    while the global collection's ``destination`` filter is an exact match.
+    
+    With ``rerank_enabled``, ``retrieve`` fetches ``rerank_candidates`` documents
+    and a cross-encoder picks the best k within ``rerank_budget_ms``; if the
+    budget is exceeded the vector order is kept.
     """
     
     def __init__(self, config: Dict[str, Any]):
         self.config = config
         
-        # Initialize embeddings
-        self.embeddings = HuggingFaceEmbeddings(
-            model_name=config.get("embedding_model", "all-MiniLM-L6-v2")
-        )
-        
-        # Initialize or load vector store
-        self.vector_store = self._initialize_vector_store()
+        # Loaded on first use, see _ensure_loaded()
+        self._embeddings: Optional[HuggingFaceEmbeddings] = None
+        self._vector_store: Optional[Chroma] = None
+        self._load_lock = threading.RLock()
+        self._load_error: Optional[Exception] = None
+        
+        # Retrieval cache: key -> (expires_at, documents), in LRU order
+        self._retrieval_cache: "OrderedDict[Tuple[str, str, int], Tuple[float, List[Document]]]" = OrderedDict()
+        self._retrieval_cache_size = config.get("retrieval_cache_size", 256)
+        self._retrieval_cache_ttl = config.get("retrieval_cache_ttl", 600)
+        self.cache_hits = 0
+        self.cache_misses = 0
+        # Called after every write, e.g. to clear caches derived from the knowledge base
+        self._update_listeners: List[Callable[[], None]] = []
+        
+        # Per-destination collections: partition name -> Chroma
+        self._partitioning = config.get("destination_partitioning", True)
+        self._partitions: Dict[str, Chroma] = {}
+        
+        # Optional cross-encoder rerank stage
+        self.reranker: Optional[CrossEncoderReranker] = None
+        if config.get("rerank_enabled", False):
+            self.reranker = CrossEncoderReranker(
+                config.get("rerank_model", "cross-encoder/ms-marco-MiniLM-L-6-v2")
+            )
+        self._rerank_candidates = config.get("rerank_candidates", 20)
+        self._rerank_budget_ms = config.get("rerank_budget_ms", 300)
         
         # Text splitter for document processing
         self.text_splitter = RecursiveCharacterTextSplitter(
@@ -40,7 +88,80 @@ class TravelRetriever:
             length_function=len,
         )
         
-        logger.info("Travel Retriever initialized")
+        logger.info("Travel Retriever created (embedding model loads on first use)")
+    
+    @property
+    def embeddings(self) -> HuggingFaceEmbeddings:
+        """Embedding model, loaded on first access."""
+        self._ensure_loaded()
+        return self._embeddings
+    
+    @property
+    def vector_store(self) -> Chroma:
+        """Chroma vector store, opened on first access."""
+        self._ensure_loaded()
+        return self._vector_store
+    
+    @property
+    def is_ready(self) -> bool:
+        """Whether the embedding model and vector store are loaded."""
+        return self._vector_store is not None
+    
+    def _ensure_loaded(self) -> None:
+        """Load the embedding model and vector store if not loaded yet (blocking)."""
+        if self._vector_store is not None:
+            return
+        
+        with self._load_lock:
+            # Another thread may have finished loading while we waited
+            if self._vector_store is not None:
+                return
+            
+            start = time.perf_counter()
+            try:
+                self._embeddings = HuggingFaceEmbeddings(
+                    model_name=self.config.get("embedding_model", "all-MiniLM-L6-v2")
+                )
+                self._vector_store = self._initialize_vector_store()
+            except Exception as e:
+                self._load_error = e
+                logger.error(f"Failed to load travel retriever: {e}")
+                raise
+            
+            self._load_error = None
+            logger.info(f"Travel Retriever loaded in {time.perf_counter() - start:.2f}s")
+    
+    async def _aensure_loaded(self) -> None:
+        """Load the retriever off the event loop if it isn't loaded yet."""
+        if self._vector_store is None:
+            await asyncio.to_thread(self._ensure_loaded)
+    
+    def warm_up(self) -> None:
+        """
+        Eagerly load the embedding model and vector store.
+        
+        Also embeds a dummy query so the model weights are paged in before
+        the first real request.
+        """
+        self._ensure_loaded()
+        self._embeddings.embed_query("warm up")
+        if self.reranker:
+            self.reranker.load()
+        logger.info("Travel Retriever warmed up")
+    
+    async def awarm_up(self) -> bool:
+        """
+        Warm up the retriever in a worker thread.
+        
+        Returns:
+            True if the retriever is ready, False if loading failed
+        """
+        try:
+            await asyncio.to_thread(self.warm_up)
+            return True
+        except Exception as e:
+            logger.error(f"Travel Retriever warm-up failed: {e}")
+            return False
     
     def _initialize_vector_store(self) -> Chroma:
         """Initialize or load the vector store."""
@@ -55,7 +176,7 @@ class TravelRetriever:
             # Try to load existing vector store
             vector_store = Chroma(
                 collection_name=collection_name,
-                embedding_function=self.embeddings,
+                embedding_function=self._embeddings,
                 persist_directory=persist_directory
             )
             logger.info(f"Loaded existing vector store from {persist_directory}")
@@ -67,17 +188,46 @@ class TravelRetriever:
             # Create new vector store
             vector_store = Chroma(
                 collection_name=collection_name,
-                embedding_function=self.embeddings,
+                embedding_function=self._embeddings,
                 persist_directory=persist_directory
             )
         
         return vector_store
     
+    @staticmethod
+    def make_chunk_id(text: str, metadata: Optional[Dict[str, Any]] = None) -> str:
+        """
+        Deterministic chunk ID derived from the source, metadata and content.
+        
+        Re-adding the same chunk yields the same ID, so writes are upserts
+        instead of duplicates; any change to the text or metadata yields a
+        new ID.
+        
+        Args:
+            text: Chunk text
+            metadata: Chunk metadata (its ``source`` key scopes the ID)
+        
+        Returns:
+            Hex digest chunk ID
+        """
+        metadata = metadata or {}
+        fingerprint = json.dumps(
+            {k: v for k, v in metadata.items() if k != "chunk_index"},
+            sort_keys=True,
+            default=str
+        )
+        digest = hashlib.sha256()
+        for part in (str(metadata.get("source", "")), fingerprint, text):
+            digest.update(part.encode("utf-8"))
+            digest.update(b"\x00")
+        return digest.hexdigest()[:32]
+    
     async def retrieve(
         self,
         query: str,
         k: int = None,
-        filters: Dict[str, Any] = None
+        filters: Dict[str, Any] = None,
+        rerank_budget_ms: Optional[int] = None
     ) -> List[Document]:
         """
         Retrieve relevant documents for a query.
@@ -86,27 +236,140 @@ class TravelRetriever:
             query: Search query
             k: Number of documents to retrieve
             filters: Metadata filters (destination, category, etc.)
+            rerank_budget_ms: Override the configured rerank time budget
         
         Returns:
             List of relevant documents
         """
         k = k or self.config.get("top_k_results", 5)
+        metadata_filter = self._build_metadata_filter(filters) if filters else None
+        
+        cache_key = self._retrieval_cache_key(query, metadata_filter, k)
+        cached = self._get_cached_retrieval(cache_key)
+        if cached is not None:
+            logger.info(f"Retrieval cache hit for query: {query[:50]}...")
+            return cached
         
         logger.info(f"Retrieving documents for query: {query[:50]}...")
+        await self._aensure_loaded()
+        
+        # Fetch a wider candidate set when a reranker will cut it down to k
+        rerank = self.reranker is not None and self.reranker.is_available
+        fetch_k = max(k, self._rerank_candidates) if rerank else k
+        
+        docs = None
+        destination = (filters or {}).get("destination")
+        if self._partitioning and destination:
+            docs = await self._search_partition(query, fetch_k, destination, filters)
+        
+        if docs is None:
+            # Build search kwargs
+            search_kwargs = {"k": fetch_k}
+            if metadata_filter:
+                search_kwargs["filter"] = metadata_filter
+            
+            # Perform similarity search
+            docs = await self.vector_store.asimilarity_search(
+                query,
+                **search_kwargs
+            )
+        
+        cacheable = True
+        if rerank:
+            budget_ms = self._rerank_budget_ms if rerank_budget_ms is None else rerank_budget_ms
+            ranked = await self.reranker.atry_rerank(query, docs, k, budget_seconds=budget_ms / 1000)
+            # A one-off slow rerank must not pin the vector-order fallback for the TTL
+            cacheable = ranked is not None
+            docs = docs[:k] if ranked is None else ranked
+        
+        if cacheable:
+            self._store_cached_retrieval(cache_key, docs)
+        logger.info(f"Retrieved {len(docs)} documents")
+        return docs
+    
+    async def _search_partition(
+        self,
+        query: str,
+        k: int,
+        destination: str,
+        filters: Dict[str, Any]
+    ) -> Optional[List[Document]]:
+        """
+        Search the destination's partition with the remaining filters.
+        
+        The partition holds every chunk of its destination, so a short result
+        is final: the global index with the same destination filter could only
+        return the same chunks.
+        
+        Returns:
+            The partition's results, or None if the partition doesn't exist
+            (caller falls back to the global index)
+        """
+        partition = self._get_partition(destination)
+        if partition is None:
+            return None
         
-        # Build search kwargs
+        rest = {key: value for key, value in filters.items() if key != "destination"}
         search_kwargs = {"k": k}
-        if filters:
-            search_kwargs["filter"] = self._build_metadata_filter(filters)
+        rest_filter = self._build_metadata_filter(rest) if rest else None
+        if rest_filter:
+            search_kwargs["filter"] = rest_filter
         
-        # Perform similarity search
-        docs = await self.vector_store.asimilarity_search(
-            query,
-            **search_kwargs
+        return await partition.asimilarity_search(query, **search_kwargs)
+    
+    @staticmethod
+    def _normalize_query(query: str) -> str:
+        """Lowercase, drop punctuation and collapse whitespace for cache keys."""
+        return " ".join(re.sub(r"[^\w\s]", " ", query.lower()).split())
+    
+    def _retrieval_cache_key(
+        self,
+        query: str,
+        metadata_filter: Optional[Dict[str, Any]],
+        k: int
+    ) -> Tuple[str, str, int]:
+        return (
+            self._normalize_query(query),
+            json.dumps(metadata_filter, sort_keys=True, default=str),
+            k,
         )
+    
+    def _get_cached_retrieval(self, key: Tuple[str, str, int]) -> Optional[List[Document]]:
+        entry = self._retrieval_cache.get(key)
+        if entry is None or entry[0] < time.monotonic():
+            if entry is not None:
+                del self._retrieval_cache[key]
+            self.cache_misses += 1
+            return None
+        
+        self._retrieval_cache.move_to_end(key)
+        self.cache_hits += 1
+        return list(entry[1])
+    
+    def _store_cached_retrieval(self, key: Tuple[str, str, int], docs: List[Document]) -> None:
+        if self._retrieval_cache_size <= 0:
+            return
+        self._retrieval_cache[key] = (time.monotonic() + self._retrieval_cache_ttl, list(docs))
+        self._retrieval_cache.move_to_end(key)
+        while len(self._retrieval_cache) > self._retrieval_cache_size:
+            self._retrieval_cache.popitem(last=False)
+    
+    def invalidate_cache(self) -> None:
+        """Drop all cached retrieval results and notify update listeners (called on every write)."""
+        if self._retrieval_cache:
+            logger.debug(f"Invalidating {len(self._retrieval_cache)} cached retrievals")
+        self._retrieval_cache.clear()
+        for listener in self._update_listeners:
+            listener()
+    
+    def add_update_listener(self, listener: Callable[[], None]) -> None:
+        """
+        Register a callback run whenever the knowledge base is written to.
         
-        logger.info(f"Retrieved {len(docs)} documents")
-        return docs
+        Args:
+            listener: Callable taking no arguments
+        """
+        self._update_listeners.append(listener)
     
     async def retrieve_with_scores(
         self,
@@ -129,6 +392,7 @@ class TravelRetriever:
         score_threshold = score_threshold or self.config.get("similarity_threshold", 0.7)
         
         logger.info(f"Retrieving documents with scores for: {query[:50]}...")
+        await self._aensure_loaded()
         
         # Perform similarity search with scores
         docs_and_scores = await self.vector_store.asimilarity_search_with_relevance_scores(
@@ -148,6 +412,8 @@ class TravelRetriever:
         """
         Add documents to the vector store.
         
+        Documents without an ``id`` get a content-hash ID (see ``make_chunk_id``).
+        
         Args:
             documents: List of documents to add
             batch_size: Batch size for adding documents
@@ -161,7 +427,15 @@ class TravelRetriever:
         ids = []
         for i in range(0, len(documents), batch_size):
             batch = documents[i:i + batch_size]
-            batch_ids = self.vector_store.add_documents(batch)
+            batch_ids = [
+                doc.id or self.make_chunk_id(doc.page_content, doc.metadata)
+                for doc in batch
+            ]
+            self._write_chunks(
+                batch_ids,
+                [doc.page_content for doc in batch],
+                [doc.metadata for doc in batch]
+            )
             ids.extend(batch_ids)
             
             logger.debug(f"Added batch {i // batch_size + 1}")
@@ -172,41 +446,125 @@ class TravelRetriever:
     def add_texts(
         self,
         texts: List[str],
-        metadatas: List[Dict[str, Any]] = None
+        metadatas: List[Dict[str, Any]] = None,
+        batch_size: int = 100
     ) -> List[str]:
         """
         Add raw texts to the vector store.
         
+        Texts are chunked one at a time and pushed in batches of
+        ``batch_size`` chunks, so only one batch is held in memory. Chunk IDs
+        are content hashes (see ``make_chunk_id``), so adding the same texts
+        again overwrites the existing chunks instead of duplicating them.
+        
         Args:
             texts: List of text strings
             metadatas: Optional list of metadata dicts
+            batch_size: Number of chunks embedded and written per batch
         
         Returns:
             List of document IDs
         """
         logger.info(f"Adding {len(texts)} texts to vector store")
         
-        # Split texts into chunks
-        chunks = []
-        chunk_metadatas = []
+        ids = []
+        seen_ids = set()
+        chunks: List[str] = []
+        chunk_ids: List[str] = []
+        chunk_metadatas: List[Dict[str, Any]] = []
+        
+        def flush() -> None:
+            self._write_chunks(list(chunk_ids), list(chunks), list(chunk_metadatas))
+            ids.extend(chunk_ids)
+            logger.debug(f"Added batch of {len(chunks)} chunks")
+            chunks.clear()
+            chunk_ids.clear()
+            chunk_metadatas.clear()
         
         for i, text in enumerate(texts):
-            text_chunks = self.text_splitter.split_text(text)
-            chunks.extend(text_chunks)
+            metadata = metadatas[i] if metadatas and i < len(metadatas) else {}
             
-            # Replicate metadata for each chunk
-            if metadatas and i < len(metadatas):
-                chunk_metadatas.extend([metadatas[i]] * len(text_chunks))
-        
-        # Add to vector store
-        ids = self.vector_store.add_texts(
-            texts=chunks,
-            metadatas=chunk_metadatas if chunk_metadatas else None
-        )
+            for chunk in self.text_splitter.split_text(text):
+                chunk_id = self.make_chunk_id(chunk, metadata)
+                # Identical chunks collapse to one ID; Chroma rejects duplicate IDs in a batch
+                if chunk_id in seen_ids:
+                    continue
+                seen_ids.add(chunk_id)
+                
+                chunks.append(chunk)
+                chunk_ids.append(chunk_id)
+                # Replicate metadata for each chunk
+                chunk_metadatas.append(metadata)
+                
+                if len(chunks) >= batch_size:
+                    flush()
+        
+        if chunks:
+            flush()
         
         logger.info(f"Added {len(ids)} text chunks")
         return ids
     
+    def upsert_embeddings(
+        self,
+        ids: List[str],
+        texts: List[str],
+        embeddings: List[List[float]],
+        metadatas: List[Dict[str, Any]]
+    ) -> None:
+        """
+        Insert or replace pre-embedded chunks in the vector store.
+        
+        Used by the ingestion pipeline, which embeds batches in parallel
+        outside the vector store.
+        
+        Args:
+            ids: Chunk IDs (existing IDs are overwritten)
+            texts: Chunk texts
+            embeddings: One embedding vector per chunk
+            metadatas: One metadata dict per chunk
+        """
+        self._write_chunks(ids, texts, metadatas, embeddings=embeddings)
+    
+    def _write_chunks(
+        self,
+        ids: List[str],
+        texts: List[str],
+        metadatas: List[Optional[Dict[str, Any]]],
+        embeddings: Optional[List[List[float]]] = None
+    ) -> None:
+        """
+        Upsert chunks into the global collection and their destination partitions.
+        
+        Chunks are embedded once (unless ``embeddings`` is given) and the same
+        vectors are written to every collection.
+        """
+        if not ids:
+            return
+        if embeddings is None:
+            embeddings = self.embeddings.embed_documents(list(texts))
+        # Chroma rejects empty metadata dicts
+        metadatas = [m or None for m in metadatas]
+        
+        self.vector_store._collection.upsert(
+            ids=ids,
+            embeddings=embeddings,
+            documents=texts,
+            metadatas=metadatas
+        )
+        
+        if self._partitioning:
+            for destination, rows in self._group_by_destination(ids, metadatas).items():
+                partition = self._get_partition(destination, create=True)
+                partition._collection.upsert(
+                    ids=[ids[i] for i in rows],
+                    embeddings=[embeddings[i] for i in rows],
+                    documents=[texts[i] for i in rows],
+                    metadatas=[metadatas[i] for i in rows]
+                )
+        
+        self.invalidate_cache()
+    
     def delete_documents(self, ids: List[str]) -> None:
         """
         Delete documents from the vector store.
@@ -215,7 +573,110 @@ class TravelRetriever:
             ids: List of document IDs to delete
         """
         logger.info(f"Deleting {len(ids)} documents")
+        if not ids:
+            return
+        
+        if self._partitioning:
+            existing = self.vector_store.get(ids=ids, include=["metadatas"])
+            grouped = self._group_by_destination(existing["ids"], existing["metadatas"])
+            for destination, rows in grouped.items():
+                partition = self._get_partition(destination)
+                if partition is not None:
+                    partition.delete(ids=[existing["ids"][i] for i in rows])
+        
         self.vector_store.delete(ids=ids)
+        self.invalidate_cache()
+    
+    @staticmethod
+    def _group_by_destination(
+        ids: List[str],
+        metadatas: List[Optional[Dict[str, Any]]]
+    ) -> Dict[str, List[int]]:
+        """Group row indexes by their ``destination`` metadata (rows without one are skipped)."""
+        grouped: Dict[str, List[int]] = {}
+        for i, metadata in enumerate(metadatas[:len(ids)]):
+            destination = (metadata or {}).get("destination")
+            if destination:
+                grouped.setdefault(str(destination), []).append(i)
+        return grouped
+    
+    def _partition_name(self, destination: str) -> str:
+        """Chroma collection name for a destination partition (case-insensitive)."""
+        base = self.config.get("collection_name", "travel_knowledge")
+        slug = re.sub(r"[^a-z0-9]+", "-", destination.lower()).strip("-") or "unknown"
+        name = f"{base}__dest__{slug}"
+        # Chroma limits collection names to 63 characters
+        if len(name) > 63:
+            name = f"{base[:32]}__dest__{hashlib.sha256(slug.encode()).hexdigest()[:16]}"
+        return name
+    
+    def _get_partition(self, destination: str, create: bool = False) -> Optional[Chroma]:
+        """
+        Get the partition collection for a destination.
+        
+        Args:
+            destination: Destination name
+            create: Create the partition if it doesn't exist yet
+        
+        Returns:
+            The partition, or None if it doesn't exist and ``create`` is False
+        """
+        name = self._partition_name(destination)
+        partition = self._partitions.get(name)
+        if partition is not None:
+            return partition
+        
+        client = self.vector_store._client
+        if not create:
+            try:
+                client.get_collection(name)
+            except Exception:
+                return None
+        
+        partition = Chroma(
+            client=client,
+            collection_name=name,
+            embedding_function=self._embeddings
+        )
+        self._partitions[name] = partition
+        return partition
+    
+    def rebuild_partitions(self, batch_size: int = 500) -> int:
+        """
+        Backfill destination partitions from the global collection.
+        
+        Stored embeddings are copied as-is, so nothing is re-embedded. Needed
+        once for collections built before partitioning was enabled.
+        
+        Args:
+            batch_size: Number of chunks read from the global collection per batch
+        
+        Returns:
+            Number of chunks written to partitions
+        """
+        collection = self.vector_store._collection
+        total = collection.count()
+        written = 0
+        
+        for offset in range(0, total, batch_size):
+            batch = collection.get(
+                include=["embeddings", "documents", "metadatas"],
+                limit=batch_size,
+                offset=offset
+            )
+            ids = batch["ids"]
+            for destination, rows in self._group_by_destination(ids, batch["metadatas"]).items():
+                self._get_partition(destination, create=True)._collection.upsert(
+                    ids=[ids[i] for i in rows],
+                    embeddings=[batch["embeddings"][i] for i in rows],
+                    documents=[batch["documents"][i] for i in rows],
+                    metadatas=[batch["metadatas"][i] for i in rows]
+                )
+                written += len(rows)
+        
+        self.invalidate_cache()
+        logger.info(f"Rebuilt destination partitions from {total} chunks ({written} partitioned)")
+        return written
     
     def _build_metadata_filter(self, filters: Dict[str, Any]) -> Dict[str, Any]:
         """
@@ -227,22 +688,24 @@ class TravelRetriever:
         Returns:
             Formatted filter dict
         """
-        # Convert filters to vector store format
-        # This depends on your vector store backend
-        
-        formatted_filter = {}
+        # Chroma accepts a single top-level operator, so multiple
+        # conditions are combined with $and
+        conditions = []
         
         if "destination" in filters and filters["destination"]:
-            formatted_filter["destination"] = filters["destination"]
+            conditions.append({"destination": filters["destination"]})
         
         if "category" in filters and filters["category"]:
-            formatted_filter["category"] = filters["category"]
+            conditions.append({"category": filters["category"]})
         
         if "interests" in filters and filters["interests"]:
-            # Handle list of interests
-            formatted_filter["interests"] = {"$in": filters["interests"]}
+            # Interests are stored as a list; match chunks tagged with any of them
+            interests = [{"interests": {"$contains": i}} for i in filters["interests"]]
+            conditions.append(interests[0] if len(interests) == 1 else {"$or": interests})
         
-        return formatted_filter if formatted_filter else None
+        if not conditions:
+            return None
+        return conditions[0] if len(conditions) == 1 else {"$and": conditions}
     
     async def hybrid_search(
         self,
@@ -270,11 +733,18 @@ class TravelRetriever:
     def get_stats(self) -> Dict[str, Any]:
         """Get statistics about the vector store."""
         
+        if not self.is_ready:
+            return {
+                "loaded": False,
+                "embedding_model": self.config.get("embedding_model")
+            }
+        
         try:
             collection = self.vector_store._collection
             count = collection.count()
             
             return {
+                "loaded": True,
                 "total_documents": count,
                 "collection_name": self.vector_store._collection.name,
                 "embedding_model": self.config.get("embedding_model")
@@ -0,0 +1,242 @@
+"""
+Process-wide Amadeus OAuth2 token manager.
+
+Every Amadeus tool shares one token instead of fetching its own. Refreshes
+are single-flight (concurrent callers on an expired token await the same
+auth request) and start in the background shortly before expiry, so
+requests rarely wait for the auth round trip.
+
+With a Redis URL configured, tokens are also shared between worker
+processes: a worker first looks for a fresh token in Redis, and only the
+worker holding the refresh lock calls the auth endpoint.
+"""
+import asyncio
+import json
+import logging
+import os
+import time
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+
+import httpx
+
+logger = logging.getLogger(__name__)
+
+AMADEUS_AUTH_URL = "https://test.api.amadeus.com/v1/security/oauth2/token"
+
+RequestFn = Callable[..., Awaitable[httpx.Response]]
+
+
+class AmadeusTokenManager:
+    """
+    Shared, single-flight Amadeus access tokens.
+
+    Args:
+        refresh_ahead: Seconds before expiry to start a background refresh
+        expiry_margin: Seconds before expiry after which a token is no longer used
+        redis_url: Optional Redis URL for sharing tokens across workers
+    """
+
+    KEY_PREFIX = "amadeus:token"
+    LOCK_TTL_MS = 10000
+    LOCK_WAIT = 3.0  # Seconds to wait for another worker's refresh
+
+    def __init__(
+        self,
+        refresh_ahead: float = 300,
+        expiry_margin: float = 30,
+        redis_url: Optional[str] = None
+    ):
+        self.refresh_ahead = refresh_ahead
+        self.expiry_margin = expiry_margin
+        self._redis = _connect_redis(redis_url) if redis_url else None
+        self._token: Optional[str] = None
+        self._expires_at = 0.0  # time.time() based
+        self._refreshing: Optional[asyncio.Task] = None
+
+        self.fetches = 0
+
+    @staticmethod
+    def credentials() -> Tuple[str, str]:
+        """
+        Raises:
+            ValueError: If the Amadeus credentials are not configured
+        """
+        api_key = os.environ.get("AMADEUS_API_KEY")
+        api_secret = os.environ.get("AMADEUS_API_SECRET")
+        if not api_key or not api_secret:
+            raise ValueError("Amadeus API credentials not found in environment variables")
+        return api_key, api_secret
+
+    def store(self, token: str, expires_in: float) -> None:
+        """Remember a token for ``expires_in`` seconds (also used to seed tests)."""
+        self._token = token
+        self._expires_at = time.time() + expires_in
+
+    def clear(self) -> None:
+        self._token = None
+        self._expires_at = 0.0
+        self._refreshing = None
+
+    async def get_token(self, make_request: RequestFn) -> str:
+        """
+        A valid access token, refreshing it if needed.
+
+        Args:
+            make_request: The calling tool's ``_make_request``, used for the auth call
+
+        Returns:
+            Bearer token
+
+        Raises:
+            ValueError: If credentials are missing
+            httpx.HTTPStatusError: If the auth request fails
+        """
+        now = time.time()
+        if self._token and now < self._expires_at - self.expiry_margin:
+            if now >= self._expires_at - self.refresh_ahead:
+                # Still valid: refresh in the background, don't make the caller wait
+                self._refresh(make_request)
+            return self._token
+
+        return await asyncio.shield(self._refresh(make_request))
+
+    def _refresh(self, make_request: RequestFn) -> asyncio.Task:
+        """Start a refresh unless one is already running (single flight)."""
+        running = self._refreshing
+        if running is not None and not running.done() and running.get_loop() is asyncio.get_running_loop():
+            return running
+
+        task = asyncio.create_task(self._fetch(make_request))
+        self._refreshing = task
+
+        def finished(done: asyncio.Task) -> None:
+            if self._refreshing is done:
+                self._refreshing = None
+            if not done.cancelled() and done.exception() is not None:
+                logger.warning(f"Amadeus token refresh failed: {done.exception()}")
+
+        task.add_done_callback(finished)
+        return task
+
+    async def _fetch(self, make_request: RequestFn) -> str:
+        """Get a fresh token from Redis (another worker's) or the auth endpoint."""
+        client_id, client_secret = self.credentials()
+        shared = await self._read_shared(client_id)
+        if shared:
+            return shared
+
+        locked = await self._lock_shared(client_id)
+        if locked is False:
+            # Another worker is refreshing; wait for its token
+            waited = 0.0
+            while waited < self.LOCK_WAIT:
+                await asyncio.sleep(0.1)
+                waited += 0.1
+                shared = await self._read_shared(client_id)
+                if shared:
+                    return shared
+
+        try:
+            self.fetches += 1
+            response = await make_request(
+                "POST",
+                AMADEUS_AUTH_URL,
+                data={
+                    "grant_type": "client_credentials",
+                    "client_id": client_id,
+                    "client_secret": client_secret,
+                },
+                headers={"Content-Type": "application/x-www-form-urlencoded"},
+            )
+            token_data = response.json()
+            token = token_data["access_token"]
+            expires_in = token_data.get("expires_in", 1800)
+            self.store(token, expires_in)
+            await self._write_shared(client_id, token, time.time() + expires_in)
+            return token
+        finally:
+            if locked:
+                await self._unlock_shared(client_id)
+
+    # ------------------------------------------------------------------
+    # Redis sharing (every failure falls back to the local token)
+    # ------------------------------------------------------------------
+
+    def _key(self, client_id: str) -> str:
+        return f"{self.KEY_PREFIX}:{client_id}"
+
+    async def _read_shared(self, client_id: str) -> Optional[str]:
+        if self._redis is None:
+            return None
+        try:
+            raw = await self._redis.get(self._key(client_id))
+        except Exception as e:
+            logger.warning(f"Reading shared Amadeus token failed: {e}")
+            return None
+        if not raw:
+            return None
+        entry: Dict[str, Any] = json.loads(raw)
+        if time.time() >= entry["expires_at"] - self.refresh_ahead:
+            return None
+        self._token = entry["token"]
+        self._expires_at = entry["expires_at"]
+        return self._token
+
+    async def _write_shared(self, client_id: str, token: str, expires_at: float) -> None:
+        if self._redis is None:
+            return
+        try:
+            await self._redis.set(
+                self._key(client_id),
+                json.dumps({"token": token, "expires_at": expires_at}),
+                px=max(int((expires_at - time.time()) * 1000), 1),
+            )
+        except Exception as e:
+            logger.warning(f"Sharing Amadeus token failed: {e}")
+
+    async def _lock_shared(self, client_id: str) -> Optional[bool]:
+        """
+        Returns:
+            True if this worker holds the refresh lock, False if another does,
+            None if there is no Redis to coordinate through
+        """
+        if self._redis is None:
+            return None
+        try:
+            return bool(await self._redis.set(f"{self._key(client_id)}:lock", "1", nx=True, px=self.LOCK_TTL_MS))
+        except Exception as e:
+            logger.warning(f"Amadeus token lock failed: {e}")
+            return None
+
+    async def _unlock_shared(self, client_id: str) -> None:
+        try:
+            await self._redis.delete(f"{self._key(client_id)}:lock")
+        except Exception as e:
+            logger.warning(f"Amadeus token unlock failed: {e}")
+
+
+def _connect_redis(url: str):
+    try:
+        import redis.asyncio as redis
+    except ImportError:
+        logger.warning("redis is not installed; Amadeus tokens are shared per process only")
+        return None
+    return redis.from_url(url)
+
+
+_token_manager: Optional[AmadeusTokenManager] = None
+
+
+def configure_amadeus_token_manager(**settings) -> AmadeusTokenManager:
+    """Replace the shared token manager (e.g. to share tokens through Redis)."""
+    global _token_manager
+    _token_manager = AmadeusTokenManager(**settings)
+    return _token_manager
+
+
+def get_amadeus_token_manager() -> AmadeusTokenManager:
+    """Process-wide token manager used by all Amadeus tools."""
+    global _token_manager
+    if _token_manager is None:
+        _token_manager = AmadeusTokenManager()
+    return _token_manager
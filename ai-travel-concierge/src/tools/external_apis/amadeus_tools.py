@@ -4,58 +4,44 @@ Amadeus API tools for flight and hotel searches.
 Amadeus provides comprehensive travel data including flights, hotels, and more.
 Test environment: 2,000-10,000 calls/month per endpoint (free).
 """
-from typing import Dict, Any, Optional, List
-from pydantic import BaseModel, Field, PrivateAttr
-from datetime import datetime, timedelta
-import os
+import asyncio
+import logging
+from datetime import date, timedelta
+from typing import Dict, Any, Optional, List, ClassVar, Tuple
+from pydantic import BaseModel, Field
 
+from src.utils.reference_store import HotelReferenceStore
+
+from .amadeus_auth import AMADEUS_AUTH_URL, get_amadeus_token_manager
 from .base import BaseTravelAPITool
 
+logger = logging.getLogger(__name__)
+
 
 class AmadeusAuthMixin:
     """Mixin for Amadeus OAuth2 authentication."""
 
-    AMADEUS_AUTH_URL = "https://test.api.amadeus.com/v1/security/oauth2/token"
+    AMADEUS_AUTH_URL = AMADEUS_AUTH_URL
     AMADEUS_BASE_URL = "https://test.api.amadeus.com"
 
     async def _get_access_token(self) -> str:
-        """Get or refresh Amadeus OAuth2 access token."""
-        # Read token from __pydantic_private__ safely
-        token = self.__pydantic_private__.get("_access_token")
-        expiry = self.__pydantic_private__.get("_token_expiry")
-
-        if token and expiry and datetime.now() < expiry:
-            return token
-
-        api_key = os.environ.get("AMADEUS_API_KEY")
-        api_secret = os.environ.get("AMADEUS_API_SECRET")
-
-        if not api_key or not api_secret:
-            raise ValueError("Amadeus API credentials not found in environment variables")
-
-        response = await self._make_request(
-            "POST",
-            self.AMADEUS_AUTH_URL,
-            data={
-                "grant_type": "client_credentials",
-                "client_id": api_key,
-                "client_secret": api_secret,
-            },
-            headers={"Content-Type": "application/x-www-form-urlencoded"},
-        )
-
-        token_data = response.json()
-        new_token = token_data["access_token"]
-        expires_in = token_data.get("expires_in", 1800) - 300
-        new_expiry = datetime.now() + timedelta(seconds=expires_in)
-
-        self.__pydantic_private__["_access_token"] = new_token
-        self.__pydantic_private__["_token_expiry"] = new_expiry
-
-        return new_token
-
-    async def _make_amadeus_request(self, method: str, endpoint: str, **kwargs):
-        """Make authenticated request to Amadeus API."""
+        """Get the shared Amadeus OAuth2 access token, refreshing it if needed."""
+        return await get_amadeus_token_manager().get_token(self._make_request)
+
+    async def _acquire_rate_limit(self) -> bool:
+        # One call can make several upstream requests (hotel list, offer
+        # chunks, flexible dates); each takes its own slot in _make_amadeus_request
+        return True
+
+    async def _make_amadeus_request(self, method: str, endpoint: str, *, acquire: bool = True, **kwargs):
+        """
+        Make authenticated request to Amadeus API.
+
+        Takes a rate-limit slot first, unless the caller already holds one
+        (``acquire=False``), so direct ``_call_api`` calls are limited too.
+        """
+        if acquire:
+            await self._rate_limiter.acquire_with_retry(self.api_name, max_retries=self.max_retries)
         token = await self._get_access_token()
 
         if "headers" not in kwargs:
@@ -75,6 +61,10 @@ class FlightSearchInput(BaseModel):
     adults: int = Field(default=1, description="Number of adult passengers (1-9)")
     travel_class: str = Field(default="ECONOMY", description="Travel class: ECONOMY, PREMIUM_ECONOMY, BUSINESS, or FIRST")
     max_results: int = Field(default=5, description="Maximum number of results (1-250)")
+    flexible_days: int = Field(
+        default=0,
+        description="To find the cheapest day, search this many consecutive days from departure_date (2-7); 0 for the exact date"
+    )
 
 
 class FlightSearchTool(AmadeusAuthMixin, BaseTravelAPITool):
@@ -84,17 +74,20 @@ class FlightSearchTool(AmadeusAuthMixin, BaseTravelAPITool):
     description: str = """Search for flight offers between cities.
     Input should include origin airport (e.g., 'JFK'), destination (e.g., 'LHR'),
     departure date (YYYY-MM-DD), and optionally return date for round trips.
-    Returns flight options with prices, duration, and airline details."""
+    Set flexible_days to compare several consecutive departure dates.
+    Returns flight options with prices, duration, and airline details,
+    plus a price calendar for flexible-date searches."""
 
     args_schema: type[BaseModel] = FlightSearchInput
 
     api_name: str = "amadeus"
     cache_prefix: str = "flight"
 
-    _access_token: Optional[str] = PrivateAttr(default=None)
-    _token_expiry: Optional[datetime] = PrivateAttr(default=None)
+    # Flexible-date searches fan out one search per day, a few at a time
+    MAX_FLEXIBLE_DAYS: ClassVar[int] = 7
+    MAX_CONCURRENT_DATES: ClassVar[int] = 3
 
-    async def _call_api(self, **params) -> Dict[str, Any]:
+    async def _search_date(self, params: Dict[str, Any]) -> Dict[str, Any]:
         api_params = {
             "originLocationCode": params.get("origin").upper(),
             "destinationLocationCode": params.get("destination").upper(),
@@ -116,7 +109,87 @@ class FlightSearchTool(AmadeusAuthMixin, BaseTravelAPITool):
 
         return response.json()
 
+    async def _search_date_window(self, params: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Search consecutive departure dates concurrently for a price calendar.
+
+        Dates already in the cache are not searched again; a date that fails
+        (e.g. no rate-limit slot freed up in time) is left without prices.
+        """
+        days = min(params["flexible_days"], self.MAX_FLEXIBLE_DAYS)
+        departure = date.fromisoformat(params["departure_date"])
+        return_date = date.fromisoformat(params["return_date"]) if params.get("return_date") else None
+
+        # Each day is searched as a plain single-date search, so its cache entry
+        # is shared with ordinary searches for that date
+        day_params = []
+        for offset in range(days):
+            shifted = {**params, "flexible_days": 0, "departure_date": (departure + timedelta(days=offset)).isoformat()}
+            if return_date:
+                # Keep the trip length when shifting the outbound date
+                shifted["return_date"] = (return_date + timedelta(days=offset)).isoformat()
+            day_params.append(shifted)
+
+        semaphore = asyncio.Semaphore(self.MAX_CONCURRENT_DATES)
+
+        async def search(day: Dict[str, Any]) -> Dict[str, Any]:
+            async with semaphore:
+                cached = await self._check_cache(**day)
+                if cached:
+                    return cached["data"]
+                normalized = self._normalize_response(await self._search_date(day))
+                await self._save_cache(normalized, **day)
+                return normalized
+
+        results = await asyncio.gather(*(search(day) for day in day_params), return_exceptions=True)
+
+        dates = []
+        for day, result in zip(day_params, results):
+            if isinstance(result, Exception):
+                logger.warning(f"Flexible flight search for {day['departure_date']} failed: {result}")
+                dates.append({"date": day["departure_date"], "result": None})
+            else:
+                dates.append({"date": day["departure_date"], "result": result})
+        if all(d["result"] is None for d in dates):
+            raise results[0]
+        return {"flexible": True, "dates": dates}
+
+    async def _call_api(self, **params) -> Dict[str, Any]:
+        if params.get("flexible_days", 0) > 1:
+            return await self._search_date_window(params)
+        return await self._search_date(params)
+
+    @staticmethod
+    def _price_calendar(dates: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """Cheapest fare per date, plus the full results of the cheapest date."""
+        calendar = []
+        best = None
+        for entry in dates:
+            result = entry["result"]
+            prices = [f["price"] for f in (result or {}).get("flights", [])]
+            cheapest = min(prices) if prices else None
+            calendar.append({
+                "date": entry["date"],
+                "cheapest_price": cheapest,
+                "currency": result["flights"][0].get("currency", "USD") if prices else None,
+                "count": len(prices),
+            })
+            if cheapest is not None and (best is None or cheapest < best[0]):
+                best = (cheapest, entry["date"], result)
+
+        cheapest_day = best[2] if best else {}
+        return {
+            "flights": cheapest_day.get("flights", []),
+            "count": cheapest_day.get("count", 0),
+            "dictionaries": cheapest_day.get("dictionaries", {}),
+            "calendar": calendar,
+            "cheapest_date": best[1] if best else None,
+        }
+
     def _normalize_response(self, raw_data: Dict[str, Any]) -> Dict[str, Any]:
+        if raw_data.get("flexible"):
+            return self._price_calendar(raw_data["dates"])
+
         offers = raw_data.get("data", [])
         dictionaries = raw_data.get("dictionaries", {})
 
@@ -174,7 +247,7 @@ class HotelSearchInput(BaseModel):
     check_out: str = Field(description="Check-out date (YYYY-MM-DD)")
     adults: int = Field(default=1, description="Number of adults (1-9)")
     radius: int = Field(default=5, description="Search radius in km (0-300)")
-    max_results: int = Field(default=10, description="Maximum number of results")
+    max_results: int = Field(default=10, description="Maximum number of results (1-50)")
 
 
 class HotelSearchTool(AmadeusAuthMixin, BaseTravelAPITool):
@@ -191,20 +264,25 @@ class HotelSearchTool(AmadeusAuthMixin, BaseTravelAPITool):
     api_name: str = "amadeus"
     cache_prefix: str = "hotel"
 
-    _access_token: Optional[str] = PrivateAttr(default=None)
-    _token_expiry: Optional[datetime] = PrivateAttr(default=None)
+    # The offers endpoint is queried in chunks of hotel IDs, a few at a time
+    OFFERS_CHUNK_SIZE: ClassVar[int] = 10
+    MAX_CONCURRENT_CHUNKS: ClassVar[int] = 3
+    MAX_RESULTS: ClassVar[int] = 50
 
-    async def _call_api(self, **params) -> Dict[str, Any]:
-        city_code = params.get("city_code", "").upper()
-        check_in = params.get("check_in")
-        check_out = params.get("check_out")
-        adults = params.get("adults", 1)
-        radius = params.get("radius", 5)
-        max_results = params.get("max_results", 10)
+    # Long-lived hotel-by-city lists (class-level, shared across instances)
+    _reference_store: Optional[HotelReferenceStore] = None
+    _refresh_tasks: ClassVar[Dict[Tuple[str, int], asyncio.Task]] = {}
+
+    @classmethod
+    def set_reference_store(cls, store: Optional[HotelReferenceStore]):
+        """Set the shared hotel reference store for all instances."""
+        cls._reference_store = store
 
+    async def _fetch_city_hotel_ids(self, city_code: str, radius: int, acquire: bool = True) -> List[str]:
         list_response = await self._make_amadeus_request(
             "GET",
             "/v1/reference-data/locations/hotels/by-city",
+            acquire=acquire,
             params={
                 "cityCode": city_code,
                 "radius": radius,
@@ -212,32 +290,120 @@ class HotelSearchTool(AmadeusAuthMixin, BaseTravelAPITool):
                 "hotelSource": "ALL",
             },
         )
+        hotel_ids = [h.get("hotelId") for h in list_response.json().get("data", []) if h.get("hotelId")]
+        if self._reference_store is not None:
+            self._reference_store.put(city_code, radius, hotel_ids)
+        return hotel_ids
+
+    async def _refresh_city_hotel_ids(self, city_code: str, radius: int) -> None:
+        # Refreshes spend real quota, so they never wait for a slot
+        if not await self._rate_limiter.acquire(self.api_name):
+            logger.debug(f"No Amadeus quota to refresh hotel list for {city_code}, keeping the stored one")
+            return
+        await self._fetch_city_hotel_ids(city_code, radius, acquire=False)
+
+    def _schedule_refresh(self, city_code: str, radius: int) -> None:
+        key = (city_code, radius)
+        running = self._refresh_tasks.get(key)
+        if running is not None and not running.done():
+            return
+
+        task = asyncio.create_task(self._refresh_city_hotel_ids(city_code, radius))
+        self._refresh_tasks[key] = task
+
+        def finished(done: asyncio.Task) -> None:
+            if self._refresh_tasks.get(key) is done:
+                del self._refresh_tasks[key]
+            if not done.cancelled() and done.exception() is not None:
+                logger.warning(f"Refreshing hotel list for {city_code} failed: {done.exception()}")
+
+        task.add_done_callback(finished)
+
+    async def _get_city_hotel_ids(self, city_code: str, radius: int) -> List[str]:
+        """Hotel IDs in a city, from the reference store when it has them."""
+        store = self._reference_store
+        if store is None:
+            return await self._fetch_city_hotel_ids(city_code, radius)
+
+        entry = store.get(city_code, radius)
+        if entry is not None:
+            hotel_ids, age = entry
+            if store.needs_refresh(age):
+                self._schedule_refresh(city_code, radius)
+            return hotel_ids
+
+        try:
+            return await self._fetch_city_hotel_ids(city_code, radius)
+        except Exception:
+            # An outdated list beats no hotel search at all
+            expired = store.get(city_code, radius, include_expired=True)
+            if expired is None:
+                raise
+            logger.warning(f"Hotel list for {city_code} unavailable, using a stored one")
+            return expired[0]
+
+    async def _fetch_offers_chunk(self, hotel_ids: List[str], offer_params: Dict[str, Any]) -> List[Dict[str, Any]]:
+        response = await self._make_amadeus_request(
+            "GET",
+            "/v3/shopping/hotel-offers",
+            params={"hotelIds": ",".join(hotel_ids), **offer_params},
+        )
+        return response.json().get("data", [])
 
-        list_data = list_response.json()
-        hotel_list = list_data.get("data", [])
-
-        if not hotel_list:
-            return {"data": []}
+    @staticmethod
+    def _offer_price(hotel_data: Dict[str, Any]) -> float:
+        offers = hotel_data.get("offers") or [{}]
+        try:
+            return float(offers[0].get("price", {}).get("total"))
+        except (TypeError, ValueError):
+            return float("inf")
 
-        hotel_ids = [h.get("hotelId") for h in hotel_list[:max_results] if h.get("hotelId")]
+    async def _call_api(self, **params) -> Dict[str, Any]:
+        city_code = params.get("city_code", "").upper()
+        radius = params.get("radius", 5)
+        max_results = min(params.get("max_results", 10), self.MAX_RESULTS)
 
+        hotel_ids = (await self._get_city_hotel_ids(city_code, radius))[:max_results]
         if not hotel_ids:
             return {"data": []}
 
-        offers_response = await self._make_amadeus_request(
-            "GET",
-            "/v3/shopping/hotel-offers",
-            params={
-                "hotelIds": ",".join(hotel_ids[:10]),
-                "checkInDate": check_in,
-                "checkOutDate": check_out,
-                "adults": adults,
-                "bestRateOnly": "true",
-                "currency": "USD",
-            },
+        offer_params = {
+            "checkInDate": params.get("check_in"),
+            "checkOutDate": params.get("check_out"),
+            "adults": params.get("adults", 1),
+            "bestRateOnly": "true",
+            "currency": "USD",
+        }
+        chunks = [
+            hotel_ids[i:i + self.OFFERS_CHUNK_SIZE]
+            for i in range(0, len(hotel_ids), self.OFFERS_CHUNK_SIZE)
+        ]
+        semaphore = asyncio.Semaphore(self.MAX_CONCURRENT_CHUNKS)
+
+        async def fetch(chunk: List[str]) -> List[Dict[str, Any]]:
+            async with semaphore:
+                return await self._fetch_offers_chunk(chunk, offer_params)
+
+        results = await asyncio.gather(
+            *(fetch(chunk) for chunk in chunks),
+            return_exceptions=True
         )
 
-        return offers_response.json()
+        hotels: List[Dict[str, Any]] = []
+        errors = []
+        for result in results:
+            if isinstance(result, Exception):
+                errors.append(result)
+            else:
+                hotels.extend(result)
+        if errors:
+            if len(errors) == len(results):
+                raise errors[0]
+            logger.warning(f"{len(errors)} of {len(results)} hotel offer chunks failed for {city_code}: {errors[0]}")
+
+        # Cheapest first; hotels without a price go last
+        hotels.sort(key=self._offer_price)
+        return {"data": hotels[:max_results]}
 
     def _normalize_response(self, raw_data: Dict[str, Any]) -> Dict[str, Any]:
         hotels_data = raw_data.get("data", [])
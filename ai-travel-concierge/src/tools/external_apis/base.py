@@ -5,13 +5,15 @@ This module provides a common foundation for all travel API wrappers with
 integrated caching, rate limiting, error handling, and response normalization.
 """
 import asyncio
+import time
 from abc import ABC, abstractmethod
 from typing import Any, Dict, Optional, Type
-from pydantic import BaseModel, Field, ConfigDict
+from pydantic import BaseModel, Field, ConfigDict, ValidationError
 import httpx
 from tenacity import (
     retry,
     stop_after_attempt,
+    stop_any,
     wait_exponential,
     retry_if_exception_type,
 )
@@ -21,6 +23,15 @@ from langchain_core.callbacks import CallbackManagerForToolRun, AsyncCallbackMan
 
 from src.utils.cache_manager import CacheManager, CACHE_TTL
 from src.utils.rate_limiter import get_rate_limiter
+from src.utils import deadline
+from src.utils.circuit_breaker import CircuitOpenError, get_circuit_breaker
+from src.utils.hedging import get_hedge_policy, hedged
+
+
+def _stop_at_deadline(retry_state) -> bool:
+    """Stop retrying when less than the minimum backoff is left before the turn deadline."""
+    left = deadline.remaining()
+    return left is not None and left < 1
 
 
 class APIResponse(BaseModel):
@@ -30,10 +41,21 @@ class APIResponse(BaseModel):
     error: Optional[str] = None
     source: str
     cached: bool = False
+    degraded: bool = False  # Stale cached data served while the API is unavailable
+    status_code: Optional[int] = None  # Upstream HTTP status of a failed call
     
     model_config = ConfigDict(arbitrary_types_allowed=True)
 
 
+class ToolCallError(Exception):
+    """A failed ``execute`` call, for callers that raise instead of checking ``APIResponse``."""
+    
+    def __init__(self, response: APIResponse):
+        super().__init__(response.error or f"{response.source} call failed")
+        self.api_name = response.source
+        self.status_code = response.status_code
+
+
 class BaseTravelAPITool(BaseTool, ABC):
     """
     Base class for all travel API tools.
@@ -57,6 +79,8 @@ class BaseTravelAPITool(BaseTool, ABC):
     # HTTP client settings
     timeout: int = 30
     max_retries: int = 3
+    # Hedge slow GETs with a second attempt; only for idempotent, free APIs
+    hedge_requests: bool = False
     
     def __init__(self, cache_manager: Optional[CacheManager] = None, **kwargs):
         """
@@ -67,7 +91,7 @@ class BaseTravelAPITool(BaseTool, ABC):
             **kwargs: Additional arguments for BaseTool
         """
         super().__init__(**kwargs)
-        if cache_manager:
+        if cache_manager is not None:
             self.__class__._cache_manager = cache_manager
     
     @classmethod
@@ -85,6 +109,15 @@ class BaseTravelAPITool(BaseTool, ABC):
         Returns:
             Cache key string
         """
+        # Fill schema defaults and case-fold strings so equivalent calls
+        # ({"location": "Tokyo"} and {"location": "tokyo", "days": 7}) share a key
+        if self.args_schema is not None:
+            try:
+                params = self.args_schema(**params).model_dump(exclude_none=True)
+            except ValidationError:
+                pass
+        params = {k: v.strip().lower() if isinstance(v, str) else v for k, v in params.items()}
+
         key_parts = [self.cache_prefix]
         for k, v in sorted(params.items()):
             key_parts.append(f"{k}:{v}")
@@ -106,7 +139,7 @@ class BaseTravelAPITool(BaseTool, ABC):
         Returns:
             Cached result or None
         """
-        if not self._cache_manager:
+        if self._cache_manager is None:
             return None
         
         cache_key = self._get_cache_key(**params)
@@ -122,6 +155,20 @@ class BaseTravelAPITool(BaseTool, ABC):
         
         return None
     
+    async def _check_stale_cache(self, **params) -> Optional[Dict[str, Any]]:
+        """
+        Cached data for the parameters even if expired (degraded fallback).
+        
+        Args:
+            **params: Query parameters
+        
+        Returns:
+            Cached data or None
+        """
+        if self._cache_manager is None or not hasattr(self._cache_manager, "get_stale"):
+            return None
+        return await self._cache_manager.get_stale(self._get_cache_key(**params))
+    
     async def _save_cache(self, data: Dict[str, Any], **params) -> None:
         """
         Save result to cache.
@@ -130,7 +177,7 @@ class BaseTravelAPITool(BaseTool, ABC):
             data: Data to cache
             **params: Query parameters for key generation
         """
-        if not self._cache_manager:
+        if self._cache_manager is None:
             return
         
         cache_key = self._get_cache_key(**params)
@@ -145,7 +192,7 @@ class BaseTravelAPITool(BaseTool, ABC):
             True if permission acquired
         
         Raises:
-            ValueError: If daily quota exceeded
+            ValueError: If the API enforces its quota and it is exhausted
             TimeoutError: If max retries exceeded
         """
         return await self._rate_limiter.acquire_with_retry(
@@ -154,7 +201,7 @@ class BaseTravelAPITool(BaseTool, ABC):
         )
     
     @retry(
-        stop=stop_after_attempt(3),
+        stop=stop_any(stop_after_attempt(3), _stop_at_deadline),
         wait=wait_exponential(multiplier=1, min=1, max=10),
         retry=retry_if_exception_type((httpx.TimeoutException, httpx.NetworkError)),
     )
@@ -178,11 +225,37 @@ class BaseTravelAPITool(BaseTool, ABC):
         Raises:
             httpx.HTTPStatusError: For HTTP errors
             httpx.TimeoutException: For timeouts
+            DeadlineExceeded: If the turn deadline has already passed
+            CircuitOpenError: If the API's circuit breaker is open
         """
-        async with httpx.AsyncClient(timeout=self.timeout) as client:
-            response = await client.request(method, url, **kwargs)
-            response.raise_for_status()
-            return response
+        # Never wait longer than the turn has left
+        deadline.check_deadline(f"{self.api_name} request")
+        timeout = deadline.budget(self.timeout)
+        
+        # Fail fast while the API is known to be down or hanging
+        breaker = get_circuit_breaker(self.api_name)
+        breaker.before_call()
+        started = time.monotonic()
+        failed = False
+        try:
+            async with httpx.AsyncClient(timeout=timeout) as client:
+                async def attempt() -> httpx.Response:
+                    response = await client.request(method, url, **kwargs)
+                    response.raise_for_status()
+                    return response
+                
+                if self.hedge_requests and method.upper() == "GET":
+                    return await hedged(attempt, get_hedge_policy(self.api_name))
+                return await attempt()
+        except httpx.HTTPStatusError as e:
+            # Client errors (bad input, 404) say nothing about upstream health
+            failed = e.response.status_code >= 500 or e.response.status_code == 429
+            raise
+        except (httpx.TimeoutException, httpx.NetworkError):
+            failed = True
+            raise
+        finally:
+            breaker.record(failed, time.monotonic() - started)
     
     def _handle_error(self, error: Exception) -> APIResponse:
         """
@@ -195,6 +268,7 @@ class BaseTravelAPITool(BaseTool, ABC):
             APIResponse with error details
         """
         error_message = str(error)
+        status_code = None
         
         if isinstance(error, httpx.HTTPStatusError):
             status_code = error.response.status_code
@@ -217,8 +291,33 @@ class BaseTravelAPITool(BaseTool, ABC):
             error=error_message,
             source=self.api_name,
             cached=False,
+            status_code=status_code,
         )
     
+    def _lookup_local(self, **params) -> Optional[Dict[str, Any]]:
+        """
+        Answer a call from data bundled with the tool, without the API.
+        
+        Args:
+            **params: API-specific parameters
+        
+        Returns:
+            Raw data in the API's response shape, or None to call the API
+        """
+        return None
+    
+    def _normalize_local(self, raw_data: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Normalize data from ``_lookup_local``; bundled data may carry fewer fields than the API.
+        
+        Args:
+            raw_data: Output of ``_lookup_local``
+        
+        Returns:
+            Normalized response data
+        """
+        return self._normalize_response(raw_data)
+    
     @abstractmethod
     async def _call_api(self, **params) -> Dict[str, Any]:
         """
@@ -252,6 +351,9 @@ class BaseTravelAPITool(BaseTool, ABC):
         """
         Execute API call with caching and rate limiting.
         
+        While the API's circuit is open, expired cached data is returned
+        (flagged ``degraded``) if there is any; otherwise the call fails fast.
+        
         Args:
             **params: API-specific parameters
         
@@ -259,11 +361,24 @@ class BaseTravelAPITool(BaseTool, ABC):
             Standardized API response
         """
         try:
+            # Data bundled with the tool needs neither the cache nor the API
+            local_data = self._lookup_local(**params)
+            if local_data is not None:
+                return APIResponse(
+                    success=True,
+                    data=self._normalize_local(local_data),
+                    source=self.api_name,
+                    cached=False,
+                )
+            
             # Check cache first
             cached_result = await self._check_cache(**params)
             if cached_result:
                 return APIResponse(**cached_result)
             
+            # Don't spend rate-limit quota on a call the breaker would reject
+            get_circuit_breaker(self.api_name).raise_if_open()
+            
             # Acquire rate limit
             await self._acquire_rate_limit()
             
@@ -283,6 +398,18 @@ class BaseTravelAPITool(BaseTool, ABC):
                 cached=False,
             )
         
+        except CircuitOpenError as e:
+            stale = await self._check_stale_cache(**params)
+            if stale:
+                return APIResponse(
+                    success=True,
+                    data=stale,
+                    source=self.api_name,
+                    cached=True,
+                    degraded=True,
+                )
+            return self._handle_error(e)
+        
         except Exception as e:
             return self._handle_error(e)
     
@@ -2,11 +2,14 @@
 Country information API tool using REST Countries (no authentication required).
 
 REST Countries provides comprehensive country data with no API key needed.
-Free tier: Unlimited calls, 250+ countries.
+Free tier: Unlimited calls, 250+ countries. When a bundled snapshot is
+configured, lookups it can answer never reach the API.
 """
-from typing import Dict, Any, Optional, List, ClassVar
+from typing import Dict, Any, Optional, List, ClassVar, Tuple
 from pydantic import BaseModel, Field
 
+from src.utils.country_dataset import CountryDataset
+
 from .base import BaseTravelAPITool
 
 
@@ -25,6 +28,8 @@ class CountryInfoTool(BaseTravelAPITool):
     - Comprehensive country data
     - Search by name, code, or capital
     - Currency, language, timezone info
+    - Offline snapshot answers most lookups (fuzzy names included), the
+      API is only called for misses
     """
     
     name: str = "country_info"
@@ -36,9 +41,39 @@ class CountryInfoTool(BaseTravelAPITool):
     
     api_name: str = "rest_countries"
     cache_prefix: str = "country"
+    hedge_requests: bool = True
     
     BASE_URL: ClassVar[str] = "https://restcountries.com/v3.1"
     
+    # Bundled country snapshot (class-level, shared across instances)
+    _dataset: Optional[CountryDataset] = None
+    
+    # (raw field, normalized key) pairs a snapshot record may not carry
+    OPTIONAL_SNAPSHOT_FIELDS: ClassVar[Tuple[Tuple[str, str], ...]] = (
+        ("borders", "borders"),
+        ("coatOfArms", "coat_of_arms_url"),
+        ("maps", "google_maps_url"),
+    )
+    
+    @classmethod
+    def set_dataset(cls, dataset: Optional[CountryDataset]):
+        """Set the shared offline country snapshot for all instances."""
+        cls._dataset = dataset
+    
+    def _lookup_local(self, **params) -> Optional[Dict[str, Any]]:
+        """Snapshot record for the query, or None to ask the API."""
+        if self._dataset is None or not params.get("query"):
+            return None
+        return self._dataset.lookup(params["query"], params.get("search_by", "name"))
+    
+    def _normalize_local(self, raw_data: Dict[str, Any]) -> Dict[str, Any]:
+        """Normalize a snapshot record, leaving out fields it doesn't carry rather than reporting them empty."""
+        normalized = self._normalize_response(raw_data)
+        for raw_field, key in self.OPTIONAL_SNAPSHOT_FIELDS:
+            if raw_field not in raw_data:
+                normalized.pop(key, None)
+        return normalized
+    
     async def _call_api(self, **params) -> Dict[str, Any]:
         """
         Call REST Countries API.
@@ -6,11 +6,27 @@ Free tier: Unlimited calls, 30+ currencies.
 """
 from typing import Dict, Any, Optional, List, ClassVar
 from pydantic import BaseModel, Field
-from datetime import datetime, timedelta
+from datetime import date as Date, datetime, timedelta
+
+from src.utils.exchange_rates import ECB_TIMEZONE, RateHistory, RateTable, get_rate_history, get_rate_tables
 
 from .base import BaseTravelAPITool
 
 
+class FrankfurterHistoryMixin:
+    """Daily ECB rates from the shared local history, filled from Frankfurter's range endpoint."""
+
+    async def _rate_history(self, start: Date, end: Date) -> RateHistory:
+        """The shared rate history, with ``start``..``end`` filled in."""
+        async def fetch_range(low: Date, high: Date) -> Dict[str, Any]:
+            response = await self._make_request("GET", f"{self.BASE_URL}/{low.isoformat()}..{high.isoformat()}")
+            return response.json()
+        
+        history = get_rate_history()
+        await history.ensure(start, end, fetch_range)
+        return history
+
+
 class CurrencyInput(BaseModel):
     """Input schema for currency conversion tool."""
     amount: float = Field(description="Amount to convert")
@@ -19,7 +35,7 @@ class CurrencyInput(BaseModel):
     date: Optional[str] = Field(default=None, description="Historical date (YYYY-MM-DD), defaults to latest")
 
 
-class CurrencyConversionTool(BaseTravelAPITool):
+class CurrencyConversionTool(FrankfurterHistoryMixin, BaseTravelAPITool):
     """
     Convert currency using Frankfurter API (ECB exchange rates).
     
@@ -28,6 +44,10 @@ class CurrencyConversionTool(BaseTravelAPITool):
     - 30+ currencies supported
     - Latest and historical rates
     - Unlimited free usage
+    - One upstream call per ECB publication; pairs and amounts are
+      converted locally from the day's rate table
+    - Historical dates are answered from the local rate history, filled
+      a quarter at a time
     """
     
     name: str = "currency_conversion"
@@ -39,6 +59,7 @@ class CurrencyConversionTool(BaseTravelAPITool):
     
     api_name: str = "frankfurter"
     cache_prefix: str = "currency"
+    hedge_requests: bool = True
     
     BASE_URL: ClassVar[str] = "https://api.frankfurter.app"
     
@@ -52,7 +73,7 @@ class CurrencyConversionTool(BaseTravelAPITool):
     
     async def _call_api(self, **params) -> Dict[str, Any]:
         """
-        Call Frankfurter API.
+        Convert using the ECB rate table for the date.
         
         Args:
             amount: Amount to convert
@@ -61,7 +82,7 @@ class CurrencyConversionTool(BaseTravelAPITool):
             date: Optional historical date
         
         Returns:
-            Raw API response
+            Conversion in the shape of a Frankfurter response
         """
         amount = params.get("amount", 1.0)
         from_curr = params.get("from_currency", "USD").upper()
@@ -74,23 +95,53 @@ class CurrencyConversionTool(BaseTravelAPITool):
         if to_curr not in self.SUPPORTED_CURRENCIES:
             raise ValueError(f"Unsupported currency: {to_curr}")
         
-        # Build URL
-        if date:
-            # Historical rate
-            url = f"{self.BASE_URL}/{date}"
-        else:
-            # Latest rate
-            url = f"{self.BASE_URL}/latest"
-        
-        # API parameters
-        api_params = {
-            "amount": amount,
-            "from": from_curr,
-            "to": to_curr,
-        }
+        # Any pair and amount is local arithmetic on the day's rate table
+        table = await self._rate_table(date)
+        return table.convert(amount, from_curr, to_curr)
+    
+    async def _rate_table(self, date: Optional[str] = None) -> RateTable:
+        """
+        All ECB rates for a date (latest if None), fetched at most once per publication.
         
-        response = await self._make_request("GET", url, params=api_params)
-        return response.json()
+        Tables are also kept in the shared tool cache so other workers reuse them.
+        """
+        if date and date < datetime.now(ECB_TIMEZONE).date().isoformat():
+            return await self._historical_table(Date.fromisoformat(date))
+        
+        key = date or "latest"
+        
+        async def fetch() -> RateTable:
+            cache_key = f"{self.cache_prefix}:rates:{key}"
+            if self._cache_manager is not None:
+                cached = await self._cache_manager.get(cache_key)
+                if cached:
+                    return RateTable.from_response(cached)
+            
+            url = f"{self.BASE_URL}/{date}" if date else f"{self.BASE_URL}/latest"
+            response = await self._make_request("GET", url)
+            raw = response.json()
+            table = RateTable.from_response(raw)
+            if self._cache_manager is not None:
+                await self._cache_manager.set(cache_key, raw, ttl=table.ttl)
+            return table
+        
+        return await get_rate_tables().get(key, fetch)
+    
+    async def _historical_table(self, day: Date) -> RateTable:
+        """
+        Rates in effect on a past date, from the local rate history.
+        
+        The whole calendar quarter is filled at once (plus the week before,
+        in case the date follows a holiday), so nearby dates cost nothing.
+        """
+        first_month = 3 * ((day.month - 1) // 3) + 1
+        quarter_start = Date(day.year, first_month, 1)
+        next_quarter = Date(day.year + 1, 1, 1) if first_month == 10 else Date(day.year, first_month + 3, 1)
+        history = await self._rate_history(quarter_start - timedelta(days=7), next_quarter - timedelta(days=1))
+        table = history.table_on(day)
+        if table is None:
+            raise ValueError(f"No exchange rates available for {day.isoformat()}")
+        return table
     
     def _normalize_response(self, raw_data: Dict[str, Any]) -> Dict[str, Any]:
         """
@@ -125,6 +176,101 @@ class CurrencyConversionTool(BaseTravelAPITool):
         }
 
 
+class RateHistoryInput(BaseModel):
+    """Input schema for exchange rate history tool."""
+    from_currency: str = Field(description="Currency to track (e.g., JPY)")
+    to_currency: str = Field(description="Currency to price it in (e.g., USD)")
+    start_date: str = Field(description="First date (YYYY-MM-DD)")
+    end_date: Optional[str] = Field(default=None, description="Last date (YYYY-MM-DD), defaults to today")
+
+
+class ExchangeRateHistoryTool(FrankfurterHistoryMixin, BaseTravelAPITool):
+    """
+    Daily exchange-rate history between two currencies (ECB reference rates).
+    
+    Answers questions like "how has the yen moved this year" and gives the
+    average rate over a trip's dates for budget estimates. Served from the
+    local rate history; only dates not yet stored are fetched.
+    """
+    
+    name: str = "exchange_rate_history"
+    description: str = """Show how an exchange rate moved over a period.
+    Input should include from_currency, to_currency and start_date, optionally end_date.
+    Returns daily rates with the change, range and average over the period."""
+    
+    args_schema: type[BaseModel] = RateHistoryInput
+    
+    api_name: str = "frankfurter"
+    cache_prefix: str = "currency_history"
+    hedge_requests: bool = True
+    
+    BASE_URL: ClassVar[str] = "https://api.frankfurter.app"
+    
+    async def _call_api(self, **params) -> Dict[str, Any]:
+        """
+        Daily rates for the period from the local rate history.
+        
+        Args:
+            from_currency: Currency to track
+            to_currency: Currency to price it in
+            start_date: First date
+            end_date: Optional last date
+        
+        Returns:
+            Currencies, period and (date, rate) series
+        """
+        from_curr = params.get("from_currency", "").upper()
+        to_curr = params.get("to_currency", "").upper()
+        for code in (from_curr, to_curr):
+            if code not in CurrencyConversionTool.SUPPORTED_CURRENCIES:
+                raise ValueError(f"Unsupported currency: {code}")
+        
+        start = Date.fromisoformat(params["start_date"])
+        end = Date.fromisoformat(params["end_date"]) if params.get("end_date") else datetime.now(ECB_TIMEZONE).date()
+        if start > end:
+            raise ValueError("start_date must not be after end_date")
+        
+        history = await self._rate_history(start, end)
+        return {
+            "from": from_curr,
+            "to": to_curr,
+            "start_date": start.isoformat(),
+            "end_date": end.isoformat(),
+            "series": history.series(from_curr, to_curr, start, end),
+        }
+    
+    def _normalize_response(self, raw_data: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Summarize the series for the period.
+        
+        Args:
+            raw_data: Output of ``_call_api``
+        
+        Returns:
+            Daily rates plus first/last/min/max/average rate and change
+        """
+        series = raw_data.get("series", [])
+        rates = [rate for _, rate in series]
+        summary: Dict[str, Any] = {
+            "from_currency": raw_data.get("from"),
+            "to_currency": raw_data.get("to"),
+            "start_date": raw_data.get("start_date"),
+            "end_date": raw_data.get("end_date"),
+            "rates": [{"date": day, "rate": round(rate, 6)} for day, rate in series],
+            "count": len(series),
+        }
+        if rates:
+            summary.update({
+                "first_rate": round(rates[0], 6),
+                "last_rate": round(rates[-1], 6),
+                "min_rate": round(min(rates), 6),
+                "max_rate": round(max(rates), 6),
+                "average_rate": round(sum(rates) / len(rates), 6),
+                "change_percent": round((rates[-1] / rates[0] - 1) * 100, 2),
+            })
+        return summary
+
+
 class CurrencyListTool(BaseTravelAPITool):
     """
     List all available currencies from Frankfurter API.
@@ -138,6 +284,7 @@ class CurrencyListTool(BaseTravelAPITool):
     
     api_name: str = "frankfurter"
     cache_prefix: str = "currency_list"
+    hedge_requests: bool = True
     
     BASE_URL: ClassVar[str] = "https://api.frankfurter.app"
     
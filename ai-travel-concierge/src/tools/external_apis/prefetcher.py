@@ -0,0 +1,186 @@
+"""
+Speculative prefetch of likely follow-up tool calls.
+
+Once a conversation has a destination and a start date, the next questions
+are predictable (weather, country facts, visa rules). After a turn
+completes, the prefetcher warms the shared tool cache for those calls in
+the background so the follow-up turn skips the API round trip.
+
+Every speculative call goes through ``RateLimiter.acquire_speculative``,
+which only grants slots from each API's prefetch share of its quota; APIs
+with a zero share (Amadeus, Unsplash) are never called speculatively.
+"""
+import asyncio
+import logging
+from typing import Any, Dict, List, Optional, Tuple
+
+import httpx
+
+from src.tools.external_apis.base import BaseTravelAPITool
+from src.tools.validation.entity_extractor import extract_passport_country
+from src.utils.circuit_breaker import OPEN, get_circuit_breaker
+from src.utils.rate_limiter import RateLimiter, get_rate_limiter
+
+logger = logging.getLogger(__name__)
+
+
+def find_passport_country(messages: List[Dict[str, Any]]) -> Optional[str]:
+    """ISO-2 passport country the user stated earlier in the conversation, if any."""
+    for message in reversed(messages):
+        if message.get("role") != "user":
+            continue
+        passport = extract_passport_country(message.get("content", ""))
+        if passport:
+            return passport
+    return None
+
+
+class ToolPrefetcher:
+    """
+    Warm the tool cache for the calls a conversation is likely to make next.
+
+    Args:
+        tools: Tool name -> tool; ``weather``, ``country`` and ``visa`` are used
+        rate_limiter: Limiter granting speculative slots (defaults to the shared one)
+        max_calls: Maximum API calls per prefetch run
+    """
+
+    def __init__(
+        self,
+        tools: Dict[str, BaseTravelAPITool],
+        rate_limiter: Optional[RateLimiter] = None,
+        max_calls: int = 4
+    ):
+        self.tools = tools
+        self.rate_limiter = rate_limiter or get_rate_limiter()
+        self.max_calls = max_calls
+        # conversation_id -> running prefetch (also keeps the task referenced)
+        self._tasks: Dict[str, asyncio.Task] = {}
+
+        self.calls_made = 0
+        self.calls_skipped = 0
+
+    def predict(self, state: Dict[str, Any]) -> List[Tuple[str, Dict[str, Any]]]:
+        """
+        Likely next tool calls, most likely first.
+
+        Visa is predicted separately, once the destination's country code is
+        known from the country lookup.
+
+        Returns:
+            List of (tool name, params); empty until destination and start date are known
+        """
+        trip = state.get("trip_details") or {}
+        destination = trip.get("destination")
+        if not destination or not trip.get("start_date"):
+            return []
+        return [
+            ("weather", {"location": destination}),
+            ("country", {"query": destination, "search_by": "name"}),
+        ]
+
+    async def _warm(self, name: str, params: Dict[str, Any]) -> Tuple[Optional[Dict[str, Any]], bool]:
+        """
+        Cache one call's normalized result.
+
+        Returns:
+            (normalized result or None, whether an API call was made)
+        """
+        tool = self.tools.get(name)
+        if tool is None:
+            return None, False
+
+        local = tool._lookup_local(**params)
+        if local is not None:
+            return tool._normalize_local(local), False
+
+        cached = await tool._check_cache(**params)
+        if cached:
+            return cached["data"], False
+
+        if get_circuit_breaker(tool.api_name).state == OPEN:
+            self.calls_skipped += 1
+            logger.debug(f"Circuit for {tool.api_name} is open, skipping {name}")
+            return None, False
+
+        if not self.rate_limiter.acquire_speculative(tool.api_name):
+            self.calls_skipped += 1
+            logger.debug(f"No prefetch budget left for {tool.api_name}, skipping {name}")
+            return None, False
+
+        self.calls_made += 1
+        normalized = tool._normalize_response(await tool._call_api(**params))
+        await tool._save_cache(normalized, **params)
+        return normalized, True
+
+    async def warm(self, state: Dict[str, Any]) -> int:
+        """
+        Prefetch the predicted calls for a conversation state.
+
+        Returns:
+            Number of API calls made, including failed ones
+        """
+        budget = self.max_calls
+        country = None
+
+        for name, params in self.predict(state):
+            if budget <= 0:
+                break
+            try:
+                result, called = await self._warm(name, params)
+            except httpx.HTTPStatusError as e:
+                budget -= 1
+                if name != "country" or e.response.status_code != 404 or budget <= 0:
+                    logger.debug(f"Prefetch of {name} failed: {e}")
+                    continue
+                # Destinations are often capital cities rather than countries
+                try:
+                    result, called = await self._warm(name, {**params, "search_by": "capital"})
+                except Exception as retry_error:
+                    budget -= 1
+                    logger.debug(f"Prefetch of {name} by capital failed: {retry_error}")
+                    continue
+            except Exception as e:
+                budget -= 1
+                logger.debug(f"Prefetch of {name} failed: {e}")
+                continue
+            budget -= called
+            if name == "country":
+                country = result
+
+        passport = find_passport_country(state.get("messages", []))
+        to_country = (country or {}).get("codes", {}).get("iso_alpha_2")
+        if passport and to_country and passport != to_country and budget > 0:
+            try:
+                _, called = await self._warm("visa", {"from_country": passport, "to_country": to_country})
+                budget -= called
+            except Exception as e:
+                budget -= 1
+                logger.debug(f"Prefetch of visa failed: {e}")
+
+        return self.max_calls - budget
+
+    def schedule(self, state: Dict[str, Any]) -> Optional[asyncio.Task]:
+        """
+        Start a background prefetch for a conversation after its turn completes.
+
+        Returns:
+            The prefetch task, or None if there is nothing to prefetch or one
+            is already running for the conversation
+        """
+        conversation_id = state.get("conversation_id") or ""
+        running = self._tasks.get(conversation_id)
+        if (running is not None and not running.done()) or not self.predict(state):
+            return None
+
+        task = asyncio.create_task(self.warm(state))
+        self._tasks[conversation_id] = task
+
+        def finished(done: asyncio.Task) -> None:
+            if self._tasks.get(conversation_id) is done:
+                del self._tasks[conversation_id]
+            if not done.cancelled() and done.exception() is not None:
+                logger.warning(f"Prefetch failed: {done.exception()}")
+
+        task.add_done_callback(finished)
+        return task
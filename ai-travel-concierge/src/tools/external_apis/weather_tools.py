@@ -37,6 +37,7 @@ class WeatherForecastTool(BaseTravelAPITool):
     
     api_name: str = "open_meteo"
     cache_prefix: str = "weather"
+    hedge_requests: bool = True
     
     GEOCODING_URL: ClassVar[str] = "https://geocoding-api.open-meteo.com/v1/search"
     FORECAST_URL: ClassVar[str] = "https://api.open-meteo.com/v1/forecast"
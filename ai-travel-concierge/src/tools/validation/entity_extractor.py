@@ -0,0 +1,587 @@
+"""
+Deterministic entity extraction for tool arguments.
+
+Parses amounts, currency codes/names/symbols, rate-history periods, country
+names to ISO-2 codes and absolute/relative dates straight from the user's
+message, so the currency and visa nodes can call their tools without an LLM
+round trip.
+Extractors return None when a message is not fully understood; callers then
+fall back to LLM extraction.
+"""
+import re
+from datetime import date, timedelta
+from typing import Any, Collection, Dict, List, Optional, Tuple
+
+from src.tools.external_apis.currency_tools import CurrencyConversionTool
+from src.tools.external_apis.visa_tools import COUNTRY_CODES
+
+SUPPORTED_CURRENCIES = CurrencyConversionTool.SUPPORTED_CURRENCIES
+
+# Currency names and symbols -> ISO 4217 (multi-word names are matched first)
+CURRENCY_ALIASES: Dict[str, str] = {
+    "us dollar": "USD", "us dollars": "USD", "dollar": "USD", "dollars": "USD", "bucks": "USD",
+    "canadian dollar": "CAD", "canadian dollars": "CAD",
+    "australian dollar": "AUD", "australian dollars": "AUD",
+    "new zealand dollar": "NZD", "new zealand dollars": "NZD",
+    "hong kong dollar": "HKD", "hong kong dollars": "HKD",
+    "singapore dollar": "SGD", "singapore dollars": "SGD",
+    "euro": "EUR", "euros": "EUR",
+    "pound": "GBP", "pounds": "GBP", "pound sterling": "GBP", "sterling": "GBP",
+    "yen": "JPY", "yuan": "CNY", "renminbi": "CNY", "rmb": "CNY",
+    "swiss franc": "CHF", "swiss francs": "CHF", "franc": "CHF", "francs": "CHF",
+    "won": "KRW", "rupee": "INR", "rupees": "INR",
+    "mexican peso": "MXN", "mexican pesos": "MXN", "philippine peso": "PHP", "philippine pesos": "PHP",
+    "peso": "MXN", "pesos": "MXN",
+    "real": "BRL", "reais": "BRL", "rand": "ZAR",
+    "swedish krona": "SEK", "krona": "SEK", "kronor": "SEK",
+    "norwegian krone": "NOK", "danish krone": "DKK", "koruna": "CZK",
+    "zloty": "PLN", "forint": "HUF", "lei": "RON", "leu": "RON", "lev": "BGN",
+    "lira": "TRY", "shekel": "ILS", "shekels": "ILS", "ruble": "RUB", "rubles": "RUB",
+    "rouble": "RUB", "roubles": "RUB", "baht": "THB", "ringgit": "MYR", "rupiah": "IDR",
+}
+
+CURRENCY_SYMBOLS: Dict[str, str] = {
+    "US$": "USD", "C$": "CAD", "CA$": "CAD", "A$": "AUD", "AU$": "AUD", "NZ$": "NZD",
+    "HK$": "HKD", "S$": "SGD", "R$": "BRL", "$": "USD", "€": "EUR", "£": "GBP",
+    "¥": "JPY", "₹": "INR", "₩": "KRW", "฿": "THB", "₺": "TRY", "₪": "ILS", "₽": "RUB",
+}
+
+# Codes that are also ordinary words only count when written in capitals
+_AMBIGUOUS_CODES = {"TRY", "RON", "WON"}
+
+# Common short forms -> ISO-2, on top of visa_tools.COUNTRY_CODES
+COUNTRY_ALIASES: Dict[str, str] = {
+    "usa": "US", "america": "US", "united states of america": "US",
+    "uk": "GB", "britain": "GB", "great britain": "GB", "england": "GB",
+    "uae": "AE", "emirates": "AE", "korea": "KR", "nigeria": "NG",
+}
+
+# Nationalities name the traveler's (passport) country
+NATIONALITIES: Dict[str, str] = {
+    "american": "US", "british": "GB", "canadian": "CA", "australian": "AU",
+    "new zealander": "NZ", "french": "FR", "german": "DE", "italian": "IT",
+    "spanish": "ES", "dutch": "NL", "swiss": "CH", "austrian": "AT", "belgian": "BE",
+    "portuguese": "PT", "greek": "GR", "japanese": "JP", "chinese": "CN", "indian": "IN",
+    "singaporean": "SG", "thai": "TH", "south korean": "KR", "korean": "KR",
+    "malaysian": "MY", "indonesian": "ID", "filipino": "PH", "vietnamese": "VN",
+    "emirati": "AE", "saudi": "SA", "turkish": "TR", "israeli": "IL", "mexican": "MX",
+    "brazilian": "BR", "argentinian": "AR", "argentine": "AR", "chilean": "CL",
+    "south african": "ZA", "egyptian": "EG", "moroccan": "MA", "kenyan": "KE",
+    "fijian": "FJ", "nigerian": "NG",
+}
+# Plurals ("Indians", "Germans"); nationalities ending in -ese/-ish/-ch/-ss have none
+NATIONALITIES.update({
+    f"{name}s": code for name, code in list(NATIONALITIES.items())
+    if not name.endswith(("ese", "ish", "ch", "ss", "ai", "i"))
+})
+
+# Upper-case abbreviations that are ordinary words in lower case ("us")
+_CASE_SENSITIVE_COUNTRIES = {"US": "US", "USA": "US", "UK": "GB", "UAE": "AE"}
+
+MONTHS = {
+    name: i for i, names in enumerate([
+        ("january", "jan"), ("february", "feb"), ("march", "mar"), ("april", "apr"),
+        ("may",), ("june", "jun"), ("july", "jul"), ("august", "aug"),
+        ("september", "sep", "sept"), ("october", "oct"), ("november", "nov"), ("december", "dec"),
+    ], start=1) for name in names
+}
+WEEKDAYS = ["monday", "tuesday", "wednesday", "thursday", "friday", "saturday", "sunday"]
+
+
+def _alternation(words) -> str:
+    return "|".join(re.escape(w) for w in sorted(words, key=len, reverse=True))
+
+
+_MONTH_NAMES = _alternation(MONTHS)
+_DATE_PATTERNS: List[Tuple[re.Pattern, str]] = [
+    (re.compile(r"\b(\d{4})-(\d{1,2})-(\d{1,2})\b"), "ymd"),
+    (re.compile(r"\b(\d{1,2})[-/.](\d{1,2})[-/.](\d{4})\b"), "dmy"),
+    (re.compile(rf"\b(\d{{1,2}})(?:st|nd|rd|th)?\s+(?:of\s+)?({_MONTH_NAMES})\.?,?(?:\s+(\d{{4}}))?\b", re.I), "d_month_y"),
+    (re.compile(rf"\b({_MONTH_NAMES})\.?\s+(\d{{1,2}})(?:st|nd|rd|th)?(?:,?\s+(\d{{4}}))?\b", re.I), "month_d_y"),
+]
+_RELATIVE_PATTERNS: List[Tuple[re.Pattern, Any]] = [
+    (re.compile(r"\bday after tomorrow\b", re.I), lambda m, today: today + timedelta(days=2)),
+    (re.compile(r"\btoday\b|\btonight\b", re.I), lambda m, today: today),
+    (re.compile(r"\btomorrow\b", re.I), lambda m, today: today + timedelta(days=1)),
+    (re.compile(r"\byesterday\b", re.I), lambda m, today: today - timedelta(days=1)),
+    (re.compile(r"\bin (\d+) (day|week)s?\b", re.I),
+     lambda m, today: today + timedelta(days=int(m.group(1)) * (7 if m.group(2).lower() == "week" else 1))),
+    (re.compile(r"\b(\d+) (day|week)s? ago\b", re.I),
+     lambda m, today: today - timedelta(days=int(m.group(1)) * (7 if m.group(2).lower() == "week" else 1))),
+    (re.compile(r"\bnext week\b", re.I), lambda m, today: today + timedelta(days=7)),
+    (re.compile(rf"\b(?:next|this|on)\s+({'|'.join(WEEKDAYS)})\b", re.I),
+     lambda m, today: today + timedelta(days=(WEEKDAYS.index(m.group(1).lower()) - today.weekday() - 1) % 7 + 1)),
+]
+
+_SYMBOLS = _alternation(CURRENCY_SYMBOLS)
+_AMOUNT_PATTERN = re.compile(
+    rf"(?P<symbol>{_SYMBOLS})?\s*(?P<number>\d{{1,3}}(?:,\d{{3}})+(?:\.\d+)?|\d+(?:\.\d+)?)"
+    r"\s*(?P<multiplier>k|thousand|million|m)?\b",
+    re.I
+)
+_CURRENCY_PATTERN = re.compile(
+    rf"(?<![\w$])(?:(?P<symbol>{_SYMBOLS})|(?P<word>\b(?:{_alternation(CURRENCY_ALIASES)}|[a-z]{{3}})\b))",
+    re.I
+)
+_COUNTRY_NAMES = {name.lower(): code for name, code in COUNTRY_CODES.items()}
+_COUNTRY_NAMES.update(COUNTRY_ALIASES)
+_COUNTRY_NAMES.update(NATIONALITIES)
+_COUNTRY_PATTERN = re.compile(
+    rf"\b(?:{_alternation(_COUNTRY_NAMES)})\b|\b(?:{_alternation(_CASE_SENSITIVE_COUNTRIES)})\b",
+    re.I
+)
+
+
+def _date_spans(text: str, today: date) -> List[Tuple[int, int, date]]:
+    """All dates in the text as (start, end, date), in order of appearance."""
+    spans = []
+    taken = []
+
+    def overlaps(start: int, end: int) -> bool:
+        return any(start < e and end > s for s, e in taken)
+
+    for pattern, kind in _DATE_PATTERNS:
+        for m in pattern.finditer(text):
+            if overlaps(*m.span()):
+                continue
+            try:
+                if kind == "ymd":
+                    value = date(int(m.group(1)), int(m.group(2)), int(m.group(3)))
+                elif kind == "dmy":
+                    value = date(int(m.group(3)), int(m.group(2)), int(m.group(1)))
+                else:
+                    day, month, year = (
+                        (m.group(1), m.group(2), m.group(3)) if kind == "d_month_y"
+                        else (m.group(2), m.group(1), m.group(3))
+                    )
+                    month_number = MONTHS[month.lower()]
+                    if year:
+                        value = date(int(year), month_number, int(day))
+                    else:
+                        # No year: the next occurrence of that day
+                        value = date(today.year, month_number, int(day))
+                        if value < today:
+                            value = date(today.year + 1, month_number, int(day))
+            except ValueError:
+                continue
+            spans.append((m.start(), m.end(), value))
+            taken.append(m.span())
+
+    for pattern, resolve in _RELATIVE_PATTERNS:
+        for m in pattern.finditer(text):
+            if not overlaps(*m.span()):
+                spans.append((m.start(), m.end(), resolve(m, today)))
+                taken.append(m.span())
+
+    return sorted(spans)
+
+
+def extract_dates(text: str, today: Optional[date] = None) -> List[date]:
+    """
+    Extract absolute and relative dates in order of appearance.
+
+    Supports YYYY-MM-DD, DD-MM-YYYY (also with / or .), "14 June 2026",
+    "June 14", and relative forms like "tomorrow", "in 3 days", "next Friday".
+
+    Args:
+        text: User message
+        today: Reference date for relative expressions (defaults to today)
+
+    Returns:
+        List of dates
+    """
+    return [value for _, _, value in _date_spans(text, today or date.today())]
+
+
+def _amounts(text: str) -> List[Tuple[float, Optional[str]]]:
+    """Amounts outside dates as (amount, currency written next to it or None), in order."""
+    date_ranges = [(start, end) for start, end, _ in _date_spans(text, date.today())]
+    mentions = _currency_mentions(text)
+    amounts = []
+    for m in _AMOUNT_PATTERN.finditer(text):
+        start = m.start("number")
+        if any(s <= start < e for s, e in date_ranges):
+            continue
+        amount = float(m.group("number").replace(",", ""))
+        multiplier = (m.group("multiplier") or "").lower()
+        if multiplier in ("k", "thousand"):
+            amount *= 1_000
+        elif multiplier in ("m", "million"):
+            amount *= 1_000_000
+        end = m.end("multiplier") if multiplier else m.end("number")
+        # "€50", "200 EUR", "GBP 20"
+        if m.group("symbol"):
+            currency = CURRENCY_SYMBOLS[m.group("symbol").upper()]
+        else:
+            after = [code for cs, _, code in mentions if cs >= end and not text[end:cs].strip()]
+            before = [code for _, ce, code in mentions if ce <= start and not text[ce:start].strip()]
+            currency = (after or before or [None])[0]
+        amounts.append((amount, currency))
+    return amounts
+
+
+def _choose_amount(amounts: List[Tuple[float, Optional[str]]]) -> Tuple[Optional[float], Optional[str]]:
+    """The first amount next to a currency, else a lone amount, as (amount, its currency)."""
+    priced = [(amount, currency) for amount, currency in amounts if currency]
+    if priced:
+        return priced[0]
+    if len(amounts) == 1:
+        return amounts[0]
+    return None, None
+
+
+def extract_amount(text: str) -> Optional[float]:
+    """
+    Monetary amount in the text, ignoring numbers that are part of dates.
+
+    The first number written next to a currency code, name or symbol wins
+    ("I'll be there 3 days, convert 200 EUR" -> 200). A lone number is taken
+    as is; several numbers with none next to a currency are ambiguous.
+
+    Args:
+        text: User message
+
+    Returns:
+        The amount, or None if there is none or it is ambiguous
+    """
+    return _choose_amount(_amounts(text))[0]
+
+
+def _currency_mentions(text: str) -> List[Tuple[int, int, str]]:
+    """Currencies mentioned by code, name or symbol as (start, end, ISO 4217 code)."""
+    mentions = []
+    for m in _CURRENCY_PATTERN.finditer(text):
+        if m.group("symbol"):
+            code = CURRENCY_SYMBOLS[m.group("symbol").upper()]
+        else:
+            word = m.group("word")
+            code = CURRENCY_ALIASES.get(word.lower())
+            if code is None:
+                if word.upper() not in SUPPORTED_CURRENCIES:
+                    continue
+                if word.upper() in _AMBIGUOUS_CODES and not word.isupper():
+                    continue
+                code = word.upper()
+        mentions.append((m.start(), m.end(), code))
+    return mentions
+
+
+def extract_currencies(text: str) -> List[str]:
+    """ISO 4217 codes mentioned by code, name or symbol, in order (duplicates removed)."""
+    codes: List[str] = []
+    for _, _, code in _currency_mentions(text):
+        if code not in codes:
+            codes.append(code)
+    return codes
+
+
+def extract_currency_conversion(text: str, today: Optional[date] = None) -> Optional[Dict[str, Any]]:
+    """
+    Extract ``CurrencyConversionTool`` arguments from a message.
+
+    "convert 100 USD to EUR", "€50 in dollars", "how many yen is 20 pounds",
+    "USD to JPY rate on 15-01-2024". The currency written next to the amount
+    is the source; "how many/much <currency>" names the target.
+
+    Args:
+        text: User message
+        today: Reference date for relative dates
+
+    Returns:
+        Dict with amount, from_currency, to_currency (and date for past
+        dates), or None if the currencies, their direction or the amount
+        couldn't be identified
+    """
+    today = today or date.today()
+    currencies = extract_currencies(text)
+    if len(currencies) != 2:
+        return None
+    amounts = _amounts(text)
+    amount, amount_currency = _choose_amount(amounts)
+    if amounts and amount is None:
+        return None
+
+    # "how many yen is 100 dollars" names the target first
+    asked = re.search(r"\bhow (?:many|much)\s+", text, re.I)
+    target = next((code for start, _, code in _currency_mentions(text) if asked and start == asked.end()), None)
+
+    if amount_currency is not None:
+        if amount_currency == target:
+            # The amount's currency can't also be the one asked for
+            return None
+        from_currency = amount_currency
+        to_currency = currencies[1] if currencies[0] == from_currency else currencies[0]
+    elif target is not None:
+        to_currency = target
+        from_currency = currencies[1] if currencies[0] == to_currency else currencies[0]
+    else:
+        from_currency, to_currency = currencies
+
+    params: Dict[str, Any] = {
+        "amount": amount or 1.0,
+        "from_currency": from_currency,
+        "to_currency": to_currency,
+    }
+    past_dates = [d for d in extract_dates(text, today) if d < today]
+    if past_dates:
+        params["date"] = past_dates[0].isoformat()
+    return params
+
+
+_RATE_HISTORY_PATTERN = re.compile(
+    r"\b(?:moved?|movement|trend(?:ing|s)?|history|historical|changed?|fluctuat\w*|average)\b"
+    r"|\bover the (?:past|last)\b|\bsince\b",
+    re.I
+)
+_PERIOD_PATTERN = re.compile(r"\b(?:(this)|(?:last|past)(?:\s+(\d+))?)\s+(day|week|month|year)s?\b", re.I)
+_PERIOD_DAYS = {"day": 1, "week": 7, "month": 30, "year": 365}
+
+
+def is_rate_history_question(text: str) -> bool:
+    """Whether a currency message asks how a rate moved over a period rather than for a conversion."""
+    return bool(_RATE_HISTORY_PATTERN.search(text))
+
+
+def _looking_back(day: date, today: date) -> date:
+    """Move a future date to the same day a year earlier."""
+    if day <= today:
+        return day
+    try:
+        return day.replace(year=day.year - 1)
+    except ValueError:  # 29 February
+        return day.replace(year=day.year - 1, day=28)
+
+
+def extract_rate_history(text: str, today: Optional[date] = None) -> Optional[Dict[str, Any]]:
+    """
+    Extract ``ExchangeRateHistoryTool`` arguments from a message.
+
+    "how has the yen moved against the dollar this year", "USD to EUR over
+    the past 3 months", "average EUR to THB rate between 1 June 2025 and
+    14 June 2025".
+
+    Args:
+        text: User message
+        today: Reference date for the period
+
+    Returns:
+        Dict with from_currency, to_currency, start_date (and end_date when
+        one is given), or None if the currencies or period are unclear
+    """
+    today = today or date.today()
+    currencies = extract_currencies(text)
+    if len(currencies) != 2:
+        return None
+
+    params: Dict[str, Any] = {"from_currency": currencies[0], "to_currency": currencies[1]}
+    # a month-day without a year rolls forward in extract_dates; history looks back
+    dates = [_looking_back(d, today) for d in extract_dates(text, today) if d != today]
+    period = _PERIOD_PATTERN.search(text)
+    if dates:
+        params["start_date"] = dates[0].isoformat()
+        if len(dates) > 1:
+            params["end_date"] = dates[1].isoformat()
+    elif period:
+        unit = period.group(3).lower()
+        if period.group(1):
+            # "this year" / "this month" start at the beginning of the period
+            start = {
+                "year": today.replace(month=1, day=1),
+                "month": today.replace(day=1),
+                "week": today - timedelta(days=today.weekday()),
+                "day": today,
+            }[unit]
+        else:
+            start = today - timedelta(days=int(period.group(2) or 1) * _PERIOD_DAYS[unit])
+        params["start_date"] = start.isoformat()
+    else:
+        return None
+    return params
+
+
+def extract_countries(text: str) -> List[Tuple[str, str, int, int]]:
+    """
+    Countries mentioned in the text.
+
+    Returns:
+        List of (ISO-2 code, matched text, start, end) in order of appearance
+    """
+    found = []
+    for m in _COUNTRY_PATTERN.finditer(text):
+        word = m.group(0)
+        code = _CASE_SENSITIVE_COUNTRIES.get(word) or _COUNTRY_NAMES.get(word.lower())
+        if code is None:
+            # Lower-case "us"/"uk" etc. are ordinary words
+            continue
+        found.append((code, word, m.start(), m.end()))
+    return found
+
+
+def _is_origin(text: str, word: str, start: int, end: int) -> bool:
+    """Whether a country mention names the traveller's passport country."""
+    before = text[:start].lower()
+    after = text[end:].lower()
+    return bool(
+        re.search(r"\bfrom\s+(?:the\s+)?$", before)
+        or re.match(r"\s*(?:citizens?|nationals?|passports?|passport holders?|residents?)\b", after)
+        or re.search(r"\b(?:as an?|i am an?|i'm an?|citizen of|passport from)\s+$", before)
+        or word.lower() in NATIONALITIES
+    )
+
+
+def extract_passport_country(text: str) -> Optional[str]:
+    """
+    The traveller's passport country ("I'm a US citizen", "as an Indian"), if stated.
+
+    Returns:
+        ISO-2 code, or None
+    """
+    for code, word, start, end in extract_countries(text):
+        if _is_origin(text, word, start, end):
+            return code
+    return None
+
+
+def extract_visa_countries(text: str) -> Optional[Dict[str, str]]:
+    """
+    Extract ``VisaRequirementTool`` arguments (passport and destination country).
+
+    The passport country is a nationality ("as a US citizen", "Indians",
+    "UK passport holders") or a country after "from"; the destination is a
+    country after to/for/visit/enter, then one after "in" (which is often
+    where the traveller lives), or otherwise the remaining mention.
+
+    Args:
+        text: User message
+
+    Returns:
+        Dict with from_country and to_country, or None if either is unclear
+    """
+    mentions = extract_countries(text)
+    from_country = None
+    destinations: List[str] = []  # after to/for/visit/enter
+    weak_destinations: List[str] = []  # after "in"
+    unlabeled: List[str] = []
+
+    for code, word, start, end in mentions:
+        before = text[:start].lower()
+        if _is_origin(text, word, start, end) and from_country is None:
+            from_country = code
+        elif re.search(r"\b(?:to|for|visit|visiting|enter|entering|into)\s+(?:the\s+)?$", before):
+            destinations.append(code)
+        elif re.search(r"\bin\s+(?:the\s+)?$", before):
+            weak_destinations.append(code)
+        else:
+            unlabeled.append(code)
+
+    # Several candidates for the destination: let the LLM decide
+    candidates = list(dict.fromkeys(destinations or weak_destinations))
+    if len(candidates) > 1:
+        return None
+    to_country = candidates[0] if candidates else None
+
+    # One unlabeled mention left over fills the missing role; any others are unexplained
+    unlabeled = [code for code in dict.fromkeys(unlabeled) if code not in (from_country, to_country)]
+    if len(unlabeled) == 1 and to_country is None:
+        to_country = unlabeled.pop()
+    elif len(unlabeled) == 1 and from_country is None:
+        from_country = unlabeled.pop()
+    if unlabeled:
+        return None
+
+    if not from_country or not to_country or from_country == to_country:
+        return None
+    return {"from_country": from_country, "to_country": to_country}
+
+
+_DAY_PERIODS = {"morning": (5 * 60, 12 * 60), "afternoon": (12 * 60, 17 * 60), "evening": (17 * 60, 24 * 60)}
+_CLOCK_PATTERN = re.compile(r"\b(after|before)\s+(\d{1,2})(?::(\d{2}))?\s*(am|pm)?\b", re.IGNORECASE)
+_MAX_PRICE_PATTERN = re.compile(
+    r"\b(?:under|below|less than|cheaper than|max(?:imum)?|up to)\s*[$€£]?\s*(\d[\d,]*(?:\.\d+)?)", re.IGNORECASE
+)
+_CARRIER_CODE_PATTERN = re.compile(r"\b(?:on|with|only|fly)\s+([A-Z][A-Z0-9]|[0-9][A-Z])\b", re.IGNORECASE)
+# A place ("to Paris", "from JFK") or a day/month ("on Friday", "in June") starts a new search
+_NEW_ROUTE_PATTERN = re.compile(r"\b(?:from|to|into|out of|via)\s+[A-Z](?:[a-z]|[A-Z]{2}\b)")
+_AIRPORT_CODE_PATTERN = re.compile(r"\b[A-Z]{3}\b")
+_NEW_DAY_PATTERN = re.compile(
+    rf"\b(?:{'|'.join(WEEKDAYS)}|weekend|{_alternation(m for m in MONTHS if m != 'may')})\b", re.I
+)
+
+
+def _names_new_search(text: str) -> bool:
+    """Whether a message names an origin, destination or date of its own."""
+    if _NEW_ROUTE_PATTERN.search(text) or _NEW_DAY_PATTERN.search(text) or extract_dates(text):
+        return True
+    return any(code not in SUPPORTED_CURRENCIES for code in _AIRPORT_CODE_PATTERN.findall(text))
+
+
+def extract_flight_refinement(text: str, carriers: Optional[Collection[str]] = None) -> Optional[Dict[str, Any]]:
+    """
+    Filter/sort/paging changes to earlier flight results.
+
+    "non-stop only", "cheaper ones", "fastest", "morning flights",
+    "after 6pm", "under $400", "only BA", "show me more". A message that
+    names its own origin, destination or date ("cheapest flights to Rome",
+    "direct ones on Friday") asks for a new search, not a refinement.
+
+    Args:
+        text: User message
+        carriers: Carrier codes of the stored offers; when given, codes in
+            any case ("only aa") count if they are one of these, otherwise
+            only upper-case codes count
+
+    Returns:
+        ``FlightOfferTable.query``-style arguments (plus ``page="next"``),
+        or None if the message is not a refinement
+    """
+    if _names_new_search(text):
+        return None
+    lowered = text.lower()
+    refinement: Dict[str, Any] = {}
+
+    if re.search(r"\b(?:non[- ]?stop|direct)\b", lowered):
+        refinement["max_stops"] = 0
+    elif re.search(r"\b(?:one|1|single)[- ]stop\b|\bat most one stop\b", lowered):
+        refinement["max_stops"] = 1
+
+    if re.search(r"\b(?:fastest|shortest|quickest)\b", lowered):
+        refinement["sort_by"] = "duration"
+    elif re.search(r"\bearliest\b", lowered):
+        refinement["sort_by"] = "departure"
+    elif re.search(r"\b(?:cheaper|cheapest|lowest price|less expensive)\b", lowered):
+        refinement["sort_by"] = "price"
+
+    for period, (start, end) in _DAY_PERIODS.items():
+        if re.search(rf"\b{period}\b", lowered):
+            refinement["depart_after"], refinement["depart_before"] = start, end
+            break
+    for m in _CLOCK_PATTERN.finditer(text):
+        hour = int(m.group(2)) % 12 if m.group(4) else int(m.group(2))
+        if (m.group(4) or "").lower() == "pm":
+            hour += 12
+        if hour > 24:
+            continue
+        minutes = hour * 60 + int(m.group(3) or 0)
+        bound = m.group(1).lower()
+        if bound == "before" and minutes == 0:
+            minutes = 24 * 60  # "before 12am" means before midnight tonight
+        refinement["depart_after" if bound == "after" else "depart_before"] = minutes
+
+    price = _MAX_PRICE_PATTERN.search(text)
+    if price:
+        refinement["max_price"] = float(price.group(1).replace(",", ""))
+
+    codes = _CARRIER_CODE_PATTERN.findall(text)
+    if carriers is None:
+        # Without the offers to check against, "on it" or "with us" are not codes
+        codes = [code for code in codes if code.isupper()]
+    else:
+        known = {code.upper() for code in carriers}
+        codes = [code.upper() for code in codes if code.upper() in known]
+    if codes:
+        refinement["airlines"] = codes
+
+    if re.search(r"\b(?:more|next|other)\s+(?:options|flights|ones|results)\b|\bshow (?:me )?more\b", lowered):
+        refinement["page"] = "next"
+
+    return refinement or None
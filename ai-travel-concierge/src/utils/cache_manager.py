@@ -1,11 +1,88 @@
+"""
+In-process cache shared by the external API tools.
+
+Entries expire after a per-tool TTL (keyed by the tool's ``cache_prefix``)
+and the least recently used entries are evicted once ``max_entries`` is
+reached. Expired entries stay readable through ``get_stale`` until evicted.
+"""
+import logging
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Seconds each tool's responses stay fresh, by cache_prefix
+CACHE_TTL: Dict[str, int] = {
+    "weather": 1800,
+    "country": 7 * 86400,
+    "currency": 3600,
+    "currency_list": 86400,
+    "currency_history": 3600,
+    "visa": 86400,
+    "images": 86400,
+    "flight": 900,
+    "hotel": 3600,
+}
+
+
 class CacheManager:
-    def __init__(self, *args, **kwargs):
-        pass
+    """Thread-safe TTL + LRU cache with the async interface the tools expect."""
+
+    def __init__(self, max_entries: int = 2048, default_ttl: int = 3600):
+        self.max_entries = max_entries
+        self.default_ttl = default_ttl
+        # key -> (expires_at, value), in LRU order
+        self._entries: "OrderedDict[str, Tuple[float, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+        self.hits = 0
+        self.misses = 0
+
+    def __deepcopy__(self, memo):
+        # Tools hold this as a pydantic private attribute, whose default is
+        # deep-copied per instance; the instance must stay shared
+        return self
+
+    async def get(self, key: str) -> Optional[Any]:
+        """Return the cached value for a key, or None if missing or expired."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] <= time.monotonic():
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    async def get_stale(self, key: str) -> Optional[Any]:
+        """
+        Return a cached value even if it has expired.
+
+        Expired entries are kept until LRU eviction so a degraded answer is
+        available while the upstream API is unavailable.
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            return None if entry is None else entry[1]
+
+    async def set(self, key: str, value: Any, ttl: Optional[int] = None) -> bool:
+        """Store a value for ``ttl`` seconds (``default_ttl`` if not given)."""
+        with self._lock:
+            self._entries[key] = (time.monotonic() + (ttl or self.default_ttl), value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return True
+
+    async def delete(self, key: str) -> None:
+        with self._lock:
+            self._entries.pop(key, None)
 
-    def get(self, key):
-        return None
-        
-    def set(self, key, value, ttl=None):
-        pass
+    async def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
 
-CACHE_TTL = 3600
+    def __len__(self) -> int:
+        return len(self._entries)
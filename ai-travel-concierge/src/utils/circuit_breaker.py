@@ -0,0 +1,159 @@
+"""
+Per-API circuit breakers for the external API tools.
+
+Each ``api_name`` gets a breaker that watches the outcome and latency of
+its recent requests. When too many fail or are too slow, the breaker
+opens and requests fail immediately (``CircuitOpenError``) instead of
+waiting out timeouts and retries. After a cool-down it lets a few trial
+requests through (half-open); success closes it again, failure re-opens it.
+"""
+import logging
+import threading
+import time
+from collections import deque
+from typing import Deque, Dict, Optional, Tuple
+
+from pydantic import BaseModel
+
+logger = logging.getLogger(__name__)
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+class CircuitOpenError(Exception):
+    """Raised instead of calling an API whose circuit is open."""
+
+    def __init__(self, api_name: str, retry_after: float):
+        super().__init__(f"{api_name} is temporarily unavailable (retry in {retry_after:.0f}s)")
+        self.api_name = api_name
+        self.retry_after = retry_after
+
+
+class CircuitBreakerConfig(BaseModel):
+    """Thresholds for opening a circuit."""
+    window_size: int = 20  # Recent requests considered
+    min_calls: int = 5  # Requests needed in the window before the breaker can open
+    failure_rate_threshold: float = 0.5  # Open when this share of requests failed
+    slow_call_seconds: float = 10.0  # Requests slower than this count as slow
+    slow_call_rate_threshold: float = 0.8  # Open when this share of requests was slow
+    cool_down: float = 30.0  # Seconds to stay open before trial requests
+    half_open_max_calls: int = 1  # Concurrent trial requests while half-open
+
+
+class CircuitBreaker:
+    """Closed/open/half-open breaker over a sliding window of request outcomes."""
+
+    def __init__(self, api_name: str, config: Optional[CircuitBreakerConfig] = None):
+        self.api_name = api_name
+        self.config = config or CircuitBreakerConfig()
+        # (failed, slow) per recent request
+        self._window: Deque[Tuple[bool, bool]] = deque(maxlen=self.config.window_size)
+        self._state = CLOSED
+        self._opened_at = 0.0
+        self._trials = 0
+        self._lock = threading.Lock()
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            self._maybe_half_open()
+            return self._state
+
+    def _maybe_half_open(self) -> None:
+        if self._state == OPEN and time.monotonic() - self._opened_at >= self.config.cool_down:
+            self._state = HALF_OPEN
+            self._trials = 0
+            logger.info(f"Circuit for {self.api_name} half-open, allowing trial requests")
+
+    def _open(self) -> None:
+        self._state = OPEN
+        self._opened_at = time.monotonic()
+        logger.warning(f"Circuit for {self.api_name} opened for {self.config.cool_down:.0f}s")
+
+    def raise_if_open(self) -> None:
+        """
+        Cheap pre-check (no trial reserved), e.g. before spending rate-limit quota.
+
+        Raises:
+            CircuitOpenError: If the circuit is open
+        """
+        with self._lock:
+            self._maybe_half_open()
+            if self._state == OPEN:
+                raise CircuitOpenError(self.api_name, self.config.cool_down - (time.monotonic() - self._opened_at))
+
+    def before_call(self) -> None:
+        """
+        Reserve permission for a request.
+
+        Raises:
+            CircuitOpenError: If the circuit is open (or half-open with its trial in flight)
+        """
+        with self._lock:
+            self._maybe_half_open()
+            if self._state == OPEN:
+                retry_after = self.config.cool_down - (time.monotonic() - self._opened_at)
+                raise CircuitOpenError(self.api_name, retry_after)
+            if self._state == HALF_OPEN:
+                if self._trials >= self.config.half_open_max_calls:
+                    raise CircuitOpenError(self.api_name, 0.0)
+                self._trials += 1
+
+    def record(self, failed: bool, duration: float) -> None:
+        """
+        Record the outcome of a request made after ``before_call``.
+
+        Args:
+            failed: Whether the upstream failed (timeout, network error, 5xx, 429)
+            duration: Request latency in seconds
+        """
+        slow = duration >= self.config.slow_call_seconds
+        with self._lock:
+            if self._state == HALF_OPEN:
+                self._trials = max(self._trials - 1, 0)
+                if failed or slow:
+                    self._open()
+                else:
+                    self._state = CLOSED
+                    self._window.clear()
+                    logger.info(f"Circuit for {self.api_name} closed")
+                return
+
+            self._window.append((failed, slow))
+            if self._state != CLOSED or len(self._window) < self.config.min_calls:
+                return
+            failures = sum(1 for f, _ in self._window if f) / len(self._window)
+            slow_calls = sum(1 for _, s in self._window if s) / len(self._window)
+            if failures >= self.config.failure_rate_threshold or slow_calls >= self.config.slow_call_rate_threshold:
+                self._window.clear()
+                self._open()
+
+    def reset(self) -> None:
+        with self._lock:
+            self._state = CLOSED
+            self._window.clear()
+            self._trials = 0
+
+
+_breakers: Dict[str, CircuitBreaker] = {}
+_default_config = CircuitBreakerConfig()
+_registry_lock = threading.Lock()
+
+
+def configure_circuit_breakers(**settings) -> None:
+    """Set the thresholds used for every API's breaker (existing breakers are replaced)."""
+    global _default_config
+    with _registry_lock:
+        _default_config = CircuitBreakerConfig(**settings)
+        _breakers.clear()
+
+
+def get_circuit_breaker(api_name: str) -> CircuitBreaker:
+    """Process-wide breaker for an API."""
+    with _registry_lock:
+        breaker = _breakers.get(api_name)
+        if breaker is None:
+            breaker = _breakers[api_name] = CircuitBreaker(api_name, _default_config)
+        return breaker
@@ -2,7 +2,7 @@
 Configuration management utilities.
 """
 import os
-from typing import Dict, Any
+from typing import Dict, Any, Optional
 from pathlib import Path
 
 from pydantic_settings import BaseSettings, SettingsConfigDict
@@ -36,6 +36,27 @@ class Settings(BaseSettings):
     chunk_overlap: int = 200
     top_k_results: int = 5
     similarity_threshold: float = 0.7
+    retriever_warm_up: bool = True  # Load the embedding model in the background at startup
+    retrieval_cache_size: int = 256  # Cached (query, filter, k) results; 0 disables
+    retrieval_cache_ttl: int = 600  # Seconds
+    destination_partitioning: bool = True  # Per-destination collections for filtered queries
+    rerank_enabled: bool = False  # Cross-encoder rerank of retrieved candidates
+    rerank_model: str = "cross-encoder/ms-marco-MiniLM-L-6-v2"
+    rerank_candidates: int = 20  # Candidates fetched from the vector store before reranking
+    rerank_budget_ms: int = 300  # Keep vector order if reranking takes longer
+    context_max_tokens: int = 2000  # Prompt budget for RAG context, history and trip state
+    history_max_tokens: int = 500  # Part of context_max_tokens reserved for conversation history
+    semantic_cache_enabled: bool = True  # Reuse answers to near-duplicate questions
+    semantic_cache_threshold: float = 0.92  # Minimum cosine similarity for a cache hit
+    semantic_cache_ttl: int = 86400  # Seconds
+    semantic_cache_max_entries: int = 500  # Per destination
+    
+    # LLM Response Cache (intent classification and tool-argument extraction only)
+    llm_cache_enabled: bool = True
+    llm_cache_size: int = 1024  # In-memory entries
+    llm_cache_path: Optional[str] = "./data/llm_cache.db"  # SQLite file; empty keeps the cache in memory
+    llm_cache_ttl: int = 604800  # Seconds
+    extraction_temperature: float = 0.0  # Extraction calls are pinned to deterministic sampling
     
     # Redis Settings
     redis_host: str = "localhost"
@@ -51,10 +72,37 @@ class Settings(BaseSettings):
     amadeus_api_secret: str = ""
     google_maps_api_key: str = ""
     weather_api_key: str = ""
+    tool_fanout_enabled: bool = True  # Fetch weather/country/currency/visa cards concurrently for trip plans
+    tool_fanout_timeout: float = 8.0  # Seconds per fan-out call; slower calls are dropped
+    image_fetch_deadline: float = 1.0  # Seconds a destination card waits for its image
+    image_patch_timeout: float = 5.0  # Seconds the stream waits to patch a late image in
+    flight_store_enabled: bool = True  # Keep each conversation's flight results for local filtering/paging
+    flight_store_fetch_size: int = 50  # Offers fetched per search so refinements need no new search
+    flight_store_ttl: int = 900  # Seconds stored flight results stay usable
+    hotel_reference_path: Optional[str] = "./data/hotel_reference.db"  # SQLite file for hotel-by-city lists; empty keeps them in memory
+    hotel_reference_refresh_days: int = 7  # Stored hotel lists older than this are refreshed in the background
+    country_dataset_enabled: bool = True  # Answer country lookups from the bundled snapshot before calling REST Countries
+    country_dataset_path: str = ""  # Country snapshot (defaults to data/countries.json)
+    amadeus_token_refresh_ahead: int = 300  # Seconds before expiry to refresh the shared Amadeus token
+    amadeus_token_shared: bool = False  # Share the Amadeus token across workers through Redis
+    circuit_failure_rate: float = 0.5  # Open an API's circuit when this share of recent calls failed
+    circuit_slow_call_seconds: float = 10.0  # Calls slower than this count towards opening the circuit
+    circuit_cool_down: float = 30.0  # Seconds an open circuit fails fast before trial calls
+    hedging_enabled: bool = True  # Retry slow weather/country/currency GETs in parallel after their p95 latency
+    hedge_budget_ratio: float = 0.05  # Extra requests hedging may add, as a share of requests
+    tool_cache_enabled: bool = True  # Shared in-process cache for API tool responses
+    tool_cache_max_entries: int = 2048
+    prefetch_enabled: bool = True  # Warm the tool cache for likely follow-up questions after each turn
+    prefetch_max_calls: int = 4  # API calls per prefetch run (within each API's prefetch quota share)
     
     # Agent Settings
     max_iterations: int = 10
-    agent_timeout: int = 120
+    agent_timeout: int = 45  # Per-turn deadline (seconds) propagated to every node and API request
+    node_timeout: float = 30.0  # Upper bound for any single graph node, within the turn deadline
+    intent_fast_path_enabled: bool = True  # Classify obvious intents locally before calling the LLM
+    intent_rule_confidence: float = 0.8  # Minimum rule margin to skip the LLM
+    intent_centroid_enabled: bool = False  # Embedding nearest-centroid fallback for uncertain rules
+    intent_examples_path: str = ""  # Labeled examples (defaults to data/intent_examples.jsonl)
     
     # Application Settings
     debug: bool = False
@@ -0,0 +1,199 @@
+"""
+Token-budgeted packing of RAG context, conversation history and trip state
+into LLM prompts.
+"""
+import logging
+from functools import lru_cache
+from typing import Any, Dict, List, Optional
+
+from pydantic import BaseModel, Field
+
+logger = logging.getLogger(__name__)
+
+# Groq's Llama/GPT-OSS tokenizers are close enough to cl100k for budgeting
+TOKENIZER_ENCODING = "cl100k_base"
+
+
+@lru_cache(maxsize=1)
+def get_tokenizer():
+    """
+    Load the tiktoken encoding once per process.
+
+    Returns:
+        The encoding, or None if tiktoken isn't installed
+    """
+    try:
+        import tiktoken
+        return tiktoken.get_encoding(TOKENIZER_ENCODING)
+    except Exception as e:
+        logger.warning(f"tiktoken unavailable, estimating token counts: {e}")
+        return None
+
+
+@lru_cache(maxsize=4096)
+def count_tokens(text: str) -> int:
+    """
+    Count tokens in a text (cached, retrieved chunks repeat across turns).
+
+    Falls back to ~4 characters per token without tiktoken.
+    """
+    tokenizer = get_tokenizer()
+    if tokenizer is None:
+        return (len(text) + 3) // 4
+    return len(tokenizer.encode(text, disallowed_special=()))
+
+
+def _overlap(previous: str, current: str, max_overlap: int) -> int:
+    """Length of the longest suffix of ``previous`` that is a prefix of ``current``."""
+    for length in range(min(len(previous), len(current), max_overlap), 0, -1):
+        if current.startswith(previous[-length:]):
+            return length
+    return 0
+
+
+def dedupe_chunks(chunks: List[str], max_overlap: int = 200, min_overlap: int = 20) -> List[str]:
+    """
+    Drop duplicate chunks and trim text repeated by the splitter's chunk overlap.
+
+    A chunk contained in an earlier one is dropped; if a chunk starts with the
+    tail of an earlier one (adjacent chunks share ``chunk_overlap`` characters),
+    the shared prefix is cut. Order is preserved.
+
+    Args:
+        chunks: Retrieved chunks in rank order
+        max_overlap: Longest overlap to look for (the splitter's chunk_overlap)
+        min_overlap: Shorter overlaps are treated as coincidence
+
+    Returns:
+        Deduplicated chunks
+    """
+    kept: List[str] = []
+    for chunk in chunks:
+        text = chunk.strip()
+        if not text or any(text in other for other in kept):
+            continue
+
+        for other in kept:
+            length = _overlap(other, text, max_overlap)
+            if length >= min_overlap:
+                text = text[length:].lstrip()
+                break
+        if text:
+            kept.append(text)
+    return kept
+
+
+def format_trip_state(trip_details: Dict[str, Any], preferences: Dict[str, Any]) -> str:
+    """Render the known trip details and preferences as compact prompt lines."""
+    lines = []
+    for label, value in (
+        ("Destination", trip_details.get("destination")),
+        ("Start date", trip_details.get("start_date")),
+        ("Duration (days)", trip_details.get("duration_days")),
+        ("Travelers", trip_details.get("num_travelers")),
+        ("Budget", preferences.get("budget")),
+        ("Travel style", preferences.get("travel_style")),
+        ("Interests", ", ".join(preferences.get("interests") or [])),
+    ):
+        if value:
+            lines.append(f"{label}: {value}")
+    return "\n".join(lines)
+
+
+class PackedContext(BaseModel):
+    """Prompt sections that fit the token budget."""
+    context: List[str] = Field(default_factory=list)
+    history: List[Dict[str, str]] = Field(default_factory=list)
+    trip_state: str = ""
+    tokens: int = 0
+    dropped_chunks: int = 0
+
+    @property
+    def context_text(self) -> str:
+        return "\n\n".join(self.context)
+
+    @property
+    def history_text(self) -> str:
+        return "\n".join(f"{m['role']}: {m['content']}" for m in self.history)
+
+
+class ContextPacker:
+    """
+    Fit retrieved chunks, conversation history and trip state into a token budget.
+
+    Trip state is always included. Chunks are taken in rank order after
+    reserving up to ``history_max_tokens`` for history; history then fills the
+    remaining budget from the most recent turn backwards.
+    """
+
+    def __init__(
+        self,
+        max_tokens: int = 2000,
+        history_max_tokens: int = 500,
+        max_overlap: int = 200
+    ):
+        self.max_tokens = max_tokens
+        self.history_max_tokens = history_max_tokens
+        self.max_overlap = max_overlap
+
+    @classmethod
+    def from_config(cls, config: Dict[str, Any]) -> "ContextPacker":
+        return cls(
+            max_tokens=config.get("context_max_tokens", 2000),
+            history_max_tokens=config.get("history_max_tokens", 500),
+            max_overlap=config.get("chunk_overlap", 200)
+        )
+
+    def pack(
+        self,
+        chunks: List[str],
+        history: Optional[List[Dict[str, str]]] = None,
+        trip_state: str = ""
+    ) -> PackedContext:
+        """
+        Select the chunks and history turns that fit the budget.
+
+        Args:
+            chunks: Retrieved chunks in rank order
+            history: Earlier conversation messages, oldest first
+            trip_state: Trip details rendered as text
+
+        Returns:
+            PackedContext with the selected sections and their token count
+        """
+        history = history or []
+        used = count_tokens(trip_state) if trip_state else 0
+
+        history_tokens = [count_tokens(f"{m['role']}: {m['content']}") for m in history]
+        history_reserve = min(sum(history_tokens), self.history_max_tokens)
+
+        context: List[str] = []
+        unique_chunks = dedupe_chunks(chunks, max_overlap=self.max_overlap)
+        chunk_budget = self.max_tokens - history_reserve
+        for chunk in unique_chunks:
+            tokens = count_tokens(chunk)
+            # Skip chunks that don't fit; a shorter, lower-ranked one still might
+            if used + tokens <= chunk_budget:
+                context.append(chunk)
+                used += tokens
+
+        packed_history: List[Dict[str, str]] = []
+        history_used = 0
+        for message, tokens in zip(reversed(history), reversed(history_tokens)):
+            if used + tokens > self.max_tokens or history_used + tokens > self.history_max_tokens:
+                break
+            packed_history.insert(0, message)
+            used += tokens
+            history_used += tokens
+
+        dropped = len(unique_chunks) - len(context)
+        if dropped:
+            logger.debug(f"Context packer dropped {dropped} chunks to fit {self.max_tokens} tokens")
+
+        return PackedContext(
+            context=context,
+            history=packed_history,
+            trip_state=trip_state,
+            tokens=used,
+            dropped_chunks=dropped
+        )
@@ -0,0 +1,205 @@
+"""
+Bundled offline snapshot of REST Countries data with indexed lookups.
+
+Country facts (capital, currencies, languages, timezones) change about
+once a decade, yet every destination card used to cost a REST Countries
+round trip. The snapshot in ``data/countries.json`` holds records in the
+API's own v3.1 shape, so the country tool can normalize them exactly like
+a live response. It is loaded once, on first use, and indexed by name,
+alternative spelling, ISO code, capital and currency; names that are
+close but not exact ("Phillipines") are matched fuzzily. Queries the
+snapshot can't answer still go to the API. Fields a record doesn't carry
+(the bundled file has no borders, coat of arms or map links) are left out
+of the tool's results instead of being reported empty.
+
+Regenerate the file with ``scripts/refresh_country_snapshot.py``.
+"""
+import difflib
+import json
+import logging
+import re
+import threading
+import unicodedata
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_SNAPSHOT_PATH = str(Path(__file__).parent.parent.parent / "data" / "countries.json")
+
+
+def normalize_name(text: str) -> str:
+    """Case-, accent- and punctuation-insensitive form of a name ("Côte d'Ivoire" -> "cote d ivoire")."""
+    decomposed = unicodedata.normalize("NFKD", text)
+    stripped = "".join(c for c in decomposed if not unicodedata.combining(c))
+    return " ".join(re.sub(r"[^0-9a-z]+", " ", stripped.casefold()).split())
+
+
+# Seat of the central bank for currencies no single country's code prefixes
+_SUPRANATIONAL_ISSUERS = {"EUR": "DE", "XAF": "CM", "XCD": "KN", "XOF": "SN", "XPF": "PF"}
+
+
+def _issuer(code: str, holders: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """The holder that issues ``code``: ISO 4217 codes start with the issuer's ISO 3166 code (USD -> US)."""
+    issuer = _SUPRANATIONAL_ISSUERS.get(code, code[:2])
+    return next((record for record in holders if record.get("cca2", "").upper() == issuer), holders[0])
+
+
+class _Indexes:
+    """Lookup tables over one set of records, swapped in as a whole on reload."""
+
+    def __init__(self, records: List[Dict[str, Any]]):
+        self.records = records
+        self.names: Dict[str, Dict[str, Any]] = {}
+        self.codes: Dict[str, Dict[str, Any]] = {}
+        self.capitals: Dict[str, Dict[str, Any]] = {}
+        self.currencies: Dict[str, Dict[str, Any]] = {}
+
+        # Common and official names win over alternative spellings
+        # ("Guinea" is a country, not only an alias of Guinea-Bissau)
+        for record in records:
+            name = record.get("name", {})
+            for value in (name.get("common"), name.get("official")):
+                if value:
+                    self.names.setdefault(normalize_name(value), record)
+        for record in records:
+            for value in record.get("altSpellings", []):
+                if value:
+                    self.names.setdefault(normalize_name(value), record)
+
+            for field in ("cca2", "cca3"):
+                if record.get(field):
+                    self.codes.setdefault(record[field].upper(), record)
+            for capital in record.get("capital", []):
+                self.capitals.setdefault(normalize_name(capital), record)
+        # A shared currency (USD, EUR, XOF) resolves to the country that
+        # issues it, not to whichever holder happens to come first
+        holders: Dict[str, List[Dict[str, Any]]] = {}
+        currency_names: Dict[str, str] = {}
+        for record in records:
+            for code, info in record.get("currencies", {}).items():
+                holders.setdefault(code.upper(), []).append(record)
+                if info.get("name"):
+                    currency_names.setdefault(normalize_name(info["name"]), code.upper())
+        for code, records_using in holders.items():
+            self.currencies[code] = _issuer(code, records_using)
+        for name, code in currency_names.items():
+            self.currencies[name] = self.currencies[code]
+
+        self.name_keys = list(self.names)
+        self.capital_keys = list(self.capitals)
+
+
+class CountryDataset:
+    """
+    In-memory country records indexed for lookups by the country tool.
+
+    Args:
+        path: JSON file with a list of REST Countries v3.1 records
+        records: Records to index instead of reading ``path``
+        fuzzy_cutoff: Minimum similarity (0-1) for a fuzzy name match
+    """
+
+    # Short queries are too ambiguous to correct ("Chad" vs "Chan")
+    MIN_FUZZY_LENGTH = 4
+
+    def __init__(
+        self,
+        path: Optional[str] = DEFAULT_SNAPSHOT_PATH,
+        records: Optional[Iterable[Dict[str, Any]]] = None,
+        fuzzy_cutoff: float = 0.85
+    ):
+        self.path = path
+        self.fuzzy_cutoff = fuzzy_cutoff
+        self._lock = threading.Lock()
+        self._indexes: Optional[_Indexes] = None
+        if records is not None:
+            self._indexes = _Indexes(list(records))
+
+        self.hits = 0
+        self.misses = 0
+
+    def __deepcopy__(self, memo):
+        # Held as a pydantic private attribute on the country tool; stays shared
+        return self
+
+    def __len__(self) -> int:
+        return len(self._get_indexes().records)
+
+    def _get_indexes(self) -> _Indexes:
+        indexes = self._indexes
+        if indexes is None:
+            with self._lock:
+                if self._indexes is None:
+                    self._indexes = _Indexes(self._read())
+                indexes = self._indexes
+        return indexes
+
+    def _read(self) -> List[Dict[str, Any]]:
+        if not self.path:
+            return []
+        try:
+            with open(self.path, encoding="utf-8") as f:
+                records = json.load(f)
+        except (OSError, ValueError) as e:
+            logger.warning(f"Country snapshot {self.path} unavailable, using the API only: {e}")
+            return []
+        logger.info(f"Loaded {len(records)} countries from {self.path}")
+        return records
+
+    def reload(self) -> int:
+        """
+        Re-read the snapshot file, e.g. after refreshing it.
+
+        Returns:
+            Number of records now loaded
+        """
+        indexes = _Indexes(self._read())
+        with self._lock:
+            self._indexes = indexes
+        return len(indexes.records)
+
+    def replace(self, records: Iterable[Dict[str, Any]]) -> None:
+        """Swap in a new set of records (lookups in flight keep the old ones)."""
+        indexes = _Indexes(list(records))
+        with self._lock:
+            self._indexes = indexes
+
+    def lookup(self, query: str, search_by: str = "name") -> Optional[Dict[str, Any]]:
+        """
+        Find a country record the way the matching REST Countries endpoint would.
+
+        Args:
+            query: Country name, ISO 2/3 code, capital city or currency
+            search_by: name, code, capital, or currency
+
+        Returns:
+            The raw v3.1 record, or None if the snapshot has no match
+        """
+        indexes = self._get_indexes()
+        search_by = (search_by or "name").lower()
+        query = (query or "").strip()
+
+        record = None
+        if query:
+            if search_by == "code":
+                record = indexes.codes.get(query.upper())
+            elif search_by == "capital":
+                record = self._match(normalize_name(query), indexes.capitals, indexes.capital_keys)
+            elif search_by == "currency":
+                record = indexes.currencies.get(query.upper()) or indexes.currencies.get(normalize_name(query))
+            else:
+                record = self._match(normalize_name(query), indexes.names, indexes.name_keys)
+
+        if record is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return record
+
+    def _match(self, key: str, index: Dict[str, Dict[str, Any]], keys: List[str]) -> Optional[Dict[str, Any]]:
+        record = index.get(key)
+        if record is not None or len(key) < self.MIN_FUZZY_LENGTH:
+            return record
+        close = difflib.get_close_matches(key, keys, n=1, cutoff=self.fuzzy_cutoff)
+        return index[close[0]] if close else None
@@ -0,0 +1,90 @@
+"""
+Per-turn deadline propagation.
+
+The caller puts an absolute deadline (``time.time()`` based) into the graph
+config as ``configurable.deadline``. Each node runs under that deadline via
+``run_with_deadline``, which also exposes it through a context variable so
+code further down (tool fan-outs, ``BaseTravelAPITool._make_request``) can
+size its own timeouts from the time that is actually left.
+"""
+import asyncio
+import logging
+import time
+from contextvars import ContextVar
+from typing import Any, Awaitable, Callable, Dict, Optional, TypeVar
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+_deadline: ContextVar[Optional[float]] = ContextVar("turn_deadline", default=None)
+
+
+class DeadlineExceeded(TimeoutError):
+    """Raised when work is started after the turn deadline has passed."""
+
+
+def make_deadline(timeout: Optional[float]) -> Optional[float]:
+    """Absolute deadline ``timeout`` seconds from now (None for no deadline)."""
+    return time.time() + timeout if timeout else None
+
+
+def deadline_from_config(config: Optional[Dict[str, Any]]) -> Optional[float]:
+    """The ``configurable.deadline`` of a LangGraph run config, if any."""
+    return ((config or {}).get("configurable") or {}).get("deadline")
+
+
+def current_deadline() -> Optional[float]:
+    return _deadline.get()
+
+
+def remaining() -> Optional[float]:
+    """Seconds left before the current deadline (None if there is none)."""
+    deadline = _deadline.get()
+    return None if deadline is None else deadline - time.time()
+
+
+def budget(timeout: Optional[float]) -> Optional[float]:
+    """``timeout`` capped by the time left before the current deadline."""
+    left = remaining()
+    if left is None:
+        return timeout
+    left = max(left, 0.0)
+    return left if timeout is None else min(timeout, left)
+
+
+def check_deadline(what: str = "operation") -> None:
+    """
+    Raises:
+        DeadlineExceeded: If the current deadline has already passed
+    """
+    left = remaining()
+    if left is not None and left <= 0:
+        raise DeadlineExceeded(f"Turn deadline passed before {what}")
+
+
+async def run_with_deadline(
+    work: Callable[[], Awaitable[T]],
+    deadline: Optional[float],
+    timeout: Optional[float] = None
+) -> T:
+    """
+    Run ``work`` under a deadline and an optional per-call timeout.
+
+    The effective deadline (the earlier of the two) is visible to everything
+    ``work`` awaits via ``remaining()``/``budget()``.
+
+    Raises:
+        asyncio.TimeoutError: If the work does not finish in time (it is cancelled)
+    """
+    effective = deadline
+    if timeout is not None:
+        effective = min(effective, time.time() + timeout) if effective is not None else time.time() + timeout
+
+    token = _deadline.set(effective)
+    try:
+        if effective is None:
+            return await work()
+        return await asyncio.wait_for(work(), timeout=max(effective - time.time(), 0.0))
+    finally:
+        _deadline.reset(token)
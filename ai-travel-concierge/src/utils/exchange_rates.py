@@ -0,0 +1,407 @@
+"""
+Local exchange-rate tables for currency conversion.
+
+The ECB publishes one set of reference rates per working day, so every
+conversion on that day can be answered from a single rate table: the full
+set of rates against one base, with any pair computed as a cross rate.
+Latest tables are kept until the next publication; tables for past dates
+never change and are kept until evicted.
+
+Past rates are also kept as a daily time series (``RateHistory``), filled
+in bulk from Frankfurter's range endpoint, so historical conversions and
+"how has the yen moved this year" questions are answered locally.
+"""
+import asyncio
+import logging
+import math
+import time
+from array import array
+from bisect import bisect_left, bisect_right
+from collections import OrderedDict
+from datetime import date, datetime, time as dt_time, timedelta, timezone
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+from zoneinfo import ZoneInfo
+
+logger = logging.getLogger(__name__)
+
+ECB_TIMEZONE = ZoneInfo("Europe/Berlin")
+# The ECB publishes around 16:00 CET; Frankfurter picks the rates up shortly after
+PUBLISH_TIME = dt_time(16, 30)
+# A table older than the latest expected publication (late publication or a
+# TARGET holiday) is re-checked this often instead of kept for a day
+STALE_RETRY_SECONDS = 1800
+# Past tables never change; shared caches keep them this long
+HISTORICAL_TTL = 30 * 86400
+
+
+def last_publish(now: Optional[datetime] = None) -> datetime:
+    """The most recent expected ECB publication at or before ``now``."""
+    local = (now or datetime.now(timezone.utc)).astimezone(ECB_TIMEZONE)
+    day = local.date()
+    while True:
+        moment = datetime.combine(day, PUBLISH_TIME, tzinfo=ECB_TIMEZONE)
+        if day.weekday() < 5 and moment <= local:
+            return moment
+        day -= timedelta(days=1)
+
+
+def next_publish(now: Optional[datetime] = None) -> datetime:
+    """The first expected ECB publication after ``now``."""
+    local = (now or datetime.now(timezone.utc)).astimezone(ECB_TIMEZONE)
+    day = local.date()
+    while True:
+        moment = datetime.combine(day, PUBLISH_TIME, tzinfo=ECB_TIMEZONE)
+        if day.weekday() < 5 and moment > local:
+            return moment
+        day += timedelta(days=1)
+
+
+class RateTable:
+    """
+    All reference rates for one day against one base currency.
+
+    Args:
+        base: Base currency code
+        rate_date: ECB date the rates apply to (YYYY-MM-DD)
+        rates: Units of each currency per one unit of ``base``
+        expires_at: ``time.time()`` after which the table must be re-fetched
+    """
+
+    def __init__(self, base: str, rate_date: str, rates: Dict[str, float], expires_at: float = math.inf):
+        self.base = base.upper()
+        self.date = rate_date
+        self.rates = {code.upper(): float(rate) for code, rate in rates.items()}
+        self.rates[self.base] = 1.0
+        self.expires_at = expires_at
+
+    @classmethod
+    def from_response(cls, raw: Dict[str, Any], latest: bool = True, now: Optional[datetime] = None) -> "RateTable":
+        """
+        Build a table from a Frankfurter rates response.
+
+        Args:
+            raw: ``/latest`` or ``/YYYY-MM-DD`` response (rates are per ``amount`` of base)
+            latest: Whether the table answers "latest" queries and so expires
+                at the next ECB publication
+            now: Current time, for tests
+        """
+        amount = float(raw.get("amount") or 1.0)
+        rates = {code: rate / amount for code, rate in (raw.get("rates") or {}).items()}
+        table = cls(raw.get("base", "EUR"), raw.get("date", ""), rates)
+        if latest:
+            table.expires_at = table._latest_expiry(now)
+        return table
+
+    def _latest_expiry(self, now: Optional[datetime] = None) -> float:
+        now = now or datetime.now(timezone.utc)
+        try:
+            stale = date.fromisoformat(self.date) < last_publish(now).date()
+        except ValueError:
+            stale = True
+        if stale:
+            return now.timestamp() + STALE_RETRY_SECONDS
+        return next_publish(now).timestamp()
+
+    @property
+    def ttl(self) -> int:
+        """Seconds until expiry, for shared caches."""
+        if math.isinf(self.expires_at):
+            return HISTORICAL_TTL
+        return max(int(self.expires_at - time.time()), 1)
+
+    def is_expired(self) -> bool:
+        return time.time() >= self.expires_at
+
+    def rate(self, from_currency: str, to_currency: str) -> float:
+        """
+        Cross rate: units of ``to_currency`` per unit of ``from_currency``.
+
+        Raises:
+            ValueError: If either currency is missing from the table
+        """
+        try:
+            return self.rates[to_currency.upper()] / self.rates[from_currency.upper()]
+        except KeyError as e:
+            raise ValueError(f"No {self.date} rate for {e.args[0]}") from None
+
+    def convert(self, amount: float, from_currency: str, to_currency: str) -> Dict[str, Any]:
+        """Convert locally, answering in the shape of a Frankfurter conversion response."""
+        return {
+            "amount": amount,
+            "base": from_currency.upper(),
+            "date": self.date,
+            "rates": {to_currency.upper(): round(amount * self.rate(from_currency, to_currency), 4)},
+        }
+
+
+class RateTableCache:
+    """
+    Process-wide rate tables keyed by date (or "latest"), fetched single-flight.
+
+    Args:
+        max_tables: Tables kept before the least recently used is dropped
+    """
+
+    def __init__(self, max_tables: int = 64):
+        self.max_tables = max_tables
+        self._tables: "OrderedDict[str, RateTable]" = OrderedDict()
+        self._pending: Dict[str, asyncio.Task] = {}
+
+        self.fetches = 0
+
+    async def get(self, key: str, fetch: Callable[[], Awaitable[RateTable]]) -> RateTable:
+        """
+        The table for ``key``, calling ``fetch`` only if it is missing or expired.
+
+        Concurrent callers for the same missing table share one fetch.
+        """
+        table = self._tables.get(key)
+        if table is not None and not table.is_expired():
+            self._tables.move_to_end(key)
+            return table
+
+        running = self._pending.get(key)
+        if running is None or running.done() or running.get_loop() is not asyncio.get_running_loop():
+            running = asyncio.create_task(self._fetch(key, fetch))
+            self._pending[key] = running
+        return await asyncio.shield(running)
+
+    async def _fetch(self, key: str, fetch: Callable[[], Awaitable[RateTable]]) -> RateTable:
+        try:
+            self.fetches += 1
+            table = await fetch()
+            self.put(key, table)
+            return table
+        finally:
+            if self._pending.get(key) is asyncio.current_task():
+                del self._pending[key]
+
+    def put(self, key: str, table: RateTable) -> None:
+        self._tables[key] = table
+        self._tables.move_to_end(key)
+        while len(self._tables) > self.max_tables:
+            self._tables.popitem(last=False)
+
+    def clear(self) -> None:
+        self._tables.clear()
+        self._pending.clear()
+
+
+class RateHistory:
+    """
+    Daily ECB rates against one base currency, stored column-wise.
+
+    ECB dates are kept as ascending ordinals in one ``array`` and each
+    currency's rates in an aligned ``array("d")`` (NaN where a currency
+    has no rate that day), so a year of ~30 currencies is a few tens of
+    kilobytes. Covered date ranges are tracked separately, since weekends
+    and holidays have no rows.
+
+    Args:
+        base: Currency the stored rates are quoted against
+    """
+
+    # Longer ranges may come back sampled rather than daily, so fills are chunked
+    MAX_RANGE_DAYS = 100
+
+    def __init__(self, base: str = "EUR"):
+        self.base = base.upper()
+        self._days = array("i")
+        self._rates: Dict[str, array] = {}
+        self._covered: List[Tuple[int, int]] = []  # Inclusive ordinal ranges, merged
+        self._pending: Dict[Tuple[int, int], asyncio.Task] = {}
+
+        self.fetches = 0
+
+    def __len__(self) -> int:
+        return len(self._days)
+
+    def add(self, raw: Dict[str, Any]) -> None:
+        """Store the rows of a Frankfurter range response (``{"rates": {date: {code: rate}}}``)."""
+        amount = float(raw.get("amount") or 1.0)
+        for day, rates in sorted((raw.get("rates") or {}).items()):
+            self._insert(date.fromisoformat(day).toordinal(), {code: rate / amount for code, rate in rates.items()})
+
+    def _insert(self, ordinal: int, rates: Dict[str, float]) -> None:
+        index = bisect_left(self._days, ordinal)
+        if index == len(self._days) or self._days[index] != ordinal:
+            self._days.insert(index, ordinal)
+            for column in self._rates.values():
+                column.insert(index, math.nan)
+        for code, rate in {**rates, self.base: 1.0}.items():
+            column = self._rates.get(code.upper())
+            if column is None:
+                column = self._rates[code.upper()] = array("d", [math.nan]) * len(self._days)
+            column[index] = float(rate)
+
+    def mark_covered(self, start: date, end: date) -> None:
+        """Record that every ECB rate between ``start`` and ``end`` is stored."""
+        ranges = sorted(self._covered + [(start.toordinal(), end.toordinal())])
+        merged = [ranges[0]]
+        for low, high in ranges[1:]:
+            if low <= merged[-1][1] + 1:
+                merged[-1] = (merged[-1][0], max(merged[-1][1], high))
+            else:
+                merged.append((low, high))
+        self._covered = merged
+
+    def gaps(self, start: date, end: date) -> List[Tuple[date, date]]:
+        """Uncovered parts of ``start``..``end``, in chunks the range endpoint returns daily."""
+        missing = []
+        cursor = start.toordinal()
+        for low, high in self._covered:
+            if high < cursor:
+                continue
+            if low > end.toordinal():
+                break
+            if low > cursor:
+                missing.append((cursor, low - 1))
+            cursor = high + 1
+        if cursor <= end.toordinal():
+            missing.append((cursor, end.toordinal()))
+
+        chunks = []
+        for low, high in missing:
+            while low <= high:
+                chunk_end = min(low + self.MAX_RANGE_DAYS - 1, high)
+                chunks.append((date.fromordinal(low), date.fromordinal(chunk_end)))
+                low = chunk_end + 1
+        return chunks
+
+    async def ensure(
+        self,
+        start: date,
+        end: date,
+        fetch_range: Callable[[date, date], Awaitable[Dict[str, Any]]]
+    ) -> None:
+        """
+        Fill ``start``..``end`` from upstream where it is not yet stored.
+
+        Only the gaps are fetched, concurrently; concurrent callers needing
+        the same gap share one fetch. Dates after the last ECB publication
+        are not fetched (there is nothing to store yet).
+
+        Args:
+            start: First date needed
+            end: Last date needed
+            fetch_range: Fetches a Frankfurter range response for (start, end)
+        """
+        end = min(end, last_publish().date())
+        if start > end:
+            return
+
+        waiting = []
+        for low, high in self.gaps(start, end):
+            key = (low.toordinal(), high.toordinal())
+            running = self._pending.get(key)
+            if running is None or running.done() or running.get_loop() is not asyncio.get_running_loop():
+                running = asyncio.create_task(self._fill(key, low, high, fetch_range))
+                self._pending[key] = running
+            waiting.append(asyncio.shield(running))
+        if waiting:
+            await asyncio.gather(*waiting)
+
+    async def _fill(
+        self,
+        key: Tuple[int, int],
+        start: date,
+        end: date,
+        fetch_range: Callable[[date, date], Awaitable[Dict[str, Any]]]
+    ) -> None:
+        try:
+            self.fetches += 1
+            raw = await fetch_range(start, end)
+            self.add(raw)
+            covered_end = self._covered_end(raw, start, end)
+            if covered_end >= start:
+                self.mark_covered(start, covered_end)
+        finally:
+            if self._pending.get(key) is asyncio.current_task():
+                del self._pending[key]
+
+    @staticmethod
+    def _covered_end(raw: Dict[str, Any], start: date, end: date) -> date:
+        """
+        Last date of ``start``..``end`` that a range response settles.
+
+        Weekend days after the last returned row have no rate to wait for,
+        but a missing weekday may just not be published upstream yet (the
+        ECB fixing can land after ``last_publish``), so coverage stops at
+        the last row and that weekday is fetched again next time.
+        """
+        settled = start - timedelta(days=1)
+        for day in raw.get("rates") or {}:
+            day = date.fromisoformat(day)
+            if settled < day <= end:
+                settled = day
+
+        day = settled + timedelta(days=1)
+        while day <= end:
+            if day.weekday() < 5:
+                return settled
+            day += timedelta(days=1)
+        return end
+
+    def table_on(self, day: date) -> Optional[RateTable]:
+        """Rates in effect on ``day`` (the latest ECB date on or before it), or None."""
+        index = bisect_right(self._days, day.toordinal()) - 1
+        if index < 0:
+            return None
+        rates = {code: column[index] for code, column in self._rates.items() if not math.isnan(column[index])}
+        return RateTable(self.base, date.fromordinal(self._days[index]).isoformat(), rates)
+
+    def series(self, from_currency: str, to_currency: str, start: date, end: date) -> List[Tuple[str, float]]:
+        """
+        Daily cross rates between ``start`` and ``end``.
+
+        Returns:
+            (ECB date, units of ``to_currency`` per ``from_currency``) for each
+            date both currencies have a rate
+        """
+        source = self._rates.get(from_currency.upper())
+        target = self._rates.get(to_currency.upper())
+        if source is None or target is None:
+            return []
+        low = bisect_left(self._days, start.toordinal())
+        high = bisect_right(self._days, end.toordinal())
+        return [
+            (date.fromordinal(self._days[i]).isoformat(), target[i] / source[i])
+            for i in range(low, high)
+            if not math.isnan(source[i]) and not math.isnan(target[i])
+        ]
+
+
+_rate_tables: Optional[RateTableCache] = None
+
+
+def configure_rate_tables(**settings) -> RateTableCache:
+    """Replace the shared rate-table cache."""
+    global _rate_tables
+    _rate_tables = RateTableCache(**settings)
+    return _rate_tables
+
+
+def get_rate_tables() -> RateTableCache:
+    """Process-wide rate tables used by the currency tools."""
+    global _rate_tables
+    if _rate_tables is None:
+        _rate_tables = RateTableCache()
+    return _rate_tables
+
+
+_rate_history: Optional[RateHistory] = None
+
+
+def configure_rate_history(**settings) -> RateHistory:
+    """Replace the shared rate history."""
+    global _rate_history
+    _rate_history = RateHistory(**settings)
+    return _rate_history
+
+
+def get_rate_history() -> RateHistory:
+    """Process-wide daily rate history used by the currency tools."""
+    global _rate_history
+    if _rate_history is None:
+        _rate_history = RateHistory()
+    return _rate_history
@@ -0,0 +1,276 @@
+"""
+Per-conversation store of flight search results.
+
+A flight search fetches a generous page of offers once; follow-ups such as
+"non-stop only", "cheaper ones" or "show me more" are then answered from
+the stored offers instead of a new Amadeus search.
+
+Offers are kept column-wise (one ``array`` per attribute, plus flat segment
+columns indexed by per-offer offsets), which keeps a 250-offer search to a
+few kilobytes and makes filter/sort passes tight loops over plain numbers.
+"""
+import logging
+import re
+import threading
+import time
+from array import array
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+_DURATION_PATTERN = re.compile(r"PT(?:(\d+)H)?(?:(\d+)M)?")
+
+SORT_KEYS = ("price", "duration", "departure", "stops")
+
+
+def parse_duration(value: Optional[str]) -> int:
+    """Minutes in an ISO-8601 duration like ``PT7H30M`` (0 if unparseable)."""
+    match = _DURATION_PATTERN.fullmatch(value or "")
+    if not match:
+        return 0
+    return int(match.group(1) or 0) * 60 + int(match.group(2) or 0)
+
+
+def _minute_of_day(timestamp: Optional[str]) -> int:
+    """Minutes after midnight of an ``YYYY-MM-DDTHH:MM`` timestamp (-1 if unknown)."""
+    if not timestamp or "T" not in timestamp:
+        return -1
+    try:
+        hours, minutes = timestamp.split("T", 1)[1].split(":")[:2]
+        return int(hours) * 60 + int(minutes)
+    except ValueError:
+        return -1
+
+
+class FlightOfferTable:
+    """
+    Column-oriented flight offers from one search.
+
+    Args:
+        flights: ``FlightSearchTool._normalize_response`` flights
+        carriers: Carrier code -> name, from the search's dictionaries
+    """
+
+    SEGMENT_FIELDS = (
+        "departure_airport", "departure_time", "arrival_airport", "arrival_time",
+        "airline", "flight_number", "duration", "aircraft",
+    )
+
+    def __init__(self, flights: List[Dict[str, Any]], carriers: Optional[Dict[str, str]] = None):
+        self.carriers = carriers or {}
+        self.ids: List[Optional[str]] = []
+        self.currency: List[str] = []
+        self.price = array("d")
+        self.duration = array("i")  # Minutes over all itineraries
+        self.stops = array("b")  # Most stops on any itinerary
+        self.departure = array("h")  # Outbound departure, minutes after midnight
+        self.seats = array("h")
+        # Interned carrier of the first outbound segment
+        self._carrier_codes: List[str] = []
+        self.carrier = array("H")
+
+        # Segments, flattened; itinerary i of offer o spans
+        # itinerary_start[offer_start[o] + i] : itinerary_start[offer_start[o] + i + 1]
+        self.offer_start = array("I", [0])
+        self.itinerary_start = array("I", [0])
+        self.itinerary_duration: List[Optional[str]] = []
+        self.segments: Dict[str, List[Any]] = {field: [] for field in self.SEGMENT_FIELDS}
+
+        for flight in flights:
+            self._append(flight)
+
+    def _intern_carrier(self, code: str) -> int:
+        try:
+            return self._carrier_codes.index(code)
+        except ValueError:
+            self._carrier_codes.append(code)
+            return len(self._carrier_codes) - 1
+
+    def _append(self, flight: Dict[str, Any]) -> None:
+        itineraries = flight.get("itineraries") or []
+        self.ids.append(flight.get("id"))
+        self.currency.append(flight.get("currency", "USD"))
+        self.price.append(float(flight.get("price") or 0.0))
+        self.duration.append(sum(parse_duration(it.get("duration")) for it in itineraries))
+        self.stops.append(max((max(len(it.get("segments") or []) - 1, 0) for it in itineraries), default=0))
+        self.seats.append(int(flight.get("number_of_bookable_seats") or 0))
+
+        outbound = (itineraries[0].get("segments") or [{}]) if itineraries else [{}]
+        self.departure.append(_minute_of_day(outbound[0].get("departure_time")))
+        self.carrier.append(self._intern_carrier(outbound[0].get("airline") or ""))
+
+        for itinerary in itineraries:
+            for segment in itinerary.get("segments") or []:
+                for field in self.SEGMENT_FIELDS:
+                    self.segments[field].append(segment.get(field))
+            self.itinerary_duration.append(itinerary.get("duration"))
+            self.itinerary_start.append(len(self.segments["airline"]))
+        self.offer_start.append(len(self.itinerary_duration))
+
+    def __len__(self) -> int:
+        return len(self.price)
+
+    def carrier_code(self, index: int) -> str:
+        return self._carrier_codes[self.carrier[index]]
+
+    @property
+    def carrier_codes(self) -> List[str]:
+        """Carriers operating any stored offer."""
+        return list(self._carrier_codes)
+
+    def match_carriers(self, text: str) -> List[str]:
+        """Carrier codes whose name (from the search dictionaries) appears in ``text``."""
+        lowered = text.lower()
+        return [
+            code for code in self._carrier_codes
+            if self.carriers.get(code) and self.carriers[code].lower() in lowered
+        ]
+
+    def row(self, index: int) -> Dict[str, Any]:
+        """One offer in the normalized ``FlightSearchTool`` shape."""
+        itineraries = []
+        for it in range(self.offer_start[index], self.offer_start[index + 1]):
+            segments = [
+                {field: self.segments[field][s] for field in self.SEGMENT_FIELDS}
+                for s in range(self.itinerary_start[it], self.itinerary_start[it + 1])
+            ]
+            itineraries.append({"segments": segments, "duration": self.itinerary_duration[it]})
+        return {
+            "id": self.ids[index],
+            "price": self.price[index],
+            "currency": self.currency[index],
+            "itineraries": itineraries,
+            "number_of_bookable_seats": self.seats[index],
+            "one_way": len(itineraries) == 1,
+        }
+
+    def query(
+        self,
+        max_stops: Optional[int] = None,
+        airlines: Optional[List[str]] = None,
+        depart_after: Optional[int] = None,
+        depart_before: Optional[int] = None,
+        max_price: Optional[float] = None,
+        sort_by: str = "price",
+        descending: bool = False,
+        offset: int = 0,
+        limit: int = 5
+    ) -> Tuple[List[Dict[str, Any]], int]:
+        """
+        Filter, sort and page the stored offers.
+
+        Args:
+            max_stops: Most stops allowed on any itinerary (0 for non-stop)
+            airlines: Carrier codes allowed for the first outbound segment
+            depart_after: Earliest outbound departure, minutes after midnight
+            depart_before: Latest outbound departure, minutes after midnight
+            max_price: Highest total price
+            sort_by: One of ``SORT_KEYS``
+            descending: Reverse the sort order
+            offset: Matches to skip
+            limit: Matches to return
+
+        Returns:
+            (page of offers in the normalized shape, total number of matches)
+        """
+        if sort_by not in SORT_KEYS:
+            raise ValueError(f"Unknown sort key: {sort_by}")
+
+        allowed = None
+        if airlines:
+            wanted = {code.upper() for code in airlines}
+            allowed = {i for i, code in enumerate(self._carrier_codes) if code.upper() in wanted}
+
+        matches = [
+            i for i in range(len(self.price))
+            if (max_stops is None or self.stops[i] <= max_stops)
+            and (allowed is None or self.carrier[i] in allowed)
+            and (depart_after is None or self.departure[i] >= depart_after)
+            and (depart_before is None or 0 <= self.departure[i] < depart_before)
+            and (max_price is None or self.price[i] <= max_price)
+        ]
+        column = getattr(self, sort_by)
+        # Price breaks ties so "fastest" still lists the cheaper of equal flights first
+        matches.sort(key=lambda i: (column[i], self.price[i]), reverse=descending)
+        return [self.row(i) for i in matches[offset:offset + limit]], len(matches)
+
+
+class StoredFlightSearch:
+    """A conversation's latest flight search and the view the user is on."""
+
+    def __init__(self, search: Dict[str, Any], table: FlightOfferTable, page_size: int = 5):
+        self.search = search
+        self.table = table
+        self.page_size = page_size
+        self.created_at = time.monotonic()
+        self.view: Dict[str, Any] = {"sort_by": "price", "offset": 0}
+
+    def refine(self, refinement: Dict[str, Any]) -> Tuple[List[Dict[str, Any]], int]:
+        """
+        Apply a follow-up refinement on top of the current view.
+
+        ``page="next"`` moves to the next page; any other change starts
+        again from the first page.
+
+        Returns:
+            (page of offers, total number of matches)
+        """
+        refinement = dict(refinement)
+        if refinement.pop("page", None) == "next":
+            self.view["offset"] = self.view.get("offset", 0) + self.page_size
+        else:
+            self.view["offset"] = 0
+        self.view.update(refinement)
+        return self.table.query(limit=self.page_size, **self.view)
+
+
+class FlightOfferStore:
+    """
+    Latest flight search per conversation, with TTL and LRU eviction.
+
+    Args:
+        ttl: Seconds a search stays usable (fares go stale)
+        max_conversations: Searches kept before the least recently used is dropped
+    """
+
+    def __init__(self, ttl: float = 900, max_conversations: int = 256):
+        self.ttl = ttl
+        self.max_conversations = max_conversations
+        self._searches: "OrderedDict[str, StoredFlightSearch]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def put(
+        self,
+        conversation_id: str,
+        search: Dict[str, Any],
+        normalized: Dict[str, Any],
+        page_size: int = 5
+    ) -> StoredFlightSearch:
+        """Store a conversation's search results, replacing any earlier search."""
+        carriers = (normalized.get("dictionaries") or {}).get("carriers") or {}
+        stored = StoredFlightSearch(search, FlightOfferTable(normalized.get("flights") or [], carriers), page_size)
+        with self._lock:
+            self._searches[conversation_id] = stored
+            self._searches.move_to_end(conversation_id)
+            while len(self._searches) > self.max_conversations:
+                self._searches.popitem(last=False)
+        return stored
+
+    def get(self, conversation_id: Optional[str]) -> Optional[StoredFlightSearch]:
+        """A conversation's latest search, or None if there is none or it expired."""
+        if not conversation_id:
+            return None
+        with self._lock:
+            stored = self._searches.get(conversation_id)
+            if stored is None:
+                return None
+            if time.monotonic() - stored.created_at >= self.ttl:
+                del self._searches[conversation_id]
+                return None
+            self._searches.move_to_end(conversation_id)
+            return stored
+
+    def discard(self, conversation_id: str) -> None:
+        with self._lock:
+            self._searches.pop(conversation_id, None)
@@ -0,0 +1,142 @@
+"""
+Hedged requests for idempotent, latency-sensitive API calls.
+
+If the first attempt has not answered within the API's recent p95 latency,
+a second identical attempt is started and whichever succeeds first wins;
+the loser is cancelled. Hedges are paid for from a token bucket that earns
+``budget_ratio`` tokens per request, so at most ~5% (by default) extra load
+ever reaches the upstream API.
+
+Only use this for idempotent GETs against free APIs; tools opt in with
+``BaseTravelAPITool.hedge_requests``.
+"""
+import asyncio
+import logging
+import threading
+import time
+from collections import deque
+from typing import Awaitable, Callable, Deque, Dict, Optional, TypeVar
+
+from pydantic import BaseModel
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+
+class HedgingConfig(BaseModel):
+    """Hedge delay and budget settings."""
+    enabled: bool = True
+    percentile: float = 0.95  # Hedge once the first attempt is slower than this share of recent requests
+    min_samples: int = 20  # Latencies needed before hedging starts
+    window_size: int = 200  # Recent latencies considered
+    min_delay: float = 0.05  # Never hedge sooner than this (seconds)
+    budget_ratio: float = 0.05  # Hedges earned per request
+    max_burst: float = 2.0  # Hedges that can be saved up
+
+
+class HedgePolicy:
+    """Per-API latency history and hedge budget."""
+
+    def __init__(self, api_name: str, config: Optional[HedgingConfig] = None):
+        self.api_name = api_name
+        self.config = config or HedgingConfig()
+        self._latencies: Deque[float] = deque(maxlen=self.config.window_size)
+        self._tokens = 0.0
+        self._lock = threading.Lock()
+
+        self.requests = 0
+        self.hedges = 0
+        self.hedge_wins = 0
+
+    def delay(self) -> Optional[float]:
+        """Seconds to wait before hedging, or None while there is too little history."""
+        with self._lock:
+            if not self.config.enabled or len(self._latencies) < self.config.min_samples:
+                return None
+            ordered = sorted(self._latencies)
+        index = min(int(len(ordered) * self.config.percentile), len(ordered) - 1)
+        return max(ordered[index], self.config.min_delay)
+
+    def observe(self, latency: float) -> None:
+        with self._lock:
+            self._latencies.append(latency)
+
+    def start_request(self) -> None:
+        with self._lock:
+            self.requests += 1
+            self._tokens = min(self._tokens + self.config.budget_ratio, self.config.max_burst)
+
+    def try_hedge(self) -> bool:
+        """Spend one hedge from the budget, if there is one."""
+        with self._lock:
+            if self._tokens < 1.0:
+                return False
+            self._tokens -= 1.0
+            self.hedges += 1
+            return True
+
+
+async def hedged(attempt: Callable[[], Awaitable[T]], policy: HedgePolicy) -> T:
+    """
+    Run ``attempt``, starting a second copy if the first is slow.
+
+    Args:
+        attempt: Factory for one attempt; must be safe to run twice concurrently
+        policy: The API's hedge policy
+
+    Returns:
+        The first successful result
+
+    Raises:
+        Exception: The last attempt's error if every attempt failed
+    """
+    policy.start_request()
+    started = time.monotonic()
+    first = asyncio.ensure_future(attempt())
+    pending = {first}
+    try:
+        delay = policy.delay()
+        if delay is not None:
+            done, pending = await asyncio.wait(pending, timeout=delay)
+            if not done and policy.try_hedge():
+                logger.debug(f"Hedging {policy.api_name} request after {delay:.2f}s")
+                pending.add(asyncio.ensure_future(attempt()))
+            pending |= done
+
+        error: Optional[BaseException] = None
+        while pending:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                if task.exception() is None:
+                    policy.observe(time.monotonic() - started)
+                    if task is not first:
+                        policy.hedge_wins += 1
+                    return task.result()
+                error = task.exception()
+        raise error
+    finally:
+        for task in pending:
+            task.cancel()
+
+
+_policies: Dict[str, HedgePolicy] = {}
+_default_config = HedgingConfig()
+_registry_lock = threading.Lock()
+
+
+def configure_hedging(**settings) -> None:
+    """Set the hedging settings for every API (existing history is dropped)."""
+    global _default_config
+    with _registry_lock:
+        _default_config = HedgingConfig(**settings)
+        _policies.clear()
+
+
+def get_hedge_policy(api_name: str) -> HedgePolicy:
+    """Process-wide hedge policy for an API."""
+    with _registry_lock:
+        policy = _policies.get(api_name)
+        if policy is None:
+            policy = _policies[api_name] = HedgePolicy(api_name, _default_config)
+        return policy
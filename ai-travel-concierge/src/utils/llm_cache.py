@@ -0,0 +1,142 @@
+"""
+Exact-match LLM response cache for deterministic extraction calls.
+
+Plugs into LangChain's per-model ``cache=`` hook, which keys lookups on the
+serialized prompt and the model's parameters (model name, temperature and any
+tool schemas bound with ``bind_tools``). Responses are kept in an in-memory
+LRU backed by an optional SQLite file, so they survive restarts and are
+shared between worker processes.
+"""
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Optional, Tuple
+
+from langchain_core.caches import BaseCache, RETURN_VAL_TYPE
+from langchain_core.messages import message_to_dict, messages_from_dict
+from langchain_core.outputs import ChatGeneration, Generation
+
+logger = logging.getLogger(__name__)
+
+
+class LLMResponseCache(BaseCache):
+    """
+    Two-tier (memory LRU + SQLite) LangChain cache.
+
+    Only attach it to models called at deterministic settings: a cached
+    response is returned for every identical prompt, so caching a sampled
+    (temperature > 0) model would freeze one sample forever.
+    """
+
+    def __init__(
+        self,
+        max_entries: int = 1024,
+        db_path: Optional[str] = None,
+        ttl: int = 7 * 86400
+    ):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        # key -> (stored_at, response), in LRU order
+        self._memory: "OrderedDict[str, Tuple[float, RETURN_VAL_TYPE]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+        self._db: Optional[sqlite3.Connection] = None
+        if db_path:
+            directory = os.path.dirname(db_path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            self._db = sqlite3.connect(db_path, check_same_thread=False)
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS llm_cache ("
+                "key TEXT PRIMARY KEY, response TEXT NOT NULL, created_at REAL NOT NULL)"
+            )
+            self._db.commit()
+
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def _key(prompt: str, llm_string: str) -> str:
+        return hashlib.sha256(f"{llm_string}\x00{prompt}".encode("utf-8")).hexdigest()
+
+    @staticmethod
+    def _serialize(return_val: RETURN_VAL_TYPE) -> str:
+        return json.dumps([
+            {"message": message_to_dict(g.message)} if isinstance(g, ChatGeneration) else {"text": g.text}
+            for g in return_val
+        ])
+
+    @staticmethod
+    def _deserialize(payload: str) -> RETURN_VAL_TYPE:
+        generations = []
+        for item in json.loads(payload):
+            if "message" in item:
+                generations.append(ChatGeneration(message=messages_from_dict([item["message"]])[0]))
+            else:
+                generations.append(Generation(text=item["text"]))
+        return generations
+
+    def _remember(self, key: str, value: RETURN_VAL_TYPE, stored_at: float) -> None:
+        self._memory[key] = (stored_at, value)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_entries:
+            self._memory.popitem(last=False)
+
+    def lookup(self, prompt: str, llm_string: str) -> Optional[RETURN_VAL_TYPE]:
+        """Look up a cached response for a prompt and model configuration."""
+        key = self._key(prompt, llm_string)
+        oldest = time.time() - self.ttl
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None and entry[0] > oldest:
+                self._memory.move_to_end(key)
+                self.hits += 1
+                return entry[1]
+
+            if self._db is not None:
+                row = self._db.execute(
+                    "SELECT response, created_at FROM llm_cache WHERE key = ? AND created_at > ?",
+                    (key, oldest)
+                ).fetchone()
+                if row is not None:
+                    value = self._deserialize(row[0])
+                    self._remember(key, value, row[1])
+                    self.hits += 1
+                    return value
+
+            self.misses += 1
+            return None
+
+    def update(self, prompt: str, llm_string: str, return_val: RETURN_VAL_TYPE) -> None:
+        """Store a response for a prompt and model configuration."""
+        key = self._key(prompt, llm_string)
+        now = time.time()
+        with self._lock:
+            self._remember(key, return_val, now)
+            if self._db is not None:
+                try:
+                    self._db.execute(
+                        "INSERT OR REPLACE INTO llm_cache (key, response, created_at) VALUES (?, ?, ?)",
+                        (key, self._serialize(return_val), now)
+                    )
+                    self._db.commit()
+                except (sqlite3.Error, TypeError, ValueError) as e:
+                    logger.warning(f"Could not persist LLM cache entry: {e}")
+
+    def clear(self, **kwargs: Any) -> None:
+        """Drop all cached responses."""
+        with self._lock:
+            self._memory.clear()
+            if self._db is not None:
+                self._db.execute("DELETE FROM llm_cache")
+                self._db.commit()
+
+    def close(self) -> None:
+        if self._db is not None:
+            self._db.close()
+            self._db = None
@@ -1,5 +1,175 @@
-def get_rate_limiter(*args, **kwargs):
-    class MockRateLimiter:
-        async def acquire(self):
-            pass
-    return MockRateLimiter()
+"""
+Per-API rate limiting and quota accounting for the external API tools.
+
+Each API has sliding-window allowances (per minute/hour/day). The longest
+window is treated as the API's quota. Interactive requests wait for the
+shorter windows but are not refused when the quota runs out (unless the
+API opts in with ``enforce_quota``); the quota only bounds optional calls.
+Speculative prefetches may only spend a capped share of it (none at all
+for scarce APIs), so background cache warming never eats into the
+allowance interactive requests depend on.
+"""
+import asyncio
+import logging
+import threading
+import time
+from collections import defaultdict, deque
+from typing import Deque, Dict, List, Optional, Tuple
+
+from pydantic import BaseModel
+
+logger = logging.getLogger(__name__)
+
+
+class RateLimit(BaseModel):
+    """Request allowance for one external API."""
+    per_minute: Optional[int] = None
+    per_hour: Optional[int] = None
+    per_day: Optional[int] = None
+    prefetch_share: float = 0.0  # Share of the quota (longest window) prefetches may use
+    enforce_quota: bool = False  # Refuse interactive requests once the quota is spent
+
+    def windows(self) -> List[Tuple[int, int]]:
+        """(max requests, window seconds), shortest window first."""
+        windows = [(self.per_minute, 60), (self.per_hour, 3600), (self.per_day, 86400)]
+        return [(limit, seconds) for limit, seconds in windows if limit is not None]
+
+
+# Free-tier allowances; Amadeus (test env, ~2k calls/month) and Unsplash
+# (demo apps, 50 requests/hour) are too scarce to spend speculatively
+API_RATE_LIMITS: Dict[str, RateLimit] = {
+    "amadeus": RateLimit(per_minute=40, per_day=60),
+    "unsplash": RateLimit(per_hour=50),
+    "travelbuddy_visa": RateLimit(per_minute=10, per_day=100, prefetch_share=0.1),
+    "open_meteo": RateLimit(per_minute=500, per_day=10000, prefetch_share=0.2),
+    "rest_countries": RateLimit(per_minute=60, per_day=5000, prefetch_share=0.2),
+    "frankfurter": RateLimit(per_minute=60, per_day=5000, prefetch_share=0.2),
+}
+
+
+class RateLimiter:
+    """Sliding-window rate limiter keyed by ``api_name``."""
+
+    def __init__(self, limits: Optional[Dict[str, RateLimit]] = None, max_wait: float = 5.0):
+        self.limits = dict(API_RATE_LIMITS if limits is None else limits)
+        self.max_wait = max_wait
+        # api_name -> request timestamps within the longest window
+        self._calls: Dict[str, Deque[float]] = defaultdict(deque)
+        self._speculative: Dict[str, Deque[float]] = defaultdict(deque)
+        self._lock = threading.Lock()
+
+    def __deepcopy__(self, memo):
+        # Tools hold this as a pydantic private attribute, whose default is
+        # deep-copied per instance; the instance must stay shared
+        return self
+
+    def _prune(self, api_name: str, now: float) -> None:
+        limit = self.limits.get(api_name)
+        horizon = limit.windows()[-1][1] if limit and limit.windows() else 0
+        for calls in (self._calls[api_name], self._speculative[api_name]):
+            while calls and calls[0] <= now - horizon:
+                calls.popleft()
+
+    def _wait_time(self, api_name: str, now: float, enforce_quota: bool = True) -> float:
+        """Seconds until a request is allowed (0 = now, inf = quota exhausted)."""
+        limit = self.limits.get(api_name)
+        if limit is None:
+            return 0.0
+        windows = limit.windows()
+        calls = self._calls[api_name]
+        wait = 0.0
+        for i, (max_requests, seconds) in enumerate(windows):
+            in_window = [t for t in calls if t > now - seconds] if i < len(windows) - 1 else calls
+            if len(in_window) >= max_requests:
+                if i == len(windows) - 1:
+                    if enforce_quota:
+                        return float("inf")
+                    continue
+                wait = max(wait, in_window[len(in_window) - max_requests] + seconds - now)
+        return wait
+
+    def _record(self, api_name: str, now: float, speculative: bool = False) -> None:
+        if api_name in self.limits:
+            self._calls[api_name].append(now)
+            if speculative:
+                self._speculative[api_name].append(now)
+
+    async def acquire(self, api_name: str) -> bool:
+        """Take a request slot for an optional request if one is free right now (quota included)."""
+        with self._lock:
+            now = time.monotonic()
+            self._prune(api_name, now)
+            if self._wait_time(api_name, now) > 0:
+                return False
+            self._record(api_name, now)
+            return True
+
+    async def acquire_with_retry(self, api_name: str, max_retries: int = 3) -> bool:
+        """
+        Take a request slot, waiting for short windows to free up.
+
+        A spent quota (longest window) doesn't refuse the request unless the
+        API sets ``enforce_quota``; it only stops optional and speculative calls.
+
+        Raises:
+            ValueError: If the quota is exhausted and ``enforce_quota`` is set
+            TimeoutError: If no slot frees up within ``max_retries`` waits
+        """
+        limit = self.limits.get(api_name)
+        enforce_quota = limit is not None and limit.enforce_quota
+        for _ in range(max_retries + 1):
+            with self._lock:
+                now = time.monotonic()
+                self._prune(api_name, now)
+                wait = self._wait_time(api_name, now, enforce_quota=enforce_quota)
+                if wait == 0:
+                    self._record(api_name, now)
+                    return True
+            if wait == float("inf"):
+                raise ValueError(f"Request quota exceeded for {api_name}")
+            await asyncio.sleep(min(wait, self.max_wait))
+        raise TimeoutError(f"Rate limit for {api_name} did not free up")
+
+    def acquire_speculative(self, api_name: str) -> bool:
+        """
+        Take a slot for a speculative (prefetch) request, never waiting.
+
+        Allowed only while the API's prefetch share of its quota is unspent
+        and a slot is free right now.
+        """
+        limit = self.limits.get(api_name)
+        if limit is None or limit.prefetch_share <= 0 or not limit.windows():
+            return False
+        with self._lock:
+            now = time.monotonic()
+            self._prune(api_name, now)
+            budget = int(limit.windows()[-1][0] * limit.prefetch_share)
+            if len(self._speculative[api_name]) >= budget or self._wait_time(api_name, now) > 0:
+                return False
+            self._record(api_name, now, speculative=True)
+            return True
+
+    def remaining(self, api_name: str) -> Optional[int]:
+        """Requests left in the API's quota window (None if unlimited)."""
+        limit = self.limits.get(api_name)
+        if limit is None or not limit.windows():
+            return None
+        with self._lock:
+            self._prune(api_name, time.monotonic())
+            return max(limit.windows()[-1][0] - len(self._calls[api_name]), 0)
+
+    def reset(self) -> None:
+        with self._lock:
+            self._calls.clear()
+            self._speculative.clear()
+
+
+_rate_limiter: Optional[RateLimiter] = None
+
+
+def get_rate_limiter() -> RateLimiter:
+    """Process-wide rate limiter shared by all tools."""
+    global _rate_limiter
+    if _rate_limiter is None:
+        _rate_limiter = RateLimiter()
+    return _rate_limiter
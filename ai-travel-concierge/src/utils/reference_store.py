@@ -0,0 +1,107 @@
+"""
+Long-lived store for Amadeus hotel-by-city reference data.
+
+The hotel IDs in a city change rarely, but listing them costs an Amadeus
+call on every hotel search. This keeps each (city code, radius) list in
+SQLite for weeks: entries older than ``refresh_after`` are still served
+while the caller refreshes them in the background, and only entries older
+than ``max_age`` (or missing ones) make a search wait for the upstream list.
+"""
+import logging
+import os
+import sqlite3
+import threading
+import time
+from typing import List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+class HotelReferenceStore:
+    """
+    SQLite-backed hotel ID lists keyed by city code and radius.
+
+    Args:
+        db_path: SQLite file; None keeps the store in memory
+        refresh_after: Seconds after which an entry is refreshed in the background
+        max_age: Seconds after which an entry is no longer served
+    """
+
+    def __init__(
+        self,
+        db_path: Optional[str] = None,
+        refresh_after: float = 7 * 86400,
+        max_age: float = 30 * 86400
+    ):
+        self.refresh_after = refresh_after
+        self.max_age = max_age
+        self._lock = threading.Lock()
+
+        if db_path:
+            directory = os.path.dirname(db_path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+        self._db = sqlite3.connect(db_path or ":memory:", check_same_thread=False)
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS hotels_by_city ("
+            "city_code TEXT NOT NULL, radius INTEGER NOT NULL, hotel_ids TEXT NOT NULL, "
+            "fetched_at REAL NOT NULL, PRIMARY KEY (city_code, radius))"
+        )
+        self._db.commit()
+
+        self.hits = 0
+        self.misses = 0
+
+    def __deepcopy__(self, memo):
+        # Held as a pydantic private attribute on the hotel tool; stays shared
+        return self
+
+    def get(self, city_code: str, radius: int, include_expired: bool = False) -> Optional[Tuple[List[str], float]]:
+        """
+        Stored hotel IDs for a city.
+
+        Args:
+            city_code: City IATA code
+            radius: Search radius in km
+            include_expired: Also return entries older than ``max_age``
+
+        Returns:
+            (hotel IDs, age in seconds), or None if there is no usable entry
+        """
+        with self._lock:
+            row = self._db.execute(
+                "SELECT hotel_ids, fetched_at FROM hotels_by_city WHERE city_code = ? AND radius = ?",
+                (city_code.upper(), radius)
+            ).fetchone()
+        if row is None:
+            self.misses += 1
+            return None
+        age = time.time() - row[1]
+        if age >= self.max_age and not include_expired:
+            self.misses += 1
+            return None
+        self.hits += 1
+        # IDs are stored comma-joined: compact, and Amadeus IDs never contain commas
+        return row[0].split(","), age
+
+    def put(self, city_code: str, radius: int, hotel_ids: List[str]) -> None:
+        """Store a city's hotel IDs (empty lists are not stored)."""
+        if not hotel_ids:
+            return
+        with self._lock:
+            try:
+                self._db.execute(
+                    "INSERT OR REPLACE INTO hotels_by_city (city_code, radius, hotel_ids, fetched_at) "
+                    "VALUES (?, ?, ?, ?)",
+                    (city_code.upper(), radius, ",".join(hotel_ids), time.time())
+                )
+                self._db.commit()
+            except sqlite3.Error as e:
+                logger.warning(f"Could not store hotel list for {city_code}: {e}")
+
+    def needs_refresh(self, age: float) -> bool:
+        return age >= self.refresh_after
+
+    def close(self) -> None:
+        with self._lock:
+            self._db.close()
@@ -6,3 +6,27 @@ os.environ["GROQ_API_KEY"] = "gsk_test_key_placeholder"
 os.environ["OPENAI_API_KEY"] = "test-key"
 os.environ["UNSPLASH_ACCESS_KEY"] = "test-unsplash-key"
 os.environ["PASSPORT_API_KEY"] = "test-passport-key"
+
+
+@pytest.fixture(autouse=True)
+def reset_shared_api_state():
+    """Breakers, hedge histories, the Amadeus token, exchange rates and the country snapshot are process-wide; keep them from leaking between tests."""
+    from src.tools.external_apis.amadeus_auth import configure_amadeus_token_manager
+    from src.tools.external_apis.country_tools import CountryInfoTool
+    from src.utils.circuit_breaker import configure_circuit_breakers
+    from src.utils.exchange_rates import configure_rate_history, configure_rate_tables
+    from src.utils.hedging import configure_hedging
+
+    configure_circuit_breakers()
+    configure_hedging()
+    configure_amadeus_token_manager()
+    configure_rate_tables()
+    configure_rate_history()
+    CountryInfoTool.set_dataset(None)
+    yield
+    configure_circuit_breakers()
+    configure_hedging()
+    configure_amadeus_token_manager()
+    configure_rate_tables()
+    configure_rate_history()
+    CountryInfoTool.set_dataset(None)
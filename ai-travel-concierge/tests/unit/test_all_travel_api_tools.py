@@ -14,6 +14,8 @@ Run:
 
 No real API keys needed — all HTTP calls are mocked.
 """
+import asyncio
+
 import pytest
 from unittest.mock import AsyncMock, MagicMock, patch
 import httpx
@@ -21,9 +23,11 @@ import httpx
 from src.tools.external_apis.weather_tools import WeatherForecastTool
 from src.tools.external_apis.currency_tools import CurrencyConversionTool, CurrencyListTool
 from src.tools.external_apis.country_tools import CountryInfoTool
+from src.tools.external_apis.amadeus_auth import get_amadeus_token_manager
 from src.tools.external_apis.amadeus_tools import FlightSearchTool, HotelSearchTool
 from src.tools.external_apis.image_tools import UnsplashImageTool, format_unsplash_attribution
 from src.tools.external_apis.visa_tools import VisaRequirementTool, get_country_code, COUNTRY_CODES
+from src.utils.reference_store import HotelReferenceStore
 
 
 # ===========================================================================
@@ -249,15 +253,21 @@ class TestCurrencyConversionTool:
         assert result.data["converted_currency"] == "EUR"
 
     @pytest.mark.asyncio
-    async def test_historical_date_uses_correct_url(self, currency_tool):
+    async def test_historical_date_uses_range_url(self, currency_tool):
+        range_response = {
+            "amount": 1.0, "base": "EUR", "start_date": "2024-12-24", "end_date": "2025-03-31",
+            "rates": {"2024-12-31": {"USD": 1.0389}, "2025-01-02": {"USD": 1.0321}},
+        }
         with patch.object(currency_tool, "_make_request", new=AsyncMock(
-            return_value=_mock_http(CURRENCY_RESPONSE)
+            return_value=_mock_http(range_response)
         )) as m:
-            await currency_tool.execute(
+            result = await currency_tool.execute(
                 amount=100, from_currency="USD", to_currency="EUR", date="2025-01-01"
             )
             url = m.call_args[0][1]
-            assert "2025-01-01" in url
+            assert url.endswith("/2024-12-25..2025-03-31")
+        # New Year's Day has no ECB fixing; the previous one applies
+        assert result.data["rate_date"] == "2024-12-31"
 
     @pytest.mark.asyncio
     async def test_latest_rate_url(self, currency_tool):
@@ -470,10 +480,8 @@ def flight_tool(mock_cache_manager, mock_rate_limiter):
     }):
         tool = FlightSearchTool(cache_manager=mock_cache_manager)
         tool.__class__._rate_limiter = mock_rate_limiter
-        # Pre-load token so _get_access_token is never called during tests
-        tool._access_token = "test-amadeus-token"
-        from datetime import datetime, timedelta
-        tool._token_expiry = datetime.now() + timedelta(hours=1)
+        # Pre-load the shared token so _get_access_token never hits the auth endpoint
+        get_amadeus_token_manager().store("test-amadeus-token", expires_in=3600)
         return tool
 
 
@@ -593,6 +601,103 @@ class TestFlightSearchTool:
             )
         assert result.success is False
 
+    @staticmethod
+    def _priced_response(price: str) -> dict:
+        offer = {**FLIGHT_SEARCH_RESPONSE["data"][0], "price": {"total": price, "currency": "USD"}}
+        return {**FLIGHT_SEARCH_RESPONSE, "data": [offer]}
+
+    @pytest.mark.asyncio
+    async def test_flexible_dates_return_price_calendar(self, flight_tool):
+        prices = {"2026-06-01": "450.00", "2026-06-02": "320.00", "2026-06-03": "510.00"}
+        in_flight = peak = 0
+
+        async def fake_req(method, url, **kwargs):
+            nonlocal in_flight, peak
+            in_flight += 1
+            peak = max(peak, in_flight)
+            await asyncio.sleep(0.01)
+            in_flight -= 1
+            return _mock_http(self._priced_response(prices[kwargs["params"]["departureDate"]]))
+
+        with patch.object(flight_tool, "_make_request", new=fake_req):
+            result = await flight_tool.execute(
+                origin="JFK", destination="LHR", departure_date="2026-06-01", flexible_days=3
+            )
+
+        assert result.success is True
+        assert [day["cheapest_price"] for day in result.data["calendar"]] == [450.0, 320.0, 510.0]
+        assert result.data["cheapest_date"] == "2026-06-02"
+        assert result.data["flights"][0]["price"] == 320.0
+        assert peak > 1
+
+    @pytest.mark.asyncio
+    async def test_flexible_dates_keep_trip_length(self, flight_tool):
+        calls = []
+
+        async def fake_req(method, url, **kwargs):
+            calls.append(kwargs["params"])
+            return _mock_http(FLIGHT_SEARCH_RESPONSE)
+
+        with patch.object(flight_tool, "_make_request", new=fake_req):
+            await flight_tool.execute(
+                origin="JFK", destination="LHR", departure_date="2026-06-01",
+                return_date="2026-06-08", flexible_days=2
+            )
+
+        assert sorted((c["departureDate"], c["returnDate"]) for c in calls) == [
+            ("2026-06-01", "2026-06-08"), ("2026-06-02", "2026-06-09"),
+        ]
+
+    @pytest.mark.asyncio
+    async def test_direct_call_takes_a_slot_per_search(self, flight_tool):
+        with patch.object(flight_tool, "_make_request", new=AsyncMock(
+            return_value=_mock_http(FLIGHT_SEARCH_RESPONSE)
+        )):
+            await flight_tool._call_api(origin="JFK", destination="LHR", departure_date="2026-06-01")
+            assert flight_tool._rate_limiter.acquire_with_retry.await_count == 1
+            await flight_tool._call_api(
+                origin="JFK", destination="LHR", departure_date="2026-06-01", flexible_days=3
+            )
+        assert flight_tool._rate_limiter.acquire_with_retry.await_count == 4
+
+    @pytest.mark.asyncio
+    async def test_flexible_dates_reuse_cached_days(self, flight_tool):
+        cached_day = flight_tool._normalize_response(self._priced_response("199.00"))
+        cache = MagicMock()
+        cache.get = AsyncMock(side_effect=lambda key: cached_day if "departure_date:2026-06-02" in key else None)
+        cache.set = AsyncMock(return_value=True)
+        previous = FlightSearchTool._cache_manager
+        FlightSearchTool.set_cache_manager(cache)
+        try:
+            with patch.object(flight_tool, "_make_request", new=AsyncMock(
+                return_value=_mock_http(FLIGHT_SEARCH_RESPONSE)
+            )) as m:
+                result = await flight_tool.execute(
+                    origin="JFK", destination="LHR", departure_date="2026-06-01", flexible_days=3
+                )
+        finally:
+            FlightSearchTool.set_cache_manager(previous)
+
+        assert m.call_count == 2
+        assert result.data["cheapest_date"] == "2026-06-02"
+        # Each fetched day is cached on its own, plus the calendar itself
+        assert cache.set.await_count == 3
+
+    @pytest.mark.asyncio
+    async def test_flexible_dates_tolerate_failed_day(self, flight_tool):
+        async def fake_req(method, url, **kwargs):
+            if kwargs["params"]["departureDate"] == "2026-06-02":
+                raise _http_error(500)
+            return _mock_http(FLIGHT_SEARCH_RESPONSE)
+
+        with patch.object(flight_tool, "_make_request", new=fake_req):
+            result = await flight_tool.execute(
+                origin="JFK", destination="LHR", departure_date="2026-06-01", flexible_days=3
+            )
+
+        assert result.success is True
+        assert [day["cheapest_price"] for day in result.data["calendar"]] == [450.0, None, 450.0]
+
 
 # ===========================================================================
 # 6. HotelSearchTool
@@ -638,9 +743,7 @@ def hotel_tool(mock_cache_manager, mock_rate_limiter):
     }):
         tool = HotelSearchTool(cache_manager=mock_cache_manager)
         tool.__class__._rate_limiter = mock_rate_limiter
-        tool._access_token = "pre-loaded-token"
-        from datetime import datetime, timedelta
-        tool._token_expiry = datetime.now() + timedelta(hours=1)
+        get_amadeus_token_manager().store("pre-loaded-token", expires_in=3600)
         return tool
 
 
@@ -706,8 +809,8 @@ class TestHotelSearchTool:
         assert result.data["count"] == 0
 
     @pytest.mark.asyncio
-    async def test_hotel_ids_limited_to_10(self, hotel_tool):
-        many_hotels = {"data": [{"hotelId": f"H{i:03d}"} for i in range(20)]}
+    async def test_hotel_ids_fetched_in_chunks(self, hotel_tool):
+        many_hotels = {"data": [{"hotelId": f"H{i:03d}"} for i in range(40)]}
         calls = []
         async def fake_req(method, url, **kwargs):
             calls.append((method, url, kwargs))
@@ -717,11 +820,130 @@ class TestHotelSearchTool:
 
         with patch.object(hotel_tool, "_make_request", new=fake_req):
             await hotel_tool.execute(
-                city_code="PAR", check_in="2026-06-01", check_out="2026-06-05"
+                city_code="PAR", check_in="2026-06-01", check_out="2026-06-05", max_results=25
             )
-        offers_call = next(c for c in calls if "hotel-offers" in c[1])
-        hotel_ids = offers_call[2]["params"]["hotelIds"].split(",")
-        assert len(hotel_ids) <= 10
+        offers_calls = [c for c in calls if "hotel-offers" in c[1]]
+        chunks = [c[2]["params"]["hotelIds"].split(",") for c in offers_calls]
+        assert len(offers_calls) == 3
+        assert all(len(chunk) <= 10 for chunk in chunks)
+        assert sorted(sum(chunks, [])) == [f"H{i:03d}" for i in range(25)]
+
+    @pytest.mark.asyncio
+    async def test_every_upstream_request_takes_a_slot(self, hotel_tool):
+        many_hotels = {"data": [{"hotelId": f"H{i:03d}"} for i in range(20)]}
+        async def fake_req(method, url, **kwargs):
+            return _mock_http(many_hotels if "by-city" in url else HOTEL_OFFERS_RESPONSE)
+
+        # Called directly, as the graph does, as well as through execute()
+        with patch.object(hotel_tool, "_make_request", new=fake_req):
+            await hotel_tool._call_api(city_code="PAR", check_in="2026-06-01", check_out="2026-06-05", max_results=20)
+            assert hotel_tool._rate_limiter.acquire_with_retry.await_count == 3
+            await hotel_tool.execute(city_code="PAR", check_in="2026-06-01", check_out="2026-06-05", max_results=20)
+            assert hotel_tool._rate_limiter.acquire_with_retry.await_count == 6
+
+    @pytest.mark.asyncio
+    async def test_offers_merged_cheapest_first(self, hotel_tool):
+        many_hotels = {"data": [{"hotelId": f"H{i:03d}"} for i in range(20)]}
+
+        def offer(hotel_id, total):
+            return {"hotel": {"hotelId": hotel_id}, "offers": [{"price": {"total": total}}]}
+
+        async def fake_req(method, url, **kwargs):
+            if "by-city" in url:
+                return _mock_http(many_hotels)
+            if "H000" in kwargs["params"]["hotelIds"]:
+                return _mock_http({"data": [offer("H000", "300.00"), offer("H001", None)]})
+            return _mock_http({"data": [offer("H010", "150.00")]})
+
+        with patch.object(hotel_tool, "_make_request", new=fake_req):
+            result = await hotel_tool.execute(
+                city_code="PAR", check_in="2026-06-01", check_out="2026-06-05", max_results=20
+            )
+        assert [h["hotel_id"] for h in result.data["hotels"]] == ["H010", "H000", "H001"]
+
+    @pytest.mark.asyncio
+    async def test_failed_chunk_keeps_other_offers(self, hotel_tool):
+        many_hotels = {"data": [{"hotelId": f"H{i:03d}"} for i in range(20)]}
+
+        async def fake_req(method, url, **kwargs):
+            if "by-city" in url:
+                return _mock_http(many_hotels)
+            if "H000" in kwargs["params"]["hotelIds"]:
+                raise _http_error(500)
+            return _mock_http(HOTEL_OFFERS_RESPONSE)
+
+        with patch.object(hotel_tool, "_make_request", new=fake_req):
+            result = await hotel_tool.execute(
+                city_code="PAR", check_in="2026-06-01", check_out="2026-06-05", max_results=20
+            )
+        assert result.success is True
+        assert result.data["count"] == 1
+
+    @pytest.mark.asyncio
+    async def test_stored_city_hotel_list_skips_list_call(self, hotel_tool):
+        store = HotelReferenceStore()
+        store.put("PAR", 5, ["ADPAR001"])
+        HotelSearchTool.set_reference_store(store)
+        try:
+            with patch.object(hotel_tool, "_make_request", new=AsyncMock(
+                return_value=_mock_http(HOTEL_OFFERS_RESPONSE)
+            )) as m:
+                result = await hotel_tool.execute(
+                    city_code="PAR", check_in="2026-06-01", check_out="2026-06-05"
+                )
+        finally:
+            HotelSearchTool.set_reference_store(None)
+        assert result.data["count"] == 1
+        assert m.call_count == 1
+        assert "hotel-offers" in m.call_args.args[1]
+
+    @pytest.mark.asyncio
+    async def test_aged_city_hotel_list_refreshed_in_background(self, hotel_tool):
+        store = HotelReferenceStore(refresh_after=0)
+        store.put("PAR", 5, ["ADPAR001"])
+        HotelSearchTool.set_reference_store(store)
+        hotel_tool._rate_limiter.acquire = AsyncMock(return_value=True)
+        calls = []
+        async def fake_req(method, url, **kwargs):
+            calls.append(url)
+            if "by-city" in url:
+                return _mock_http({"data": [{"hotelId": "ADPAR009"}]})
+            return _mock_http(HOTEL_OFFERS_RESPONSE)
+
+        try:
+            with patch.object(hotel_tool, "_make_request", new=fake_req):
+                result = await hotel_tool.execute(
+                    city_code="PAR", check_in="2026-06-01", check_out="2026-06-05"
+                )
+                await asyncio.gather(*HotelSearchTool._refresh_tasks.values())
+        finally:
+            HotelSearchTool.set_reference_store(None)
+        assert result.data["count"] == 1
+        assert sum("by-city" in url for url in calls) == 1
+        assert store.get("PAR", 5)[0] == ["ADPAR009"]
+
+
+class TestHotelReferenceStore:
+
+    def test_persists_across_instances(self, tmp_path):
+        path = str(tmp_path / "reference.db")
+        HotelReferenceStore(db_path=path).put("par", 5, ["A", "B"])
+        ids, age = HotelReferenceStore(db_path=path).get("PAR", 5)
+        assert ids == ["A", "B"]
+        assert age < 60
+
+    def test_entries_past_max_age_not_served(self):
+        store = HotelReferenceStore(max_age=0)
+        store.put("PAR", 5, ["A"])
+        assert store.get("PAR", 5) is None
+        assert store.get("PAR", 5, include_expired=True)[0] == ["A"]
+
+    def test_radius_is_part_of_the_key_and_empty_lists_skipped(self):
+        store = HotelReferenceStore()
+        store.put("PAR", 5, ["A"])
+        store.put("LON", 5, [])
+        assert store.get("PAR", 20) is None
+        assert store.get("LON", 5) is None
 
 
 # ===========================================================================
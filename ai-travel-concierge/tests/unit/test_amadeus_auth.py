@@ -0,0 +1,144 @@
+"""
+Unit tests for the shared Amadeus token manager.
+"""
+import asyncio
+import json
+import time
+
+import pytest
+from unittest.mock import AsyncMock, MagicMock, patch
+
+from src.tools.external_apis.amadeus_auth import AmadeusTokenManager, get_amadeus_token_manager
+from src.tools.external_apis.amadeus_tools import FlightSearchTool, HotelSearchTool
+
+
+CREDENTIALS = {"AMADEUS_API_KEY": "key", "AMADEUS_API_SECRET": "secret"}
+
+
+def auth_request(token: str = "fresh-token", delay: float = 0.0, expires_in: int = 1799) -> AsyncMock:
+    async def request(method, url, **kwargs):
+        await asyncio.sleep(delay)
+        response = MagicMock()
+        response.json.return_value = {"access_token": token, "expires_in": expires_in}
+        return response
+
+    return AsyncMock(side_effect=request)
+
+
+class FakeRedis:
+    """In-memory stand-in for the redis.asyncio calls the manager makes."""
+
+    def __init__(self):
+        self.data = {}
+
+    async def get(self, key):
+        return self.data.get(key)
+
+    async def set(self, key, value, nx=False, px=None):
+        if nx and key in self.data:
+            return None
+        self.data[key] = value
+        return True
+
+    async def delete(self, key):
+        self.data.pop(key, None)
+
+
+# ============================================================================
+# AmadeusTokenManager
+# ============================================================================
+
+class TestAmadeusTokenManager:
+
+    @pytest.mark.asyncio
+    async def test_concurrent_callers_share_one_refresh(self):
+        manager = AmadeusTokenManager()
+        request = auth_request(delay=0.05)
+
+        with patch.dict("os.environ", CREDENTIALS):
+            tokens = await asyncio.gather(*(manager.get_token(request) for _ in range(10)))
+
+        assert set(tokens) == {"fresh-token"}
+        assert request.await_count == 1
+
+    @pytest.mark.asyncio
+    async def test_valid_token_is_reused(self):
+        manager = AmadeusTokenManager()
+        manager.store("cached-token", expires_in=1800)
+        request = auth_request()
+
+        assert await manager.get_token(request) == "cached-token"
+        request.assert_not_called()
+
+    @pytest.mark.asyncio
+    async def test_refreshes_ahead_of_expiry_without_waiting(self):
+        manager = AmadeusTokenManager(refresh_ahead=300)
+        manager.store("old-token", expires_in=120)
+        request = auth_request(delay=0.05)
+
+        with patch.dict("os.environ", CREDENTIALS):
+            assert await manager.get_token(request) == "old-token"
+            assert await manager.get_token(request) == "old-token"
+            await asyncio.sleep(0.1)
+            assert await manager.get_token(request) == "fresh-token"
+
+        assert request.await_count == 1
+
+    @pytest.mark.asyncio
+    async def test_nearly_expired_token_is_not_used(self):
+        manager = AmadeusTokenManager(expiry_margin=30)
+        manager.store("old-token", expires_in=10)
+
+        with patch.dict("os.environ", CREDENTIALS):
+            assert await manager.get_token(auth_request()) == "fresh-token"
+
+    @pytest.mark.asyncio
+    async def test_missing_credentials(self):
+        manager = AmadeusTokenManager()
+        with patch.dict("os.environ", {}, clear=True):
+            with pytest.raises(ValueError, match="credentials"):
+                await manager.get_token(auth_request())
+
+    @pytest.mark.asyncio
+    async def test_token_from_another_worker_is_used(self):
+        manager = AmadeusTokenManager()
+        manager._redis = FakeRedis()
+        manager._redis.data["amadeus:token:key"] = json.dumps({"token": "shared-token", "expires_at": time.time() + 1800})
+        request = auth_request()
+
+        with patch.dict("os.environ", CREDENTIALS):
+            assert await manager.get_token(request) == "shared-token"
+
+        request.assert_not_called()
+
+    @pytest.mark.asyncio
+    async def test_fetched_token_is_shared_and_lock_released(self):
+        manager = AmadeusTokenManager()
+        redis = manager._redis = FakeRedis()
+
+        with patch.dict("os.environ", CREDENTIALS):
+            await manager.get_token(auth_request())
+
+        assert json.loads(redis.data["amadeus:token:key"])["token"] == "fresh-token"
+        assert "amadeus:token:key:lock" not in redis.data
+
+
+# ============================================================================
+# Amadeus tools
+# ============================================================================
+
+class TestSharedToken:
+
+    @pytest.mark.asyncio
+    async def test_flight_and_hotel_tools_share_the_token(self):
+        with patch.dict("os.environ", CREDENTIALS):
+            flight_tool = FlightSearchTool()
+            hotel_tool = HotelSearchTool()
+            flight_tool._make_request = auth_request()
+            hotel_tool._make_request = auth_request("other-token")
+
+            assert await flight_tool._get_access_token() == "fresh-token"
+            assert await hotel_tool._get_access_token() == "fresh-token"
+
+        hotel_tool._make_request.assert_not_called()
+        assert get_amadeus_token_manager().fetches == 1
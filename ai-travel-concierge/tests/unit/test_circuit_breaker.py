@@ -0,0 +1,164 @@
+"""
+Unit tests for the per-API circuit breakers.
+"""
+import httpx
+import pytest
+from unittest.mock import AsyncMock, MagicMock, patch
+
+from src.tools.external_apis.weather_tools import WeatherForecastTool
+from src.utils.cache_manager import CacheManager
+from src.utils.circuit_breaker import (
+    CLOSED,
+    HALF_OPEN,
+    OPEN,
+    CircuitBreaker,
+    CircuitBreakerConfig,
+    CircuitOpenError,
+    configure_circuit_breakers,
+    get_circuit_breaker,
+)
+
+
+@pytest.fixture
+def cached_tool():
+    previous = WeatherForecastTool()._cache_manager
+    cache = CacheManager()
+    WeatherForecastTool.set_cache_manager(cache)
+    yield WeatherForecastTool(), cache
+    WeatherForecastTool.set_cache_manager(previous)
+
+
+def make_breaker(**settings) -> CircuitBreaker:
+    return CircuitBreaker("api", CircuitBreakerConfig(min_calls=4, **settings))
+
+
+def mock_client(**request_kwargs) -> MagicMock:
+    client = MagicMock()
+    client.__aenter__ = AsyncMock(return_value=client)
+    client.__aexit__ = AsyncMock(return_value=False)
+    client.request = AsyncMock(**request_kwargs)
+    return client
+
+
+def status_error(status_code: int) -> httpx.HTTPStatusError:
+    return httpx.HTTPStatusError(str(status_code), request=MagicMock(), response=MagicMock(status_code=status_code))
+
+
+# ============================================================================
+# CircuitBreaker state machine
+# ============================================================================
+
+class TestCircuitBreaker:
+
+    def test_opens_on_failure_rate(self):
+        breaker = make_breaker(failure_rate_threshold=0.5)
+        for failed in (False, True, False, True):
+            breaker.before_call()
+            breaker.record(failed, 0.1)
+
+        assert breaker.state == OPEN
+        with pytest.raises(CircuitOpenError):
+            breaker.before_call()
+
+    def test_stays_closed_below_min_calls(self):
+        breaker = make_breaker()
+        for _ in range(3):
+            breaker.record(True, 0.1)
+        assert breaker.state == CLOSED
+
+    def test_opens_on_slow_calls(self):
+        breaker = make_breaker(slow_call_seconds=1.0, slow_call_rate_threshold=0.75)
+        for duration in (2.0, 2.0, 0.1, 2.0):
+            breaker.record(False, duration)
+        assert breaker.state == OPEN
+
+    def test_half_open_after_cool_down_then_closes(self):
+        breaker = make_breaker(cool_down=10)
+        with patch("src.utils.circuit_breaker.time.monotonic", return_value=100.0):
+            for _ in range(4):
+                breaker.record(True, 0.1)
+        with patch("src.utils.circuit_breaker.time.monotonic", return_value=111.0):
+            assert breaker.state == HALF_OPEN
+            breaker.before_call()
+            # Only one trial at a time
+            with pytest.raises(CircuitOpenError):
+                breaker.before_call()
+            breaker.record(False, 0.1)
+        assert breaker.state == CLOSED
+
+    def test_failed_trial_reopens(self):
+        breaker = make_breaker(cool_down=10)
+        with patch("src.utils.circuit_breaker.time.monotonic", return_value=100.0):
+            for _ in range(4):
+                breaker.record(True, 0.1)
+        with patch("src.utils.circuit_breaker.time.monotonic", return_value=111.0):
+            breaker.before_call()
+            breaker.record(True, 0.1)
+            assert breaker.state == OPEN
+
+    def test_breakers_are_per_api(self):
+        assert get_circuit_breaker("open_meteo") is get_circuit_breaker("open_meteo")
+        assert get_circuit_breaker("open_meteo") is not get_circuit_breaker("frankfurter")
+
+
+# ============================================================================
+# BaseTravelAPITool integration
+# ============================================================================
+
+class TestToolCircuit:
+
+    @pytest.mark.asyncio
+    async def test_open_circuit_fails_fast_without_request(self):
+        configure_circuit_breakers(min_calls=2)
+        tool = WeatherForecastTool()
+        client = mock_client(side_effect=status_error(503))
+
+        with patch("src.tools.external_apis.base.httpx.AsyncClient", return_value=client):
+            for _ in range(2):
+                with pytest.raises(httpx.HTTPStatusError):
+                    await tool._make_request("GET", "https://example.com")
+            with pytest.raises(CircuitOpenError):
+                await tool._make_request("GET", "https://example.com")
+
+        assert client.request.await_count == 2
+
+    @pytest.mark.asyncio
+    async def test_not_found_does_not_count_as_failure(self):
+        configure_circuit_breakers(min_calls=2)
+        tool = WeatherForecastTool()
+        client = mock_client(side_effect=status_error(404))
+
+        with patch("src.tools.external_apis.base.httpx.AsyncClient", return_value=client):
+            for _ in range(3):
+                with pytest.raises(httpx.HTTPStatusError):
+                    await tool._make_request("GET", "https://example.com")
+
+        assert get_circuit_breaker(tool.api_name).state == CLOSED
+
+    @pytest.mark.asyncio
+    async def test_execute_serves_stale_data_while_open(self, cached_tool):
+        configure_circuit_breakers(min_calls=1)
+        tool, cache = cached_tool
+        await cache.set(tool._get_cache_key(location="Oslo"), {"location": "Oslo"}, ttl=-1)
+        get_circuit_breaker(tool.api_name).record(True, 0.1)
+        tool._call_api = AsyncMock()
+
+        response = await tool.execute(location="Oslo")
+
+        assert response.success
+        assert response.degraded
+        assert response.data == {"location": "Oslo"}
+        tool._call_api.assert_not_called()
+
+    @pytest.mark.asyncio
+    async def test_execute_without_cache_fails_fast(self, cached_tool):
+        configure_circuit_breakers(min_calls=1)
+        tool, _ = cached_tool
+        get_circuit_breaker(tool.api_name).record(True, 0.1)
+        tool._call_api = AsyncMock()
+
+        response = await tool.execute(location="Oslo")
+
+        assert not response.success
+        assert "temporarily unavailable" in response.error
+        tool._call_api.assert_not_called()
@@ -0,0 +1,75 @@
+"""
+Unit tests for token-budgeted context packing.
+"""
+from unittest.mock import patch
+
+from src.utils.context_packer import ContextPacker, count_tokens, dedupe_chunks, format_trip_state, get_tokenizer
+
+
+class TestDedupeChunks:
+
+    def test_drops_exact_and_contained_duplicates(self):
+        chunks = ["Bali has rice terraces and surf beaches.", "rice terraces", "Bali has rice terraces and surf beaches."]
+        assert dedupe_chunks(chunks) == ["Bali has rice terraces and surf beaches."]
+
+    def test_trims_splitter_overlap(self):
+        first = "Tokyo's JR Pass covers most Shinkansen lines between major cities."
+        second = "most Shinkansen lines between major cities. Buy it before you arrive."
+        assert dedupe_chunks([first, second]) == [first, "Buy it before you arrive."]
+
+    def test_short_coincidental_overlap_is_kept(self):
+        assert dedupe_chunks(["Visit Paris in May.", "May is mild."]) == ["Visit Paris in May.", "May is mild."]
+
+
+class TestContextPacker:
+
+    def test_respects_token_budget_in_rank_order(self):
+        chunks = [f"Chunk {i}: " + "word " * 50 for i in range(5)]
+        packer = ContextPacker(max_tokens=120, history_max_tokens=0)
+
+        packed = packer.pack(chunks)
+
+        assert packed.tokens <= 120
+        assert packed.context == [c.strip() for c in chunks[:len(packed.context)]]
+        assert packed.dropped_chunks == 5 - len(packed.context)
+
+    def test_smaller_lower_ranked_chunk_fills_the_gap(self):
+        packer = ContextPacker(max_tokens=count_tokens("short one") + 5, history_max_tokens=0)
+        packed = packer.pack(["long " * 100, "short one"])
+        assert packed.context == ["short one"]
+
+    def test_history_keeps_most_recent_turns(self):
+        history = [{"role": "user", "content": f"message {i} " + "x " * 20} for i in range(10)]
+        packer = ContextPacker(max_tokens=1000, history_max_tokens=60)
+
+        packed = packer.pack(["Some context."], history=history)
+
+        assert packed.history
+        assert packed.history[-1] == history[-1]
+        assert len(packed.history) < len(history)
+
+    def test_trip_state_is_always_included(self):
+        trip_state = format_trip_state(
+            {"destination": "Lisbon", "duration_days": 4, "num_travelers": 2},
+            {"interests": ["food", "history"]},
+        )
+        packed = ContextPacker(max_tokens=500).pack([], trip_state=trip_state)
+
+        assert "Destination: Lisbon" in packed.trip_state
+        assert "Interests: food, history" in packed.trip_state
+        assert packed.tokens == count_tokens(trip_state)
+
+
+class TestTokenCounting:
+
+    def test_estimates_without_tiktoken(self):
+        get_tokenizer.cache_clear()
+        count_tokens.cache_clear()
+        try:
+            with patch.dict("sys.modules", {"tiktoken": None}):
+                assert get_tokenizer() is None
+                assert count_tokens("abcdefgh") == 2
+                assert count_tokens("abcdefghi") == 3
+        finally:
+            get_tokenizer.cache_clear()
+            count_tokens.cache_clear()
@@ -0,0 +1,158 @@
+"""
+Unit tests for the bundled country snapshot and its use by the country tool.
+"""
+import json
+
+import pytest
+from unittest.mock import AsyncMock, MagicMock
+
+from src.tools.external_apis.country_tools import CountryInfoTool
+from src.utils.circuit_breaker import OPEN, configure_circuit_breakers, get_circuit_breaker
+from src.utils.country_dataset import DEFAULT_SNAPSHOT_PATH, CountryDataset, normalize_name
+
+
+@pytest.fixture(scope="module")
+def dataset():
+    return CountryDataset()
+
+
+@pytest.fixture
+def local_tool(dataset):
+    CountryInfoTool.set_dataset(dataset)
+    tool = CountryInfoTool()
+    tool._make_request = AsyncMock()
+    return tool
+
+
+# ============================================================================
+# Snapshot lookups
+# ============================================================================
+
+class TestCountryDataset:
+
+    def test_bundled_snapshot_loads(self, dataset):
+        assert len(dataset) > 200
+        with open(DEFAULT_SNAPSHOT_PATH, encoding="utf-8") as f:
+            assert len(json.load(f)) == len(dataset)
+
+    def test_normalize_name(self):
+        assert normalize_name("  Côte d'Ivoire ") == "cote d ivoire"
+        assert normalize_name("SÃO TOMÉ") == "sao tome"
+
+    @pytest.mark.parametrize("query,expected", [
+        ("Japan", "JP"),
+        ("japan", "JP"),
+        ("Federal Republic of Germany", "DE"),
+        ("Holland", "NL"),
+        ("UK", "GB"),
+        ("Cote d'Ivoire", "CI"),
+        ("Phillipines", "PH"),
+        ("Switzerlnd", "CH"),
+    ])
+    def test_name_lookup(self, dataset, query, expected):
+        assert dataset.lookup(query)["cca2"] == expected
+
+    def test_official_names_win_over_alt_spellings(self, dataset):
+        assert dataset.lookup("Guinea")["cca2"] == "GN"
+
+    def test_short_queries_are_not_fuzzy_matched(self, dataset):
+        assert dataset.lookup("Chd") is None
+
+    @pytest.mark.parametrize("query,search_by,expected", [
+        ("jp", "code", "JP"),
+        ("DEU", "code", "DE"),
+        ("Tokyo", "capital", "JP"),
+        ("bogota", "capital", "CO"),
+        ("THB", "currency", "TH"),
+        ("Japanese yen", "currency", "JP"),
+    ])
+    def test_indexed_lookup(self, dataset, query, search_by, expected):
+        assert dataset.lookup(query, search_by)["cca2"] == expected
+
+    @pytest.mark.parametrize("query,expected", [
+        ("USD", "US"),
+        ("United States dollar", "US"),
+        ("EUR", "DE"),
+        ("euro", "DE"),
+        ("XOF", "SN"),
+        ("AUD", "AU"),
+    ])
+    def test_shared_currency_resolves_to_its_issuer(self, dataset, query, expected):
+        assert dataset.lookup(query, "currency")["cca2"] == expected
+
+    def test_no_match(self, dataset):
+        assert dataset.lookup("Atlantis") is None
+        assert dataset.lookup("QQ", "code") is None
+        assert dataset.lookup("") is None
+        assert dataset.misses >= 3
+
+    def test_missing_file_is_empty(self, tmp_path):
+        empty = CountryDataset(path=str(tmp_path / "missing.json"))
+        assert len(empty) == 0
+        assert empty.lookup("Japan") is None
+
+    def test_reload_and_replace(self, tmp_path):
+        path = tmp_path / "countries.json"
+        path.write_text(json.dumps([{"name": {"common": "Japan"}, "cca2": "JP", "cca3": "JPN"}]))
+        snapshot = CountryDataset(path=str(path))
+        assert snapshot.lookup("Japan")["cca3"] == "JPN"
+
+        path.write_text("[]")
+        assert snapshot.lookup("Japan") is not None  # loaded once
+        assert snapshot.reload() == 0
+        assert snapshot.lookup("Japan") is None
+
+        snapshot.replace([{"name": {"common": "Peru"}, "cca2": "PE", "cca3": "PER"}])
+        assert snapshot.lookup("PER", "code")["cca2"] == "PE"
+
+
+# ============================================================================
+# Country tool with the snapshot
+# ============================================================================
+
+class TestCountryToolLocalLookup:
+
+    @pytest.mark.asyncio
+    async def test_snapshot_hit_skips_api(self, local_tool):
+        result = await local_tool.execute(query="Japan")
+        assert result.success is True
+        assert result.data["capital"] == "Tokyo"
+        assert result.data["primary_currency"]["code"] == "JPY"
+        local_tool._make_request.assert_not_awaited()
+
+    @pytest.mark.asyncio
+    async def test_snapshot_hit_leaves_out_fields_it_lacks(self, local_tool):
+        result = await local_tool.execute(query="France")
+        assert not {"borders", "coat_of_arms_url", "google_maps_url"} & set(result.data)
+
+    def test_snapshot_fields_are_kept_when_present(self, local_tool):
+        record = {"name": {"common": "Peru"}, "cca2": "PE", "borders": ["BOL"], "maps": {"googleMaps": "https://maps/pe"}}
+        normalized = local_tool._normalize_local(record)
+        assert normalized["borders"] == ["BOL"]
+        assert normalized["google_maps_url"] == "https://maps/pe"
+        assert "coat_of_arms_url" not in normalized
+
+    @pytest.mark.asyncio
+    async def test_snapshot_hit_survives_open_circuit(self, local_tool):
+        configure_circuit_breakers(min_calls=1)
+        get_circuit_breaker(local_tool.api_name).record(True, 0.1)
+        assert get_circuit_breaker(local_tool.api_name).state == OPEN
+        result = await local_tool.execute(query="FR", search_by="code")
+        assert result.success is True
+        assert result.data["name"]["common"] == "France"
+
+    @pytest.mark.asyncio
+    async def test_snapshot_miss_falls_back_to_api(self, local_tool, monkeypatch):
+        response = MagicMock()
+        response.json.return_value = [{"name": {"common": "Anguilla"}, "cca2": "AI", "capital": ["The Valley"]}]
+        local_tool._make_request.return_value = response
+        monkeypatch.setattr(CountryInfoTool, "_rate_limiter", MagicMock(acquire_with_retry=AsyncMock(return_value=True)))
+
+        result = await local_tool.execute(query="Anguilla")
+        assert result.success is True
+        assert result.data["name"]["common"] == "Anguilla"
+        local_tool._make_request.assert_awaited_once()
+
+    def test_no_dataset_means_api_only(self):
+        CountryInfoTool.set_dataset(None)
+        assert CountryInfoTool()._lookup_local(query="Japan") is None
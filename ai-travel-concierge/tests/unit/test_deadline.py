@@ -0,0 +1,169 @@
+"""
+Unit tests for per-turn deadline propagation.
+"""
+import asyncio
+import time
+
+import httpx
+import pytest
+from unittest.mock import AsyncMock, MagicMock, patch
+
+from src.graphs.edges.graph_edges import GraphEdges
+from src.graphs.state.conversation_state import create_initial_state
+from src.graphs.workflows.travel_concierge_graph import TravelConciergeGraph
+from src.tools.external_apis.weather_tools import WeatherForecastTool
+from src.utils import deadline
+from src.utils.deadline import DeadlineExceeded, make_deadline, run_with_deadline
+
+
+# ============================================================================
+# Deadline helpers
+# ============================================================================
+
+class TestDeadline:
+
+    def test_no_deadline_leaves_timeouts_alone(self):
+        assert deadline.remaining() is None
+        assert deadline.budget(30) == 30
+        deadline.check_deadline()
+
+    @pytest.mark.asyncio
+    async def test_budget_capped_inside_deadline(self):
+        async def work():
+            return deadline.budget(30)
+
+        left = await run_with_deadline(work, make_deadline(2))
+        assert 1.5 < left <= 2
+
+    @pytest.mark.asyncio
+    async def test_node_timeout_tighter_than_turn_deadline(self):
+        async def work():
+            return deadline.remaining()
+
+        left = await run_with_deadline(work, make_deadline(60), timeout=1)
+        assert left <= 1
+
+    @pytest.mark.asyncio
+    async def test_slow_work_is_cancelled(self):
+        cancelled = asyncio.Event()
+
+        async def work():
+            try:
+                await asyncio.sleep(5)
+            except asyncio.CancelledError:
+                cancelled.set()
+                raise
+
+        started = time.perf_counter()
+        with pytest.raises(asyncio.TimeoutError):
+            await run_with_deadline(work, make_deadline(0.1))
+        assert time.perf_counter() - started < 1
+        assert cancelled.is_set()
+        assert deadline.remaining() is None
+
+    @pytest.mark.asyncio
+    async def test_passed_deadline_raises(self):
+        async def work():
+            deadline.check_deadline("lookup")
+
+        with pytest.raises((DeadlineExceeded, asyncio.TimeoutError)):
+            await run_with_deadline(work, time.time() - 1)
+
+
+# ============================================================================
+# BaseTravelAPITool._make_request
+# ============================================================================
+
+class TestRequestBudget:
+
+    @pytest.mark.asyncio
+    async def test_http_timeout_derived_from_deadline(self):
+        tool = WeatherForecastTool()
+        client = MagicMock()
+        client.__aenter__ = AsyncMock(return_value=client)
+        client.__aexit__ = AsyncMock(return_value=False)
+        client.request = AsyncMock(return_value=MagicMock())
+
+        async def request():
+            with patch("src.tools.external_apis.base.httpx.AsyncClient", return_value=client) as client_cls:
+                await tool._make_request("GET", "https://example.com")
+                return client_cls.call_args.kwargs["timeout"]
+
+        timeout = await run_with_deadline(request, make_deadline(5))
+        assert timeout <= 5
+
+    @pytest.mark.asyncio
+    async def test_no_retry_without_time_left(self):
+        tool = WeatherForecastTool()
+        client = MagicMock()
+        client.__aenter__ = AsyncMock(return_value=client)
+        client.__aexit__ = AsyncMock(return_value=False)
+        client.request = AsyncMock(side_effect=httpx.ConnectTimeout("slow"))
+
+        async def request():
+            with patch("src.tools.external_apis.base.httpx.AsyncClient", return_value=client):
+                await tool._make_request("GET", "https://example.com")
+
+        started = time.perf_counter()
+        with pytest.raises(Exception):
+            await run_with_deadline(request, make_deadline(0.5))
+        assert time.perf_counter() - started < 1
+        assert client.request.await_count == 1
+
+
+# ============================================================================
+# Graph node wrapper
+# ============================================================================
+
+@pytest.fixture
+def graph():
+    travel_graph = TravelConciergeGraph.__new__(TravelConciergeGraph)
+    travel_graph.config = {"node_timeout": 5}
+    travel_graph.edges = GraphEdges()
+    return travel_graph
+
+
+class TestNodeDeadline:
+
+    @pytest.mark.asyncio
+    async def test_timed_out_answer_node_apologizes_and_keeps_partial_state(self, graph):
+        async def slow_node(state):
+            state["tool_results"] = [{"type": "weather", "data": {}}]
+            await asyncio.sleep(5)
+            return state
+
+        node = graph._with_deadline("weather_check", slow_node)
+        state = create_initial_state()
+        state["messages"].append({"role": "user", "content": "weather in Oslo"})
+
+        result = await node(state, {"configurable": {"deadline": make_deadline(0.1)}})
+
+        assert result["tool_results"] == [{"type": "weather", "data": {}}]
+        assert result["error"] == "weather_check timed out"
+        assert result["messages"][-1]["role"] == "assistant"
+
+    @pytest.mark.asyncio
+    async def test_timed_out_upstream_node_passes_state_on(self, graph):
+        async def slow_node(state):
+            await asyncio.sleep(5)
+            return state
+
+        node = graph._with_deadline("retrieve_context", slow_node, answers=False)
+        state = create_initial_state()
+        state["messages"].append({"role": "user", "content": "hi"})
+
+        result = await node(state, {"configurable": {"deadline": make_deadline(0.1)}})
+
+        assert result["messages"][-1]["role"] == "user"
+
+    @pytest.mark.asyncio
+    async def test_fast_node_untouched(self, graph):
+        async def fast_node(state):
+            state["current_intent"] = "check_weather"
+            return state
+
+        node = graph._with_deadline("classify_intent", fast_node, answers=False)
+        result = await node(create_initial_state(), {"configurable": {}})
+
+        assert result["current_intent"] == "check_weather"
+        assert result["error"] is None
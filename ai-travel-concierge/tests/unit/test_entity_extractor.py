@@ -0,0 +1,204 @@
+"""
+Unit tests for deterministic entity extraction.
+"""
+from datetime import date
+
+import pytest
+
+from src.tools.validation.entity_extractor import (
+    extract_amount,
+    extract_currencies,
+    extract_currency_conversion,
+    extract_dates,
+    extract_flight_refinement,
+    extract_passport_country,
+    extract_rate_history,
+    extract_visa_countries,
+    is_rate_history_question,
+)
+
+TODAY = date(2026, 3, 10)  # a Tuesday
+
+
+class TestCurrencyExtraction:
+
+    @pytest.mark.parametrize("message,expected", [
+        ("convert 100 USD to EUR", (100.0, "USD", "EUR")),
+        ("Convert 250 euros to yen", (250.0, "EUR", "JPY")),
+        ("€50 in dollars", (50.0, "EUR", "USD")),
+        ("how many yen is 20 pounds", (20.0, "GBP", "JPY")),
+        ("convert 1,200 INR into USD", (1200.0, "INR", "USD")),
+        ("5k THB to US dollars", (5000.0, "THB", "USD")),
+        ("GBP to CHF rate", (1.0, "GBP", "CHF")),
+    ])
+    def test_conversion_parameters(self, message, expected):
+        params = extract_currency_conversion(message, today=TODAY)
+        assert (params["amount"], params["from_currency"], params["to_currency"]) == expected
+
+    def test_past_date_becomes_historical_rate(self):
+        params = extract_currency_conversion("USD to JPY rate on 15-01-2024", today=TODAY)
+        assert params["date"] == "2024-01-15"
+        assert params["amount"] == 1.0
+
+    def test_incomplete_request_returns_none(self):
+        assert extract_currency_conversion("exchange rate for Swiss francs") is None
+        assert extract_currency_conversion("convert 100 dollars") is None
+
+    def test_ambiguous_lowercase_codes_are_ignored(self):
+        assert extract_currencies("I'll try to convert ron's money from USD to EUR") == ["USD", "EUR"]
+
+    def test_amount_skips_dates(self):
+        assert extract_amount("On 14-06-2026 convert 75 EUR") == 75.0
+
+    @pytest.mark.parametrize("message,expected", [
+        ("I'll be there 3 days, convert 200 EUR to JPY", 200.0),
+        ("For 2 people, what is GBP 40 in USD", 40.0),
+        ("we have 4 nights and €300", 300.0),
+        ("convert 100 to yen", 100.0),
+    ])
+    def test_amount_next_to_currency_wins(self, message, expected):
+        assert extract_amount(message) == expected
+
+    def test_ambiguous_amount_defers_to_llm(self):
+        message = "I'll be there 3 days with 200, how much is that from EUR to JPY"
+        assert extract_amount(message) is None
+        assert extract_currency_conversion(message, today=TODAY) is None
+
+    @pytest.mark.parametrize("message", [
+        "How much would 100 USD be in EUR?",
+        "I have 100 USD, how much in EUR?",
+        "how much do I get for 100 USD in EUR",
+    ])
+    def test_amount_currency_is_the_source(self, message):
+        params = extract_currency_conversion(message, today=TODAY)
+        assert (params["amount"], params["from_currency"], params["to_currency"]) == (100.0, "USD", "EUR")
+
+    def test_asked_currency_is_the_target(self):
+        params = extract_currency_conversion("How many yen is 50 dollars?", today=TODAY)
+        assert (params["from_currency"], params["to_currency"]) == ("USD", "JPY")
+
+    def test_conflicting_direction_defers_to_llm(self):
+        assert extract_currency_conversion("how much EUR is 100 EUR in dollars", today=TODAY) is None
+
+    def test_conversion_skips_other_numbers(self):
+        params = extract_currency_conversion("I'll be there 3 days, convert 200 EUR to JPY", today=TODAY)
+        assert (params["amount"], params["from_currency"], params["to_currency"]) == (200.0, "EUR", "JPY")
+
+
+class TestVisaExtraction:
+
+    @pytest.mark.parametrize("message,expected", [
+        ("Do I need a visa for Japan as a US citizen?", ("US", "JP")),
+        ("visa requirements for Indians visiting Thailand", ("IN", "TH")),
+        ("Can UK passport holders enter Brazil without a visa?", ("GB", "BR")),
+        ("visa for Germany from Nigeria", ("NG", "DE")),
+        ("I'm from France, do I need a visa to go to the United States?", ("FR", "US")),
+    ])
+    def test_country_pairs(self, message, expected):
+        params = extract_visa_countries(message)
+        assert (params["from_country"], params["to_country"]) == expected
+
+    @pytest.mark.parametrize("message,expected", [
+        ("As an Indian living in Germany, do I need a visa for Japan?", ("IN", "JP")),
+        ("I am a US citizen in France, do I need a visa to visit Japan?", ("US", "JP")),
+    ])
+    def test_country_of_residence_is_not_the_destination(self, message, expected):
+        params = extract_visa_countries(message)
+        assert (params["from_country"], params["to_country"]) == expected
+
+    def test_several_destinations_return_none(self):
+        assert extract_visa_countries("visa for Japan or Korea as a US citizen") is None
+        assert extract_visa_countries("As a US citizen, do I need a visa to visit Japan and Thailand?") is None
+
+    def test_missing_passport_country_returns_none(self):
+        assert extract_visa_countries("tell us about visas for Japan") is None
+
+    def test_passport_country_alone(self):
+        assert extract_passport_country("I'm a US citizen") == "US"
+        assert extract_passport_country("we are Canadians") == "CA"
+        assert extract_passport_country("Plan a week in Japan") is None
+
+
+class TestFlightRefinement:
+
+    @pytest.mark.parametrize("message,expected", [
+        ("non-stop only please", {"max_stops": 0}),
+        ("any cheaper ones?", {"sort_by": "price"}),
+        ("what's the fastest", {"sort_by": "duration"}),
+        ("morning flights", {"depart_after": 300, "depart_before": 720}),
+        ("something after 6pm", {"depart_after": 1080}),
+        ("direct flights under $400", {"max_stops": 0, "max_price": 400.0}),
+        ("only BA", {"airlines": ["BA"]}),
+        ("show me more", {"page": "next"}),
+        ("direct ones under 400 USD", {"max_stops": 0, "max_price": 400.0}),
+    ])
+    def test_refinements(self, message, expected):
+        assert extract_flight_refinement(message) == expected
+
+    def test_before_12am_means_end_of_day(self):
+        assert extract_flight_refinement("anything before 12am?") == {"depart_before": 1440}
+        assert extract_flight_refinement("after 12am") == {"depart_after": 0}
+
+    def test_lower_case_codes_checked_against_stored_carriers(self):
+        assert extract_flight_refinement("only aa flights", carriers=["AA", "BA"]) == {"airlines": ["AA"]}
+        assert extract_flight_refinement("I'll go with it, cheaper ones", carriers=["AA", "BA"]) == {"sort_by": "price"}
+        assert extract_flight_refinement("I'll go with it, cheaper ones") == {"sort_by": "price"}
+
+    def test_new_requests_are_not_refinements(self):
+        assert extract_flight_refinement("Find flights from NYC to London on June 1") is None
+        assert extract_flight_refinement("Plan a budget trip to Lisbon") is None
+
+    @pytest.mark.parametrize("message", [
+        "cheapest flights from NYC to Paris",
+        "direct flights to Rome next Friday",
+        "any non-stop ones on June 3?",
+        "cheaper ones to LHR",
+        "morning flights in August",
+        "cheapest flight JFK CDG",
+    ])
+    def test_new_route_or_date_is_a_new_search(self, message):
+        assert extract_flight_refinement(message) is None
+
+
+class TestDateExtraction:
+
+    def test_absolute_formats(self):
+        assert extract_dates("from 14-06-2026 to 2026-06-19", today=TODAY) == [date(2026, 6, 14), date(2026, 6, 19)]
+        assert extract_dates("3rd of July 2027 or June 20", today=TODAY) == [date(2027, 7, 3), date(2026, 6, 20)]
+
+    def test_month_without_year_rolls_forward(self):
+        assert extract_dates("January 5", today=TODAY) == [date(2027, 1, 5)]
+
+    def test_relative_dates(self):
+        assert extract_dates("tomorrow", today=TODAY) == [date(2026, 3, 11)]
+        assert extract_dates("in 2 weeks", today=TODAY) == [date(2026, 3, 24)]
+        assert extract_dates("next friday", today=TODAY) == [date(2026, 3, 13)]
+        assert extract_dates("next tuesday", today=TODAY) == [date(2026, 3, 17)]
+
+    def test_invalid_dates_are_skipped(self):
+        assert extract_dates("31-02-2026", today=TODAY) == []
+
+
+class TestRateHistoryExtraction:
+
+    @pytest.mark.parametrize("message,expected", [
+        ("How has the yen moved against the dollar this year?",
+         {"from_currency": "JPY", "to_currency": "USD", "start_date": "2026-01-01"}),
+        ("USD to EUR trend over the past 3 months",
+         {"from_currency": "USD", "to_currency": "EUR", "start_date": "2025-12-10"}),
+        ("average EUR to THB rate between 1 June 2025 and 14 June 2025",
+         {"from_currency": "EUR", "to_currency": "THB", "start_date": "2025-06-01", "end_date": "2025-06-14"}),
+        ("EUR to GBP since January 5",
+         {"from_currency": "EUR", "to_currency": "GBP", "start_date": "2026-01-05"}),
+    ])
+    def test_history_parameters(self, message, expected):
+        assert is_rate_history_question(message)
+        assert extract_rate_history(message, today=TODAY) == expected
+
+    def test_conversions_are_not_history_questions(self):
+        assert not is_rate_history_question("convert 100 USD to EUR")
+        assert not is_rate_history_question("GBP to CHF rate")
+
+    def test_missing_period_or_currency_returns_none(self):
+        assert extract_rate_history("how has the yen moved against the dollar", today=TODAY) is None
+        assert extract_rate_history("how has the yen moved this year", today=TODAY) is None
@@ -0,0 +1,307 @@
+"""
+Unit tests for local exchange-rate tables and the daily rate history.
+"""
+import asyncio
+import math
+from datetime import date, datetime, timedelta, timezone
+
+import pytest
+from unittest.mock import AsyncMock, MagicMock, patch
+
+from src.tools.external_apis.currency_tools import CurrencyConversionTool, ExchangeRateHistoryTool
+from src.utils.exchange_rates import (
+    RateHistory,
+    RateTable,
+    STALE_RETRY_SECONDS,
+    get_rate_history,
+    get_rate_tables,
+    last_publish,
+    next_publish,
+)
+
+
+ECB_RESPONSE = {
+    "amount": 1.0,
+    "base": "EUR",
+    "date": "2026-10-16",
+    "rates": {"USD": 1.1, "GBP": 0.85, "JPY": 165.0},
+}
+
+
+def rates_response(raw: dict = ECB_RESPONSE) -> MagicMock:
+    response = MagicMock()
+    response.json.return_value = raw
+    return response
+
+
+# ============================================================================
+# Publication schedule
+# ============================================================================
+
+class TestPublishSchedule:
+
+    def test_weekday_after_publication(self):
+        # Friday 2026-10-16, 15:00 UTC = 17:00 in Frankfurt
+        now = datetime(2026, 10, 16, 15, 0, tzinfo=timezone.utc)
+        assert last_publish(now).date().isoformat() == "2026-10-16"
+        assert next_publish(now).date().isoformat() == "2026-10-19"
+
+    def test_weekday_before_publication(self):
+        now = datetime(2026, 10, 15, 8, 0, tzinfo=timezone.utc)
+        assert last_publish(now).date().isoformat() == "2026-10-14"
+        assert next_publish(now).date().isoformat() == "2026-10-15"
+
+    def test_latest_table_kept_until_next_publication(self):
+        now = datetime(2026, 10, 17, 12, 0, tzinfo=timezone.utc)  # Saturday
+        table = RateTable.from_response(ECB_RESPONSE, now=now)
+        assert table.expires_at == next_publish(now).timestamp()
+
+    def test_late_table_rechecked_soon(self):
+        now = datetime(2026, 10, 19, 16, 0, tzinfo=timezone.utc)  # Monday, after publication
+        table = RateTable.from_response(ECB_RESPONSE, now=now)
+        assert table.expires_at == now.timestamp() + STALE_RETRY_SECONDS
+
+    def test_historical_table_never_expires(self):
+        table = RateTable.from_response(ECB_RESPONSE, latest=False)
+        assert math.isinf(table.expires_at)
+
+
+# ============================================================================
+# RateTable
+# ============================================================================
+
+class TestRateTable:
+
+    def test_cross_rates(self):
+        table = RateTable.from_response(ECB_RESPONSE)
+        assert table.rate("EUR", "USD") == pytest.approx(1.1)
+        assert table.rate("USD", "GBP") == pytest.approx(0.85 / 1.1)
+        assert table.rate("gbp", "gbp") == 1.0
+
+    def test_rates_scaled_by_amount(self):
+        table = RateTable.from_response({"amount": 100.0, "base": "USD", "date": "2026-10-16", "rates": {"EUR": 91.5}})
+        assert table.rate("USD", "EUR") == pytest.approx(0.915)
+
+    def test_convert_matches_frankfurter_shape(self):
+        table = RateTable.from_response(ECB_RESPONSE)
+        assert table.convert(250, "usd", "jpy") == {
+            "amount": 250, "base": "USD", "date": "2026-10-16", "rates": {"JPY": 37500.0},
+        }
+
+    def test_missing_currency(self):
+        with pytest.raises(ValueError, match="CHF"):
+            RateTable.from_response(ECB_RESPONSE).rate("CHF", "USD")
+
+
+# ============================================================================
+# CurrencyConversionTool
+# ============================================================================
+
+@pytest.fixture
+def currency_tool():
+    tool = CurrencyConversionTool()
+    tool.__class__._rate_limiter = MagicMock(acquire_with_retry=AsyncMock(return_value=True))
+    return tool
+
+
+class TestCurrencyRateTable:
+
+    @pytest.mark.asyncio
+    async def test_one_upstream_call_for_any_pair_and_amount(self, currency_tool):
+        with patch.object(currency_tool, "_make_request", new=AsyncMock(return_value=rates_response())) as m:
+            usd = await currency_tool._call_api(amount=100, from_currency="USD", to_currency="EUR")
+            gbp = await currency_tool._call_api(amount=250, from_currency="GBP", to_currency="JPY")
+
+        assert m.await_count == 1
+        assert m.await_args.args[1].endswith("/latest")
+        assert usd["rates"]["EUR"] == pytest.approx(100 / 1.1, abs=1e-4)
+        assert gbp["rates"]["JPY"] == pytest.approx(250 * 165.0 / 0.85, abs=1e-4)
+
+    @pytest.mark.asyncio
+    async def test_concurrent_conversions_share_one_fetch(self, currency_tool):
+        async def slow_request(method, url, **kwargs):
+            await asyncio.sleep(0.02)
+            return rates_response()
+
+        with patch.object(currency_tool, "_make_request", new=AsyncMock(side_effect=slow_request)) as m:
+            await asyncio.gather(*(
+                currency_tool._call_api(amount=amount, from_currency="USD", to_currency="GBP")
+                for amount in range(1, 6)
+            ))
+
+        assert m.await_count == 1
+        assert get_rate_tables().fetches == 1
+
+    @pytest.mark.asyncio
+    async def test_table_shared_through_tool_cache(self, currency_tool):
+        cache = MagicMock()
+        cache.get = AsyncMock(return_value=ECB_RESPONSE)
+        cache.set = AsyncMock(return_value=True)
+        previous = CurrencyConversionTool._cache_manager
+        CurrencyConversionTool.set_cache_manager(cache)
+        try:
+            with patch.object(currency_tool, "_make_request", new=AsyncMock()) as m:
+                result = await currency_tool._call_api(amount=10, from_currency="EUR", to_currency="USD")
+        finally:
+            CurrencyConversionTool.set_cache_manager(previous)
+
+        m.assert_not_called()
+        assert cache.get.await_args.args[0] == "currency:rates:latest"
+        assert result["rates"]["USD"] == pytest.approx(11.0)
+
+
+# ============================================================================
+# RateHistory
+# ============================================================================
+
+def range_response(start: date, end: date) -> dict:
+    """Frankfurter range response with a weekday row per date; USD drifts up by 0.01 a day."""
+    rates = {}
+    day = start
+    while day <= end:
+        if day.weekday() < 5:
+            offset = (day - start).days
+            rates[day.isoformat()] = {"USD": round(1.0 + offset * 0.01, 4), "JPY": 160.0}
+        day += timedelta(days=1)
+    return {"amount": 1.0, "base": "EUR", "start_date": start.isoformat(), "end_date": end.isoformat(), "rates": rates}
+
+
+def range_request() -> AsyncMock:
+    async def request(method, url, **kwargs):
+        low, high = url.rsplit("/", 1)[1].split("..")
+        return rates_response(range_response(date.fromisoformat(low), date.fromisoformat(high)))
+
+    return AsyncMock(side_effect=request)
+
+
+class TestRateHistory:
+
+    def test_lookup_uses_latest_fixing_on_or_before(self):
+        history = RateHistory()
+        history.add(range_response(date(2025, 3, 3), date(2025, 3, 9)))  # Mon..Sun
+
+        table = history.table_on(date(2025, 3, 9))
+        assert table.date == "2025-03-07"
+        assert table.rate("EUR", "USD") == pytest.approx(1.04)
+        assert history.table_on(date(2025, 3, 1)) is None
+
+    def test_series_cross_rates(self):
+        history = RateHistory()
+        history.add(range_response(date(2025, 3, 3), date(2025, 3, 7)))
+
+        series = history.series("USD", "JPY", date(2025, 3, 4), date(2025, 3, 5))
+        assert [day for day, _ in series] == ["2025-03-04", "2025-03-05"]
+        assert series[0][1] == pytest.approx(160.0 / 1.01)
+
+    def test_rows_added_out_of_order_stay_sorted(self):
+        history = RateHistory()
+        history.add(range_response(date(2025, 3, 10), date(2025, 3, 10)))
+        history.add({"rates": {"2025-03-03": {"USD": 2.0, "GBP": 0.8}}})
+
+        assert len(history) == 2
+        assert [day for day, _ in history.series("EUR", "USD", date(2025, 3, 1), date(2025, 3, 31))] == [
+            "2025-03-03", "2025-03-10",
+        ]
+        # GBP only has a rate on the day it was reported
+        assert history.series("EUR", "GBP", date(2025, 3, 1), date(2025, 3, 31)) == [("2025-03-03", 0.8)]
+
+    def test_gaps_skip_covered_ranges_and_are_chunked(self):
+        history = RateHistory()
+        history.mark_covered(date(2025, 2, 1), date(2025, 2, 28))
+        history.mark_covered(date(2025, 3, 1), date(2025, 3, 10))
+
+        assert history.gaps(date(2025, 2, 10), date(2025, 3, 5)) == []
+        assert history.gaps(date(2025, 1, 20), date(2025, 3, 15)) == [
+            (date(2025, 1, 20), date(2025, 1, 31)),
+            (date(2025, 3, 11), date(2025, 3, 15)),
+        ]
+        chunks = history.gaps(date(2025, 6, 1), date(2025, 12, 31))
+        assert len(chunks) == 3
+        assert all((high - low).days < RateHistory.MAX_RANGE_DAYS for low, high in chunks)
+
+    @pytest.mark.asyncio
+    async def test_ensure_fetches_only_missing_dates(self):
+        history = RateHistory()
+        fetch = AsyncMock(side_effect=lambda low, high: range_response(low, high))
+
+        await history.ensure(date(2025, 3, 1), date(2025, 3, 31), fetch)
+        await history.ensure(date(2025, 3, 10), date(2025, 4, 10), fetch)
+
+        assert [call.args for call in fetch.await_args_list] == [
+            (date(2025, 3, 1), date(2025, 3, 31)),
+            (date(2025, 4, 1), date(2025, 4, 10)),
+        ]
+
+
+    @pytest.mark.asyncio
+    async def test_unpublished_weekday_is_fetched_again(self):
+        history = RateHistory()
+        # Upstream has not published Friday 7 March yet
+        fetch = AsyncMock(side_effect=lambda low, high: range_response(low, min(high, date(2025, 3, 6))))
+
+        await history.ensure(date(2025, 3, 3), date(2025, 3, 9), fetch)
+        await history.ensure(date(2025, 3, 3), date(2025, 3, 9), fetch)
+
+        assert [call.args for call in fetch.await_args_list] == [
+            (date(2025, 3, 3), date(2025, 3, 9)),
+            (date(2025, 3, 7), date(2025, 3, 9)),
+        ]
+
+    @pytest.mark.asyncio
+    async def test_trailing_weekend_counts_as_covered(self):
+        history = RateHistory()
+        fetch = AsyncMock(side_effect=lambda low, high: range_response(low, high))
+
+        await history.ensure(date(2025, 3, 3), date(2025, 3, 9), fetch)  # Mon..Sun
+
+        assert history.gaps(date(2025, 3, 3), date(2025, 3, 9)) == []
+
+
+# ============================================================================
+# Historical conversions and ExchangeRateHistoryTool
+# ============================================================================
+
+class TestHistoricalRates:
+
+    @pytest.mark.asyncio
+    async def test_dates_in_the_same_quarter_share_one_fill(self, currency_tool):
+        with patch.object(currency_tool, "_make_request", new=range_request()) as m:
+            first = await currency_tool._call_api(amount=100, from_currency="EUR", to_currency="USD", date="2025-02-03")
+            second = await currency_tool._call_api(amount=100, from_currency="EUR", to_currency="USD", date="2025-03-14")
+
+        assert m.await_count == 1
+        assert m.await_args.args[1].endswith("/2024-12-25..2025-03-31")
+        assert first["date"] == "2025-02-03"
+        assert second["date"] == "2025-03-14"
+
+    @pytest.mark.asyncio
+    async def test_history_tool_summarizes_period(self):
+        tool = ExchangeRateHistoryTool()
+        with patch.object(tool, "_make_request", new=range_request()):
+            raw = await tool._call_api(
+                from_currency="usd", to_currency="eur", start_date="2025-03-03", end_date="2025-03-07"
+            )
+        result = tool._normalize_response(raw)
+
+        assert result["count"] == 5
+        assert result["first_rate"] == pytest.approx(1.0)
+        assert result["last_rate"] == pytest.approx(1 / 1.04, abs=1e-6)
+        assert result["change_percent"] == pytest.approx(-3.85)
+        assert result["min_rate"] == result["last_rate"]
+
+    @pytest.mark.asyncio
+    async def test_history_tool_reuses_stored_rates(self):
+        tool = ExchangeRateHistoryTool()
+        with patch.object(tool, "_make_request", new=range_request()) as m:
+            await tool._call_api(from_currency="JPY", to_currency="USD", start_date="2025-01-01", end_date="2025-06-30")
+            await tool._call_api(from_currency="GBP", to_currency="USD", start_date="2025-02-01", end_date="2025-03-01")
+
+        assert m.await_count == 2  # Two chunks for the half year, nothing for the second query
+        assert get_rate_history().fetches == 2
+
+    @pytest.mark.asyncio
+    async def test_history_tool_rejects_reversed_period(self):
+        with pytest.raises(ValueError, match="start_date"):
+            await ExchangeRateHistoryTool()._call_api(
+                from_currency="USD", to_currency="EUR", start_date="2025-03-07", end_date="2025-03-03"
+            )
@@ -0,0 +1,230 @@
+"""
+Unit tests for the per-conversation flight offer store.
+"""
+import pytest
+from unittest.mock import AsyncMock, Mock
+
+from src.graphs.nodes.graph_nodes import GraphNodes
+from src.graphs.state.conversation_state import create_initial_state
+from src.utils.flight_offer_store import FlightOfferStore, FlightOfferTable, parse_duration
+
+
+def flight(offer_id, price, depart, duration="PT7H", carriers=("BA",), round_trip=False):
+    """Normalized flight with one segment per carrier on the outbound leg."""
+    segments = [
+        {
+            "departure_airport": "JFK", "departure_time": f"2026-06-01T{depart}",
+            "arrival_airport": "LHR", "arrival_time": "2026-06-01T20:00",
+            "airline": carrier, "flight_number": str(100 + i), "duration": "PT3H", "aircraft": "777",
+        }
+        for i, carrier in enumerate(carriers)
+    ]
+    itineraries = [{"segments": segments, "duration": duration}]
+    if round_trip:
+        itineraries.append({"segments": segments[:1], "duration": "PT6H"})
+    return {
+        "id": offer_id, "price": price, "currency": "USD", "itineraries": itineraries,
+        "number_of_bookable_seats": 4, "one_way": not round_trip,
+    }
+
+
+FLIGHTS = [
+    flight("1", 450.0, "08:00", "PT7H30M"),
+    flight("2", 320.0, "14:15", "PT11H", carriers=("AA", "BA")),
+    flight("3", 610.0, "19:40", "PT6H50M", carriers=("VS",)),
+    flight("4", 380.0, "06:30", "PT9H", carriers=("AA",)),
+]
+
+
+@pytest.fixture
+def table():
+    return FlightOfferTable(FLIGHTS, carriers={"BA": "British Airways", "VS": "Virgin Atlantic", "AA": "American Airlines"})
+
+
+# ============================================================================
+# FlightOfferTable
+# ============================================================================
+
+class TestFlightOfferTable:
+
+    def test_rows_round_trip(self):
+        offer = flight("9", 999.0, "10:00", carriers=("BA", "AA"), round_trip=True)
+        table = FlightOfferTable([offer])
+        assert table.row(0) == offer
+
+    def test_default_sort_is_cheapest_first(self, table):
+        rows, total = table.query()
+        assert [r["id"] for r in rows] == ["2", "4", "1", "3"]
+        assert total == 4
+
+    def test_filters(self, table):
+        assert [r["id"] for r in table.query(max_stops=0)[0]] == ["4", "1", "3"]
+        assert [r["id"] for r in table.query(airlines=["aa"])[0]] == ["2", "4"]
+        assert [r["id"] for r in table.query(depart_after=12 * 60)[0]] == ["2", "3"]
+        assert [r["id"] for r in table.query(depart_before=9 * 60)[0]] == ["4", "1"]
+        assert [r["id"] for r in table.query(max_price=400)[0]] == ["2", "4"]
+
+    def test_sort_and_paging(self, table):
+        assert [r["id"] for r in table.query(sort_by="duration")[0]] == ["3", "1", "4", "2"]
+        rows, total = table.query(sort_by="price", descending=True, offset=1, limit=2)
+        assert [r["id"] for r in rows] == ["1", "4"]
+        assert total == 4
+
+    def test_unknown_sort_key(self, table):
+        with pytest.raises(ValueError):
+            table.query(sort_by="legroom")
+
+    def test_carrier_names_matched(self, table):
+        assert table.match_carriers("anything on virgin atlantic?") == ["VS"]
+
+    def test_parse_duration(self):
+        assert parse_duration("PT7H30M") == 450
+        assert parse_duration("PT45M") == 45
+        assert parse_duration(None) == 0
+
+
+# ============================================================================
+# FlightOfferStore
+# ============================================================================
+
+class TestFlightOfferStore:
+
+    def test_refinements_accumulate_and_page(self):
+        store = FlightOfferStore()
+        stored = store.put("conv", {"origin": "JFK"}, {"flights": FLIGHTS}, page_size=1)
+
+        rows, total = stored.refine({"max_stops": 0})
+        assert [r["id"] for r in rows] == ["4"] and total == 3
+        rows, _ = stored.refine({"page": "next"})
+        assert [r["id"] for r in rows] == ["1"]
+        rows, _ = stored.refine({"sort_by": "duration"})
+        assert [r["id"] for r in rows] == ["3"]
+
+    def test_expired_searches_dropped(self):
+        store = FlightOfferStore(ttl=0)
+        store.put("conv", {}, {"flights": FLIGHTS})
+        assert store.get("conv") is None
+
+    def test_least_recently_used_evicted(self):
+        store = FlightOfferStore(max_conversations=2)
+        store.put("a", {}, {"flights": FLIGHTS})
+        store.put("b", {}, {"flights": FLIGHTS})
+        store.get("a")
+        store.put("c", {}, {"flights": FLIGHTS})
+        assert store.get("b") is None
+        assert store.get("a") is not None
+
+
+# ============================================================================
+# flight_search_node
+# ============================================================================
+
+@pytest.fixture
+def nodes():
+    graph_nodes = GraphNodes.__new__(GraphNodes)
+    graph_nodes.config = {"flight_store_fetch_size": 50}
+    graph_nodes.flight_offers = FlightOfferStore()
+    graph_nodes.intent_classifier = None
+    graph_nodes.flight_tool = Mock()
+    graph_nodes.flight_tool._call_api = AsyncMock(return_value={"raw": True})
+    graph_nodes.flight_tool._normalize_response = Mock(return_value={"flights": FLIGHTS, "count": 4})
+    graph_nodes.extraction_llm = Mock()
+    graph_nodes.extraction_llm.bind_tools.return_value.ainvoke = AsyncMock(return_value=Mock(tool_calls=[{
+        "args": {"origin": "jfk", "destination": "lhr", "departure_date": "2026-06-01", "max_results": 2}
+    }]))
+    return graph_nodes
+
+
+def conversation(message: str):
+    state = create_initial_state(user_id="test-user")
+    state["messages"].append({"role": "user", "content": message})
+    return state
+
+
+class TestFlightSearchNode:
+
+    @pytest.mark.asyncio
+    async def test_search_fetches_deep_page_but_shows_requested(self, nodes):
+        state = await nodes.flight_search_node(conversation("Flights from JFK to LHR on June 1"))
+
+        assert nodes.flight_tool._call_api.await_args.kwargs["max_results"] == 50
+        assert [f["price"]["amount"] for f in state["current_tool_result"]["data"]["flights"]] == [320.0, 380.0]
+
+    @pytest.mark.asyncio
+    async def test_refinement_served_without_new_search(self, nodes):
+        state = await nodes.flight_search_node(conversation("Flights from JFK to LHR on June 1"))
+        state["messages"].append({"role": "user", "content": "non-stop only"})
+
+        nodes.extraction_llm.ainvoke = AsyncMock(return_value=Mock(content='{"intent": "search_flights"}'))
+        state = await nodes.classify_intent_node(state)
+        assert state["current_intent"] == "search_flights"
+        state = await nodes.flight_search_node(state)
+
+        assert nodes.flight_tool._call_api.await_count == 1
+        data = state["current_tool_result"]["data"]
+        assert data["origin"] == "JFK"
+        assert [f["stops"] for f in data["flights"]] == [0, 0]
+        assert state["messages"][-1]["content"] == "Here are 2 of the 3 matching flight options."
+
+    @pytest.mark.asyncio
+    @pytest.mark.parametrize("message,expected", [
+        ("only aa please", ["AA"]),
+        ("fly ba", ["BA"]),
+        ("only lh", None),
+    ])
+    async def test_carrier_codes_checked_against_stored_offers(self, nodes, message, expected):
+        state = await nodes.flight_search_node(conversation("Flights from JFK to LHR on June 1"))
+        state["messages"].append({"role": "user", "content": message})
+
+        assert (nodes._flight_refinement(state) or {}).get("airlines") == expected
+
+    @pytest.mark.asyncio
+    async def test_no_stored_search_means_no_refinement(self, nodes):
+        assert nodes._flight_refinement(conversation("non-stop only")) is None
+
+    @pytest.mark.asyncio
+    async def test_new_search_is_not_served_from_stored_results(self, nodes):
+        state = await nodes.flight_search_node(conversation("Flights from JFK to LHR on June 1"))
+        state["messages"].append({"role": "user", "content": "cheapest direct flights from JFK to CDG on June 5"})
+
+        state = await nodes.flight_search_node(state)
+
+        assert nodes.flight_tool._call_api.await_count == 2
+        assert state["messages"][-1]["content"] == "I found 4 flight options for you."
+
+    @pytest.mark.asyncio
+    @pytest.mark.parametrize("message", [
+        "Is it cheaper to eat at street markets?",
+        "What's the weather like in the morning?",
+        "Are there more options for vegetarian food?",
+    ])
+    async def test_refinement_words_do_not_decide_the_intent(self, nodes, message):
+        state = await nodes.flight_search_node(conversation("Flights from JFK to LHR on June 1"))
+        state["messages"].append({"role": "user", "content": message})
+
+        nodes.extraction_llm.ainvoke = AsyncMock(return_value=Mock(content='{"intent": "ask_question"}'))
+        state = await nodes.classify_intent_node(state)
+
+        nodes.extraction_llm.ainvoke.assert_awaited_once()
+        assert state["current_intent"] == "ask_question"
+
+    @pytest.mark.asyncio
+    async def test_flexible_search_shows_cheapest_day_and_calendar(self, nodes):
+        nodes.flight_tool._normalize_response.return_value = {
+            "flights": FLIGHTS, "count": 4, "cheapest_date": "2026-06-02",
+            "calendar": [
+                {"date": "2026-06-01", "cheapest_price": 410.0, "currency": "USD", "count": 3},
+                {"date": "2026-06-02", "cheapest_price": 320.0, "currency": "USD", "count": 4},
+            ],
+        }
+        state = await nodes.flight_search_node(conversation("Cheapest day to fly JFK to LHR in early June?"))
+
+        data = state["current_tool_result"]["data"]
+        assert data["departureDate"] == "2026-06-02"
+        assert data["priceCalendar"][0] == {"date": "2026-06-01", "price": 410.0, "currency": "USD"}
+        assert "2026-06-02 is the cheapest" in state["messages"][-1]["content"]
+
+        # Refinements keep the calendar on the card
+        state["messages"].append({"role": "user", "content": "non-stop only"})
+        state = await nodes.flight_search_node(state)
+        assert len(state["current_tool_result"]["data"]["priceCalendar"]) == 2
@@ -0,0 +1,428 @@
+"""
+Unit tests for the concurrent tool fan-out in GraphNodes.
+"""
+import asyncio
+import time
+from contextlib import asynccontextmanager
+
+import httpx
+import pytest
+from unittest.mock import AsyncMock, Mock
+
+from src.graphs.nodes.graph_nodes import GraphNodes, current_date
+from src.graphs.state.conversation_state import create_initial_state
+from src.graphs.workflows.travel_concierge_graph import TravelConciergeGraph
+from src.retrievers.rag.semantic_cache import SemanticAnswerCache
+from src.tools.external_apis.base import BaseTravelAPITool, ToolCallError
+from src.tools.external_apis.currency_tools import ExchangeRateHistoryTool
+from src.utils.context_packer import ContextPacker
+
+
+@pytest.fixture
+def nodes():
+    """GraphNodes with only the attributes the fan-out uses (no LLM or retriever)."""
+    graph_nodes = GraphNodes.__new__(GraphNodes)
+    graph_nodes.config = {"tool_fanout_timeout": 0.5, "image_fetch_deadline": 0.2}
+    graph_nodes._country_names = {}
+    graph_nodes._pending_images = {}
+    return graph_nodes
+
+
+@pytest.fixture
+def trip_state():
+    state = create_initial_state(user_id="test-user")
+    state["trip_details"]["destination"] = "Tokyo"
+    state["trip_details"]["duration_days"] = 5
+    state["messages"].append({"role": "user", "content": "Plan 5 days in Tokyo in April"})
+    return state
+
+
+def card(card_type: str, delay: float = 0.0):
+    async def fetch(*args, **kwargs):
+        await asyncio.sleep(delay)
+        return {"type": card_type, "data": {}}
+    return fetch
+
+
+# ============================================================================
+# _gather_tool_calls
+# ============================================================================
+
+class TestGatherToolCalls:
+
+    @pytest.mark.asyncio
+    async def test_calls_run_concurrently(self, nodes):
+        started = time.perf_counter()
+        cards = await nodes._gather_tool_calls(
+            {"a": card("weather", 0.2)(), "b": card("destination", 0.2)(), "c": card("visa", 0.2)()},
+            timeout=1.0
+        )
+        assert [c["type"] for c in cards] == ["weather", "destination", "visa"]
+        assert time.perf_counter() - started < 0.5
+
+    @pytest.mark.asyncio
+    async def test_failures_and_timeouts_are_dropped(self, nodes):
+        async def broken():
+            raise RuntimeError("API down")
+
+        cards = await nodes._gather_tool_calls(
+            {"slow": card("weather", 5.0)(), "broken": broken(), "ok": card("destination")()},
+            timeout=0.1
+        )
+        assert cards == [{"type": "destination", "data": {}}]
+
+
+# ============================================================================
+# destination_briefing_node
+# ============================================================================
+
+class TestDestinationBriefing:
+
+    @pytest.mark.asyncio
+    async def test_emits_weather_and_country_cards(self, nodes, trip_state):
+        nodes._fetch_weather_card = AsyncMock(side_effect=card("weather"))
+        nodes._fetch_destination_country_card = AsyncMock(side_effect=card("destination"))
+        nodes._fetch_currency_card_only = AsyncMock(side_effect=card("currency"))
+        nodes._fetch_visa_card = AsyncMock(side_effect=card("visa"))
+
+        state = await nodes.destination_briefing_node(trip_state)
+
+        assert [c["type"] for c in state["tool_results"]] == ["weather", "destination"]
+        assert state["current_tool_result"]["type"] == "weather"
+        nodes._fetch_weather_card.assert_awaited_once_with({"location": "Tokyo", "days": 5})
+        nodes._fetch_currency_card_only.assert_not_called()
+        nodes._fetch_visa_card.assert_not_called()
+
+    @pytest.mark.asyncio
+    async def test_adds_currency_and_visa_when_message_names_them(self, nodes, trip_state):
+        trip_state["messages"][-1]["content"] = (
+            "Plan 5 days in Tokyo, I'm a US citizen traveling to Japan, convert 500 USD to JPY"
+        )
+        nodes._fetch_weather_card = AsyncMock(side_effect=card("weather"))
+        nodes._fetch_destination_country_card = AsyncMock(side_effect=card("destination"))
+        nodes._fetch_currency_card_only = AsyncMock(side_effect=card("currency"))
+        nodes._fetch_visa_card = AsyncMock(side_effect=card("visa"))
+
+        state = await nodes.destination_briefing_node(trip_state)
+
+        assert [c["type"] for c in state["tool_results"]] == ["weather", "destination", "currency", "visa"]
+
+    @pytest.mark.asyncio
+    async def test_partial_results_when_a_tool_fails(self, nodes, trip_state):
+        nodes._fetch_weather_card = AsyncMock(side_effect=RuntimeError("weather down"))
+        nodes._fetch_destination_country_card = AsyncMock(side_effect=card("destination"))
+
+        state = await nodes.destination_briefing_node(trip_state)
+
+        assert [c["type"] for c in state["tool_results"]] == ["destination"]
+        assert state["current_tool_result"]["type"] == "destination"
+
+    @pytest.mark.asyncio
+    async def test_no_destination_skips_briefing(self, nodes, trip_state):
+        trip_state["trip_details"]["destination"] = None
+        nodes._fetch_weather_card = AsyncMock()
+
+        state = await nodes.destination_briefing_node(trip_state)
+
+        assert state["tool_results"] == []
+        nodes._fetch_weather_card.assert_not_called()
+
+
+# ============================================================================
+# _fetch_country_card (concurrent image lookup)
+# ============================================================================
+
+def api_tool(api_name: str = "test_api") -> Mock:
+    """Tool mock running the real ``execute`` with a cold cache and a permissive rate limiter."""
+    tool = Mock()
+    tool.api_name = api_name
+    tool.execute = lambda **params: BaseTravelAPITool.execute(tool, **params)
+    tool._handle_error = lambda error: BaseTravelAPITool._handle_error(tool, error)
+    tool._lookup_local = Mock(return_value=None)
+    tool._check_cache = AsyncMock(return_value=None)
+    tool._check_stale_cache = AsyncMock(return_value=None)
+    tool._save_cache = AsyncMock()
+    tool._acquire_rate_limit = AsyncMock(return_value=True)
+    return tool
+
+
+def country_tool(delay: float = 0.0):
+    async def call_api(**params):
+        await asyncio.sleep(delay)
+        return {"raw": True}
+    tool = api_tool()
+    tool._call_api = AsyncMock(side_effect=call_api)
+    tool._normalize_response = Mock(return_value={
+        "name": {"common": "Japan"},
+        "capital": "Tokyo",
+        "codes": {"iso_alpha_2": "JP"},
+    })
+    return tool
+
+
+def image_tool(delay: float = 0.0):
+    async def call_api(**params):
+        await asyncio.sleep(delay)
+        return {"raw": True}
+    tool = api_tool()
+    tool._call_api = AsyncMock(side_effect=call_api)
+    tool._normalize_response = Mock(return_value={
+        "returned_count": 1,
+        "images": [{"urls": {"regular": "https://img/japan.jpg"}, "photographer": {"name": "Ann"}}],
+    })
+    return tool
+
+
+class TestCountryCardImage:
+
+    @pytest.mark.asyncio
+    async def test_image_fetched_concurrently_with_country(self, nodes):
+        nodes.country_tool = country_tool(delay=0.15)
+        nodes.image_tool = image_tool(delay=0.15)
+
+        started = time.perf_counter()
+        card_result = await nodes._fetch_country_card({"query": "japan", "search_by": "name"}, "conv-1")
+
+        assert time.perf_counter() - started < 0.25
+        assert card_result["data"]["imageUrl"] == "https://img/japan.jpg"
+        assert card_result["data"]["imageAttribution"] == "Photo by Ann on Unsplash"
+        nodes.image_tool._call_api.assert_awaited_once_with(query="japan skyline landmark", per_page=1)
+        assert nodes.take_pending_image("conv-1") is None
+
+    @pytest.mark.asyncio
+    async def test_late_image_is_left_for_a_follow_up_patch(self, nodes):
+        nodes.country_tool = country_tool()
+        nodes.image_tool = image_tool(delay=0.4)
+
+        started = time.perf_counter()
+        card_result = await nodes._fetch_country_card({"query": "japan", "search_by": "name"}, "conv-1")
+
+        assert time.perf_counter() - started < 0.3
+        assert card_result["data"]["name"] == "Japan"
+        assert card_result["data"]["imageUrl"] is None
+
+        pending = nodes.take_pending_image("conv-1")
+        assert pending is not None
+        assert (await pending)["imageUrl"] == "https://img/japan.jpg"
+        assert nodes.take_pending_image("conv-1") is None
+
+    @pytest.mark.asyncio
+    async def test_late_image_without_conversation_is_dropped(self, nodes):
+        nodes.country_tool = country_tool()
+        nodes.image_tool = image_tool(delay=0.4)
+
+        card_result = await nodes._fetch_country_card({"query": "japan", "search_by": "name"})
+
+        assert card_result["data"]["imageUrl"] is None
+        assert nodes._pending_images == {}
+
+    @pytest.mark.asyncio
+    async def test_cli_run_cancels_late_image(self, nodes):
+        nodes.country_tool = country_tool()
+        nodes.image_tool = image_tool(delay=0.4)
+        nodes.schedule_prefetch = Mock()
+
+        async def ainvoke(state, config):
+            await nodes._fetch_country_card({"query": "japan", "search_by": "name"}, state["conversation_id"])
+            state["messages"].append({"role": "assistant", "content": "Japan it is."})
+            return state
+
+        @asynccontextmanager
+        async def compiled_graph():
+            yield Mock(ainvoke=ainvoke)
+
+        travel_graph = TravelConciergeGraph.__new__(TravelConciergeGraph)
+        travel_graph.config = {}
+        travel_graph.nodes = nodes
+        travel_graph.get_compiled_graph = compiled_graph
+
+        assert await travel_graph.run("Tell me about Japan") == "Japan it is."
+        assert nodes._pending_images == {}
+        await asyncio.sleep(0)
+        nodes.image_tool._call_api.assert_awaited_once()
+        assert nodes.image_tool._normalize_response.call_count == 0
+
+    @pytest.mark.asyncio
+    async def test_code_lookup_uses_cached_name_mapping(self, nodes):
+        nodes.country_tool = country_tool(delay=0.1)
+        nodes.image_tool = image_tool()
+
+        await nodes._fetch_country_card({"query": "JP", "search_by": "code"})
+        nodes.image_tool._call_api.assert_awaited_once_with(query="Japan skyline landmark", per_page=1)
+        assert nodes._country_names[("code", "jp")] == "Japan"
+
+        # Second lookup starts the image search before the country API answers
+        calls = []
+
+        async def country_api(**params):
+            await asyncio.sleep(0.1)
+            calls.append("country")
+            return {"raw": True}
+
+        async def image_api(**params):
+            calls.append("image")
+            return {"raw": True}
+
+        nodes.country_tool._call_api.side_effect = country_api
+        nodes.image_tool._call_api.side_effect = image_api
+        await nodes._fetch_country_card({"query": "jp", "search_by": "code"})
+        assert calls == ["image", "country"]
+
+    @pytest.mark.asyncio
+    async def test_warm_cache_skips_the_api(self, nodes):
+        nodes.country_tool = country_tool()
+        nodes.country_tool._check_cache = AsyncMock(return_value={
+            "success": True,
+            "data": {"name": {"common": "Japan"}, "codes": {"iso_alpha_2": "JP"}},
+            "source": "test_api",
+            "cached": True,
+        })
+        nodes.image_tool = image_tool()
+
+        card_result = await nodes._fetch_country_card({"query": "japan"})
+
+        assert card_result["data"]["name"] == "Japan"
+        nodes.country_tool._call_api.assert_not_called()
+        nodes.country_tool._acquire_rate_limit.assert_not_called()
+
+    @pytest.mark.asyncio
+    async def test_unknown_country_name_retries_as_capital(self, nodes):
+        not_found = httpx.HTTPStatusError("404", request=Mock(), response=Mock(status_code=404))
+        nodes.country_tool = country_tool()
+        nodes.country_tool._call_api.side_effect = [not_found, {"raw": True}]
+        nodes.image_tool = image_tool()
+
+        card_result = await nodes._fetch_destination_country_card("Tokyo")
+
+        assert card_result["data"]["name"] == "Japan"
+        assert nodes.country_tool._call_api.await_args.kwargs == {"query": "Tokyo", "search_by": "capital"}
+
+    @pytest.mark.asyncio
+    async def test_failed_call_raises_with_status(self, nodes):
+        unavailable = httpx.HTTPStatusError("503", request=Mock(), response=Mock(status_code=503, text="down"))
+        nodes.country_tool = country_tool()
+        nodes.country_tool._call_api.side_effect = unavailable
+
+        with pytest.raises(ToolCallError) as exc_info:
+            await nodes._call_tool(nodes.country_tool, query="Japan")
+        assert exc_info.value.status_code == 503
+
+
+# ============================================================================
+# Semantic answer cache in the question flow
+# ============================================================================
+
+def question_state(budget: str, history: bool = False):
+    state = create_initial_state(user_id="test-user")
+    state["trip_details"]["destination"] = "Bali"
+    state["user_preferences"]["budget"] = budget
+    state["current_intent"] = "ask_question"
+    if history:
+        state["messages"].append({"role": "user", "content": "I'm vegetarian."})
+        state["messages"].append({"role": "assistant", "content": "Noted!"})
+    state["messages"].append({"role": "user", "content": "Where should I eat in Bali?"})
+    return state
+
+
+class TestAnswerCacheScope:
+
+    @pytest.fixture
+    def qa_nodes(self, nodes):
+        words = ["where", "eat", "bali", "should"]
+        nodes.answer_cache = SemanticAnswerCache(
+            embed_query=lambda text: [float(w in text.lower()) for w in words], threshold=0.9
+        )
+        nodes.context_packer = ContextPacker(max_tokens=500)
+        nodes.retriever = Mock(retrieve=AsyncMock(return_value=[]))
+        nodes.llm = Mock(ainvoke=AsyncMock(side_effect=[Mock(content="Luxury pick."), Mock(content="Budget pick.")]))
+        return nodes
+
+    async def ask(self, nodes, state):
+        state = await nodes.retrieve_context_node(state)
+        state = await nodes.answer_question_node(state)
+        return state["messages"][-1]["content"]
+
+    @pytest.mark.asyncio
+    async def test_answers_are_not_shared_across_trip_states(self, qa_nodes):
+        assert await self.ask(qa_nodes, question_state("luxury")) == "Luxury pick."
+        assert await self.ask(qa_nodes, question_state("budget")) == "Budget pick."
+        assert await self.ask(qa_nodes, question_state("luxury")) == "Luxury pick."
+        assert qa_nodes.llm.ainvoke.await_count == 2
+
+    @pytest.mark.asyncio
+    async def test_answers_shaped_by_history_are_not_stored(self, qa_nodes):
+        await self.ask(qa_nodes, question_state("luxury", history=True))
+        assert len(qa_nodes.answer_cache) == 0
+
+
+# ============================================================================
+# Extraction prompts
+# ============================================================================
+
+class TestExtractionPrompts:
+
+    @pytest.mark.asyncio
+    @pytest.mark.parametrize("node_name", ["weather_check_node", "hotel_search_node"])
+    async def test_prompt_carries_todays_date(self, nodes, node_name):
+        """Cached extractions of "this weekend" must not outlive the day they were resolved on."""
+        bound = Mock(ainvoke=AsyncMock(return_value=Mock(tool_calls=[])))
+        nodes.extraction_llm = Mock(bind_tools=Mock(return_value=bound))
+        nodes.weather_tool = nodes.hotel_tool = Mock()
+        state = create_initial_state(user_id="test-user")
+        state["messages"].append({"role": "user", "content": "What's it like this weekend?"})
+
+        await getattr(nodes, node_name)(state)
+
+        prompt = bound.ainvoke.await_args.args[0][0].content
+        assert f"Today's date: {current_date()}" in prompt
+
+
+# ============================================================================
+# Exchange-rate history in the currency node
+# ============================================================================
+
+def rate_history_tool(series):
+    tool = api_tool("frankfurter")
+    tool._call_api = AsyncMock(side_effect=lambda **params: {
+        "from": params["from_currency"],
+        "to": params["to_currency"],
+        "start_date": params["start_date"],
+        "end_date": "2026-03-09",
+        "series": series,
+    })
+    tool._normalize_response = lambda raw: ExchangeRateHistoryTool._normalize_response(tool, raw)
+    return tool
+
+
+def currency_state(message: str):
+    state = create_initial_state(user_id="test-user")
+    state["current_intent"] = "convert_currency"
+    state["messages"].append({"role": "user", "content": message})
+    return state
+
+
+class TestRateHistory:
+
+    @pytest.mark.asyncio
+    async def test_history_question_uses_the_history_tool(self, nodes):
+        nodes.rate_history_tool = rate_history_tool([("2026-01-02", 0.0064), ("2026-03-09", 0.0068)])
+        nodes.currency_tool = api_tool()
+
+        state = await nodes.currency_conversion_node(currency_state("How has the yen moved against the dollar this year?"))
+
+        assert nodes.rate_history_tool._call_api.await_args.kwargs["from_currency"] == "JPY"
+        nodes.currency_tool._call_api.assert_not_called()
+        assert state["current_tool_result"] == {
+            "type": "currency",
+            "data": {"from": "JPY", "to": "USD", "rate": 0.0068, "lastUpdated": "2026-03-09"},
+        }
+        assert "+6.25%" in state["messages"][-1]["content"]
+
+    @pytest.mark.asyncio
+    async def test_empty_period_says_so(self, nodes):
+        nodes.rate_history_tool = rate_history_tool([])
+
+        state = await nodes.currency_conversion_node(currency_state("How has EUR moved against GBP this week?"))
+
+        assert state["current_tool_result"] is None
+        assert "No published EUR/GBP rates" in state["messages"][-1]["content"]
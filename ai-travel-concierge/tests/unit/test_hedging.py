@@ -0,0 +1,150 @@
+"""
+Unit tests for hedged requests.
+"""
+import asyncio
+
+import pytest
+from unittest.mock import AsyncMock, MagicMock, patch
+
+from src.tools.external_apis.amadeus_tools import FlightSearchTool
+from src.tools.external_apis.country_tools import CountryInfoTool
+from src.tools.external_apis.currency_tools import CurrencyConversionTool
+from src.tools.external_apis.visa_tools import VisaRequirementTool
+from src.tools.external_apis.weather_tools import WeatherForecastTool
+from src.utils.hedging import HedgePolicy, HedgingConfig, configure_hedging, get_hedge_policy, hedged
+
+
+def warmed_policy(latency: float = 0.01, **settings) -> HedgePolicy:
+    policy = HedgePolicy("api", HedgingConfig(min_samples=5, min_delay=0.01, **settings))
+    for _ in range(20):
+        policy.observe(latency)
+    return policy
+
+
+def attempts(*delays: float):
+    """Attempt factory whose n-th call sleeps delays[n] and returns n."""
+    calls = []
+
+    async def attempt():
+        n = len(calls)
+        calls.append(n)
+        await asyncio.sleep(delays[n])
+        return n
+
+    return attempt, calls
+
+
+# ============================================================================
+# HedgePolicy / hedged
+# ============================================================================
+
+class TestHedged:
+
+    @pytest.mark.asyncio
+    async def test_no_hedge_without_latency_history(self):
+        policy = HedgePolicy("api", HedgingConfig(budget_ratio=1.0))
+        attempt, calls = attempts(0.05)
+
+        assert await hedged(attempt, policy) == 0
+        assert calls == [0]
+
+    @pytest.mark.asyncio
+    async def test_fast_first_attempt_is_not_hedged(self):
+        policy = warmed_policy(latency=0.2, budget_ratio=1.0)
+        attempt, calls = attempts(0.01)
+
+        assert await hedged(attempt, policy) == 0
+        assert calls == [0]
+
+    @pytest.mark.asyncio
+    async def test_slow_first_attempt_is_hedged_and_loses(self):
+        policy = warmed_policy(budget_ratio=1.0)
+        attempt, calls = attempts(5, 0.01)
+
+        started = asyncio.get_running_loop().time()
+        assert await hedged(attempt, policy) == 1
+        assert asyncio.get_running_loop().time() - started < 1
+        assert policy.hedges == 1
+        assert policy.hedge_wins == 1
+
+    @pytest.mark.asyncio
+    async def test_budget_limits_hedges(self):
+        policy = warmed_policy(budget_ratio=0.5)
+
+        attempt, calls = attempts(0.05, 0.01)
+        await hedged(attempt, policy)
+        assert calls == [0]  # half a token earned, nothing to spend
+
+        attempt, calls = attempts(0.05, 0.01)
+        await hedged(attempt, policy)
+        assert calls == [0, 1]
+
+    @pytest.mark.asyncio
+    async def test_first_failure_waits_for_hedge(self):
+        policy = warmed_policy(budget_ratio=1.0)
+        state = {"calls": 0}
+
+        async def attempt():
+            state["calls"] += 1
+            if state["calls"] == 1:
+                await asyncio.sleep(0.05)
+                raise ConnectionError("reset")
+            await asyncio.sleep(0.1)
+            return "ok"
+
+        assert await hedged(attempt, policy) == "ok"
+
+    @pytest.mark.asyncio
+    async def test_all_attempts_failing_raises(self):
+        policy = warmed_policy(budget_ratio=1.0)
+
+        async def attempt():
+            await asyncio.sleep(0.05)
+            raise ConnectionError("reset")
+
+        with pytest.raises(ConnectionError):
+            await hedged(attempt, policy)
+
+    @pytest.mark.asyncio
+    async def test_disabled(self):
+        configure_hedging(enabled=False, min_samples=1)
+        policy = get_hedge_policy("api")
+        policy.observe(0.01)
+        assert policy.delay() is None
+
+
+# ============================================================================
+# Tool opt-in
+# ============================================================================
+
+class TestToolHedging:
+
+    def test_only_free_idempotent_apis_hedge(self):
+        assert WeatherForecastTool().hedge_requests
+        assert CountryInfoTool().hedge_requests
+        assert CurrencyConversionTool().hedge_requests
+        assert not VisaRequirementTool().hedge_requests
+        assert not FlightSearchTool().hedge_requests
+
+    @pytest.mark.asyncio
+    async def test_slow_get_is_hedged(self):
+        configure_hedging(min_samples=1, min_delay=0.01, budget_ratio=1.0)
+        get_hedge_policy("open_meteo").observe(0.01)
+        tool = WeatherForecastTool()
+        fast = MagicMock()
+
+        async def request(method, url, **kwargs):
+            if client.request.await_count == 1:
+                await asyncio.sleep(5)
+            return fast
+
+        client = MagicMock()
+        client.__aenter__ = AsyncMock(return_value=client)
+        client.__aexit__ = AsyncMock(return_value=False)
+        client.request = AsyncMock(side_effect=request)
+
+        with patch("src.tools.external_apis.base.httpx.AsyncClient", return_value=client):
+            response = await asyncio.wait_for(tool._make_request("GET", "https://example.com"), timeout=1)
+
+        assert response is fast
+        assert client.request.await_count == 2
@@ -0,0 +1,107 @@
+"""
+Unit tests for the local intent classification fast path.
+"""
+import pytest
+
+from src.chains.intent_classifier import (
+    DEFAULT_EXAMPLES_PATH,
+    LocalIntentClassifier,
+    NearestCentroidClassifier,
+    evaluate_classifier,
+    load_labeled_examples,
+)
+
+
+@pytest.fixture
+def classifier():
+    return LocalIntentClassifier()
+
+
+@pytest.fixture
+def labeled_examples():
+    return load_labeled_examples(DEFAULT_EXAMPLES_PATH)
+
+
+class TestRules:
+
+    @pytest.mark.parametrize("message,intent", [
+        ("convert 100 USD to EUR", "convert_currency"),
+        ("weather in Tokyo", "check_weather"),
+        ("Do I need a visa for Japan?", "check_visa"),
+        ("cheap flights to Bali", "search_flights"),
+        ("hotels in Rome for 2 adults", "search_hotels"),
+    ])
+    def test_obvious_intents_resolve_locally(self, classifier, message, intent):
+        prediction = classifier.classify(message)
+        assert prediction.resolved is True
+        assert prediction.intent == intent
+
+    @pytest.mark.parametrize("message", [
+        "Book the flight to Paris",            # book vs flights
+        "Plan a trip to Rome with hotels",     # plan vs hotels
+        "What's the best time to visit Bali?", # no rule matches
+        "Plan a 5 day trip to Paris",          # plan_trip needs LLM entity extraction
+    ])
+    def test_ambiguous_or_llm_only_messages_fall_back(self, classifier, message):
+        assert classifier.classify(message).resolved is False
+
+    def test_extracts_destination_but_not_codes_or_months(self, classifier):
+        assert classifier.classify("Find me a hotel in Paris").destination == "Paris"
+        assert classifier.classify("convert 100 USD to EUR").destination is None
+        assert classifier.classify("weather in New York").destination == "New York"
+
+    def test_destination_must_be_a_known_place(self, classifier):
+        assert classifier.classify("cheap flights to Lisbon with Sarah").destination == "Lisbon"
+        assert classifier.classify("Do I need a visa for Phillipines?").destination == "Phillipines"
+        # Unknown names may be people; the LLM decides
+        assert classifier.classify("hotels for Sarah").resolved is False
+        assert classifier.classify("weather in Springfield").resolved is False
+
+    @pytest.mark.parametrize("message", [
+        "Find me a hotel in Paris from June 1 to June 5",
+        "weather in Rome in May",
+        "hotels in Rome this weekend",
+        "flights to Tokyo tomorrow",
+        "hotels in Lisbon under $150",
+        "cheap flights to Bali on a tight budget",
+    ])
+    def test_dates_and_budgets_go_to_the_llm(self, classifier, message):
+        """The LLM path stores dates and budget in the trip state; the fast path can't."""
+        assert classifier.classify(message).resolved is False
+
+    def test_currency_amounts_are_not_a_budget(self, classifier):
+        assert classifier.classify("convert 100 USD to EUR").resolved is True
+
+
+class TestLabeledSetMetrics:
+
+    def test_precision_on_labeled_set(self, classifier, labeled_examples):
+        evaluation = evaluate_classifier(classifier, labeled_examples)
+
+        assert evaluation.precision >= 0.95
+        assert all(p >= 0.9 for p in evaluation.precision_by_intent.values())
+        # The fast path should take a meaningful share of traffic off the LLM
+        assert evaluation.coverage >= 0.4
+
+
+class TestNearestCentroid:
+
+    @staticmethod
+    def keyword_embed(texts):
+        vocab = ["rain", "hot", "sunny", "pack", "tipping", "safe"]
+        return [[float(w in t.lower()) for w in vocab] + [0.1] for t in texts]
+
+    def test_centroid_resolves_when_rules_are_unsure(self):
+        centroid = NearestCentroidClassifier(self.keyword_embed).fit([
+            {"text": "will it rain", "intent": "check_weather"},
+            {"text": "is it hot and sunny", "intent": "check_weather"},
+            {"text": "what to pack", "intent": "ask_question"},
+            {"text": "is tipping expected", "intent": "ask_question"},
+        ])
+        classifier = LocalIntentClassifier(centroid=centroid, centroid_threshold=0.5)
+
+        prediction = classifier.classify("Is it sunny and hot in Lisbon")
+        assert prediction.source == "centroid"
+        assert prediction.intent == "check_weather"
+        assert prediction.resolved is True
+        assert prediction.destination == "Lisbon"
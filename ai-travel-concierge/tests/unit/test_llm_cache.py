@@ -0,0 +1,64 @@
+"""
+Unit tests for the LLM response cache.
+"""
+import pytest
+
+from langchain_core.language_models import FakeListChatModel
+from langchain_core.messages import AIMessage
+from langchain_core.outputs import ChatGeneration
+
+from src.utils.llm_cache import LLMResponseCache
+
+
+@pytest.fixture
+def cache(tmp_path):
+    cache = LLMResponseCache(max_entries=2, db_path=str(tmp_path / "llm_cache.db"))
+    yield cache
+    cache.close()
+
+
+class TestLLMResponseCache:
+
+    @pytest.mark.asyncio
+    async def test_identical_prompt_is_served_from_cache(self, cache):
+        llm = FakeListChatModel(responses=["first", "second"], cache=cache)
+
+        assert (await llm.ainvoke("Classify: flights to Rome")).content == "first"
+        assert (await llm.ainvoke("Classify: flights to Rome")).content == "first"
+        assert (await llm.ainvoke("Classify: hotels in Rome")).content == "second"
+        assert cache.hits == 1
+
+    @pytest.mark.asyncio
+    async def test_bound_tools_are_part_of_the_key(self, cache):
+        llm = FakeListChatModel(responses=["plain", "with tools"], cache=cache)
+        tool = {"type": "function", "function": {"name": "search_hotels", "parameters": {}}}
+
+        await llm.ainvoke("Extract hotel search parameters")
+        response = await llm.bind(tools=[tool]).ainvoke("Extract hotel search parameters")
+
+        assert response.content == "with tools"
+
+    def test_tool_calls_survive_sqlite_round_trip(self, cache, tmp_path):
+        message = AIMessage(
+            content="",
+            tool_calls=[{"name": "convert_currency", "args": {"amount": 100, "from_currency": "USD"}, "id": "call_1"}],
+        )
+        cache.update("prompt", "llm", [ChatGeneration(message=message)])
+
+        reopened = LLMResponseCache(db_path=str(tmp_path / "llm_cache.db"))
+        restored = reopened.lookup("prompt", "llm")
+        reopened.close()
+
+        assert restored[0].message.tool_calls[0]["args"] == {"amount": 100, "from_currency": "USD"}
+
+    def test_memory_tier_is_bounded_lru(self, cache):
+        for i in range(3):
+            cache.update(f"p{i}", "llm", [ChatGeneration(message=AIMessage(content=str(i)))])
+        assert list(cache._memory) == [cache._key("p1", "llm"), cache._key("p2", "llm")]
+        # Evicted entries are still found on disk
+        assert cache.lookup("p0", "llm")[0].message.content == "0"
+
+    def test_expired_entries_miss(self, cache):
+        cache.ttl = -1
+        cache.update("p", "llm", [ChatGeneration(message=AIMessage(content="x"))])
+        assert cache.lookup("p", "llm") is None
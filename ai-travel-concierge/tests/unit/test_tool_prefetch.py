@@ -0,0 +1,240 @@
+"""
+Unit tests for the tool cache, rate limiter quotas and speculative prefetcher.
+"""
+import asyncio
+
+import httpx
+import pytest
+from unittest.mock import AsyncMock, MagicMock
+
+from src.tools.external_apis.prefetcher import ToolPrefetcher, find_passport_country
+from src.tools.external_apis.weather_tools import WeatherForecastTool
+from src.utils.cache_manager import CacheManager
+from src.utils.rate_limiter import API_RATE_LIMITS, RateLimit, RateLimiter
+
+
+# ============================================================================
+# CacheManager
+# ============================================================================
+
+class TestCacheManager:
+
+    @pytest.mark.asyncio
+    async def test_get_set_and_expiry(self):
+        cache = CacheManager()
+        await cache.set("a", {"v": 1}, ttl=60)
+        await cache.set("b", {"v": 2}, ttl=-1)
+
+        assert await cache.get("a") == {"v": 1}
+        assert await cache.get("b") is None
+        assert cache.hits == 1
+        assert cache.misses == 1
+
+    @pytest.mark.asyncio
+    async def test_lru_eviction(self):
+        cache = CacheManager(max_entries=2)
+        await cache.set("a", 1)
+        await cache.set("b", 2)
+        await cache.get("a")
+        await cache.set("c", 3)
+
+        assert await cache.get("b") is None
+        assert await cache.get("a") == 1
+        assert await cache.get("c") == 3
+
+
+class TestCacheKeys:
+
+    def test_equivalent_calls_share_a_key(self):
+        tool = WeatherForecastTool()
+        assert tool._get_cache_key(location="Tokyo") == tool._get_cache_key(location="tokyo ", days=7)
+        assert tool._get_cache_key(location="Tokyo") != tool._get_cache_key(location="Tokyo", days=3)
+
+
+# ============================================================================
+# RateLimiter
+# ============================================================================
+
+class TestRateLimiter:
+
+    @pytest.mark.asyncio
+    async def test_spent_quota_does_not_refuse_interactive_requests(self):
+        limiter = RateLimiter({"api": RateLimit(per_day=2, prefetch_share=0.5)})
+        assert await limiter.acquire_with_retry("api")
+        assert await limiter.acquire_with_retry("api")
+        assert limiter.remaining("api") == 0
+        assert await limiter.acquire_with_retry("api")
+        assert not await limiter.acquire("api")
+        assert not limiter.acquire_speculative("api")
+
+    @pytest.mark.asyncio
+    async def test_enforced_quota_exhaustion_raises(self):
+        limiter = RateLimiter({"api": RateLimit(per_day=2, enforce_quota=True)})
+        assert await limiter.acquire_with_retry("api")
+        assert await limiter.acquire_with_retry("api")
+        with pytest.raises(ValueError):
+            await limiter.acquire_with_retry("api")
+
+    @pytest.mark.asyncio
+    async def test_default_limits_never_refuse_interactive_calls(self):
+        limiter = RateLimiter()
+        for _ in range(API_RATE_LIMITS["unsplash"].per_hour + 1):
+            assert await limiter.acquire_with_retry("unsplash")
+
+    @pytest.mark.asyncio
+    async def test_short_window_blocks_without_spending_quota(self):
+        limiter = RateLimiter({"api": RateLimit(per_minute=1, per_day=10)})
+        assert await limiter.acquire("api")
+        assert not await limiter.acquire("api")
+        assert limiter.remaining("api") == 9
+
+    def test_speculative_share_is_capped(self):
+        limiter = RateLimiter({"api": RateLimit(per_day=10, prefetch_share=0.2)})
+        assert limiter.acquire_speculative("api")
+        assert limiter.acquire_speculative("api")
+        assert not limiter.acquire_speculative("api")
+        assert limiter.remaining("api") == 8
+
+    def test_scarce_and_unknown_apis_never_prefetch(self):
+        limiter = RateLimiter()
+        assert not limiter.acquire_speculative("amadeus")
+        assert not limiter.acquire_speculative("unsplash")
+        assert not limiter.acquire_speculative("something_new")
+
+    @pytest.mark.asyncio
+    async def test_unknown_api_is_unlimited(self):
+        limiter = RateLimiter({})
+        assert await limiter.acquire_with_retry("anything")
+        assert limiter.remaining("anything") is None
+
+
+# ============================================================================
+# ToolPrefetcher
+# ============================================================================
+
+def api_tool(api_name: str, normalized: dict) -> MagicMock:
+    tool = MagicMock()
+    tool.api_name = api_name
+    tool._lookup_local = MagicMock(return_value=None)
+    tool._check_cache = AsyncMock(return_value=None)
+    tool._save_cache = AsyncMock()
+    tool._call_api = AsyncMock(return_value={"raw": True})
+    tool._normalize_response = MagicMock(return_value=normalized)
+    return tool
+
+
+@pytest.fixture
+def tools():
+    return {
+        "weather": api_tool("open_meteo", {"location": "Tokyo"}),
+        "country": api_tool("rest_countries", {"name": {"common": "Japan"}, "codes": {"iso_alpha_2": "JP"}}),
+        "visa": api_tool("travelbuddy_visa", {"category": "visa_free"}),
+    }
+
+
+@pytest.fixture
+def limiter():
+    return RateLimiter({
+        "open_meteo": RateLimit(per_day=100, prefetch_share=0.5),
+        "rest_countries": RateLimit(per_day=100, prefetch_share=0.5),
+        "travelbuddy_visa": RateLimit(per_day=100, prefetch_share=0.5),
+    })
+
+
+def trip_state(messages=None, start_date="2026-11-01"):
+    return {
+        "conversation_id": "conv-1",
+        "trip_details": {"destination": "Tokyo", "start_date": start_date},
+        "messages": messages or [{"role": "user", "content": "Plan a week in Tokyo"}],
+    }
+
+
+class TestToolPrefetcher:
+
+    def test_nothing_predicted_without_start_date(self, tools, limiter):
+        prefetcher = ToolPrefetcher(tools, limiter)
+        assert prefetcher.predict(trip_state(start_date=None)) == []
+
+    @pytest.mark.asyncio
+    async def test_warms_weather_and_country(self, tools, limiter):
+        prefetcher = ToolPrefetcher(tools, limiter)
+
+        made = await prefetcher.warm(trip_state())
+
+        assert made == 2
+        tools["weather"]._save_cache.assert_awaited_once_with({"location": "Tokyo"}, location="Tokyo")
+        tools["country"]._call_api.assert_awaited_once_with(query="Tokyo", search_by="name")
+        tools["visa"]._call_api.assert_not_called()
+
+    @pytest.mark.asyncio
+    async def test_visa_warmed_once_passport_is_known(self, tools, limiter):
+        prefetcher = ToolPrefetcher(tools, limiter)
+        messages = [
+            {"role": "user", "content": "I'm a US citizen"},
+            {"role": "assistant", "content": "Noted!"},
+            {"role": "user", "content": "Plan a week in Tokyo"},
+        ]
+
+        await prefetcher.warm(trip_state(messages))
+
+        tools["visa"]._call_api.assert_awaited_once_with(from_country="US", to_country="JP")
+
+    @pytest.mark.asyncio
+    async def test_cached_calls_spend_no_quota(self, tools, limiter):
+        tools["weather"]._check_cache = AsyncMock(return_value={"data": {"location": "Tokyo"}})
+        prefetcher = ToolPrefetcher(tools, limiter)
+
+        made = await prefetcher.warm(trip_state())
+
+        assert made == 1
+        tools["weather"]._call_api.assert_not_called()
+        assert limiter.remaining("open_meteo") == 100
+
+    @pytest.mark.asyncio
+    async def test_no_budget_means_no_call(self, tools):
+        limiter = RateLimiter({
+            "open_meteo": RateLimit(per_day=100, prefetch_share=0.0),
+            "rest_countries": RateLimit(per_day=100, prefetch_share=0.5),
+        })
+        prefetcher = ToolPrefetcher(tools, limiter)
+
+        await prefetcher.warm(trip_state())
+
+        tools["weather"]._call_api.assert_not_called()
+        tools["country"]._call_api.assert_awaited_once()
+        assert prefetcher.calls_skipped == 1
+
+    @pytest.mark.asyncio
+    async def test_city_destination_falls_back_to_capital_search(self, tools, limiter):
+        not_found = httpx.HTTPStatusError("404", request=MagicMock(), response=MagicMock(status_code=404))
+        tools["country"]._call_api = AsyncMock(side_effect=[not_found, {"raw": True}])
+        prefetcher = ToolPrefetcher(tools, limiter)
+
+        await prefetcher.warm(trip_state())
+
+        assert tools["country"]._call_api.await_args_list[-1].kwargs == {"query": "Tokyo", "search_by": "capital"}
+        tools["country"]._save_cache.assert_awaited_once()
+
+    @pytest.mark.asyncio
+    async def test_schedule_runs_in_background_once_per_conversation(self, tools, limiter):
+        prefetcher = ToolPrefetcher(tools, limiter)
+
+        task = prefetcher.schedule(trip_state())
+        assert task is not None
+        assert prefetcher.schedule(trip_state()) is None  # already running
+        await task
+        await asyncio.sleep(0)
+        assert prefetcher.schedule(trip_state(start_date=None)) is None
+
+
+class TestFindPassportCountry:
+
+    def test_latest_stated_nationality(self):
+        messages = [
+            {"role": "user", "content": "I'm a US citizen going to France"},
+            {"role": "user", "content": "Actually I have a UK passport, visiting Japan"},
+        ]
+        assert find_passport_country(messages) == "GB"
+
+    def test_assistant_messages_ignored(self):
+        assert find_passport_country([{"role": "assistant", "content": "US citizens visiting Japan..."}]) is None
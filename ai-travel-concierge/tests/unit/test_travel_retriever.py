@@ -0,0 +1,534 @@
+"""
+Unit tests for the RAG TravelRetriever.
+
+The HuggingFace embedding model is replaced with a deterministic fake so no
+model download is needed; Chroma runs against a temporary directory.
+"""
+import json
+import time
+
+import pytest
+from unittest.mock import patch
+
+from langchain_core.documents import Document
+from langchain_core.embeddings import DeterministicFakeEmbedding
+
+from src.retrievers.rag.travel_retriever import TravelRetriever
+from src.retrievers.rag.ingestion import IngestionPipeline, IngestionStats, iter_source_documents
+from src.retrievers.rag.reranker import CrossEncoderReranker
+from src.retrievers.rag.semantic_cache import SemanticAnswerCache
+
+
+@pytest.fixture
+def fake_embeddings_cls():
+    """Patch HuggingFaceEmbeddings so loading is instant and offline."""
+    with patch(
+        "src.retrievers.rag.travel_retriever.HuggingFaceEmbeddings",
+        side_effect=lambda **kwargs: DeterministicFakeEmbedding(size=32),
+    ) as m:
+        yield m
+
+
+@pytest.fixture
+def retriever_config(tmp_path):
+    return {
+        "chroma_persist_directory": str(tmp_path / "vector_db"),
+        "collection_name": "test_travel_knowledge",
+        "embedding_model": "fake-model",
+        "chunk_size": 200,
+        "chunk_overlap": 20,
+        "top_k_results": 3,
+    }
+
+
+@pytest.fixture
+def retriever(fake_embeddings_cls, retriever_config):
+    return TravelRetriever(retriever_config)
+
+
+class TestLazyLoading:
+
+    def test_construction_does_not_load_model(self, fake_embeddings_cls, retriever_config):
+        retriever = TravelRetriever(retriever_config)
+        assert retriever.is_ready is False
+        fake_embeddings_cls.assert_not_called()
+
+    def test_stats_before_load(self, retriever):
+        stats = retriever.get_stats()
+        assert stats["loaded"] is False
+        assert retriever.is_ready is False
+
+    def test_property_access_loads_once(self, retriever, fake_embeddings_cls):
+        store = retriever.vector_store
+        assert retriever.is_ready is True
+        assert retriever.vector_store is store
+        assert fake_embeddings_cls.call_count == 1
+
+    @pytest.mark.asyncio
+    async def test_awarm_up(self, retriever):
+        assert await retriever.awarm_up() is True
+        assert retriever.is_ready is True
+        assert retriever.get_stats()["loaded"] is True
+
+    @pytest.mark.asyncio
+    async def test_awarm_up_failure_is_reported(self, retriever_config):
+        with patch(
+            "src.retrievers.rag.travel_retriever.HuggingFaceEmbeddings",
+            side_effect=OSError("model not found"),
+        ):
+            retriever = TravelRetriever(retriever_config)
+            assert await retriever.awarm_up() is False
+        assert retriever.is_ready is False
+
+    @pytest.mark.asyncio
+    async def test_retrieve_loads_on_first_use(self, retriever):
+        docs = await retriever.retrieve("museums in Paris")
+        assert docs == []
+        assert retriever.is_ready is True
+
+
+# ===========================================================================
+# Ingestion
+# ===========================================================================
+
+@pytest.fixture
+def guides_dir(tmp_path):
+    root = tmp_path / "guides"
+    root.mkdir()
+    records = [
+        {"id": "paris", "text": "Paris has the Louvre and great cafes. " * 10,
+         "metadata": {"destination": "Paris", "category": "overview"}},
+        {"id": "tokyo", "text": "Tokyo has temples, ramen and the JR Pass. " * 10,
+         "metadata": {"destination": "Tokyo", "category": "overview"}},
+    ]
+    (root / "cities.jsonl").write_text("\n".join(json.dumps(r) for r in records) + "\n")
+    (root / "bali.md").write_text(
+        "---\ndestination: Bali\ninterests: beach, wellness\n---\n"
+        "Bali is known for rice terraces and surf beaches."
+    )
+    (root / "notes.txt").write_text("ignored")
+    return root
+
+
+class TestSourceDocuments:
+
+    def test_reads_jsonl_and_markdown(self, guides_dir):
+        docs = list(iter_source_documents(str(guides_dir)))
+        sources = [d.metadata["source"] for d in docs]
+        assert sources == ["bali.md", "cities.jsonl:paris", "cities.jsonl:tokyo"]
+
+    def test_markdown_front_matter(self, guides_dir):
+        bali = next(iter_source_documents(str(guides_dir)))
+        assert bali.metadata["destination"] == "Bali"
+        assert bali.metadata["interests"] == ["beach", "wellness"]
+        assert bali.page_content.startswith("Bali is known")
+
+
+class TestIngestionPipeline:
+
+    def test_ingests_all_chunks(self, retriever, guides_dir):
+        pipeline = IngestionPipeline(retriever, batch_size=2, embed_workers=2)
+        stats = pipeline.run(iter_source_documents(str(guides_dir)))
+
+        assert stats.documents == 3
+        assert stats.chunks > 3
+        assert stats.batches >= stats.chunks // 2
+        assert retriever.get_stats()["total_documents"] == stats.chunks
+
+    def test_reingest_is_idempotent(self, retriever, guides_dir):
+        IngestionPipeline(retriever, batch_size=4).run(iter_source_documents(str(guides_dir)))
+        first = retriever.get_stats()["total_documents"]
+        IngestionPipeline(retriever, batch_size=4).run(iter_source_documents(str(guides_dir)))
+        assert retriever.get_stats()["total_documents"] == first
+
+    def test_checkpoint_resume_skips_completed(self, retriever, guides_dir, tmp_path):
+        checkpoint = str(tmp_path / "ingest.ckpt")
+        IngestionPipeline(retriever, batch_size=3, checkpoint_path=checkpoint).run(
+            iter_source_documents(str(guides_dir))
+        )
+
+        stats = IngestionPipeline(retriever, batch_size=3, checkpoint_path=checkpoint).run(
+            iter_source_documents(str(guides_dir))
+        )
+        assert stats.documents == 0
+        assert stats.skipped_documents == 3
+
+    def test_checkpoint_waits_for_last_chunk(self, retriever, tmp_path):
+        checkpoint = str(tmp_path / "ingest.ckpt")
+        pipeline = IngestionPipeline(retriever, batch_size=1, checkpoint_path=checkpoint)
+        docs = [Document(page_content="word " * 200, metadata={"source": "long"})]
+
+        stats = IngestionStats()
+        batches = list(pipeline._iter_batches(docs, stats))
+        assert len(batches) > 1
+        assert all(b.completed_sources == [] for b in batches[:-1])
+        assert batches[-1].completed_sources == ["long"]
+        assert stats.documents == 1
+
+
+class TestAddTexts:
+
+    def test_add_texts_respects_batch_size(self, retriever):
+        with patch.object(retriever, "_write_chunks", wraps=retriever._write_chunks) as m:
+            ids = retriever.add_texts(
+                texts=["Lisbon trams and pastel de nata. " * 20],
+                metadatas=[{"destination": "Lisbon"}],
+                batch_size=2,
+            )
+        assert len(ids) > 2
+        assert all(len(call.args[1]) <= 2 for call in m.call_args_list)
+
+    def test_add_texts_twice_does_not_duplicate(self, retriever):
+        texts = ["Rome has the Colosseum and trattorias. " * 10]
+        metadatas = [{"destination": "Rome"}]
+        first_ids = retriever.add_texts(texts=texts, metadatas=metadatas)
+        second_ids = retriever.add_texts(texts=texts, metadatas=metadatas)
+
+        assert first_ids == second_ids
+        assert retriever.get_stats()["total_documents"] == len(first_ids)
+
+    def test_chunk_id_depends_on_source_and_content(self):
+        a = TravelRetriever.make_chunk_id("text", {"source": "a.md"})
+        assert a == TravelRetriever.make_chunk_id("text", {"source": "a.md", "chunk_index": 3})
+        assert a != TravelRetriever.make_chunk_id("text", {"source": "b.md"})
+        assert a != TravelRetriever.make_chunk_id("other text", {"source": "a.md"})
+
+
+class TestIncrementalReindexing:
+
+    @pytest.fixture
+    def manifest_path(self, tmp_path):
+        return str(tmp_path / "manifest.db")
+
+    def _run(self, retriever, guides_dir, manifest_path, prune=False):
+        pipeline = IngestionPipeline(retriever, batch_size=4, manifest_path=manifest_path)
+        return pipeline.run(iter_source_documents(str(guides_dir)), prune=prune)
+
+    def test_unchanged_sources_are_skipped(self, retriever, guides_dir, manifest_path):
+        first = self._run(retriever, guides_dir, manifest_path)
+        second = self._run(retriever, guides_dir, manifest_path)
+
+        assert first.documents == 3
+        assert second.documents == 0
+        assert second.unchanged_documents == 3
+        assert second.chunks == 0
+
+    def test_changed_source_embeds_only_new_chunks(self, retriever, guides_dir, manifest_path):
+        self._run(retriever, guides_dir, manifest_path)
+        total_before = retriever.get_stats()["total_documents"]
+
+        (guides_dir / "bali.md").write_text(
+            "---\ndestination: Bali\ninterests: beach, wellness\n---\n"
+            "Bali is known for rice terraces, surf beaches and Ubud's yoga retreats."
+        )
+        stats = self._run(retriever, guides_dir, manifest_path)
+
+        # stats.chunks counts chunks sent to the embedding model
+        assert stats.documents == 1
+        assert stats.unchanged_documents == 2
+        assert stats.deleted_chunks == 1
+        assert stats.chunks == 1
+        assert retriever.get_stats()["total_documents"] == total_before
+
+    def test_prune_removes_deleted_sources(self, retriever, guides_dir, manifest_path):
+        self._run(retriever, guides_dir, manifest_path)
+        (guides_dir / "bali.md").unlink()
+
+        stats = self._run(retriever, guides_dir, manifest_path, prune=True)
+
+        assert stats.deleted_chunks == 1
+        remaining = retriever.vector_store.get()["metadatas"]
+        assert all(m["source"] != "bali.md" for m in remaining)
+
+
+class TestRetrievalCache:
+
+    @pytest.fixture
+    def loaded_retriever(self, retriever):
+        retriever.add_texts(
+            texts=["Kyoto has Fushimi Inari and tea houses.", "Osaka is famous for street food."],
+            metadatas=[{"destination": "Kyoto"}, {"destination": "Osaka"}],
+        )
+        return retriever
+
+    @pytest.mark.asyncio
+    async def test_repeated_query_hits_cache(self, loaded_retriever):
+        store = loaded_retriever._get_partition("Kyoto")
+        with patch.object(store, "asimilarity_search", wraps=store.asimilarity_search) as search:
+            first = await loaded_retriever.retrieve("Temples in Kyoto?", filters={"destination": "Kyoto"})
+            second = await loaded_retriever.retrieve("temples  in kyoto", filters={"destination": "Kyoto"})
+
+        assert search.call_count == 1
+        assert [d.page_content for d in first] == [d.page_content for d in second]
+        assert loaded_retriever.cache_hits == 1
+
+    @pytest.mark.asyncio
+    async def test_different_filter_or_k_misses(self, loaded_retriever):
+        await loaded_retriever.retrieve("food", filters={"destination": "Kyoto"})
+        await loaded_retriever.retrieve("food", filters={"destination": "Osaka"})
+        await loaded_retriever.retrieve("food", k=1, filters={"destination": "Osaka"})
+
+        assert loaded_retriever.cache_misses == 3
+        assert loaded_retriever.cache_hits == 0
+
+    @pytest.mark.asyncio
+    async def test_write_invalidates_cache(self, loaded_retriever):
+        await loaded_retriever.retrieve("food", filters={"destination": "Osaka"})
+        loaded_retriever.add_texts(
+            texts=["Osaka castle is a must-see."],
+            metadatas=[{"destination": "Osaka"}],
+        )
+
+        docs = await loaded_retriever.retrieve("food", filters={"destination": "Osaka"})
+        assert len(docs) == 2
+        assert loaded_retriever.cache_hits == 0
+
+    @pytest.mark.asyncio
+    async def test_expired_entries_are_refetched(self, loaded_retriever):
+        loaded_retriever._retrieval_cache_ttl = -1
+        await loaded_retriever.retrieve("food")
+        await loaded_retriever.retrieve("food")
+        assert loaded_retriever.cache_hits == 0
+
+
+class TestDestinationPartitions:
+
+    @pytest.fixture
+    def partitioned_retriever(self, retriever):
+        retriever.add_texts(
+            texts=[
+                "Kyoto has Fushimi Inari and tea houses.",
+                "Kyoto's Gion district is best at dusk.",
+                "Osaka is famous for street food.",
+            ],
+            metadatas=[
+                {"destination": "Kyoto", "category": "culture"},
+                {"destination": "Kyoto", "category": "nightlife"},
+                {"destination": "Osaka", "category": "food"},
+            ],
+        )
+        return retriever
+
+    def test_writes_go_to_destination_partition(self, partitioned_retriever):
+        kyoto = partitioned_retriever._get_partition("kyoto")
+        assert kyoto is not None
+        assert kyoto._collection.count() == 2
+        assert partitioned_retriever._get_partition("Lisbon") is None
+
+    def test_build_metadata_filter_combines_conditions(self, retriever):
+        assert retriever._build_metadata_filter({"destination": "Kyoto"}) == {"destination": "Kyoto"}
+        assert retriever._build_metadata_filter(
+            {"destination": "Kyoto", "interests": ["food", "art"]}
+        ) == {"$and": [
+            {"destination": "Kyoto"},
+            {"$or": [{"interests": {"$contains": "food"}}, {"interests": {"$contains": "art"}}]},
+        ]}
+
+    @pytest.mark.asyncio
+    async def test_filtered_query_searches_partition_only(self, partitioned_retriever):
+        store = partitioned_retriever.vector_store
+        with patch.object(store, "asimilarity_search", wraps=store.asimilarity_search) as global_search:
+            docs = await partitioned_retriever.retrieve("temples", k=2, filters={"destination": "Kyoto"})
+
+        assert global_search.call_count == 0
+        assert {d.metadata["destination"] for d in docs} == {"Kyoto"}
+        assert len(docs) == 2
+
+    @pytest.mark.asyncio
+    async def test_sparse_partition_is_not_searched_again_globally(self, partitioned_retriever):
+        store = partitioned_retriever.vector_store
+        with patch.object(store, "asimilarity_search", wraps=store.asimilarity_search) as global_search:
+            docs = await partitioned_retriever.retrieve(
+                "temples", k=2, filters={"destination": "Kyoto", "category": "culture"}
+            )
+
+        assert global_search.call_count == 0
+        assert [d.metadata["category"] for d in docs] == ["culture"]
+
+    @pytest.mark.asyncio
+    async def test_falls_back_to_global_without_partition(self, partitioned_retriever):
+        partitioned_retriever.add_texts(["Porto has port cellars."], [{"destination": "Porto"}])
+        store = partitioned_retriever.vector_store
+        with patch.object(partitioned_retriever, "_get_partition", return_value=None), \
+                patch.object(store, "asimilarity_search", wraps=store.asimilarity_search) as global_search:
+            docs = await partitioned_retriever.retrieve("wine", k=2, filters={"destination": "Porto"})
+
+        assert global_search.call_count == 1
+        assert [d.metadata["destination"] for d in docs] == ["Porto"]
+
+    def test_delete_removes_from_partition(self, partitioned_retriever):
+        osaka = partitioned_retriever._get_partition("Osaka")
+        ids = osaka._collection.get()["ids"]
+        partitioned_retriever.delete_documents(ids)
+        assert osaka._collection.count() == 0
+
+    def test_rebuild_partitions_backfills(self, retriever_config, fake_embeddings_cls):
+        legacy = TravelRetriever({**retriever_config, "destination_partitioning": False})
+        legacy.add_texts(texts=["Porto is known for port wine."], metadatas=[{"destination": "Porto"}])
+
+        retriever = TravelRetriever(retriever_config)
+        assert retriever._get_partition("Porto") is None
+        assert retriever.rebuild_partitions() == 1
+        assert retriever._get_partition("Porto")._collection.count() == 1
+
+
+# ===========================================================================
+# Reranking
+# ===========================================================================
+
+class KeywordCrossEncoder:
+    """Scores a pair by how often the query's words occur in the chunk."""
+
+    def __init__(self, delay: float = 0.0):
+        self.delay = delay
+        self.calls = 0
+
+    def predict(self, pairs):
+        self.calls += 1
+        time.sleep(self.delay)
+        return [sum(text.lower().count(w) for w in query.lower().split()) for query, text in pairs]
+
+
+class TestReranking:
+
+    @pytest.fixture
+    def docs(self):
+        return [
+            Document(page_content="Paris has many bakeries."),
+            Document(page_content="The Louvre is the largest museum in Paris, a must for museum lovers."),
+            Document(page_content="Paris metro runs until 1am."),
+        ]
+
+    @pytest.fixture
+    def reranker(self):
+        reranker = CrossEncoderReranker("fake-cross-encoder")
+        reranker._model = KeywordCrossEncoder()
+        return reranker
+
+    @pytest.mark.asyncio
+    async def test_reranks_and_cuts_to_k(self, reranker, docs):
+        ranked = await reranker.arerank("museum", docs, k=2, budget_seconds=1)
+        assert ranked[0] is docs[1]
+        assert len(ranked) == 2
+
+    @pytest.mark.asyncio
+    async def test_budget_exceeded_keeps_vector_order(self, reranker, docs):
+        reranker._model.delay = 0.2
+        ranked = await reranker.arerank("museum", docs, k=2, budget_seconds=0.01)
+        assert ranked == docs[:2]
+        assert reranker.timeouts == 1
+
+    @pytest.mark.asyncio
+    async def test_missing_model_disables_reranking(self, docs):
+        reranker = CrossEncoderReranker("fake-cross-encoder")
+        with patch.dict("sys.modules", {"sentence_transformers": None}):
+            ranked = await reranker.arerank("museum", docs, k=2, budget_seconds=1)
+        assert ranked == docs[:2]
+        assert reranker.is_available is False
+
+    @pytest.mark.asyncio
+    async def test_retrieve_fetches_candidates_then_reranks(self, retriever_config, fake_embeddings_cls):
+        retriever = TravelRetriever({**retriever_config, "rerank_enabled": True, "rerank_candidates": 4})
+        retriever.reranker._model = KeywordCrossEncoder()
+        retriever.add_texts(
+            texts=[
+                "Lisbon trams climb the hills.",
+                "Lisbon's Alfama has fado bars.",
+                "Lisbon food: pastel de nata, bifana and grilled sardines, great food.",
+                "Lisbon beaches are a train ride away.",
+            ],
+            metadatas=[{"destination": "Lisbon"}] * 4,
+        )
+
+        docs = await retriever.retrieve("food", k=1, filters={"destination": "Lisbon"})
+
+        assert len(docs) == 1
+        assert "pastel de nata" in docs[0].page_content
+        assert retriever.reranker._model.calls == 1
+
+    @pytest.mark.asyncio
+    async def test_model_loads_outside_the_budget(self, docs):
+        reranker = CrossEncoderReranker("fake-cross-encoder")
+
+        def slow_load():
+            if reranker._model is None:
+                time.sleep(0.2)
+                reranker._model = KeywordCrossEncoder()
+
+        with patch.object(reranker, "load", side_effect=slow_load):
+            ranked = await reranker.arerank("museum", docs, k=2, budget_seconds=0.05)
+
+        assert ranked[0] is docs[1]
+        assert reranker.timeouts == 0
+
+    @pytest.mark.asyncio
+    async def test_vector_order_fallback_is_not_cached(self, retriever_config, fake_embeddings_cls):
+        retriever = TravelRetriever({**retriever_config, "rerank_enabled": True, "rerank_budget_ms": 10})
+        retriever.reranker._model = KeywordCrossEncoder(delay=0.2)
+        retriever.add_texts(
+            texts=["Lisbon trams climb the hills.", "Lisbon food: pastel de nata, great food."],
+            metadatas=[{"destination": "Lisbon"}] * 2,
+        )
+
+        await retriever.retrieve("food", k=1)
+        retriever.reranker._model.delay = 0.0
+        docs = await retriever.retrieve("food", k=1)
+
+        assert retriever.cache_hits == 0
+        assert "pastel de nata" in docs[0].page_content
+
+
+# ===========================================================================
+# Semantic answer cache
+# ===========================================================================
+
+VOCABULARY = ["best", "time", "visit", "bali", "jr", "pass", "need", "do", "i", "when", "to", "the"]
+
+
+def bag_of_words(text):
+    words = text.lower().replace("?", "").split()
+    return [float(words.count(w)) for w in VOCABULARY]
+
+
+class TestSemanticAnswerCache:
+
+    @pytest.fixture
+    def cache(self):
+        return SemanticAnswerCache(embed_query=bag_of_words, threshold=0.9)
+
+    @pytest.mark.asyncio
+    async def test_near_duplicate_question_hits(self, cache):
+        await cache.store("Best time to visit Bali?", "April to October.", destination="Bali")
+        assert await cache.lookup("best time to visit bali", destination="bali") == "April to October."
+        assert cache.hits == 1
+
+    @pytest.mark.asyncio
+    async def test_unrelated_question_or_other_destination_misses(self, cache):
+        await cache.store("Best time to visit Bali?", "April to October.", destination="Bali")
+        assert await cache.lookup("Do I need a JR Pass?", destination="Bali") is None
+        assert await cache.lookup("Best time to visit Bali?", destination="Tokyo") is None
+
+    @pytest.mark.asyncio
+    async def test_other_trip_state_misses(self, cache):
+        await cache.store("Best time to visit Bali?", "April, within your budget.",
+                          destination="Bali", trip_state="Destination: Bali\nBudget: luxury")
+        assert await cache.lookup("Best time to visit Bali?", destination="Bali",
+                                  trip_state="Destination: Bali\nBudget: budget") is None
+        assert await cache.lookup("Best time to visit Bali?", destination="Bali",
+                                  trip_state="Destination: Bali\nBudget: luxury") == "April, within your budget."
+
+    @pytest.mark.asyncio
+    async def test_expired_answers_are_dropped(self, cache):
+        cache.ttl = -1
+        await cache.store("Do I need a JR Pass?", "Usually yes.")
+        assert await cache.lookup("Do I need a JR Pass?") is None
+        assert len(cache) == 0
+
+    @pytest.mark.asyncio
+    async def test_knowledge_base_update_clears_cache(self, cache, retriever):
+        retriever.add_update_listener(cache.clear)
+        await cache.store("Do I need a JR Pass?", "Usually yes.")
+
+        retriever.add_texts(texts=["The JR Pass price rose in 2023."], metadatas=[{"destination": "Tokyo"}])
+
+        assert len(cache) == 0
@@ -1,3 +1,4 @@
+import asyncio
 from contextlib import asynccontextmanager
 
 from dotenv import load_dotenv
@@ -12,6 +13,7 @@ from app.db.engine import engine, async_session
 from app.db.models import Base
 from app.db.seed import seed_welcome_conversation
 from app.routers import health, conversations, chat
+from app.services.real_agent import warm_up_travel_graph
 
 
 @asynccontextmanager
@@ -25,7 +27,12 @@ async def lifespan(app: FastAPI):
         await seed_welcome_conversation(session)
         await session.commit()
 
+    # Load the agent graph and embedding model in the background so the
+    # first chat request on a fresh worker doesn't pay the cold start
+    warm_up_task = asyncio.create_task(warm_up_travel_graph())
+
     yield
+    warm_up_task.cancel()
     # Dispose engine on shutdown
     await engine.dispose()
 
@@ -35,3 +35,4 @@ class HealthResponse(BaseModel):
     status: str = "ok"
     version: str = "0.1.0"
     llm_provider: str = "mock"
+    agent_ready: bool = False
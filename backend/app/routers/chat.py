@@ -56,7 +56,9 @@ async def chat(
                         full_content += event["content"]
                     elif event["type"] == "tool_result":
                         tool_results.append(event["content"])
-                except (json.JSONDecodeError, KeyError):
+                    elif event["type"] == "tool_result_update":
+                        tool_results[event["content"]["index"]]["data"].update(event["content"]["data"])
+                except (json.JSONDecodeError, KeyError, IndexError):
                     pass
 
         # Store assistant message after streaming completes
@@ -1,9 +1,25 @@
 from fastapi import APIRouter
+from fastapi.responses import JSONResponse
 from app.models.schemas import HealthResponse
+from app.services.real_agent import is_travel_graph_degraded, is_travel_graph_ready
 
 router = APIRouter()
 
 
 @router.get("/api/health", response_model=HealthResponse)
 async def health_check():
-    return HealthResponse()
+    return HealthResponse(agent_ready=is_travel_graph_ready())
+
+
+@router.get("/api/health/ready", response_model=HealthResponse)
+async def readiness_check():
+    """
+    Readiness probe: 503 until the agent graph (and, when warmed up, the retriever) is loaded.
+
+    A retriever that failed every warm-up attempt reports "degraded" with a
+    200; it loads lazily on the first question instead.
+    """
+    ready = is_travel_graph_ready()
+    status = ("degraded" if is_travel_graph_degraded() else "ok") if ready else "starting"
+    body = HealthResponse(status=status, agent_ready=ready)
+    return JSONResponse(status_code=200 if ready else 503, content=body.model_dump())
@@ -1,7 +1,9 @@
 import asyncio
 import json
+import logging
 import os
 import sys
+import threading
 from typing import AsyncGenerator
 from uuid import UUID
 
@@ -11,21 +13,96 @@ sys.path.insert(0, AGENT_ROOT)
 
 from src.graphs.workflows.travel_concierge_graph import TravelConciergeGraph
 from src.graphs.state.conversation_state import create_initial_state
+from src.utils.deadline import make_deadline
 from app.db import crud
 from app.db.engine import async_session
 
+logger = logging.getLogger(__name__)
+
 # We can initialize it lazily or globally
 _travel_graph_instance = None
+_travel_graph_lock = threading.Lock()
 
 def get_travel_graph() -> TravelConciergeGraph:
     global _travel_graph_instance
     if _travel_graph_instance is None:
-        # Avoid loading everything at module load if not needed
-        from src.utils.config import load_config
-        config = load_config()
-        _travel_graph_instance = TravelConciergeGraph(config)
+        # The warm-up thread and a request may race to build the graph
+        with _travel_graph_lock:
+            if _travel_graph_instance is None:
+                # Avoid loading everything at module load if not needed
+                from src.utils.config import load_config
+                config = load_config()
+                _travel_graph_instance = TravelConciergeGraph(config)
     return _travel_graph_instance
 
+
+# Warm-up retries with exponential backoff before giving up on the retriever
+WARM_UP_ATTEMPTS = 5
+WARM_UP_BACKOFF = 2.0
+
+# Set when the retriever could not be warmed up; it is retried on the first question
+_retriever_degraded = False
+
+
+async def warm_up_travel_graph(attempts: int = WARM_UP_ATTEMPTS, backoff: float = WARM_UP_BACKOFF) -> None:
+    """
+    Build the graph and load the RAG retriever without blocking the event loop.
+
+    Failures are retried with exponential backoff. If the retriever still
+    won't load, the service is reported ready but degraded: the retriever
+    loads lazily, so the first question tries again instead of the
+    readiness probe failing forever.
+    """
+    global _retriever_degraded
+    graph = None
+    for attempt in range(1, attempts + 1):
+        try:
+            graph = await asyncio.to_thread(get_travel_graph)
+        except Exception as e:
+            logger.error(f"Travel graph warm-up failed (attempt {attempt}/{attempts}): {e}")
+        else:
+            if not graph.config.get("retriever_warm_up", True) or await graph.nodes.retriever.awarm_up():
+                _retriever_degraded = False
+                return
+            logger.error(f"Travel retriever warm-up failed (attempt {attempt}/{attempts})")
+
+        if attempt < attempts:
+            await asyncio.sleep(backoff * 2 ** (attempt - 1))
+
+    if graph is not None:
+        logger.warning("Travel retriever not warmed up; serving degraded until it loads on first use")
+        _retriever_degraded = True
+
+
+def _image_patch_event(image_task: asyncio.Task, tool_results: list, index: int) -> str | None:
+    """Apply a late destination image to its card and build the SSE update event."""
+    image = None if image_task.cancelled() else image_task.result()
+    if not image:
+        return None
+    tool_results[index] = {**tool_results[index], "data": {**tool_results[index]["data"], **image}}
+    return json.dumps({"type": "tool_result_update", "content": {"index": index, "data": image}})
+
+
+def is_travel_graph_ready() -> bool:
+    """
+    Whether the graph is built and its retriever has finished loading.
+
+    With retriever warm-up disabled, or given up on after its retries, the
+    retriever only loads on the first question, so the graph alone counts
+    as ready; otherwise a probe gating traffic would never let that first
+    question through.
+    """
+    graph = _travel_graph_instance
+    if graph is None:
+        return False
+    return not graph.config.get("retriever_warm_up", True) or graph.nodes.retriever.is_ready or _retriever_degraded
+
+
+def is_travel_graph_degraded() -> bool:
+    """Whether the service is ready only because retriever warm-up was given up on."""
+    graph = _travel_graph_instance
+    return graph is not None and _retriever_degraded and not graph.nodes.retriever.is_ready
+
 async def generate_real_response(message: str, conversation_id: str) -> AsyncGenerator[str, None]:
     """Stream response from the real LangGraph as SSE events."""
     graph = get_travel_graph()
@@ -37,6 +114,11 @@ async def generate_real_response(message: str, conversation_id: str) -> AsyncGen
     db_msg_list = [{"role": msg.role, "content": msg.content} for msg in db_messages]
     
     config = {"configurable": {"thread_id": conversation_id}}
+    # Every node and API request of this turn derives its timeout from the deadline
+    turn_config = {"configurable": {
+        "thread_id": conversation_id,
+        "deadline": make_deadline(graph.config.get("agent_timeout")),
+    }}
     
     try:
         async with graph.get_compiled_graph() as compiled_graph:
@@ -63,13 +145,13 @@ async def generate_real_response(message: str, conversation_id: str) -> AsyncGen
                     # Keep existing trip details and other state, just update messages
                     state.update({k: v for k, v in checkpoint_state.values.items() if k != "messages"})
                 state["messages"] = db_msg_list
-                result_state = await compiled_graph.ainvoke(state, config)
+                result_state = await compiled_graph.ainvoke(state, turn_config)
             else:
                 # Checkpoint exists and is in sync, determine suffix not yet in checkpoint
                 num_existing = len(checkpoint_messages)
                 new_messages = db_msg_list[num_existing:]
                 if new_messages:
-                    result_state = await compiled_graph.ainvoke({"messages": new_messages}, config)
+                    result_state = await compiled_graph.ainvoke({"messages": new_messages}, turn_config)
                 else:
                     result_state = checkpoint_state.values
                 
@@ -80,14 +162,26 @@ async def generate_real_response(message: str, conversation_id: str) -> AsyncGen
         ]
         text_response = assistant_messages[-1] if assistant_messages else "I'm sorry, I couldn't process that request."
         
-        # 5. Extract current tool result
-        current_tool_result = result_state.get("current_tool_result")
+        # 5. Extract tool results (fan-out nodes produce several per turn)
+        tool_results = result_state.get("tool_results") or []
+        if not tool_results and result_state.get("current_tool_result"):
+            tool_results = [result_state["current_tool_result"]]
         
-        # 6. Stream tool_result event first if present
-        if current_tool_result:
-            tool_event = json.dumps({"type": "tool_result", "content": current_tool_result})
+        # 6. Stream tool_result events first if present
+        for tool_result in tool_results:
+            tool_event = json.dumps({"type": "tool_result", "content": tool_result})
             yield f"data: {tool_event}\n\n"
             await asyncio.sleep(0.1)
+        
+        # A destination image that missed the card deadline is patched in as
+        # soon as it arrives, while the text streams
+        image_task = graph.nodes.take_pending_image(result_state.get("conversation_id"))
+        image_index = next(
+            (i for i, result in enumerate(tool_results) if result.get("type") == "destination"), None
+        )
+        if image_task is not None and image_index is None:
+            image_task.cancel()
+            image_task = None
             
         # 7. Stream text tokens
         words = text_response.split(" ")
@@ -97,17 +191,35 @@ async def generate_real_response(message: str, conversation_id: str) -> AsyncGen
             yield f"data: {event}\n\n"
             await asyncio.sleep(0.04)
             
+            if image_task is not None and image_task.done():
+                patch_event = _image_patch_event(image_task, tool_results, image_index)
+                if patch_event:
+                    yield f"data: {patch_event}\n\n"
+                image_task = None
+        
+        if image_task is not None:
+            done, _ = await asyncio.wait({image_task}, timeout=graph.config.get("image_patch_timeout", 5.0))
+            if done:
+                patch_event = _image_patch_event(image_task, tool_results, image_index)
+                if patch_event:
+                    yield f"data: {patch_event}\n\n"
+            else:
+                image_task.cancel()
+            
         # 8. Complete event
         complete_content = {
             "role": "assistant",
             "content": text_response
         }
-        if current_tool_result:
-            complete_content["toolResults"] = [current_tool_result]
+        if tool_results:
+            complete_content["toolResults"] = tool_results
             
         event = json.dumps({"type": "complete", "content": complete_content})
         yield f"data: {event}\n\n"
         yield "data: [DONE]\n\n"
+        
+        # 9. Warm the tool cache for the likely next question
+        graph.nodes.schedule_prefetch(result_state)
 
     except Exception as e:
         error_msg = f"Sorry, I encountered an error: {e}"
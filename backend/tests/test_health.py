@@ -0,0 +1,95 @@
+"""
+Tests for health and readiness endpoints.
+"""
+
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+from httpx import AsyncClient
+
+from app.services import real_agent
+
+
+def _fake_graph(retriever_ready: bool, warm_up: bool = True) -> MagicMock:
+    graph = MagicMock()
+    graph.config = {"retriever_warm_up": warm_up}
+    graph.nodes.retriever.is_ready = retriever_ready
+    return graph
+
+
+@pytest.mark.asyncio
+async def test_health_reports_agent_not_ready_before_warm_up(test_client: AsyncClient):
+    """Liveness stays 200 while the agent graph hasn't been built yet."""
+    with patch("app.services.real_agent._travel_graph_instance", None):
+        response = await test_client.get("/api/health")
+
+    assert response.status_code == 200
+    data = response.json()
+    assert data["status"] == "ok"
+    assert data["agent_ready"] is False
+
+
+@pytest.mark.asyncio
+async def test_readiness_is_503_until_retriever_loaded(test_client: AsyncClient):
+    """Readiness probe fails while the retriever is still loading."""
+    with patch("app.services.real_agent._travel_graph_instance", _fake_graph(False)):
+        response = await test_client.get("/api/health/ready")
+
+    assert response.status_code == 503
+    assert response.json()["agent_ready"] is False
+
+
+@pytest.mark.asyncio
+async def test_readiness_is_200_once_retriever_loaded(test_client: AsyncClient):
+    """Readiness probe passes once the graph and retriever are loaded."""
+    with patch("app.services.real_agent._travel_graph_instance", _fake_graph(True)):
+        response = await test_client.get("/api/health/ready")
+        health = await test_client.get("/api/health")
+
+    assert response.status_code == 200
+    assert response.json()["agent_ready"] is True
+    assert health.json()["agent_ready"] is True
+
+
+@pytest.mark.asyncio
+async def test_readiness_without_warm_up_only_needs_the_graph(test_client: AsyncClient):
+    """With warm-up disabled the retriever loads on first use, so it can't gate readiness."""
+    with patch("app.services.real_agent._travel_graph_instance", _fake_graph(False, warm_up=False)):
+        response = await test_client.get("/api/health/ready")
+
+    assert response.status_code == 200
+    assert response.json()["agent_ready"] is True
+
+
+@pytest.mark.asyncio
+async def test_warm_up_retries_with_backoff():
+    """A failed retriever load is retried after a growing delay."""
+    graph = _fake_graph(False)
+    graph.nodes.retriever.awarm_up = AsyncMock(side_effect=[False, False, True])
+    sleep = AsyncMock()
+    with patch("app.services.real_agent.get_travel_graph", return_value=graph), \
+            patch("app.services.real_agent.asyncio.sleep", sleep), \
+            patch("app.services.real_agent._retriever_degraded", False):
+        await real_agent.warm_up_travel_graph(attempts=5, backoff=1.0)
+        assert real_agent._retriever_degraded is False
+
+    assert graph.nodes.retriever.awarm_up.await_count == 3
+    assert [call.args[0] for call in sleep.await_args_list] == [1.0, 2.0]
+
+
+@pytest.mark.asyncio
+async def test_readiness_is_degraded_after_warm_up_gives_up(test_client: AsyncClient):
+    """A retriever that never warms up no longer holds readiness at 503; it loads on first use."""
+    graph = _fake_graph(False)
+    graph.nodes.retriever.awarm_up = AsyncMock(return_value=False)
+    with patch("app.services.real_agent.get_travel_graph", return_value=graph), \
+            patch("app.services.real_agent.asyncio.sleep", AsyncMock()), \
+            patch("app.services.real_agent._travel_graph_instance", graph), \
+            patch("app.services.real_agent._retriever_degraded", False):
+        await real_agent.warm_up_travel_graph(attempts=3, backoff=1.0)
+        response = await test_client.get("/api/health/ready")
+
+    assert graph.nodes.retriever.awarm_up.await_count == 3
+    assert response.status_code == 200
+    assert response.json()["status"] == "degraded"
+    assert response.json()["agent_ready"] is True
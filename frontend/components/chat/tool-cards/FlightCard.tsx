@@ -28,6 +28,23 @@ export function FlightCard({ data }: FlightCardProps) {
         </div>
       </CardHeader>
       <CardContent className="space-y-2">
+        {flightData.priceCalendar && flightData.priceCalendar.length > 0 && (
+          <div className="flex gap-1 overflow-x-auto" aria-label="Price calendar">
+            {flightData.priceCalendar.map((day) => (
+              <div
+                key={day.date}
+                className={`min-w-16 rounded-md p-1.5 text-center text-xs ${
+                  day.date === flightData.departureDate
+                    ? "bg-flight/15 font-semibold text-flight"
+                    : "bg-background/60 text-muted-foreground"
+                }`}
+              >
+                <p>{day.date.slice(5)}</p>
+                <p>{day.price !== null ? formatCurrency(day.price, day.currency) : "—"}</p>
+              </div>
+            ))}
+          </div>
+        )}
         {flightData.flights.slice(0, 3).map((flight, idx) => (
           <div
             key={idx}
@@ -92,6 +92,10 @@ export function useChatStream(
               allToolResults.push(toolResult);
               setStreamingToolResults([...allToolResults]);
             },
+            onToolResultUpdate: (index, toolResult) => {
+              allToolResults[index] = toolResult;
+              setStreamingToolResults([...allToolResults]);
+            },
             onComplete: (completedContent, toolResults) => {
               const assistantMessage: Message = {
                 role: "assistant",
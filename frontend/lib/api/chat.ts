@@ -6,6 +6,7 @@ import { API_BASE_URL } from "@/lib/constants";
 export interface StreamChatCallbacks {
   onToken: (token: string) => void;
   onToolResult: (toolResult: ToolResult) => void;
+  onToolResultUpdate?: (index: number, toolResult: ToolResult) => void;
   onComplete: (content: string, toolResults: ToolResult[]) => void;
   onError: (error: Error) => void;
 }
@@ -66,6 +67,19 @@ export async function streamChat(
               toolResults.push(toolResult);
               callbacks.onToolResult(toolResult);
               break;
+            case "tool_result_update": {
+              // Late fields (e.g. a destination image) for an earlier card
+              const { index, data } = event.content;
+              const current = toolResults[index];
+              if (!current) break;
+              const updated = {
+                ...current,
+                data: { ...current.data, ...data },
+              } as ToolResult;
+              toolResults[index] = updated;
+              callbacks.onToolResultUpdate?.(index, updated);
+              break;
+            }
             case "complete":
               callbacks.onComplete(event.content.content, toolResults);
               break;
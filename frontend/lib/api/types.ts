@@ -29,6 +29,14 @@ export interface SSEToolResultEvent {
   };
 }
 
+export interface SSEToolResultUpdateEvent {
+  type: "tool_result_update";
+  content: {
+    index: number;
+    data: Record<string, unknown>;
+  };
+}
+
 export interface SSECompleteEvent {
   type: "complete";
   content: {
@@ -49,6 +57,7 @@ export interface SSEErrorEvent {
 export type SSEEvent =
   | SSETokenEvent
   | SSEToolResultEvent
+  | SSEToolResultUpdateEvent
   | SSECompleteEvent
   | SSEErrorEvent;
 
@@ -112,4 +112,33 @@ describe("FlightCard", () => {
     // Should show "+N more options" message
     expect(screen.getByText("+2 more options")).toBeInTheDocument();
   });
+
+  it("renders the price calendar for flexible-date searches", () => {
+    const flightData: FlightResult = {
+      origin: "JFK",
+      destination: "LHR",
+      departureDate: "2026-06-02",
+      priceCalendar: [
+        { date: "2026-06-01", price: 450, currency: "USD" },
+        { date: "2026-06-02", price: 320, currency: "USD" },
+        { date: "2026-06-03", price: null, currency: "USD" },
+      ],
+      flights: [
+        {
+          airline: "BA",
+          flightNumber: "117",
+          duration: "7h",
+          stops: 0,
+          price: { amount: 320, currency: "USD" },
+        },
+      ],
+    };
+
+    render(<FlightCard data={flightData} />);
+
+    expect(screen.getByLabelText("Price calendar")).toBeInTheDocument();
+    expect(screen.getByText("06-01")).toBeInTheDocument();
+    expect(screen.getByText("$450")).toBeInTheDocument();
+    expect(screen.getByText("—")).toBeInTheDocument();
+  });
 });
@@ -48,6 +48,14 @@ export interface FlightResult {
   origin: string;
   destination: string;
   departureDate: string;
+  priceCalendar?: PriceCalendarDay[];
+}
+
+// Cheapest fare per departure date, for flexible-date searches
+export interface PriceCalendarDay {
+  date: string;
+  price: number | null;
+  currency: string;
 }
 
 export interface Flight {
@@ -7,6 +7,7 @@ export type {
   ToolResultData,
   FlightResult,
   Flight,
+  PriceCalendarDay,
   HotelResult,
   Hotel,
   WeatherResult,